@@ -0,0 +1,58 @@
+# Compares the time to calculate the next fire time of crontab notations using get_next_datetime(), which parses the
+# notation on every call, with a CompiledCrontab which is parsed once.
+#
+# Usage: python benchmarks/crontab_benchmark.py [iterations]
+
+import datetime
+import sys
+import time
+from typing import Callable
+
+import pytz
+
+from tomodachi.helpers.crontab import CompiledCrontab, get_next_datetime
+
+CRONTAB_NOTATIONS = [
+    "* * * * *",
+    "*/15 8-18 * * mon-fri",
+    "0 0 * * 0,6",
+    "39 3 L * *",
+    "30 5 * jan,mar Ltue",
+]
+
+
+def run(name: str, func: Callable[[], object], iterations: int) -> float:
+    for _ in range(min(iterations, 100)):
+        func()
+
+    start_time = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start_time) / iterations * 1000000
+
+
+def main(iterations: int) -> None:
+    now_date = pytz.timezone("Europe/Stockholm").localize(datetime.datetime(2024, 3, 29, 16, 42, 10))
+
+    for crontab_notation in CRONTAB_NOTATIONS:
+        crontab = CompiledCrontab(crontab_notation)
+
+        get_next_datetime_time = run(
+            "get_next_datetime", lambda: get_next_datetime(crontab_notation, now_date), iterations
+        )
+        next_datetime_time = run("next_datetime", lambda: crontab.next_datetime(now_date), iterations)
+        next_datetimes_time = run("next_datetimes", lambda: crontab.next_datetimes(now_date, 10), iterations)
+
+        print(
+            "{:<24} get_next_datetime={:>8.2f}us compiled={:>6.2f}us speedup={:>5.1f}x next_10={:>7.2f}us".format(
+                crontab_notation,
+                get_next_datetime_time,
+                next_datetime_time,
+                get_next_datetime_time / next_datetime_time,
+                next_datetimes_time,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
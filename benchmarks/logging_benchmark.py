@@ -0,0 +1,49 @@
+# Measures the cost of the logger lookups and bindings done for every handled request or message, and the cost of
+# log calls for disabled and enabled log levels.
+#
+# Usage: python benchmarks/logging_benchmark.py [iterations]
+
+import logging as std_logging
+import sys
+import time
+from typing import Callable
+
+from tomodachi import logging
+
+
+def run(name: str, func: Callable[[], object], iterations: int) -> None:
+    for _ in range(1000):
+        func()
+
+    start_time = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = (time.perf_counter() - start_time) / iterations * 1000000
+
+    print("{:<32} time_per_call={:>7.2f}us".format(name, elapsed))
+
+
+def main(iterations: int) -> None:
+    python_logger = std_logging.getLogger("tomodachi.benchmark")
+    python_logger.addHandler(std_logging.NullHandler())
+    python_logger.propagate = False
+    python_logger.setLevel(std_logging.INFO)
+
+    logger = logging.getLogger("tomodachi.benchmark")
+    bound_logger = logger.bind(handler="handler", type="tomodachi.benchmark")
+
+    def per_message() -> None:
+        # the logger handling done by the transports for each message
+        logging.bind_logger(bound_logger)
+        logging.getLogger("tomodachi.benchmark").info("handled message", message_id="id")
+
+    run("getLogger", lambda: logging.getLogger("tomodachi.benchmark"), iterations)
+    run("getLogger().bind()", lambda: logging.getLogger("tomodachi.benchmark").bind(handler="handler"), iterations)
+    run("bind_logger", lambda: logging.bind_logger(bound_logger), iterations)
+    run("debug (level disabled)", lambda: logger.debug("event", value=1), iterations)
+    run("info (level enabled)", lambda: logger.info("event", value=1), iterations)
+    run("per message", per_message, iterations)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,63 @@
+# Measures the overhead per middleware hop of the compiled middleware chain, using middleware signatures of the
+# HTTP transport and of the AWS SNS+SQS transport.
+#
+# Usage: python benchmarks/middleware_benchmark.py [iterations]
+
+import asyncio
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+from tomodachi import logging
+from tomodachi.helpers.middleware import execute_middlewares
+
+
+async def http_middleware(func: Callable, service: Any, request: Any, context: Dict) -> Any:
+    return await func()
+
+
+async def sqs_middleware(
+    func: Callable, service: Any, message: Any, topic: str, context: Dict, *, message_attributes: Dict
+) -> Any:
+    return await func()
+
+
+async def handler(*args: Any, **kwargs: Any) -> None:
+    pass
+
+
+async def run(name: str, middleware: Callable, args: tuple, kwargs: Dict, iterations: int) -> None:
+    results: List[float] = []
+    for hop_count in range(0, 5):
+        middlewares = [middleware] * hop_count
+        for _ in range(100):
+            await execute_middlewares(handler, handler, middlewares, *args, **kwargs)
+
+        start_time = time.perf_counter()
+        for _ in range(iterations):
+            await execute_middlewares(handler, handler, middlewares, *args, **kwargs)
+        elapsed = (time.perf_counter() - start_time) / iterations * 1000000
+        results.append(elapsed)
+
+        per_hop = (elapsed - results[0]) / hop_count if hop_count else 0.0
+        print(
+            "{:<5} middlewares={} time_per_call={:>7.2f}us overhead_per_hop={:>6.2f}us".format(
+                name, hop_count, elapsed, per_hop
+            )
+        )
+
+
+async def main(iterations: int) -> None:
+    logging.bind_logger(logging.getLogger("tomodachi.benchmark"))
+    await run("http", http_middleware, (object(), object()), {"request": object()}, iterations)
+    await run(
+        "sqs",
+        sqs_middleware,
+        (object(), object(), "topic"),
+        {"message": object(), "topic": "topic", "message_attributes": {}},
+        iterations,
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000))
@@ -0,0 +1,71 @@
+import asyncio
+import os
+
+from aiohttp import web
+
+import tomodachi
+from tomodachi.transport.http import http
+
+
+@tomodachi.service
+class HttpService(tomodachi.Service):
+    name = "test_http"
+    options = {
+        "http": {
+            "port": None,
+            "access_log": "/tmp/5f6b1d2e-8a0c-4a3e-9d57-2c1f0b7e4a19.log",
+            "access_log_sample_rate": 0.0,
+            "access_log_client_error_sample_rate": 1.0,
+            "access_log_slow_request_threshold": 0.2,
+            "access_log_batch_interval": 0.1,
+            "access_log_summary_interval": 0.5,
+        }
+    }
+    closer: asyncio.Future
+
+    def __init__(self) -> None:
+        try:
+            os.remove("/tmp/5f6b1d2e-8a0c-4a3e-9d57-2c1f0b7e4a19.log")
+        except OSError:
+            pass
+
+    @http("GET", r"/test/?")
+    async def test(self, request: web.Request) -> str:
+        return "test"
+
+    @http("GET", r"/slow/?")
+    async def slow(self, request: web.Request) -> str:
+        await asyncio.sleep(0.3)
+        return "slow"
+
+    @http("GET", r"/error/?")
+    async def error(self, request: web.Request) -> tomodachi.HttpResponse:
+        return tomodachi.HttpResponse(body="error", status=503)
+
+    async def _start_service(self) -> None:
+        self.closer = asyncio.Future()
+
+    async def _started_service(self) -> None:
+        async def _async() -> None:
+            async def sleep_and_kill() -> None:
+                await asyncio.sleep(10.0)
+                if not self.closer.done():
+                    self.closer.set_result(None)
+
+            task = asyncio.ensure_future(sleep_and_kill())
+            await self.closer
+            if not task.done():
+                task.cancel()
+            tomodachi.exit()
+
+        asyncio.ensure_future(_async())
+
+    async def _stop_service(self) -> None:
+        try:
+            os.remove("/tmp/5f6b1d2e-8a0c-4a3e-9d57-2c1f0b7e4a19.log")
+        except OSError:
+            pass
+
+    def stop_service(self) -> None:
+        if not self.closer.done():
+            self.closer.set_result(None)
@@ -0,0 +1,54 @@
+import asyncio
+from typing import Any
+
+import tomodachi
+from tomodachi.transport.http import http
+
+
+class HttpClientService(tomodachi.Service):
+    name = "test_http_client"
+    options = tomodachi.Options(
+        http=tomodachi.Options.HTTP(port=53262, access_log=False, keepalive_timeout=1),
+        http_client=tomodachi.Options.HTTPClient(retry_backoff=0.01, circuit_breaker_threshold=3),
+    )
+    flaky_count = 0
+    closed_client = None
+
+    @http("GET", r"/upstream/?")
+    async def upstream(self, request: Any) -> str:
+        return request.headers.get("traceparent") or "-"
+
+    @http("GET", r"/flaky/?")
+    async def flaky(self, request: Any) -> Any:
+        self.flaky_count += 1
+        if self.flaky_count % 3:
+            return 503, "unavailable"
+        return "ok"
+
+    @http("GET", r"/proxy/?")
+    async def proxy(self, request: Any) -> Any:
+        response = await tomodachi.get_http_client(self).get("http://127.0.0.1:53262/upstream")
+        return await response.text()
+
+    async def _start_service(self) -> None:
+        self.closer: asyncio.Future = asyncio.Future()
+        self.http_client = tomodachi.get_http_client(self)
+
+    async def _started_service(self) -> None:
+        async def _async() -> None:
+            async def sleep_and_kill() -> None:
+                await asyncio.sleep(10.0)
+                if not self.closer.done():
+                    self.closer.set_result(None)
+
+            task = asyncio.ensure_future(sleep_and_kill())
+            await self.closer
+            if not task.done():
+                task.cancel()
+            tomodachi.exit()
+
+        asyncio.ensure_future(_async())
+
+    def stop_service(self) -> None:
+        if not self.closer.done():
+            self.closer.set_result(None)
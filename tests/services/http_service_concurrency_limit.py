@@ -0,0 +1,44 @@
+import asyncio
+
+from aiohttp import web
+
+import tomodachi
+from tomodachi.transport.http import http
+
+
+class HttpConcurrencyLimitService(tomodachi.Service):
+    name = "test_http_concurrency_limit"
+    options = tomodachi.Options(
+        http=tomodachi.Options.HTTP(port=None, access_log=True, max_concurrent_requests=10, overload_retry_after=3)
+    )
+
+    @http("GET", r"/slow/?", max_concurrent_requests=1, max_queued_requests=1, request_queue_timeout=0.5)
+    async def slow(self, request: web.Request) -> str:
+        await asyncio.sleep(1.0)
+        return "slow"
+
+    @http("GET", r"/fast/?")
+    async def fast(self, request: web.Request) -> str:
+        return "fast"
+
+    async def _start_service(self) -> None:
+        self.closer: asyncio.Future = asyncio.Future()
+
+    async def _started_service(self) -> None:
+        async def _async() -> None:
+            async def sleep_and_kill() -> None:
+                await asyncio.sleep(10.0)
+                if not self.closer.done():
+                    self.closer.set_result(None)
+
+            task = asyncio.ensure_future(sleep_and_kill())
+            await self.closer
+            if not task.done():
+                task.cancel()
+            tomodachi.exit()
+
+        asyncio.ensure_future(_async())
+
+    def stop_service(self) -> None:
+        if not self.closer.done():
+            self.closer.set_result(None)
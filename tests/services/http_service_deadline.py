@@ -0,0 +1,63 @@
+import asyncio
+from typing import Any
+
+import tomodachi
+from tomodachi.helpers.deadline import DEADLINE_HEADER, get_remaining_time
+from tomodachi.transport.http import http
+
+
+class HttpDeadlineService(tomodachi.Service):
+    name = "test_http_deadline"
+    options = tomodachi.Options(http=tomodachi.Options.HTTP(port=53263, access_log=False, cancel_on_disconnect=True))
+    cancelled_count = 0
+    disconnected_count = 0
+
+    @http("GET", r"/slow/?", deadline=0.2)
+    async def slow(self, request: Any) -> str:
+        try:
+            await asyncio.sleep(2.0)
+        except asyncio.CancelledError:
+            self.cancelled_count += 1
+            raise
+        return "slow"
+
+    @http("GET", r"/disconnect/?")
+    async def disconnect(self, request: Any) -> str:
+        try:
+            await asyncio.sleep(2.0)
+        except asyncio.CancelledError:
+            self.disconnected_count += 1
+            raise
+        return "disconnect"
+
+    @http("GET", r"/remaining/?")
+    async def remaining(self, request: Any) -> str:
+        remaining = get_remaining_time()
+        return "{} {}".format(request.headers.get(DEADLINE_HEADER, "-"), "-" if remaining is None else "set")
+
+    @http("GET", r"/proxy/?", deadline=5.0)
+    async def proxy(self, request: Any) -> str:
+        response = await tomodachi.get_http_client(self).get("http://127.0.0.1:53263/remaining")
+        return await response.text()
+
+    async def _start_service(self) -> None:
+        self.closer: asyncio.Future = asyncio.Future()
+
+    async def _started_service(self) -> None:
+        async def _async() -> None:
+            async def sleep_and_kill() -> None:
+                await asyncio.sleep(10.0)
+                if not self.closer.done():
+                    self.closer.set_result(None)
+
+            task = asyncio.ensure_future(sleep_and_kill())
+            await self.closer
+            if not task.done():
+                task.cancel()
+            tomodachi.exit()
+
+        asyncio.ensure_future(_async())
+
+    def stop_service(self) -> None:
+        if not self.closer.done():
+            self.closer.set_result(None)
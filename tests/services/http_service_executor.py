@@ -0,0 +1,51 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Any
+
+import tomodachi
+from tomodachi.transport.http import http
+
+
+class HttpExecutorService(tomodachi.Service):
+    name = "test_http_executor"
+    options = tomodachi.Options(
+        http=tomodachi.Options.HTTP(port=None, access_log=False),
+        executor=tomodachi.Options.Executor(thread_max_workers=4, process_max_workers=2),
+    )
+
+    @http("GET", r"/thread/?", executor="thread")
+    def thread(self, request: Any) -> str:
+        time.sleep(0.2)
+        return "{} {}".format(threading.current_thread().name, tomodachi.get_logger()._context.get("handler"))
+
+    @http("GET", r"/process/(?P<id>[0-9]+)/?", executor="process")
+    def process(self, request: Any, id: str) -> str:
+        return "{} {} {} {}".format(os.getpid(), request.path, request.headers.get("X-Value"), id)
+
+    @http("GET", r"/sync/?")
+    def sync(self, request: Any) -> str:
+        return threading.current_thread().name
+
+    async def _start_service(self) -> None:
+        self.closer: asyncio.Future = asyncio.Future()
+
+    async def _started_service(self) -> None:
+        async def _async() -> None:
+            async def sleep_and_kill() -> None:
+                await asyncio.sleep(10.0)
+                if not self.closer.done():
+                    self.closer.set_result(None)
+
+            task = asyncio.ensure_future(sleep_and_kill())
+            await self.closer
+            if not task.done():
+                task.cancel()
+            tomodachi.exit()
+
+        asyncio.ensure_future(_async())
+
+    def stop_service(self) -> None:
+        if not self.closer.done():
+            self.closer.set_result(None)
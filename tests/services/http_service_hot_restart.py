@@ -0,0 +1,16 @@
+import os
+
+from aiohttp import web
+
+import tomodachi
+from tomodachi.transport.http import http
+
+
+@tomodachi.service
+class HttpHotRestartService(tomodachi.Service):
+    name = "test_http_hot_restart"
+    options = {"http": {"port": 53261, "access_log": False, "reuse_port": False}}
+
+    @http("GET", r"/pid/?")
+    async def pid(self, request: web.Request) -> str:
+        return str(os.getpid())
@@ -0,0 +1,63 @@
+import asyncio
+from typing import AsyncIterator, Iterator
+
+from aiohttp import web
+
+import tomodachi
+from tomodachi.transport.http import SSEResponse, StreamResponse, http
+
+
+class HttpStreamingService(tomodachi.Service):
+    name = "test_http_streaming"
+    options = tomodachi.Options(http=tomodachi.Options.HTTP(port=None, access_log=True))
+
+    @http("GET", r"/generator/?")
+    async def generator(self, request: web.Request) -> AsyncIterator[str]:
+        for i in range(5):
+            yield "chunk-{}\n".format(i)
+            await asyncio.sleep(0.01)
+
+    @http("GET", r"/stream/?")
+    async def stream(self, request: web.Request) -> StreamResponse:
+        def _chunks() -> Iterator[bytes]:
+            yield b"first,"
+            yield b"second"
+
+        return StreamResponse(_chunks(), status=201, content_type="text/csv", headers={"X-Stream": "1"})
+
+    @http("GET", r"/sse/?")
+    async def sse(self, request: web.Request) -> SSEResponse:
+        async def _events() -> AsyncIterator:
+            yield {"event": "greeting", "id": "1", "data": "hello\nworld"}
+            await asyncio.sleep(0.3)
+            yield {"data": {"value": 4711}}
+            yield "plain"
+
+        return SSEResponse(_events(), ping_interval=0.1)
+
+    @http("GET", r"/broken/?")
+    async def broken(self, request: web.Request) -> AsyncIterator[str]:
+        yield "ok\n"
+        raise Exception("broken stream")
+
+    async def _start_service(self) -> None:
+        self.closer: asyncio.Future = asyncio.Future()
+
+    async def _started_service(self) -> None:
+        async def _async() -> None:
+            async def sleep_and_kill() -> None:
+                await asyncio.sleep(10.0)
+                if not self.closer.done():
+                    self.closer.set_result(None)
+
+            task = asyncio.ensure_future(sleep_and_kill())
+            await self.closer
+            if not task.done():
+                task.cancel()
+            tomodachi.exit()
+
+        asyncio.ensure_future(_async())
+
+    def stop_service(self) -> None:
+        if not self.closer.done():
+            self.closer.set_result(None)
@@ -0,0 +1,52 @@
+import asyncio
+import os
+from typing import Any
+
+import tomodachi
+from tomodachi.transport.http import http
+
+
+class HttpUnixSocketService(tomodachi.Service):
+    name = "test_http_unix_socket"
+    options = tomodachi.Options(
+        http=tomodachi.Options.HTTP(
+            unix_socket=os.environ.get("TOMODACHI_TEST_UNIX_SOCKET"), unix_socket_permissions=0o660, access_log=False
+        )
+    )
+
+    @http("GET", r"/test/?")
+    async def test(self, request: Any) -> str:
+        return "test {}".format(tomodachi.get_forwarded_remote_ip(request))
+
+    async def _start_service(self) -> None:
+        self.closer: asyncio.Future = asyncio.Future()
+
+    async def _started_service(self) -> None:
+        async def _async() -> None:
+            async def sleep_and_kill() -> None:
+                await asyncio.sleep(10.0)
+                if not self.closer.done():
+                    self.closer.set_result(None)
+
+            task = asyncio.ensure_future(sleep_and_kill())
+            await self.closer
+            if not task.done():
+                task.cancel()
+            tomodachi.exit()
+
+        asyncio.ensure_future(_async())
+
+    def stop_service(self) -> None:
+        if not self.closer.done():
+            self.closer.set_result(None)
+
+
+class HttpListenFdService(tomodachi.Service):
+    name = "test_http_listen_fd"
+    options = tomodachi.Options(
+        http=tomodachi.Options.HTTP(listen_fd=os.environ.get("TOMODACHI_TEST_LISTEN_FD"), access_log=False)
+    )
+
+    @http("GET", r"/test/?")
+    async def test(self, request: Any) -> str:
+        return "test fd"
@@ -0,0 +1,49 @@
+import asyncio
+from typing import Callable, Tuple
+
+from aiohttp import web
+
+import tomodachi
+from tomodachi.transport.http import get_websocket_hub, http, websocket
+
+
+class HttpWebSocketHubService(tomodachi.Service):
+    name = "test_http_websocket_hub"
+    options = tomodachi.Options(http=tomodachi.Options.HTTP(port=None, access_log=True, websocket_max_queue_size=10))
+
+    @websocket(r"/ws/(?P<room>[a-z]+)/?")
+    async def websocket_connection(self, websocket: web.WebSocketResponse, room: str) -> Tuple[Callable]:
+        hub = get_websocket_hub(self)
+        hub.join(websocket, room)
+
+        async def _receive(data: str) -> None:
+            hub.broadcast(data, room, exclude=websocket)
+
+        return (_receive,)
+
+    @http("POST", r"/broadcast/(?P<room>[a-z]+)/?")
+    async def broadcast(self, request: web.Request, room: str) -> str:
+        count = get_websocket_hub(self).broadcast(await request.text(), room if room != "all" else None)
+        return str(count)
+
+    async def _start_service(self) -> None:
+        self.closer: asyncio.Future = asyncio.Future()
+
+    async def _started_service(self) -> None:
+        async def _async() -> None:
+            async def sleep_and_kill() -> None:
+                await asyncio.sleep(10.0)
+                if not self.closer.done():
+                    self.closer.set_result(None)
+
+            task = asyncio.ensure_future(sleep_and_kill())
+            await self.closer
+            if not task.done():
+                task.cancel()
+            tomodachi.exit()
+
+        asyncio.ensure_future(_async())
+
+    def stop_service(self) -> None:
+        if not self.closer.done():
+            self.closer.set_result(None)
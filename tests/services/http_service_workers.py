@@ -0,0 +1,20 @@
+import os
+
+from aiohttp import web
+
+import tomodachi
+from tomodachi.transport.http import http
+
+
+@tomodachi.service
+class HttpWorkersService(tomodachi.Service):
+    name = "test_http_workers"
+    options = {"http": {"port": 53260, "access_log": False, "reuse_port": True}}
+
+    @http("GET", r"/pid/?")
+    async def pid(self, request: web.Request) -> str:
+        return str(os.getpid())
+
+    @http("GET", r"/crash/?")
+    async def crash(self, request: web.Request) -> str:
+        os._exit(1)
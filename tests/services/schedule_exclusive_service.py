@@ -0,0 +1,45 @@
+import asyncio
+import os
+import tempfile
+from typing import List, Optional
+
+import tomodachi
+from tomodachi.helpers.lease import SQLiteLeaseBackend
+from tomodachi.transport.schedule import schedule
+
+
+@tomodachi.service
+class SchedulerExclusiveService(tomodachi.Service):
+    name = "test_schedule_exclusive"
+    uuid = None
+    closer: asyncio.Future
+    schedule_lease_backend = SQLiteLeaseBackend(os.path.join(tempfile.mkdtemp(), "leases.sqlite3"))
+    fencing_tokens: List[Optional[int]] = []
+    invocation_times: List[str] = []
+
+    @schedule(interval=1, exclusive=True)
+    async def every_second(self, invocation_time: str = "", fencing_token: Optional[int] = None) -> None:
+        self.invocation_times.append(invocation_time)
+        self.fencing_tokens.append(fencing_token)
+
+    async def _start_service(self) -> None:
+        self.closer = asyncio.Future()
+
+    async def _started_service(self) -> None:
+        async def _async() -> None:
+            async def sleep_and_kill() -> None:
+                await asyncio.sleep(8.0)
+                if not self.closer.done():
+                    self.closer.set_result(None)
+
+            task = asyncio.ensure_future(sleep_and_kill())
+            await self.closer
+            if not task.done():
+                task.cancel()
+            tomodachi.exit()
+
+        asyncio.ensure_future(_async())
+
+    def stop_service(self) -> None:
+        if not self.closer.done():
+            self.closer.set_result(None)
@@ -1,10 +1,26 @@
-from typing import Any
+import asyncio
+import types
+from typing import Any, Dict, List, cast
 
+import aioamqp.protocol
+import pamqp.commands
 import pytest
 
 import tomodachi
 from run_test_service_helper import start_service
-from tomodachi.transport.amqp import AmqpException, AmqpTransport
+from tomodachi.envelope import JsonBase, ProtobufBinaryBase
+from tomodachi.helpers.execution_context import get_execution_context
+from tomodachi.transport.amqp import (
+    AmqpAckCoalescer,
+    AmqpChannelPool,
+    AmqpConnectionException,
+    AmqpDeliveryDispatcher,
+    AmqpException,
+    AmqpInternalServiceError,
+    AmqpPublisherConfirms,
+    AmqpPublishFailed,
+    AmqpTransport,
+)
 
 
 def test_routing_key() -> None:
@@ -56,6 +72,473 @@ def test_queue_name() -> None:
     assert queue_name == "prefix-540e8e5bc604e4ea618f7e0517a04f030ad1dcbff2e121e9466ddd1c811450bf"
 
 
+def test_payload_content_properties() -> None:
+    assert AmqpTransport.get_content_properties("message") == {
+        "content_type": "text/plain",
+        "content_encoding": "utf-8",
+    }
+    assert AmqpTransport.get_content_properties(b"\x00\xff") == {"content_type": "application/octet-stream"}
+    assert AmqpTransport.get_content_properties("{}", JsonBase) == {
+        "content_type": "application/json",
+        "content_encoding": "utf-8",
+    }
+    assert AmqpTransport.get_content_properties(b"\x00\xff", ProtobufBinaryBase) == {
+        "content_type": "application/x-protobuf"
+    }
+
+
+def test_decode_payload() -> None:
+    def properties(**kwargs: Any) -> Any:
+        return types.SimpleNamespace(**{"content_type": None, "content_encoding": None, **kwargs})
+
+    assert AmqpTransport.decode_payload("åäö".encode(), properties()) == "åäö"
+    assert AmqpTransport.decode_payload(b"message", properties(content_type="text/plain")) == "message"
+    assert AmqpTransport.decode_payload(b"{}", properties(content_type="application/json")) == "{}"
+    assert AmqpTransport.decode_payload("åäö".encode("latin-1"), properties(content_encoding="latin-1")) == "åäö"
+    assert AmqpTransport.decode_payload(b"\x00\xff", properties(content_type="application/x-protobuf")) == b"\x00\xff"
+    assert AmqpTransport.decode_payload(b"\x1f\x8b", properties(content_encoding="gzip")) == b"\x1f\x8b"
+
+    # parameters of the content type are ignored when matching, and the charset is used without a content encoding
+    assert AmqpTransport.decode_payload(b"{}", properties(content_type="application/json; charset=utf-8")) == "{}"
+    assert AmqpTransport.decode_payload(b"{}", properties(content_type="Application/JSON")) == "{}"
+    assert AmqpTransport.decode_payload(b"{}", properties(content_type="application/cloudevents+json")) == "{}"
+    assert AmqpTransport.decode_payload(b"<a/>", properties(content_type="application/atom+xml")) == "<a/>"
+    assert (
+        AmqpTransport.decode_payload("åäö".encode("latin-1"), properties(content_type="text/plain; charset=latin-1"))
+        == "åäö"
+    )
+    assert (
+        AmqpTransport.decode_payload(
+            "åäö".encode("latin-1"), properties(content_type='text/plain; format=flowed; charset="ISO-8859-1"')
+        )
+        == "åäö"
+    )
+    assert (
+        AmqpTransport.decode_payload(
+            "åäö".encode(), properties(content_type="text/plain; charset=latin-1", content_encoding="utf-8")
+        )
+        == "åäö"
+    )
+    assert AmqpTransport.parse_content_type("application/json; charset=UTF-8") == ("application/json", "UTF-8")
+    assert AmqpTransport.parse_content_type("") == ("", None)
+
+
+def test_publisher_confirms(loop: Any) -> None:
+    class Channel(object):
+        def __init__(self) -> None:
+            self._futures: Dict[str, asyncio.Future] = {}
+            self.published: List[bytes] = []
+
+        async def confirm_select(self) -> None:
+            pass
+
+        async def basic_publish(self, payload: bytes, exchange_name: str, routing_key: str, properties: Dict) -> None:
+            self.published.append(payload)
+
+    async def _async() -> None:
+        channel = Channel()
+        publisher_confirms = AmqpPublisherConfirms(channel, window=3)
+        await publisher_confirms.enable()
+
+        futures = [await publisher_confirms.publish(b"data", "amq.topic", "test.topic", {}) for _ in range(3)]
+        assert publisher_confirms.pending_count == 3
+
+        # the window is full until messages are confirmed
+        publish_task = asyncio.ensure_future(publisher_confirms.publish(b"data", "amq.topic", "test.topic", {}))
+        await asyncio.sleep(0.01)
+        assert not publish_task.done()
+        assert len(channel.published) == 3
+
+        await getattr(channel, "basic_server_ack")(types.SimpleNamespace(delivery_tag=2, multiple=True))
+        assert futures[0].result() is True
+        assert futures[1].result() is True
+        assert not futures[2].done()
+
+        futures.append(await publish_task)
+        assert len(channel.published) == 4
+        assert publisher_confirms.pending_count == 2
+
+        await getattr(channel, "basic_server_nack")(types.SimpleNamespace(delivery_tag=4, multiple=False))
+        with pytest.raises(AmqpPublishFailed):
+            futures[3].result()
+        await getattr(channel, "basic_server_ack")(types.SimpleNamespace(delivery_tag=3, multiple=False))
+        assert futures[2].result() is True
+
+        assert publisher_confirms.pending_count == 0
+        assert channel._futures == {}
+
+    loop.run_until_complete(_async())
+
+
+def test_channel_pool(loop: Any) -> None:
+    class Channel(object):
+        def __init__(self, channel_id: int) -> None:
+            self.channel_id = channel_id
+            self.qos: List[Any] = []
+            self.frames: List[Any] = []
+
+        async def dispatch_frame(self, frame: Any) -> None:
+            raise NotImplementedError
+
+        async def _write_frame(self, channel_id: int, request: Any) -> None:
+            self.frames.append(request)
+
+        async def basic_qos(self, prefetch_count: int, prefetch_size: int, connection_global: bool) -> None:
+            self.qos.append((prefetch_count, connection_global))
+
+    class Protocol(object):
+        def __init__(self) -> None:
+            self.channels: List[Channel] = []
+
+        async def channel(self) -> Channel:
+            self.channels.append(Channel(len(self.channels) + 1))
+            return self.channels[-1]
+
+    async def _async() -> None:
+        channel_pool = AmqpChannelPool(Protocol())
+        await channel_pool.open_publish_channels(3)
+        consumer_channel = await channel_pool.open_consumer_channel("queue", 10, 400)
+        assert consumer_channel.channel.qos == [(10, False), (400, True)]
+        assert consumer_channel.ack_coalescer is None
+        assert channel_pool.stats() == {
+            "amqp_publish_channels": 3,
+            "amqp_consumer_channels": 1,
+            "amqp_paused_channels": 0,
+        }
+
+        publish_channels = [(await channel_pool.get_publish_channel()).channel.channel_id for _ in range(4)]
+        assert publish_channels == [1, 2, 3, 1]
+
+        # channels paused by the broker are skipped
+        channel = channel_pool.publish_channels[1].channel
+        await channel.dispatch_frame(pamqp.commands.Channel.Flow(False))
+        assert isinstance(channel.frames[-1], pamqp.commands.Channel.FlowOk)
+        assert channel_pool.stats()["amqp_paused_channels"] == 1
+
+        publish_channels = [(await channel_pool.get_publish_channel()).channel.channel_id for _ in range(4)]
+        assert publish_channels == [3, 1, 3, 1]
+
+        await channel.dispatch_frame(pamqp.commands.Channel.Flow(True))
+        assert channel_pool.stats()["amqp_paused_channels"] == 0
+        assert (await channel_pool.get_publish_channel()).channel.channel_id == 2
+
+        with pytest.raises(NotImplementedError):
+            await channel.dispatch_frame(pamqp.commands.Basic.Ack(1))
+
+    loop.run_until_complete(_async())
+
+
+def test_ack_coalescer(loop: Any) -> None:
+    class Channel(object):
+        def __init__(self) -> None:
+            self.acks: List[Any] = []
+
+        async def basic_client_ack(self, delivery_tag: int, multiple: bool = False) -> None:
+            self.acks.append(("ack", delivery_tag, multiple))
+
+        async def basic_client_nack(self, delivery_tag: int, multiple: bool = False, requeue: bool = True) -> None:
+            self.acks.append(("nack", delivery_tag, multiple))
+
+    async def _async() -> None:
+        channel = Channel()
+        ack_coalescer = AmqpAckCoalescer(channel, 0.05, prefetch_count=100)
+        for delivery_tag in range(1, 7):
+            ack_coalescer.delivered(delivery_tag)
+
+        # deliveries completed out of order are acknowledged up to the first unacknowledged delivery
+        await ack_coalescer.basic_client_ack(2)
+        await ack_coalescer.basic_client_ack(1)
+        await ack_coalescer.basic_client_nack(3)
+        await ack_coalescer.basic_client_ack(5)
+        assert channel.acks == [("nack", 3, False)]
+        assert ack_coalescer.pending_count == 3
+
+        await asyncio.sleep(0.1)
+        assert channel.acks == [("nack", 3, False), ("ack", 2, True)]
+        assert ack_coalescer.pending_count == 1
+
+        # acknowledgements are sent right away when every delivery has been handled
+        await ack_coalescer.basic_client_ack(4)
+        assert channel.acks[-1] == ("ack", 2, True)
+        await ack_coalescer.basic_client_ack(6)
+        assert channel.acks[-1] == ("ack", 6, True)
+        assert ack_coalescer.pending_count == 0
+
+        # remaining acknowledgements above a gap are sent when flushed on shutdown
+        for delivery_tag in range(7, 10):
+            ack_coalescer.delivered(delivery_tag)
+        await ack_coalescer.basic_client_ack(8)
+        await ack_coalescer.basic_client_ack(9)
+        await ack_coalescer.flush(force=True)
+        assert channel.acks[-2:] == [("ack", 8, False), ("ack", 9, False)]
+
+        await ack_coalescer.basic_client_ack(7)
+        assert channel.acks[-1] == ("ack", 7, True)
+
+        # dropped deliveries (for example duplicates) are no longer in-flight and are left unacknowledged
+        for delivery_tag in range(10, 14):
+            ack_coalescer.delivered(delivery_tag)
+        await ack_coalescer.basic_client_ack(10)
+        await ack_coalescer.basic_client_ack(12)
+        assert channel.acks[-1] == ("ack", 7, True)
+        await ack_coalescer.dropped(11)
+        assert channel.acks[-1] == ("ack", 7, True)
+        await ack_coalescer.basic_client_ack(13)
+        assert channel.acks[-3:] == [("ack", 10, True), ("ack", 12, False), ("ack", 13, False)]
+        assert ack_coalescer.pending_count == 0
+
+        with pytest.raises(ValueError):
+            AmqpAckCoalescer(channel, 0)
+
+    loop.run_until_complete(_async())
+
+
+def test_delivery_dispatcher(loop: Any) -> None:
+    running: List[int] = []
+    max_running: List[int] = []
+    handled: List[Any] = []
+
+    async def handler(payload: Any, delivery_tag: int, routing_key: str, properties: Any, channel: Any = None) -> None:
+        running.append(delivery_tag)
+        max_running.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(delivery_tag)
+        handled.append(delivery_tag)
+
+    async def batch_handler(deliveries: List[Any]) -> None:
+        handled.append([delivery[1] for delivery in deliveries])
+
+    async def _async() -> None:
+        # handlers run concurrently up to the limit, regardless of the number of deliveries
+        dispatcher = AmqpDeliveryDispatcher(handler, max_concurrency=2)
+        for delivery_tag in range(1, 7):
+            await dispatcher.dispatch("message", delivery_tag, "routing_key", None)
+        assert dispatcher.pending_count == 6
+        await dispatcher.close()
+        assert sorted(handled) == [1, 2, 3, 4, 5, 6]
+        assert max(max_running) == 2
+
+        # deliveries are grouped into batches, partial batches are handed over after the timeout
+        handled.clear()
+        dispatcher = AmqpDeliveryDispatcher(batch_handler, batch_size=3, batch_timeout=0.05)
+        for delivery_tag in range(1, 6):
+            await dispatcher.dispatch("message", delivery_tag, "routing_key", None)
+        await asyncio.sleep(0.01)
+        assert handled == [[1, 2, 3]]
+        assert dispatcher.pending_count == 2
+        await asyncio.sleep(0.1)
+        assert handled == [[1, 2, 3], [4, 5]]
+
+        # partial batches are handed over when closed
+        await dispatcher.dispatch("message", 6, "routing_key", None)
+        await dispatcher.close()
+        assert handled == [[1, 2, 3], [4, 5], [6]]
+
+        # deliveries received while closing are left for redelivery and no new workers are started
+        handled.clear()
+
+        async def redelivering_handler(
+            payload: Any, delivery_tag: int, routing_key: str, properties: Any, channel: Any = None
+        ) -> None:
+            await asyncio.sleep(0.01)
+            handled.append(delivery_tag)
+            await redelivering_dispatcher.dispatch("message", delivery_tag + 1, "routing_key", None)
+
+        redelivering_dispatcher = AmqpDeliveryDispatcher(redelivering_handler)
+        await redelivering_dispatcher.dispatch("message", 1, "routing_key", None)
+        await asyncio.sleep(0.05)
+        await asyncio.wait_for(redelivering_dispatcher.close(timeout=1.0), timeout=2.0)
+        handled_count = len(handled)
+        await asyncio.sleep(0.05)
+        assert len(handled) == handled_count
+        assert redelivering_dispatcher.pending_count == 0
+
+        await redelivering_dispatcher.dispatch("message", 100, "routing_key", None)
+        assert redelivering_dispatcher.pending_count == 0
+        assert redelivering_dispatcher._workers == []
+
+        # handlers that are still running when the timeout is reached are cancelled
+        slow_dispatcher = AmqpDeliveryDispatcher(handler)
+        handled.clear()
+        await slow_dispatcher.dispatch("message", 1, "routing_key", None)
+        await slow_dispatcher.dispatch("message", 2, "routing_key", None)
+        await asyncio.sleep(0)
+        await slow_dispatcher.close(timeout=0.001)
+        assert handled == []
+        assert running == [1]
+
+        with pytest.raises(ValueError):
+            AmqpDeliveryDispatcher(handler, max_concurrency=0)
+
+    loop.run_until_complete(_async())
+
+
+def test_batch_handler(monkeypatch: Any, loop: Any) -> None:
+    class Channel(object):
+        def __init__(self) -> None:
+            self.acks: List[Any] = []
+
+        async def basic_client_ack(self, delivery_tag: int, multiple: bool = False) -> None:
+            self.acks.append(("ack", delivery_tag))
+
+        async def basic_client_nack(self, delivery_tag: int, multiple: bool = False, requeue: bool = True) -> None:
+            self.acks.append(("nack", delivery_tag))
+
+    class Service(object):
+        uuid = "8e3c5c4c-8a4d-4bbd-9d3c-8ac4b8e5c1f0"
+        name = "service"
+
+        def __init__(self) -> None:
+            self.batches: List[Any] = []
+
+        async def handler(self, data: Any, routing_key: Any) -> None:
+            if "fail" in data:
+                raise AmqpInternalServiceError("retry")
+            self.batches.append((data, routing_key))
+
+    async def subscribe(cls: Any, obj: Any, context: Dict) -> None:
+        return None
+
+    async def _async() -> None:
+        monkeypatch.setattr(AmqpTransport, "subscribe", classmethod(subscribe))
+        service = Service()
+        context: Dict = {"message_envelope": JsonBase}
+        await AmqpTransport.subscribe_handler(
+            service, context, Service.handler, "routing.key", batch_size=3, batch_timeout=0.05
+        )
+        _, _, _, _, _, dispatch, prefetch_count = context["_amqp_subscribers"][-1]
+        assert prefetch_count == 100
+
+        channel = Channel()
+        for delivery_tag, data in enumerate(["a", "b", "c", "d", "fail"], 1):
+            payload = await JsonBase.build_message(service, "routing.key", data)
+            properties = types.SimpleNamespace(headers=None)
+            await dispatch(payload, delivery_tag, "routing.key", properties, channel=channel)
+
+        await context["_amqp_dispatchers"][-1].close()
+        assert service.batches == [(["a", "b", "c"], ["routing.key", "routing.key", "routing.key"])]
+        assert channel.acks == [("ack", 1), ("ack", 2), ("ack", 3), ("nack", 4), ("nack", 5)]
+
+        with pytest.raises(ValueError):
+            await AmqpTransport.subscribe_handler(service, context, Service.handler, "routing.key", batch_size=0)
+
+    loop.run_until_complete(_async())
+
+
+def test_duplicate_delivery_with_ack_coalescer(monkeypatch: Any, loop: Any) -> None:
+    class Channel(object):
+        def __init__(self) -> None:
+            self.acks: List[Any] = []
+
+        async def basic_client_ack(self, delivery_tag: int, multiple: bool = False) -> None:
+            self.acks.append(("ack", delivery_tag, multiple))
+
+    class Service(object):
+        uuid = "0b7b0c0e-4c3f-4a8e-a6b1-0a6f7e5f1c2d"
+        name = "service"
+
+        def __init__(self) -> None:
+            self.received: List[Any] = []
+
+        async def handler(self, data: Any) -> None:
+            self.received.append(data)
+
+    async def subscribe(cls: Any, obj: Any, context: Dict) -> None:
+        return None
+
+    async def _async() -> None:
+        monkeypatch.setattr(AmqpTransport, "subscribe", classmethod(subscribe))
+        service = Service()
+        context: Dict = {"message_envelope": JsonBase}
+        await AmqpTransport.subscribe_handler(service, context, Service.handler, "routing.key")
+        _, _, _, _, _, handler, _ = context["_amqp_subscribers"][-1]
+
+        channel = Channel()
+        ack_coalescer = AmqpAckCoalescer(channel, 10.0, prefetch_count=100)
+        payload = await JsonBase.build_message(service, "routing.key", "data")
+        properties = types.SimpleNamespace(headers=None)
+        ack_coalescer.delivered(1)
+        ack_coalescer.delivered(2)
+
+        await handler(payload, 1, "routing.key", properties, channel=ack_coalescer)
+        assert channel.acks == []
+
+        # the duplicate delivery isn't handled, and the acknowledgement of the first delivery is flushed right away
+        # since no delivery is in-flight anymore
+        await handler(payload, 2, "routing.key", properties, channel=ack_coalescer)
+        assert service.received == ["data"]
+        assert channel.acks == [("ack", 1, True)]
+        assert ack_coalescer.pending_count == 0
+
+    loop.run_until_complete(_async())
+
+
+def test_connection_recovery(monkeypatch: Any, loop: Any) -> None:
+    class Protocol(object):
+        def __init__(self, state: int) -> None:
+            self.state = state
+
+    connect_attempts: List[float] = []
+    consume_calls: List[Any] = []
+
+    async def connect(cls: Any, obj: Any, context: Dict) -> None:
+        connect_attempts.append(loop.time())
+        if len(connect_attempts) < 3:
+            raise AmqpConnectionException("connection refused")
+        cls.protocol = Protocol(aioamqp.protocol.OPEN)
+
+    async def consume() -> None:
+        consume_calls.append(AmqpTransport.protocol)
+
+    context: Dict = {
+        "options": {"amqp": {"reconnect_delay": 0.01, "reconnect_max_delay": 0.02, "publish_buffer_size": 1}},
+        "_amqp_consume": consume,
+    }
+
+    async def _async() -> None:
+        monkeypatch.setattr(AmqpTransport, "connect", classmethod(connect))
+        monkeypatch.setattr(AmqpTransport, "protocol", Protocol(aioamqp.protocol.CLOSED))
+        monkeypatch.setattr(AmqpTransport, "connected", asyncio.Event())
+        monkeypatch.setattr(AmqpTransport, "channel_pool", object())
+        monkeypatch.setattr(AmqpTransport, "recovery_task", None)
+        cast(asyncio.Event, AmqpTransport.connected).set()
+        reconnects = get_execution_context().get("amqp_reconnects", 0)
+
+        AmqpTransport.connection_lost(None, context, Exception("connection lost"))
+        recovery_task = cast(asyncio.Future, AmqpTransport.recovery_task)
+        assert recovery_task is not None
+        assert not cast(asyncio.Event, AmqpTransport.connected).is_set()
+
+        # the connection is only recovered once
+        AmqpTransport.connection_lost(None, context, Exception("connection lost"))
+        assert AmqpTransport.recovery_task is recovery_task
+
+        # one message may wait for the connection to be recovered, the next one is dropped
+        buffered = asyncio.ensure_future(AmqpTransport.wait_for_connection(context))
+        await asyncio.sleep(0)
+        assert AmqpTransport.buffered_count == 1
+        with pytest.raises(AmqpConnectionException):
+            await AmqpTransport.wait_for_connection(context)
+
+        await recovery_task
+        await buffered
+        assert AmqpTransport.buffered_count == 0
+        assert len(connect_attempts) == 3
+        assert connect_attempts[2] - connect_attempts[1] >= 0.02
+        assert consume_calls == [AmqpTransport.protocol]
+        assert get_execution_context()["amqp_reconnects"] == reconnects + 1
+        assert get_execution_context()["amqp_last_recovery_time"] >= 0.04
+
+        # connections that are still open, or that are closed when stopping, don't start a recovery
+        AmqpTransport.connection_lost(None, context, Exception("connection lost"))
+        assert AmqpTransport.recovery_task is recovery_task
+        monkeypatch.setattr(AmqpTransport, "protocol", None)
+        AmqpTransport.connection_lost(None, context, Exception("connection lost"))
+        assert AmqpTransport.recovery_task is recovery_task
+
+    loop.run_until_complete(_async())
+
+
 def test_publish_invalid_credentials(capsys: Any, loop: Any) -> None:
     services, future = start_service("tests/services/dummy_service.py", loop=loop)
 
@@ -3,7 +3,7 @@ import datetime
 import pytest
 import pytz
 
-from tomodachi.helpers.crontab import get_next_datetime
+from tomodachi.helpers.crontab import CompiledCrontab, get_next_datetime
 
 
 def test_aliases() -> None:
@@ -151,3 +151,84 @@ def test_impossible_dates() -> None:
 
     with pytest.raises(Exception):
         get_next_datetime("* * * nope *", t)
+
+
+def test_compiled_crontab() -> None:
+    t = datetime.datetime(2017, 6, 15, 10, 16, 50)
+    for crontab_notation in (
+        "@hourly",
+        "* * * * *",
+        "*/2 * * * *",
+        "1-3/2 * * * *",
+        "15 */2 * * *",
+        "5,10,55 * * * *",
+        "* * * * 4",
+        "* * * * fri-sun",
+        "0 10 1-7 * mon",
+        "0 * 1-23 * mon",
+        "39 3 L * *",
+        "55 7 * * Lsun",
+        "* * * * Lwed-fri",
+        "3-20/2 5 7-15 feb-may wed,tue,sat,mon",
+        "* * 29 2 0",
+        "30 5 * jan,mar Ltue",
+        "* * 29 2 * 2049,2051-2060",
+    ):
+        assert CompiledCrontab(crontab_notation).next_datetime(t) == get_next_datetime(crontab_notation, t)
+
+    # days match if either the day of month or the weekday matches, when both are restricted
+    assert get_next_datetime("*/5 0 1 12 0", datetime.datetime(2020, 11, 10)) == datetime.datetime(2020, 12, 1)
+    assert CompiledCrontab("0 0 1 12 0").next_datetimes(datetime.datetime(2020, 11, 10), 3) == [
+        datetime.datetime(2020, 12, 1),
+        datetime.datetime(2020, 12, 6),
+        datetime.datetime(2020, 12, 13),
+    ]
+    assert CompiledCrontab("0 10 1-7 * mon").next_datetimes(t, 3) == [
+        datetime.datetime(2017, 6, 19, 10),
+        datetime.datetime(2017, 6, 26, 10),
+        datetime.datetime(2017, 7, 1, 10),
+    ]
+
+    assert CompiledCrontab("0 0 1 jan/2 * 2011-2013").next_datetime(t) is None
+    assert CompiledCrontab("* * * * *").next_datetime(datetime.datetime(2017, 6, 15, 10, 16)) == datetime.datetime(
+        2017, 6, 15, 10, 16
+    )
+
+    assert CompiledCrontab("0 0 * * 1-5").next_datetimes(t, 3) == [
+        datetime.datetime(2017, 6, 16),
+        datetime.datetime(2017, 6, 19),
+        datetime.datetime(2017, 6, 20),
+    ]
+
+    with pytest.raises(Exception):
+        CompiledCrontab("* * 30 2 *")
+
+
+def test_compiled_crontab_daylight_saving_time() -> None:
+    tz = pytz.timezone("Europe/Stockholm")
+
+    # 02:30 doesn't exist on the day the clock is turned forward
+    t = tz.localize(datetime.datetime(2024, 3, 30, 12, 0))
+    assert CompiledCrontab("30 2 * * *").next_datetimes(t, 2) == [
+        tz.localize(datetime.datetime(2024, 3, 31, 3, 30)),
+        tz.localize(datetime.datetime(2024, 4, 1, 2, 30)),
+    ]
+    assert CompiledCrontab("0 8 * * *").next_datetime(t) == tz.localize(datetime.datetime(2024, 3, 31, 8, 0))
+    assert CompiledCrontab("0 8 * * *").next_datetime(t).utcoffset() == datetime.timedelta(hours=2)
+
+    # 02:00 - 02:59 occurs twice on the day the clock is turned back
+    t = tz.localize(datetime.datetime(2024, 10, 27, 2, 10), is_dst=True)
+    assert [d.astimezone(pytz.UTC) for d in CompiledCrontab("*/30 * * * *").next_datetimes(t, 4)] == [
+        datetime.datetime(2024, 10, 27, 0, 30, tzinfo=pytz.UTC),
+        datetime.datetime(2024, 10, 27, 1, 0, tzinfo=pytz.UTC),
+        datetime.datetime(2024, 10, 27, 1, 30, tzinfo=pytz.UTC),
+        datetime.datetime(2024, 10, 27, 2, 0, tzinfo=pytz.UTC),
+    ]
+    assert CompiledCrontab("30 2 * * *").next_datetimes(t, 2) == [
+        tz.localize(datetime.datetime(2024, 10, 27, 2, 30), is_dst=True),
+        tz.localize(datetime.datetime(2024, 10, 27, 2, 30), is_dst=False),
+    ]
+
+    assert CompiledCrontab("0 * * * *").next_timestamp(
+        datetime.datetime(2024, 3, 31, 0, 10, tzinfo=pytz.UTC).timestamp(), tz
+    ) == (datetime.datetime(2024, 3, 31, 1, 0, tzinfo=pytz.UTC).timestamp())
@@ -0,0 +1,137 @@
+import asyncio
+import time
+from typing import Any
+
+import aiohttp
+import pytest
+
+from run_test_service_helper import start_service
+from tomodachi.helpers.deadline import (
+    DEADLINE_HEADER,
+    DEADLINE_MESSAGE_ATTRIBUTE,
+    Deadline,
+    DeadlineExceeded,
+    get_deadline,
+    get_deadline_timestamp,
+    get_remaining_time,
+    get_timeout,
+    parse_deadline_attribute,
+    parse_timeout_header,
+)
+
+
+def test_parse_deadline_values() -> None:
+    assert parse_timeout_header({DEADLINE_HEADER: "1500"}) == 1.5
+    assert parse_timeout_header({DEADLINE_HEADER: "invalid"}) is None
+    assert parse_timeout_header({}) is None
+    assert parse_timeout_header({DEADLINE_HEADER: "inf"}) is None
+    assert parse_timeout_header({DEADLINE_HEADER: "-Infinity"}) is None
+    assert parse_timeout_header({DEADLINE_HEADER: "nan"}) is None
+
+    remaining = parse_deadline_attribute({DEADLINE_MESSAGE_ATTRIBUTE: str(time.time() + 10)})
+    assert remaining is not None and 9 < remaining <= 10
+    remaining = parse_deadline_attribute({DEADLINE_MESSAGE_ATTRIBUTE: time.time() - 10})
+    assert remaining is not None and remaining < 0
+    assert parse_deadline_attribute({DEADLINE_MESSAGE_ATTRIBUTE: "invalid"}) is None
+    assert parse_deadline_attribute({DEADLINE_MESSAGE_ATTRIBUTE: "Infinity"}) is None
+    assert parse_deadline_attribute({DEADLINE_MESSAGE_ATTRIBUTE: float("inf")}) is None
+    assert parse_deadline_attribute(None) is None
+
+
+def test_deadline_scope(loop: Any) -> None:
+    async def _async() -> None:
+        assert get_deadline() is None
+        assert get_timeout(40) == 40
+
+        async with Deadline(None):
+            assert get_deadline() is None
+
+        async with Deadline(10):
+            timeout = get_timeout(40)
+            assert timeout is not None and 9 < timeout <= 10
+            assert get_timeout(1) == 1
+
+            timestamp = get_deadline_timestamp()
+            assert timestamp is not None and time.time() + 9 < timestamp <= time.time() + 10
+
+            # a nested deadline never extends the current deadline
+            async with Deadline(60):
+                remaining = get_remaining_time()
+                assert remaining is not None and remaining <= 10
+
+            async with Deadline(1):
+                remaining = get_remaining_time()
+                assert remaining is not None and remaining <= 1
+
+            # the deadline is copied to tasks started within the scope
+            remaining = await asyncio.create_task(asyncio.sleep(0, get_remaining_time()))
+            assert remaining is not None and remaining <= 10
+
+        assert get_deadline() is None
+
+    loop.run_until_complete(_async())
+
+
+def test_deadline_exceeded(loop: Any) -> None:
+    async def _async() -> None:
+        with pytest.raises(DeadlineExceeded):
+            async with Deadline(0.05):
+                await asyncio.sleep(1)
+        assert get_deadline() is None
+
+        with pytest.raises(DeadlineExceeded):
+            async with Deadline(0):
+                pass
+
+        async with Deadline(0.05):
+            time.sleep(0.06)
+            # outbound calls made after the deadline has passed fail fast
+            with pytest.raises(DeadlineExceeded):
+                get_timeout(40)
+
+    loop.run_until_complete(_async())
+
+
+def test_http_deadline_service(loop: Any) -> None:
+    services, future = start_service("tests/services/http_service_deadline.py", loop=loop)
+    instance = services.get("test_http_deadline")
+
+    async def _async() -> None:
+        async with aiohttp.ClientSession() as client:
+            start_time = time.time()
+            response = await client.get("http://127.0.0.1:53263/slow")
+            assert response.status == 504
+            assert time.time() - start_time < 1.5
+            assert instance.cancelled_count == 1
+
+            response = await client.get("http://127.0.0.1:53263/slow", headers={DEADLINE_HEADER: "50"})
+            assert response.status == 504
+            assert instance.cancelled_count == 2
+
+            response = await client.get("http://127.0.0.1:53263/remaining")
+            assert await response.text() == "- -"
+
+            # a non-finite budget is ignored
+            response = await client.get("http://127.0.0.1:53263/remaining", headers={DEADLINE_HEADER: "inf"})
+            assert await response.text() == "inf -"
+
+            # the handler is cancelled when the client disconnects
+            with pytest.raises(asyncio.TimeoutError):
+                await client.get("http://127.0.0.1:53263/disconnect", timeout=aiohttp.ClientTimeout(total=0.2))
+            await asyncio.sleep(0.1)
+            assert instance.disconnected_count == 1
+
+            response = await client.get("http://127.0.0.1:53263/remaining", headers={DEADLINE_HEADER: "0"})
+            assert response.status == 504
+
+            # the remaining budget is passed on by the outbound http client
+            response = await client.get("http://127.0.0.1:53263/proxy", headers={DEADLINE_HEADER: "3000"})
+            assert response.status == 200
+            budget, remaining = (await response.text()).split(" ")
+            assert 2000 < int(budget) <= 3000
+            assert remaining == "set"
+
+        instance.stop_service()
+        await future
+
+    loop.run_until_complete(_async())
@@ -8,6 +8,7 @@ from google.protobuf.json_format import MessageToJson
 import tomodachi
 from proto_build.message_pb2 import Person
 from run_test_service_helper import start_service
+from tomodachi.envelope import ProtobufBase, ProtobufBinaryBase
 from tomodachi.envelope.proto_build.protobuf.sns_sqs_message_pb2 import SNSSQSMessage  # noqa
 from tomodachi.validation.validation import RegexMissmatchException, validate_field_regex
 
@@ -106,6 +107,28 @@ def test_protobuf_base(capsys: Any, loop: Any) -> None:
     loop.run_until_complete(future)
 
 
+def test_protobuf_binary_base(loop: Any) -> None:
+    async def _async() -> None:
+        data = Person()
+        data.name = "John Doe"
+        data.id = "12"
+        service = type("Service", (object,), {"name": "service", "uuid": "a3e3d7a8-ecfd-4b7d-a0e8-6e5d0b0d3c5e"})()
+
+        protobuf_message = await ProtobufBinaryBase.build_message(service, "topic", data)
+        assert type(protobuf_message) is bytes
+        result, message_uuid, _ = await ProtobufBinaryBase.parse_message(protobuf_message, Person)
+        assert result.get("data") == data
+        assert result.get("metadata", {}).get("data_encoding") == "proto"
+        assert message_uuid[0:36] == service.uuid
+
+        # base64 encoded messages built with ProtobufBase are parsed as well
+        base64_message = await ProtobufBase.build_message(service, "topic", data)
+        result, _, _ = await ProtobufBinaryBase.parse_message(base64_message, Person)
+        assert result.get("data") == data
+
+    loop.run_until_complete(_async())
+
+
 def test_protobuf_base_no_proto_class(capsys: Any, loop: Any) -> None:
     services, future = start_service("tests/services/dummy_protobuf_service.py", loop=loop)
 
@@ -0,0 +1,68 @@
+import asyncio
+import os
+import time
+from typing import Any
+
+import aiohttp
+import pytest
+
+import tomodachi
+from run_test_service_helper import start_service
+from tomodachi.helpers.executor import ExecutorPool, executor_handler
+
+
+def test_executor_handler_validation() -> None:
+    def sync_handler(self: Any) -> None:
+        pass
+
+    async def async_handler(self: Any) -> None:
+        pass
+
+    assert executor_handler(object(), {}, sync_handler, None) is sync_handler
+
+    with pytest.raises(ValueError):
+        executor_handler(object(), {}, sync_handler, "fiber")
+
+    with pytest.raises(ValueError):
+        executor_handler(object(), {}, async_handler, "thread")
+
+    with pytest.raises(ValueError):
+        ExecutorPool("thread", 0)
+
+
+def test_executor_service(loop: Any) -> None:
+    services, future = start_service("tests/services/http_service_executor.py", loop=loop)
+    instance = services.get("test_http_executor")
+    port = instance.context.get("_http_port")
+
+    async def _async() -> None:
+        async with aiohttp.ClientSession() as client:
+            start_time = time.time()
+            responses = await asyncio.gather(*[client.get("http://127.0.0.1:{}/thread".format(port)) for _ in range(4)])
+            assert time.time() - start_time < 0.6
+            for response in responses:
+                assert response.status == 200
+                thread_name, handler = (await response.text()).split(" ")
+                assert thread_name.startswith("tomodachi-executor")
+                assert handler == "thread"
+
+            execution_context = tomodachi.get_execution_context()
+            assert execution_context.get("executor_thread_pool_max_workers") == 4
+            assert execution_context.get("executor_thread_pool_total_tasks") == 4
+            assert execution_context.get("executor_thread_pool_pending_tasks") == 0
+
+            response = await client.get("http://127.0.0.1:{}/process/4711".format(port), headers={"X-Value": "value"})
+            assert response.status == 200
+            pid, path, header_value, id_ = (await response.text()).split(" ")
+            assert int(pid) != os.getpid()
+            assert path == "/process/4711"
+            assert header_value == "value"
+            assert id_ == "4711"
+
+            response = await client.get("http://127.0.0.1:{}/sync".format(port))
+            assert await response.text() == "MainThread"
+
+    loop.run_until_complete(_async())
+
+    instance.stop_service()
+    loop.run_until_complete(future)
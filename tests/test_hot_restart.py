@@ -0,0 +1,77 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Any
+
+PORT = 53261
+
+
+def get_pid() -> str:
+    with urllib.request.urlopen("http://127.0.0.1:{}/pid".format(PORT), timeout=5) as response:
+        return response.read().decode()
+
+
+def pid_exists(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def test_hot_restart_listener_handoff(tmp_path: Any) -> None:
+    # the replacement process inherits stdout, which is why output is written to a file instead of a pipe
+    output_file = open(tmp_path / "output.log", "wb")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "tomodachi.run", "--production", "tests/services/http_service_hot_restart.py"],
+        stdout=output_file,
+        stderr=subprocess.STDOUT,
+        env={**os.environ, "TOMODACHI_LOGGER": "json"},
+    )
+    new_pid = None
+
+    try:
+        start_time = time.time()
+        old_pid = None
+        while not old_pid and time.time() - start_time < 15:
+            try:
+                old_pid = get_pid()
+            except Exception:
+                time.sleep(0.1)
+        assert old_pid == str(process.pid)
+
+        process.send_signal(signal.SIGHUP)
+
+        # every request is served by either the old or the new process while the listening socket is handed off
+        start_time = time.time()
+        while time.time() - start_time < 30:
+            pid = get_pid()
+            if pid != old_pid:
+                new_pid = int(pid)
+                break
+            time.sleep(0.01)
+
+        assert new_pid is not None
+        assert new_pid != process.pid
+
+        assert process.wait(timeout=30) == 0
+        assert get_pid() == str(new_pid)
+
+        output_str = (tmp_path / "output.log").read_text()
+        assert "started replacement process" in output_str
+        assert "replacement process is ready" in output_str
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        if new_pid and pid_exists(new_pid):
+            os.kill(new_pid, signal.SIGTERM)
+            start_time = time.time()
+            while pid_exists(new_pid) and time.time() - start_time < 15:
+                time.sleep(0.1)
+        output_file.close()
+
+    assert new_pid and not pid_exists(new_pid)
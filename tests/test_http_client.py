@@ -0,0 +1,142 @@
+import asyncio
+import socket
+from typing import Any, cast
+
+import aiohttp
+import pytest
+
+import tomodachi
+from run_test_service_helper import start_service
+from tomodachi.helpers.http_client import CircuitBreaker, CircuitOpenError, HttpClient
+
+
+def test_circuit_breaker() -> None:
+    circuit_breaker = CircuitBreaker(2, 30)
+    assert circuit_breaker.allow() is True
+
+    assert circuit_breaker.record_failure() is False
+    assert circuit_breaker.record_failure() is True
+    assert circuit_breaker.is_open is True
+    assert circuit_breaker.allow() is False
+    assert circuit_breaker.retry_after() > 29
+
+    circuit_breaker.opened_at = 0
+    assert circuit_breaker.allow() is True
+    assert circuit_breaker.allow() is False
+    circuit_breaker.record_success()
+    assert circuit_breaker.is_open is False
+    assert circuit_breaker.failures == 0
+
+
+def test_http_client_bad_options() -> None:
+    with pytest.raises(ValueError):
+        HttpClient(tomodachi.Options.HTTPClient(retries=-1))
+    with pytest.raises(ValueError):
+        HttpClient(tomodachi.Options.HTTPClient(limit_per_host=-1))
+
+
+def test_get_http_client_before_start() -> None:
+    # the client is created when the service starts
+    with pytest.raises(RuntimeError):
+        tomodachi.get_http_client({})
+
+
+def test_http_client_circuit_opens_on_connection_errors(loop: Any) -> None:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    async def _async() -> None:
+        client = HttpClient(tomodachi.Options.HTTPClient(retries=1, retry_backoff=0.01, circuit_breaker_threshold=3))
+        url = "http://127.0.0.1:{}/".format(port)
+
+        with pytest.raises(aiohttp.ClientConnectionError):
+            await client.get(url)
+        with pytest.raises(aiohttp.ClientConnectionError):
+            await client.get(url)
+        with pytest.raises(CircuitOpenError) as exc_info:
+            await client.get(url)
+        assert exc_info.value.host == "http://127.0.0.1:{}".format(port)
+
+        await client.close()
+        assert client.closed is True
+        with pytest.raises(RuntimeError):
+            await client.get(url)
+
+    loop.run_until_complete(_async())
+
+
+def test_http_client_cancelled_trial_request(loop: Any) -> None:
+    async def _send(*args: Any, **kwargs: Any) -> None:
+        await asyncio.sleep(10)
+
+    async def _async() -> None:
+        client = HttpClient(tomodachi.Options.HTTPClient(retries=0, circuit_breaker_threshold=1))
+        setattr(client, "_send", _send)  # noqa: B010
+        url = "http://127.0.0.1:1/"
+
+        circuit_breaker = cast(CircuitBreaker, client.circuit_breaker(url))
+        circuit_breaker.record_failure()
+        circuit_breaker.opened_at = 0
+
+        # the cancelled trial request doesn't keep the circuit open
+        task = asyncio.ensure_future(client.get(url))
+        await asyncio.sleep(0.01)
+        assert circuit_breaker.allow() is False
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert circuit_breaker.allow() is True
+
+        await client.close()
+
+    loop.run_until_complete(_async())
+
+
+def test_http_client_service(loop: Any) -> None:
+    services, future = start_service("tests/services/http_client_service.py", loop=loop)
+    instance = services.get("test_http_client")
+
+    async def _async() -> None:
+        client = tomodachi.get_http_client(instance)
+        assert client is instance.http_client
+        assert tomodachi.get_http_client(instance.context) is client
+
+        response = await client.get("http://127.0.0.1:53262/upstream")
+        assert response.status == 200
+        assert await response.text() == "-"
+
+        # the response body has been read and the connection has been released back to the pool
+        assert client.pool_stats()["acquired_connections"] == 0
+        assert client.pool_stats()["idle_connections"] == 1
+
+        response = await client.get("http://127.0.0.1:53262/flaky")
+        assert response.status == 200
+        assert await response.text() == "ok"
+        assert instance.flaky_count == 3
+
+        response = await client.get("http://127.0.0.1:53262/flaky", retries=0)
+        assert response.status == 503
+
+        response = await client.post("http://127.0.0.1:53262/proxy")
+        assert response.status == 405
+
+        response = await client.get("http://127.0.0.1:53262/proxy")
+        assert response.status == 200
+        assert await response.text() == "-"
+
+        context = tomodachi.get_execution_context()
+        assert context["http_client_retries"] == 2
+        assert context["http_client_failures"] == 3
+
+        instance.stop_service()
+        await future
+
+        assert client.closed is True
+
+        # the closed client is returned after the service has stopped, instead of a new client
+        assert tomodachi.get_http_client(instance) is client
+        with pytest.raises(RuntimeError):
+            client.session
+
+    loop.run_until_complete(_async())
@@ -0,0 +1,131 @@
+import asyncio
+from typing import Any
+
+import aiohttp
+import pytest
+
+from run_test_service_helper import start_service
+from tomodachi.helpers.limiter import AdaptiveConcurrencyLimiter, ConcurrencyLimiter, ConcurrencyLimitExceeded
+from tomodachi.transport.http import HttpTransport
+
+
+def test_concurrency_limiter_queue(loop: Any) -> None:
+    async def _async() -> None:
+        limiter = ConcurrencyLimiter(1, max_queue_size=1, queue_timeout=None)
+        await limiter.acquire()
+        assert limiter.in_flight == 1
+
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.queued == 1
+
+        with pytest.raises(ConcurrencyLimitExceeded):
+            await limiter.acquire()
+        assert limiter.rejected_count == 1
+
+        limiter.release()
+        await waiter
+        assert limiter.in_flight == 1
+        assert limiter.queued == 0
+
+        limiter.release()
+        assert limiter.in_flight == 0
+
+    loop.run_until_complete(_async())
+
+
+def test_concurrency_limiter_queue_timeout_and_cancel(loop: Any) -> None:
+    async def _async() -> None:
+        limiter = ConcurrencyLimiter(1, queue_timeout=0.05)
+        assert limiter.try_acquire() is True
+        assert limiter.try_acquire() is False
+
+        with pytest.raises(ConcurrencyLimitExceeded):
+            await limiter.acquire()
+        assert limiter.timeout_count == 1
+        assert limiter.queued == 0
+
+        waiter = asyncio.ensure_future(ConcurrencyLimiter.acquire(limiter))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert limiter.queued == 0
+
+        limiter.release()
+        assert limiter.in_flight == 0
+
+    loop.run_until_complete(_async())
+
+
+def test_adaptive_concurrency_limiter() -> None:
+    limiter = AdaptiveConcurrencyLimiter(50, min_limit=5, max_limit=100, window_size=10)
+    for _ in range(200):
+        limiter.record_latency(0.01)
+    stable_limit = limiter.limit
+    assert stable_limit > 50
+
+    for _ in range(500):
+        limiter.record_latency(0.5)
+    assert limiter.limit < stable_limit
+    assert limiter.limit >= 5
+
+
+def test_http_route_queue_requires_limit(loop: Any) -> None:
+    async def handler(self: Any, request: Any) -> str:
+        return ""
+
+    with pytest.raises(ValueError):
+        loop.run_until_complete(HttpTransport.request_handler(object(), {}, handler, "GET", "/", max_queued_requests=1))
+    with pytest.raises(ValueError):
+        loop.run_until_complete(
+            HttpTransport.request_handler(object(), {}, handler, "GET", "/", request_queue_timeout=1.0)
+        )
+
+
+def test_http_concurrency_limit(capsys: Any, loop: Any) -> None:
+    services, future = start_service("tests/services/http_service_concurrency_limit.py", loop=loop)
+    instance = services.get("test_http_concurrency_limit")
+    port = instance.context.get("_http_port")
+
+    async def _async() -> None:
+        async with aiohttp.ClientSession() as client:
+
+            async def _get(path: str) -> aiohttp.ClientResponse:
+                response = await client.get("http://127.0.0.1:{}{}".format(port, path))
+                await response.read()
+                return response
+
+            slow_request = asyncio.ensure_future(_get("/slow"))
+            await asyncio.sleep(0.1)
+            queued_request = asyncio.ensure_future(_get("/slow"))
+            await asyncio.sleep(0.1)
+
+            rejected_response = await _get("/slow")
+            assert rejected_response.status == 503
+            assert rejected_response.headers.get("Retry-After") == "3"
+
+            fast_response = await _get("/fast")
+            assert fast_response.status == 200
+
+            queued_response = await queued_request
+            assert queued_response.status == 503
+
+            slow_response = await slow_request
+            assert slow_response.status == 200
+
+            response = await _get("/slow")
+            assert response.status == 200
+
+    loop.run_until_complete(_async())
+
+    import tomodachi
+
+    assert tomodachi.get_execution_context().get("http_rejected_tasks") == 2
+    assert tomodachi.get_execution_context().get("http_queued_tasks") == 0
+
+    instance.stop_service()
+    loop.run_until_complete(future)
+
+    out, err = capsys.readouterr()
+    assert "request rejected - concurrency limit exceeded" in (out + err)
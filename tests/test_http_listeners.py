@@ -0,0 +1,80 @@
+import os
+import socket
+import stat
+from typing import Any
+
+import aiohttp
+import pytest
+
+from run_test_service_helper import start_service
+from tomodachi.helpers.sockets import SD_LISTEN_FDS_START, get_listen_fd, get_systemd_listen_fds
+
+
+def test_systemd_listen_fds(monkeypatch: Any) -> None:
+    monkeypatch.setenv("LISTEN_PID", str(os.getpid()))
+    monkeypatch.setenv("LISTEN_FDS", "2")
+    monkeypatch.setenv("LISTEN_FDNAMES", "http:admin")
+
+    assert get_systemd_listen_fds() == [(SD_LISTEN_FDS_START, "http"), (SD_LISTEN_FDS_START + 1, "admin")]
+    assert get_listen_fd("systemd") == SD_LISTEN_FDS_START
+    assert get_listen_fd("admin") == SD_LISTEN_FDS_START + 1
+    assert get_listen_fd(10) == 10
+    assert get_listen_fd("10") == 10
+
+    with pytest.raises(ValueError):
+        get_listen_fd("unknown")
+
+    monkeypatch.setenv("LISTEN_PID", "1")
+    assert get_systemd_listen_fds() == []
+    with pytest.raises(ValueError):
+        get_listen_fd("systemd")
+
+
+def test_unix_socket_and_inherited_socket_listeners(monkeypatch: Any, tmp_path: Any, loop: Any) -> None:
+    unix_socket_path = str(tmp_path / "http.sock")
+
+    # stale socket file from a previous process
+    stale_sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale_sock.bind(unix_socket_path)
+    stale_sock.close()
+
+    listen_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listen_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listen_sock.bind(("127.0.0.1", 0))
+    listen_sock.listen(100)
+    listen_port = listen_sock.getsockname()[1]
+
+    monkeypatch.setenv("TOMODACHI_TEST_UNIX_SOCKET", unix_socket_path)
+    monkeypatch.setenv("TOMODACHI_TEST_LISTEN_FD", str(listen_sock.fileno()))
+
+    services, future = start_service("tests/services/http_service_unix_socket.py", loop=loop)
+    unix_socket_instance = services.get("test_http_unix_socket")
+    listen_fd_instance = services.get("test_http_listen_fd")
+
+    assert unix_socket_instance.context.get("_http_unix_socket") == unix_socket_path
+    assert unix_socket_instance.context.get("_http_port") is None
+    assert stat.S_IMODE(os.stat(unix_socket_path).st_mode) == 0o660
+    assert listen_fd_instance.context.get("_http_port") == listen_port
+
+    async def _async() -> None:
+        async with aiohttp.ClientSession(connector=aiohttp.UnixConnector(path=unix_socket_path)) as client:
+            response = await client.get("http://localhost/test")
+            assert response.status == 200
+            assert await response.text() == "test unix"
+
+        async with aiohttp.ClientSession() as client:
+            response = await client.get("http://127.0.0.1:{}/test".format(listen_port))
+            assert response.status == 200
+            assert await response.text() == "test fd"
+
+    loop.run_until_complete(_async())
+
+    unix_socket_instance.stop_service()
+    loop.run_until_complete(future)
+
+    assert not os.path.exists(unix_socket_path)
+
+    # the inherited file descriptor is kept open when the server is closed
+    assert listen_sock.fileno() != -1
+    os.fstat(listen_sock.fileno())
+    listen_sock.close()
@@ -437,3 +437,52 @@ def test_access_log(loop: Any) -> None:
     loop.run_until_complete(future)
 
     assert os.path.exists(log_path) is False
+
+
+def test_access_log_sampling(loop: Any) -> None:
+    log_path = "/tmp/5f6b1d2e-8a0c-4a3e-9d57-2c1f0b7e4a19.log"
+
+    services, future = start_service("tests/services/http_access_log_sampling_service.py", loop=loop)
+    instance = services.get("test_http")
+    port = instance.context.get("_http_port")
+
+    async def _async(loop: Any) -> None:
+        async with aiohttp.ClientSession(loop=loop) as client:
+            for _ in range(5):
+                response = await client.get("http://127.0.0.1:{}/test".format(port))
+                assert await response.read() == b"test"
+            response = await client.get("http://127.0.0.1:{}/slow".format(port))
+            assert await response.read() == b"slow"
+            response = await client.get("http://127.0.0.1:{}/error".format(port))
+            assert response.status == 503
+            response = await client.get("http://127.0.0.1:{}/404".format(port))
+            assert response.status == 404
+
+        await asyncio.sleep(1.0)
+
+        with open(log_path) as file:
+            content = file.read()
+            assert '"request_path": "/test"' not in content
+            assert (
+                '"status_code": 200, "remote_ip": "127.0.0.1", "request_method": "GET", "request_path": "/slow"'
+                in content
+            )
+            assert (
+                '"status_code": 503, "remote_ip": "127.0.0.1", "request_method": "GET", "request_path": "/error"'
+                in content
+            )
+            assert (
+                '"status_code": 404, "remote_ip": "127.0.0.1", "request_method": "GET", "request_path": "/404"'
+                in content
+            )
+
+            assert "access log summary" in content
+            assert '"request_method": "GET", "route": "/test/?"' in content
+            assert '"request_count": 5, "status_counts": {"2xx": 5}' in content
+            assert '"request_count": 1, "status_counts": {"5xx": 1}' in content
+
+    loop.run_until_complete(_async(loop))
+    instance.stop_service()
+    loop.run_until_complete(future)
+
+    assert os.path.exists(log_path) is False
@@ -0,0 +1,60 @@
+from typing import Any
+
+import aiohttp
+import pytest
+
+from run_test_service_helper import start_service
+from tomodachi.transport.http import SSEResponse
+
+
+def test_sse_encode_event() -> None:
+    assert SSEResponse.encode_event("hello") == "data: hello\n\n"
+    assert SSEResponse.encode_event("a\nb", event="update", id="4") == "id: 4\nevent: update\ndata: a\ndata: b\n\n"
+    assert SSEResponse.encode_event({"key": "value"}, retry=1000) == 'retry: 1000\ndata: {"key": "value"}\n\n'
+
+
+def test_http_streaming(capsys: Any, loop: Any) -> None:
+    services, future = start_service("tests/services/http_service_streaming.py", loop=loop)
+    instance = services.get("test_http_streaming")
+    port = instance.context.get("_http_port")
+
+    async def _async() -> None:
+        async with aiohttp.ClientSession() as client:
+            response = await client.get("http://127.0.0.1:{}/generator".format(port))
+            assert response.status == 200
+            assert response.headers.get("Transfer-Encoding") == "chunked"
+            assert response.headers.get("Content-Type") == "text/plain; charset=utf-8"
+            chunks = []
+            async for chunk in response.content.iter_any():
+                chunks.append(chunk)
+            assert b"".join(chunks) == b"chunk-0\nchunk-1\nchunk-2\nchunk-3\nchunk-4\n"
+
+            response = await client.get("http://127.0.0.1:{}/stream".format(port))
+            assert response.status == 201
+            assert response.headers.get("X-Stream") == "1"
+            assert response.headers.get("Content-Type") == "text/csv"
+            assert await response.read() == b"first,second"
+
+            response = await client.get("http://127.0.0.1:{}/sse".format(port))
+            assert response.status == 200
+            assert response.headers.get("Content-Type") == "text/event-stream; charset=utf-8"
+            assert response.headers.get("Cache-Control") == "no-cache"
+            body = (await response.read()).decode()
+            assert body.startswith("id: 1\nevent: greeting\ndata: hello\ndata: world\n\n")
+            assert ": ping\n\n" in body
+            assert body.endswith('data: {"value": 4711}\n\ndata: plain\n\n')
+
+            response = await client.get("http://127.0.0.1:{}/broken".format(port))
+            assert response.status == 200
+            with pytest.raises(aiohttp.ClientPayloadError):
+                await response.read()
+
+    loop.run_until_complete(_async())
+
+    instance.stop_service()
+    loop.run_until_complete(future)
+
+    out, err = capsys.readouterr()
+    output = out + err
+    assert "broken stream" in output
+    assert "response_content_length=40" in output or "'response_content_length': 40" in output
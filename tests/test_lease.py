@@ -0,0 +1,107 @@
+import asyncio
+import os
+import time
+from typing import Any, List, Optional, Tuple
+
+import pytest
+
+from tomodachi.helpers.lease import LEASE_TTL, Lease, LeaseBackend, SQLiteLeaseBackend
+from tomodachi.transport.schedule import Scheduler
+
+
+def test_sqlite_lease_backend(loop: Any, tmp_path: Any) -> None:
+    backend = SQLiteLeaseBackend(os.path.join(str(tmp_path), "leases.sqlite3"))
+
+    async def _async() -> None:
+        lease = await backend.acquire("service/func/2023-01-01T00:00:00Z", "owner-1")
+        assert lease is not None
+        assert lease.token == 1
+        assert lease.expires_at > time.time()
+
+        assert await backend.acquire("service/func/2023-01-01T00:00:00Z", "owner-2") is None
+
+        # released leases that aren't completed can be acquired again, with a higher fencing token
+        await backend.release(lease, completed=False)
+        lease = await backend.acquire("service/func/2023-01-01T00:00:00Z", "owner-2")
+        assert lease is not None
+        assert lease.owner == "owner-2"
+        assert lease.token == 2
+
+        await backend.release(lease)
+        assert await backend.acquire("service/func/2023-01-01T00:00:00Z", "owner-1") is None
+
+        lease = await backend.acquire("service/func/2023-01-01T00:00:01Z", "owner-1", ttl=-1)
+        assert lease is not None
+        assert lease.token == 3
+
+        # expired leases can be taken over by another owner
+        lease = await backend.acquire("service/func/2023-01-01T00:00:01Z", "owner-2")
+        assert lease is not None
+        assert lease.token == 4
+
+        await backend.close()
+
+    loop.run_until_complete(_async())
+
+
+class Service(object):
+    name = "service"
+
+    async def func(self) -> None:
+        pass
+
+
+def test_lease_key() -> None:
+    service = Service()
+
+    assert (
+        Scheduler.get_lease_key(service, Service.func, "2023-01-01T00:00:07Z", interval=5)
+        == "service/Service.func/2023-01-01T00:00:05Z"
+    )
+    assert Scheduler.get_lease_key(
+        service, Service.func, "2023-01-01T00:00:07Z", interval=5
+    ) == Scheduler.get_lease_key(service, Service.func, "2023-01-01T00:00:09Z", interval=5)
+    assert (
+        Scheduler.get_lease_key(service, Service.func, "2023-01-01T01:00:00Z", interval="hourly")
+        == "service/Service.func/2023-01-01T01:00:00Z"
+    )
+    assert (
+        Scheduler.get_lease_key(service, Service.func, "2023-01-01T00:15:00Z", interval="*/15 * * * *")
+        == "service/Service.func/2023-01-01T00:15:00Z"
+    )
+
+
+class SlowLeaseBackend(LeaseBackend):
+    def __init__(self) -> None:
+        self.released: List[Tuple[Lease, bool]] = []
+
+    async def acquire(self, key: str, owner: str, ttl: float = LEASE_TTL) -> Optional[Lease]:
+        await asyncio.sleep(0.1)
+        return Lease(key, owner, 1, time.time() + ttl)
+
+    async def release(self, lease: Lease, completed: bool = True) -> None:
+        self.released.append((lease, completed))
+
+
+def test_lease_released_when_acquire_is_cancelled(loop: Any) -> None:
+    backend = SlowLeaseBackend()
+
+    async def _async() -> None:
+        task = asyncio.ensure_future(
+            Scheduler.acquire_lease({"schedule_lease_backend": backend}, "service/func/2023-01-01T00:00:00Z", "owner")
+        )
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert backend.released == []
+        await asyncio.sleep(0.2)
+
+        # the lease acquired after the cancellation is released without being completed
+        assert len(backend.released) == 1
+        lease, completed = backend.released[0]
+        assert lease.key == "service/func/2023-01-01T00:00:00Z"
+        assert completed is False
+
+    loop.run_until_complete(_async())
@@ -0,0 +1,170 @@
+import io
+import json
+import logging
+import threading
+import time
+from typing import Any, List
+
+import structlog
+
+import tomodachi
+from tomodachi.logging import BufferedHandler
+
+
+def _lines(stream: io.StringIO) -> List[Any]:
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def _buffered_logger(name: str, **kwargs: Any) -> Any:
+    stream = io.StringIO()
+    stream_handler = logging.StreamHandler(stream)
+    stream_handler.setFormatter(tomodachi.logging.JSONFormatter)
+    handler = BufferedHandler(stream_handler, **kwargs)
+
+    std_logger = logging.getLogger(name)
+    std_logger.propagate = False
+    std_logger.setLevel(logging.DEBUG)
+    std_logger.addHandler(handler)
+
+    return stream, stream_handler, handler, std_logger
+
+
+def test_buffered_handler() -> None:
+    stream, _, handler, std_logger = _buffered_logger("tomodachi.test_buffered")
+
+    try:
+        logger = tomodachi.logging.getLogger("tomodachi.test_buffered")
+        structlog.contextvars.bind_contextvars(request_id="c2d4ed43")
+        try:
+            logger.info("first message", value=1)
+        finally:
+            structlog.contextvars.unbind_contextvars("request_id")
+        logger.warning("second message", value=2)
+
+        try:
+            raise ValueError("test exception")
+        except ValueError:
+            logger.exception("third message")
+
+        handler.flush()
+
+        lines = _lines(stream)
+        assert [line["message"] for line in lines] == ["first message", "second message", "third message"]
+        assert lines[0]["request_id"] == "c2d4ed43"
+        assert lines[0]["value"] == 1
+        assert "request_id" not in lines[1]
+        assert lines[1]["level"] == "warning"
+        assert lines[2]["exc_type"] == "ValueError"
+        assert lines[2]["exc_message"] == "test exception"
+        assert handler.dropped_count == 0
+    finally:
+        std_logger.removeHandler(handler)
+        handler.close()
+
+    assert handler._thread is None
+
+
+def test_buffered_handler_concurrent_start() -> None:
+    stream, _, handler, std_logger = _buffered_logger("tomodachi.test_buffered_concurrent")
+    barrier = threading.Barrier(8)
+
+    def writer_thread_count() -> int:
+        return len([thread for thread in threading.enumerate() if thread.name == "tomodachi.logging"])
+
+    writer_threads = writer_thread_count()
+
+    def log(index: int) -> None:
+        barrier.wait()
+        for value in range(50):
+            std_logger.info("message", extra={"index": index, "value": value})
+
+    try:
+        threads = [threading.Thread(target=log, args=(index,)) for index in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        handler.flush()
+
+        # a single writer thread is started and no queued records are lost
+        assert writer_thread_count() == writer_threads + 1
+        assert len(_lines(stream)) == 400
+    finally:
+        std_logger.removeHandler(handler)
+        handler.close()
+
+
+def test_buffered_handler_drop_oldest() -> None:
+    stream, stream_handler, handler, std_logger = _buffered_logger(
+        "tomodachi.test_buffered_drop", max_queue_size=2, overflow_policy="drop_oldest"
+    )
+
+    try:
+        logger = tomodachi.logging.getLogger("tomodachi.test_buffered_drop")
+
+        # blocks the writer thread until the lock of the wrapped handler is released
+        stream_handler.acquire()
+        try:
+            logger.info("message 0")
+            for _ in range(50):
+                if not handler.queue_size:
+                    break
+                time.sleep(0.01)
+
+            for i in range(1, 6):
+                logger.info("message {}".format(i))
+            assert handler.queue_size == 2
+        finally:
+            stream_handler.release()
+
+        handler.flush()
+
+        lines = _lines(stream)
+        assert [line["message"] for line in lines] == ["message 0", "message 4", "message 5", "log records dropped"]
+        assert lines[-1]["dropped_count"] == 3
+        assert lines[-1]["level"] == "warning"
+        assert handler.dropped_count == 3
+    finally:
+        std_logger.removeHandler(handler)
+        handler.close()
+
+
+def test_buffered_handler_drop_newest() -> None:
+    stream, stream_handler, handler, std_logger = _buffered_logger(
+        "tomodachi.test_buffered_drop_newest", max_queue_size=2, overflow_policy="drop_newest"
+    )
+
+    try:
+        logger = tomodachi.logging.getLogger("tomodachi.test_buffered_drop_newest")
+
+        stream_handler.acquire()
+        try:
+            logger.info("message 0")
+            for _ in range(50):
+                if not handler.queue_size:
+                    break
+                time.sleep(0.01)
+
+            for i in range(1, 6):
+                logger.info("message {}".format(i))
+        finally:
+            stream_handler.release()
+
+        handler.flush()
+
+        lines = _lines(stream)
+        assert [line["message"] for line in lines] == ["message 0", "message 1", "message 2", "log records dropped"]
+        assert handler.dropped_count == 3
+    finally:
+        std_logger.removeHandler(handler)
+        handler.close()
+
+
+def test_buffered_handler_invalid_values() -> None:
+    for kwargs in ({"max_queue_size": 0}, {"overflow_policy": "drop_all"}):
+        try:
+            BufferedHandler(logging.StreamHandler(io.StringIO()), **kwargs)
+            assert False
+        except ValueError:
+            pass
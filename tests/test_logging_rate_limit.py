@@ -0,0 +1,102 @@
+import io
+import json
+import logging
+import time
+from typing import Any, List
+
+import pytest
+from structlog.exceptions import DropEvent
+
+import tomodachi
+from tomodachi.logging import LogRateLimiter
+
+
+def _lines(stream: io.StringIO) -> List[Any]:
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_rate_limiter_token_bucket() -> None:
+    rate_limiter = LogRateLimiter(10, burst=2)
+
+    event_dict = {"logger": "tomodachi.test", "event": "unable to receive message"}
+    assert rate_limiter(None, "error", dict(event_dict)) == event_dict
+    assert rate_limiter(None, "error", dict(event_dict)) == event_dict
+    with pytest.raises(DropEvent):
+        rate_limiter(None, "error", dict(event_dict))
+
+    # a different level, event or logger is limited separately
+    assert rate_limiter(None, "warning", dict(event_dict)) == event_dict
+    assert rate_limiter(None, "error", {**event_dict, "event": "other event"})
+    assert rate_limiter(None, "error", {**event_dict, "logger": "tomodachi.other"})
+
+    time.sleep(0.15)
+    assert rate_limiter(None, "error", dict(event_dict)) == event_dict
+    with pytest.raises(DropEvent):
+        rate_limiter(None, "error", dict(event_dict))
+
+
+def test_rate_limiter_sampling() -> None:
+    rate_limiter = LogRateLimiter(debug_sample_rate=0.0, info_sample_rate=0.5)
+
+    event_dict = {"logger": "tomodachi.test", "event": "message"}
+    with pytest.raises(DropEvent):
+        rate_limiter(None, "debug", dict(event_dict))
+
+    for _ in range(100):
+        assert rate_limiter(None, "warning", dict(event_dict)) == event_dict
+
+    kept = 0
+    for _ in range(1000):
+        try:
+            rate_limiter(None, "info", dict(event_dict))
+            kept += 1
+        except DropEvent:
+            pass
+    assert 300 < kept < 700
+
+
+def test_rate_limiter_invalid_values() -> None:
+    for args, kwargs in (((0,), {}), ((1,), {"burst": 0}), ((), {"info_sample_rate": 1.5})):
+        with pytest.raises(ValueError):
+            LogRateLimiter(*args, **kwargs)
+
+
+def test_rate_limited_logger() -> None:
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(tomodachi.logging.JSONFormatter)
+    std_logger = logging.getLogger("tomodachi.test_rate_limit")
+    std_logger.propagate = False
+    std_logger.setLevel(logging.DEBUG)
+    std_logger.addHandler(handler)
+
+    tomodachi.logging.set_rate_limit(1, burst=3)
+    try:
+        logger = tomodachi.logging.getLogger("tomodachi.test_rate_limit")
+        for _ in range(10):
+            try:
+                raise ValueError("test exception")
+            except ValueError:
+                logger.exception("uncaught exception")
+        logger.info("other event")
+
+        tomodachi.logging.flush_handlers()
+
+        lines = _lines(stream)
+        assert [line["message"] for line in lines] == [
+            "uncaught exception",
+            "uncaught exception",
+            "uncaught exception",
+            "other event",
+            "suppressed similar log events",
+        ]
+        assert lines[0]["exc_type"] == "ValueError"
+        assert lines[-1]["level"] == "warning"
+        assert lines[-1]["suppressed_count"] == 7
+        assert lines[-1]["suppressed_event"] == "uncaught exception"
+        assert lines[-1]["suppressed_level"] == "exception"
+    finally:
+        tomodachi.logging.set_rate_limit(None)
+        std_logger.removeHandler(handler)
+
+    assert tomodachi.logging._rate_limiter is None
@@ -0,0 +1,53 @@
+import asyncio
+from typing import Any, Callable, Dict, List
+
+from tomodachi import get_contextvar, logging
+from tomodachi.helpers.middleware import TOMODACHI_MIDDLEWARE_ATTRIBUTE, execute_middlewares
+
+
+def test_execute_middlewares(loop: Any) -> None:
+    calls: List[Any] = []
+
+    async def middleware_a(func: Callable, service: Any, value: int, context: Dict) -> Any:
+        context["a"] = True
+        calls.append(("a", value, get_contextvar("service.logger").get()))
+        result = await func(extra="from-a")
+        calls.append(("a-after", logging.get_logger()._context.get("middleware")))
+        return result
+
+    class MiddlewareB:
+        async def __call__(self, func: Callable, service: Any, value: int, context: Dict, **kwargs: Any) -> Any:
+            calls.append(("b", context.get("a"), kwargs.get("extra"), logging.get_logger()._context.get("middleware")))
+            return await func()
+
+    middleware_b = MiddlewareB()
+
+    async def routine_func(*a: Any, **kwargs: Any) -> Any:
+        calls.append(("handler", kwargs, asyncio.current_task()))
+        return kwargs["value"] * 2
+
+    async def handler() -> None:
+        pass
+
+    async def _async() -> None:
+        logging.bind_logger(logging.getLogger("tomodachi.test.middleware"))
+        current_task = asyncio.current_task()
+
+        for _ in range(2):
+            calls.clear()
+            result = await execute_middlewares(
+                handler, routine_func, [middleware_a, middleware_b], *(object(), 21), value=21
+            )
+            assert result == 42
+
+            assert calls[0] == ("a", 21, "tomodachi.test.middleware")
+            assert calls[1] == ("b", True, "from-a", "MiddlewareB")
+            assert calls[2][0] == "handler"
+            assert calls[2][1] == {"value": 21, "extra": "from-a"}
+            assert calls[2][2] is current_task
+            assert calls[3] == ("a-after", "middleware_a")
+
+        assert getattr(middleware_a, TOMODACHI_MIDDLEWARE_ATTRIBUTE)[-1] == "middleware_a"
+        assert await execute_middlewares(handler, routine_func, [], *(object(), 4), value=4) == 8
+
+    loop.run_until_complete(_async())
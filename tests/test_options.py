@@ -64,11 +64,19 @@ def test_default_values() -> None:
         "http.port": 9700,
         "http.host": "0.0.0.0",
         "http.reuse_port": True if platform.system() == "Linux" else False,
+        "http.unix_socket": None,
+        "http.unix_socket_permissions": None,
+        "http.listen_fd": None,
         "http.content_type": "text/plain; charset=utf-8",
         "http.charset": "utf-8",
         "http.client_max_size": 104857600,
         "http.termination_grace_period_seconds": 30,
         "http.access_log": True,
+        "http.access_log_sample_rate": 1.0,
+        "http.access_log_client_error_sample_rate": 1.0,
+        "http.access_log_slow_request_threshold": None,
+        "http.access_log_batch_interval": None,
+        "http.access_log_summary_interval": None,
         "http.real_ip_from": [],
         "http.real_ip_header": "X-Forwarded-For",
         "http.keepalive_timeout": 0,
@@ -76,6 +84,14 @@ def test_default_values() -> None:
         "http.max_keepalive_time": None,
         "http.max_keepalive_requests": None,
         "http.server_header": "tomodachi",
+        "http.max_concurrent_requests": None,
+        "http.max_queued_requests": 100,
+        "http.request_queue_timeout": 5.0,
+        "http.overload_retry_after": 1,
+        "http.adaptive_concurrency": False,
+        "http.websocket_max_queue_size": 100,
+        "http.websocket_overflow_policy": "drop_oldest",
+        "http.cancel_on_disconnect": False,
         "aws_sns_sqs.region_name": None,
         "aws_sns_sqs.aws_access_key_id": None,
         "aws_sns_sqs.aws_secret_access_key": None,
@@ -100,10 +116,31 @@ def test_default_values() -> None:
         "amqp.ssl": False,
         "amqp.heartbeat": 60,
         "amqp.queue_ttl": 86400,
+        "amqp.publisher_confirms": False,
+        "amqp.publisher_confirms_window": 1000,
+        "amqp.publish_channels": 1,
+        "amqp.ack_flush_interval": 0.0,
+        "amqp.reconnect": True,
+        "amqp.reconnect_delay": 1.0,
+        "amqp.reconnect_max_delay": 30.0,
+        "amqp.publish_buffer_size": 0,
         "amqp.qos.queue_prefetch_count": 100,
         "amqp.qos.global_prefetch_count": 400,
         "watcher.ignored_dirs": [],
         "watcher.watched_file_endings": [],
+        "executor.thread_max_workers": None,
+        "executor.process_max_workers": None,
+        "http_client.limit": 100,
+        "http_client.limit_per_host": 0,
+        "http_client.dns_cache_ttl": 30,
+        "http_client.keepalive_timeout": 15,
+        "http_client.connect_timeout": 8,
+        "http_client.timeout": 30,
+        "http_client.retries": 2,
+        "http_client.retry_backoff": 0.1,
+        "http_client.circuit_breaker_threshold": 5,
+        "http_client.circuit_breaker_reset_timeout": 30,
+        "http_client.propagate_trace_context": True,
     }
 
     assert Options.HTTP().port == 9700
@@ -111,11 +148,19 @@ def test_default_values() -> None:
         "port": 9700,
         "host": "0.0.0.0",
         "reuse_port": True if platform.system() == "Linux" else False,
+        "unix_socket": None,
+        "unix_socket_permissions": None,
+        "listen_fd": None,
         "content_type": "text/plain; charset=utf-8",
         "charset": "utf-8",
         "client_max_size": 104857600,
         "termination_grace_period_seconds": 30,
         "access_log": True,
+        "access_log_sample_rate": 1.0,
+        "access_log_client_error_sample_rate": 1.0,
+        "access_log_slow_request_threshold": None,
+        "access_log_batch_interval": None,
+        "access_log_summary_interval": None,
         "real_ip_from": [],
         "real_ip_header": "X-Forwarded-For",
         "keepalive_timeout": 0,
@@ -123,6 +168,14 @@ def test_default_values() -> None:
         "max_keepalive_time": None,
         "max_keepalive_requests": None,
         "server_header": "tomodachi",
+        "max_concurrent_requests": None,
+        "max_queued_requests": 100,
+        "request_queue_timeout": 5.0,
+        "overload_retry_after": 1,
+        "adaptive_concurrency": False,
+        "websocket_max_queue_size": 100,
+        "websocket_overflow_policy": "drop_oldest",
+        "cancel_on_disconnect": False,
     }
 
 
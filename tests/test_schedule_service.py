@@ -1,7 +1,12 @@
 import asyncio
-from typing import Any
+import datetime
+import time
+from typing import Any, List
+
+import pytest
 
 from run_test_service_helper import start_service
+from tomodachi.transport.schedule import ScheduledFunction, ScheduleEngine, Scheduler
 
 
 def test_schedule_service(capsys: Any, loop: Any) -> None:
@@ -33,3 +38,167 @@ def test_schedule_service(capsys: Any, loop: Any) -> None:
     loop.run_until_complete(_async(loop))
     instance.stop_service()
     loop.run_until_complete(future)
+
+
+def test_schedule_next_runs(capsys: Any, loop: Any) -> None:
+    services, future = start_service("tests/services/schedule_service.py", loop=loop)
+
+    instance = services.get("test_schedule")
+    assert instance is not None
+
+    async def _async(loop: Any) -> None:
+        await asyncio.sleep(3.5)
+
+        next_runs = Scheduler.next_runs(instance)
+        assert len(next_runs) == 8
+        assert [run["next_call_at"] for run in next_runs] == sorted(run["next_call_at"] for run in next_runs)
+
+        runs = {run["handler"].split(".")[-1]: run for run in next_runs}
+        assert runs["every_second"]["next_call_at"] - time.time() <= 1.0
+        assert runs["every_second"]["next_call_at"] - runs["every_second"]["prev_call_at"] == 1
+        assert runs["every_third_second"]["next_call_at"] - runs["every_third_second"]["prev_call_at"] == 3
+        assert runs["midnight"]["prev_call_at"] is None
+
+    loop.run_until_complete(_async(loop))
+    instance.stop_service()
+    loop.run_until_complete(future)
+
+
+def test_next_call_at() -> None:
+    t = datetime.datetime(2024, 3, 30, 12, 0, 10, tzinfo=datetime.timezone.utc).timestamp()
+
+    assert Scheduler.next_call_at(t, 5) == int(t + 5)
+    assert Scheduler.next_call_at(t, "10 seconds") == int(t + 10)
+    assert Scheduler.next_call_at(t, "minutely", timezone="UTC") == int(t + 50)
+    assert Scheduler.next_call_at(t, "*/15 * * * *", timezone="UTC") == int(t + 14 * 60 + 50)
+    assert Scheduler.next_call_at(t, timestamp="12:00:30", timezone="UTC") == int(t + 20)
+    assert Scheduler.next_call_at(t, timestamp="12:00:05", timezone="UTC") == int(t + 86400 - 5)
+    assert Scheduler.next_call_at(t, timestamp="2024-03-30 12:01", timezone="UTC") == int(t + 50)
+    assert Scheduler.next_call_at(t, timestamp="2024-03-30 11:00", timezone="UTC") > t + 86400 * 365 * 50
+
+    # the clock is turned forward in Europe/Stockholm on 2024-03-31
+    assert Scheduler.next_call_at(t, timestamp="08:00", timezone="Europe/Stockholm") == int(
+        datetime.datetime(2024, 3, 31, 6, 0, tzinfo=datetime.timezone.utc).timestamp()
+    )
+    assert Scheduler.next_call_at(t, "daily", timezone=Scheduler.get_timezone("+01:00")) == int(
+        datetime.datetime(2024, 3, 30, 23, 0, tzinfo=datetime.timezone.utc).timestamp()
+    )
+
+    with pytest.raises(Exception):
+        Scheduler.next_call_at(t, "invalid")
+    with pytest.raises(Exception):
+        Scheduler.next_call_at(t, timestamp="invalid")
+    with pytest.raises(Exception):
+        Scheduler.next_call_at(t, "minutely", timezone="Invalid/Timezone")
+
+
+def test_schedule_exclusive(capsys: Any, loop: Any) -> None:
+    services, future = start_service("tests/services/schedule_exclusive_service.py", loop=loop)
+
+    instance = services.get("test_schedule_exclusive")
+    assert instance is not None
+
+    async def _async(loop: Any) -> None:
+        await asyncio.sleep(2.5)
+
+        assert len(instance.fencing_tokens) >= 2
+        assert instance.fencing_tokens == sorted(set(instance.fencing_tokens))
+
+        # the invocations that have already been run can't be run again, for example by another instance.
+        lease_key = Scheduler.get_lease_key(
+            instance, type(instance).every_second, instance.invocation_times[0], interval=1
+        )
+        assert await instance.schedule_lease_backend.acquire(lease_key, "other-instance") is None
+
+    loop.run_until_complete(_async(loop))
+    instance.stop_service()
+    loop.run_until_complete(future)
+
+
+def test_schedule_policies(loop: Any) -> None:
+    class Service(object):
+        name = "test_schedule_policies"
+        uuid = "7f0c7a8e-1c44-4c86-9c07-1c0f9d3e6a55"
+
+        async def func(self) -> None:
+            pass
+
+    service = Service()
+
+    async def _async() -> None:
+        invocation_times: List[str] = []
+        waiter: asyncio.Future = asyncio.Future()
+
+        async def handler(invocation_time: str) -> None:
+            invocation_times.append(invocation_time)
+            await waiter
+
+        engine = ScheduleEngine(asyncio.Future())
+        current_time = 1672531200.0  # 2023-01-01T00:00:00Z
+
+        # catch-up policies for invocations missed since the previous invocation
+        for catch_up, expected_runs, expected_skipped_runs, expected_late_runs in (
+            ("none", 1, 5, 1),
+            ("coalesce", 2, 4, 1),
+            ("all", 6, 0, 5),
+        ):
+            invocation_times.clear()
+            function = ScheduledFunction(service, Service.func, handler, interval=60, catch_up=catch_up)
+            function.next_call_at = current_time - 300
+            while function.next_call_at is not None and function.next_call_at <= current_time:
+                engine._fire(function, current_time)
+            await asyncio.sleep(0)
+            assert len(invocation_times) == expected_runs
+            assert function.skipped_runs == expected_skipped_runs
+            assert function.late_runs == expected_late_runs
+            assert function.next_call_at == current_time + 60
+        assert invocation_times[-1] == "2023-01-01T00:00:00Z"
+
+        # overlap policies when the previous invocation is still running
+        for overlap, expected_runs, expected_queued_runs, expected_skipped_runs in (
+            ("allow", 3, 0, 0),
+            ("skip", 1, 0, 2),
+            ("queue", 1, 2, 0),
+        ):
+            invocation_times.clear()
+            function = ScheduledFunction(service, Service.func, handler, interval=1, overlap=overlap)
+            for i in range(3):
+                function.next_call_at = current_time + i
+                engine._fire(function, current_time + i)
+            await asyncio.sleep(0)
+            assert len(invocation_times) == expected_runs
+            assert len(function.queued) == expected_queued_runs
+            assert function.skipped_runs == expected_skipped_runs
+
+        waiter.set_result(None)
+        await asyncio.sleep(0.1)
+        assert len(invocation_times) == 3
+        assert invocation_times == ["2023-01-01T00:00:00Z", "2023-01-01T00:00:01Z", "2023-01-01T00:00:02Z"]
+
+        with pytest.raises(ValueError):
+            ScheduledFunction(service, Service.func, handler, interval=1, overlap="wait")
+        with pytest.raises(ValueError):
+            ScheduledFunction(service, Service.func, handler, interval=1, catch_up="some")
+
+    loop.run_until_complete(_async())
+
+
+def test_schedule_jitter() -> None:
+    class Service(object):
+        name = "test_schedule_jitter"
+        uuid = "7f0c7a8e-1c44-4c86-9c07-1c0f9d3e6a55"
+
+        async def func(self) -> None:
+            pass
+
+    async def handler(invocation_time: str) -> None:
+        pass
+
+    service = Service()
+    function = ScheduledFunction(service, Service.func, handler, interval=60, jitter=30)
+    assert 0 <= function.jitter < 30
+    assert function.jitter == Scheduler.get_jitter_offset(service, Service.func, 30)
+
+    other_service = Service()
+    other_service.uuid = "0a6e3a9f-5d0b-4bd5-8f8e-8a4a3bd2a1f4"
+    assert Scheduler.get_jitter_offset(other_service, Service.func, 30) != function.jitter
@@ -0,0 +1,197 @@
+import asyncio
+from typing import Any, List
+
+import pytest
+
+from tomodachi.helpers.singleflight import SingleFlight, singleflight
+
+
+def test_singleflight_coalesces_concurrent_calls(loop: Any) -> None:
+    calls: List[str] = []
+
+    async def load(value: str) -> str:
+        calls.append(value)
+        await asyncio.sleep(0.05)
+        return value.upper()
+
+    async def _async() -> None:
+        group = SingleFlight()
+        results = await asyncio.gather(*[group.do("key", load, "a") for _ in range(10)], group.do("other", load, "b"))
+
+        assert results == ["A"] * 10 + ["B"]
+        assert calls == ["a", "b"]
+        assert group.stats() == {"hits": 0, "misses": 2, "coalesced": 9, "in_flight": 0, "cached": 0}
+
+        # without a ttl, results are not kept once the call has completed
+        assert await group.do("key", load, "a") == "A"
+        assert calls == ["a", "b", "a"]
+
+    loop.run_until_complete(_async())
+
+
+def test_singleflight_errors_are_shared_and_not_cached(loop: Any) -> None:
+    calls: List[int] = []
+
+    async def fail() -> None:
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("failed")
+
+    async def _async() -> None:
+        group = SingleFlight(ttl=60)
+        results = await asyncio.gather(group.do("key", fail), group.do("key", fail), return_exceptions=True)
+        assert [type(r) for r in results] == [ValueError, ValueError]
+        assert len(calls) == 1
+
+        with pytest.raises(ValueError):
+            await group.do("key", fail)
+        assert len(calls) == 2
+        assert len(group) == 0
+
+    loop.run_until_complete(_async())
+
+
+def test_singleflight_cancelled_waiter(loop: Any) -> None:
+    async def _async() -> None:
+        group = SingleFlight()
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def work() -> str:
+            started.set()
+            await release.wait()
+            return "done"
+
+        first = asyncio.ensure_future(group.do("key", work))
+        second = asyncio.ensure_future(group.do("key", work))
+        await started.wait()
+
+        # cancelling one of the callers doesn't cancel the shared work
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        assert await second == "done"
+        assert first.cancelled()
+
+        # the work is cancelled when every caller has been cancelled
+        started.clear()
+        release.clear()
+        third = asyncio.ensure_future(group.do("key", work))
+        await started.wait()
+        task = group._calls["key"].task
+        third.cancel()
+        await asyncio.gather(third, task, return_exceptions=True)
+        assert task.cancelled()
+        assert group.in_flight == 0
+
+    loop.run_until_complete(_async())
+
+
+def test_singleflight_call_after_cancelled_work(loop: Any) -> None:
+    async def _async() -> None:
+        group = SingleFlight()
+        started = asyncio.Event()
+        release = asyncio.Event()
+        calls: List[int] = []
+
+        async def work() -> str:
+            calls.append(1)
+            started.set()
+            await release.wait()
+            return "done"
+
+        async def call_again_when_cancelled() -> str:
+            try:
+                return await group.do("key", work)
+            except asyncio.CancelledError:
+                # the cancelled work is not done until the loop has run it again – a call made before then must not
+                # be coalesced with the cancelled work.
+                return await group.do("key", work)
+
+        caller = asyncio.ensure_future(call_again_when_cancelled())
+        await started.wait()
+        task = group._calls["key"].task
+        caller.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        assert task.cancelled()
+
+        release.set()
+        assert await caller == "done"
+        assert len(calls) == 2
+        assert group.in_flight == 0
+
+    loop.run_until_complete(_async())
+
+
+def test_singleflight_ttl_lru_cache(loop: Any) -> None:
+    calls: List[int] = []
+
+    async def load(value: int) -> int:
+        calls.append(value)
+        return value * 2
+
+    async def _async() -> None:
+        group = SingleFlight(ttl=60, max_size=2)
+        assert await group.do(1, load, 1) == 2
+        assert await group.do(1, load, 1) == 2
+        assert group.hit_count == 1
+
+        await group.do(2, load, 2)
+        await group.do(1, load, 1)
+        await group.do(3, load, 3)
+
+        # key 2 was the least recently used key
+        assert group.get_cached(1) == 2
+        assert group.get_cached(2) is None
+        assert group.get_cached(3) == 6
+        assert calls == [1, 2, 3]
+
+        group.forget(1)
+        await group.do(1, load, 1)
+        assert calls == [1, 2, 3, 1]
+
+        group._cache[1] = (0, 2)
+        await group.do(1, load, 1)
+        assert calls == [1, 2, 3, 1, 1]
+
+    loop.run_until_complete(_async())
+
+
+def test_singleflight_decorator(loop: Any) -> None:
+    class Service(object):
+        calls = 0
+
+        @singleflight(ttl=60, key=lambda self, name, **kwargs: name)
+        async def load_config(self, name: str, reload: bool = False) -> str:
+            self.calls += 1
+            await asyncio.sleep(0.01)
+            return "config:{}".format(name)
+
+        @singleflight
+        async def load(self, value: int) -> int:
+            self.calls += 1
+            await asyncio.sleep(0.01)
+            return value
+
+    async def _async() -> None:
+        service = Service()
+        results = await asyncio.gather(
+            *[asyncio.ensure_future(service.load_config("a", reload=bool(i % 2))) for i in range(5)]
+        )
+        assert results == ["config:a"] * 5
+        assert service.calls == 1
+        assert await service.load_config("a") == "config:a"
+        assert service.calls == 1
+        assert getattr(Service.load_config, "singleflight").stats()["hits"] == 1
+
+        assert await asyncio.gather(service.load(1), service.load(1), service.load(2)) == [1, 1, 2]
+        assert service.calls == 3
+
+    loop.run_until_complete(_async())
+
+
+def test_singleflight_bad_values() -> None:
+    with pytest.raises(ValueError):
+        SingleFlight(ttl=-1)
+    with pytest.raises(ValueError):
+        SingleFlight(max_size=0)
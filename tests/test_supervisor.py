@@ -0,0 +1,94 @@
+import os
+import platform
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Set
+
+import pytest
+
+PORT = 53260
+
+
+def get_pid() -> str:
+    with urllib.request.urlopen("http://127.0.0.1:{}/pid".format(PORT), timeout=2) as response:
+        return response.read().decode()
+
+
+def wait_for_pids(count: int, timeout: float = 15.0) -> Set[str]:
+    pids: Set[str] = set()
+    start_time = time.time()
+    while len(pids) < count and time.time() - start_time < timeout:
+        try:
+            pids.add(get_pid())
+        except Exception:
+            time.sleep(0.1)
+    return pids
+
+
+def pid_exists(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+@pytest.mark.skipif(
+    platform.system() != "Linux",
+    reason="SO_REUSEPORT can only be enabled on Linux",
+)
+def test_workers_restart_and_graceful_stop() -> None:
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "tomodachi.run",
+            "--production",
+            "--workers",
+            "2",
+            "tests/services/http_service_workers.py",
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        env={**os.environ, "TOMODACHI_LOGGER": "json"},
+    )
+
+    try:
+        pids = wait_for_pids(2)
+        assert len(pids) == 2
+
+        # a crashed worker is replaced by a new worker process
+        try:
+            urllib.request.urlopen("http://127.0.0.1:{}/crash".format(PORT), timeout=2)
+        except Exception:
+            pass
+
+        start_time = time.time()
+        new_pids: Set[str] = set()
+        while time.time() - start_time < 15:
+            new_pids = wait_for_pids(2, timeout=2)
+            if len(new_pids - pids) >= 1 and len(new_pids) == 2:
+                break
+        assert len(new_pids - pids) >= 1
+        assert len([pid for pid in pids | new_pids if pid_exists(int(pid))]) == 2
+
+        worker_pids = [int(pid) for pid in pids | new_pids if pid_exists(int(pid))]
+
+        # termination signals are forwarded to the workers
+        process.send_signal(signal.SIGTERM)
+        output, _ = process.communicate(timeout=30)
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.communicate()
+
+    assert process.returncode == 0
+    assert not [pid for pid in worker_pids if pid_exists(pid)]
+
+    output_str = output.decode()
+    assert "starting workers" in output_str
+    assert "worker exited unexpectedly - restarting" in output_str
+    assert "all workers stopped" in output_str
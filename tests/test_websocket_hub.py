@@ -0,0 +1,165 @@
+import asyncio
+from typing import Any, List, Tuple
+
+import aiohttp
+import pytest
+
+from run_test_service_helper import start_service
+from tomodachi.helpers.websocket_hub import WebSocketHub, encode_frame
+
+
+class FakeWriter(object):
+    def __init__(self, blocked: bool = False) -> None:
+        self.sent: List[Tuple[bytes, bool]] = []
+        self.unblocked = asyncio.Event()
+        if not blocked:
+            self.unblocked.set()
+
+    async def send(self, message: bytes, binary: bool = False) -> None:
+        await self.unblocked.wait()
+        self.sent.append((message, binary))
+
+
+class FakeWebSocket(object):
+    def __init__(self, blocked: bool = False) -> None:
+        self._writer = FakeWriter(blocked)
+        self.closed = False
+        self.close_code = None
+
+    async def close(self, code: int = 1000, message: bytes = b"") -> None:
+        self.closed = True
+        self.close_code = code
+
+
+def test_encode_frame() -> None:
+    assert encode_frame("hello") == (b"hello", False)
+    assert encode_frame(b"\x00\x01") == (b"\x00\x01", True)
+    assert encode_frame({"a": 1}) == (b'{"a": 1}', False)
+
+
+def test_websocket_hub_rooms(loop: Any) -> None:
+    async def _async() -> None:
+        hub = WebSocketHub()
+        ws1, ws2, ws3 = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        hub.join(ws1, "a", "b")
+        hub.join(ws2, "a")
+        hub.add(ws3)
+
+        assert len(hub) == 3
+        assert hub.room_size("a") == 2
+        assert hub.rooms_for(ws1) == {"a", "b"}
+
+        assert hub.broadcast("to-a", "a") == 2
+        assert hub.broadcast("to-all") == 3
+        assert hub.broadcast("to-a-b", ["a", "b"], exclude=ws2) == 1
+        await asyncio.sleep(0.01)
+
+        assert [m for m, _ in ws1._writer.sent] == [b"to-a", b"to-all", b"to-a-b"]
+        assert [m for m, _ in ws2._writer.sent] == [b"to-a", b"to-all"]
+        assert [m for m, _ in ws3._writer.sent] == [b"to-all"]
+
+        hub.leave(ws2, "a")
+        assert hub.room_size("a") == 1
+        hub.remove(ws1)
+        assert hub.room_size("a") == 0
+        assert "a" not in hub.rooms
+        assert ws1 not in hub
+        assert hub.broadcast("after") == 2
+
+    loop.run_until_complete(_async())
+
+
+@pytest.mark.parametrize(
+    "overflow_policy, expected",
+    [("drop_oldest", [b"2", b"3", b"4"]), ("drop_newest", [b"0", b"1", b"2"]), ("disconnect", [])],
+)
+def test_websocket_hub_slow_client(loop: Any, overflow_policy: str, expected: List[bytes]) -> None:
+    async def _async() -> None:
+        hub = WebSocketHub(max_queue_size=3, overflow_policy=overflow_policy)
+        slow, fast = FakeWebSocket(blocked=True), FakeWebSocket()
+        hub.add(slow)
+        hub.add(fast)
+        await asyncio.sleep(0)
+
+        # the first frame is picked up by the sender task of the slow client, which then blocks on the write
+        hub.broadcast("first")
+        await asyncio.sleep(0)
+
+        for i in range(5):
+            hub.broadcast(str(i))
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)
+
+        assert len(fast._writer.sent) == 6
+
+        slow._writer.unblocked.set()
+        await asyncio.sleep(0.01)
+        if overflow_policy == "disconnect":
+            assert slow.closed is True
+            assert slow.close_code == 1008
+            assert slow not in hub
+            assert hub.disconnected_count == 1
+        else:
+            assert [m for m, _ in slow._writer.sent] == [b"first"] + expected
+            assert hub.dropped_count == 2
+
+    loop.run_until_complete(_async())
+
+
+def test_websocket_hub_sender_cancelled(loop: Any) -> None:
+    async def _async() -> None:
+        hub = WebSocketHub()
+        slow = FakeWebSocket(blocked=True)
+        connection = hub.add(slow)
+        hub.broadcast("first")
+        hub.broadcast("second")
+        await asyncio.sleep(0)
+
+        sender = connection._sender
+        assert sender is not None
+        sender.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await sender
+
+        assert sender.cancelled() is True
+        assert connection.queued == 0
+
+    loop.run_until_complete(_async())
+
+
+def test_websocket_hub_service(loop: Any) -> None:
+    services, future = start_service("tests/services/http_service_websocket_hub.py", loop=loop)
+    instance = services.get("test_http_websocket_hub")
+    port = instance.context.get("_http_port")
+
+    async def _async() -> None:
+        async with aiohttp.ClientSession() as client:
+            ws1 = await client.ws_connect("http://127.0.0.1:{}/ws/lobby".format(port))
+            ws2 = await client.ws_connect("http://127.0.0.1:{}/ws/lobby".format(port))
+            ws3 = await client.ws_connect("http://127.0.0.1:{}/ws/other".format(port))
+            await asyncio.sleep(0.1)
+
+            response = await client.post("http://127.0.0.1:{}/broadcast/lobby".format(port), data="hello")
+            assert await response.text() == "2"
+            assert (await ws1.receive_str(timeout=2)) == "hello"
+            assert (await ws2.receive_str(timeout=2)) == "hello"
+
+            await ws1.send_str("from ws1")
+            assert (await ws2.receive_str(timeout=2)) == "from ws1"
+
+            response = await client.post("http://127.0.0.1:{}/broadcast/all".format(port), data="everyone")
+            assert await response.text() == "3"
+            assert (await ws3.receive_str(timeout=2)) == "everyone"
+
+            await ws3.close()
+            await asyncio.sleep(0.1)
+            response = await client.post("http://127.0.0.1:{}/broadcast/all".format(port), data="again")
+            assert await response.text() == "2"
+
+            instance.stop_service()
+            await future
+
+            await ws1.close()
+            await ws2.close()
+
+    loop.run_until_complete(_async())
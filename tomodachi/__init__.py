@@ -42,6 +42,8 @@ __available_defs: Dict[str, Union[Tuple[str], Tuple[str, Optional[str]]]] = {
     "sqs_send_message": ("tomodachi.transport.aws_sns_sqs",),
     "HttpException": ("tomodachi.transport.http",),
     "HttpResponse": ("tomodachi.transport.http", "Response"),
+    "HttpStreamResponse": ("tomodachi.transport.http", "StreamResponse"),
+    "HttpSSEResponse": ("tomodachi.transport.http", "SSEResponse"),
     "get_http_response_status": ("tomodachi.transport.http",),
     "get_http_response_status_sync": ("tomodachi.transport.http",),
     "get_forwarded_remote_ip": ("tomodachi.transport.http",),
@@ -50,6 +52,11 @@ __available_defs: Dict[str, Union[Tuple[str], Tuple[str, Optional[str]]]] = {
     "http_static": ("tomodachi.transport.http",),
     "websocket": ("tomodachi.transport.http",),
     "ws": ("tomodachi.transport.http",),
+    "get_websocket_hub": ("tomodachi.transport.http",),
+    "WebSocketHub": ("tomodachi.helpers.websocket_hub",),
+    "get_http_client": ("tomodachi.helpers.http_client",),
+    "HttpClient": ("tomodachi.helpers.http_client",),
+    "CircuitOpenError": ("tomodachi.helpers.http_client",),
     "daily": ("tomodachi.transport.schedule",),
     "heartbeat": ("tomodachi.transport.schedule",),
     "every_second": ("tomodachi.transport.schedule",),
@@ -303,7 +310,14 @@ __all__ = [
     "http_static",
     "websocket",
     "ws",
+    "get_websocket_hub",
+    "WebSocketHub",
+    "get_http_client",
+    "HttpClient",
+    "CircuitOpenError",
     "HttpResponse",
+    "HttpStreamResponse",
+    "HttpSSEResponse",
     "HttpException",
     "get_http_response_status",
     "get_http_response_status_sync",
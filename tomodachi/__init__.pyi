@@ -31,6 +31,10 @@ from tomodachi.helpers.execution_context import increase_execution_context_value
 from tomodachi.helpers.execution_context import set_execution_context as set_execution_context
 from tomodachi.helpers.execution_context import set_service as _set_service
 from tomodachi.helpers.execution_context import unset_service as _unset_service
+from tomodachi.helpers.http_client import CircuitOpenError as CircuitOpenError
+from tomodachi.helpers.http_client import HttpClient as HttpClient
+from tomodachi.helpers.http_client import get_http_client as get_http_client
+from tomodachi.helpers.websocket_hub import WebSocketHub as WebSocketHub
 from tomodachi.invoker import decorator as decorator
 from tomodachi.logging import Logger as Logger
 from tomodachi.logging import LoggerProtocol as LoggerProtocol
@@ -49,9 +53,12 @@ from tomodachi.transport.aws_sns_sqs import sns_publish as sns_publish
 from tomodachi.transport.aws_sns_sqs import sqs_send_message as sqs_send_message
 from tomodachi.transport.http import HttpException as HttpException
 from tomodachi.transport.http import Response as _HttpResponse
+from tomodachi.transport.http import SSEResponse as _HttpSSEResponse
+from tomodachi.transport.http import StreamResponse as _HttpStreamResponse
 from tomodachi.transport.http import get_forwarded_remote_ip as get_forwarded_remote_ip
 from tomodachi.transport.http import get_http_response_status as get_http_response_status
 from tomodachi.transport.http import get_http_response_status_sync as get_http_response_status_sync
+from tomodachi.transport.http import get_websocket_hub as get_websocket_hub
 from tomodachi.transport.http import http as http
 from tomodachi.transport.http import http_error as http_error
 from tomodachi.transport.http import http_static as http_static
@@ -68,6 +75,8 @@ from tomodachi.transport.schedule import schedule as schedule
 AiobotocoreClientConnector = _AiobotocoreClientConnector
 aiobotocore_client_connector = _aiobotocore_client_connector
 HttpResponse = _HttpResponse
+HttpStreamResponse = _HttpStreamResponse
+HttpSSEResponse = _HttpSSEResponse
 
 __author__: str = ...
 __email__: str = ...
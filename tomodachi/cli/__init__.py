@@ -38,6 +38,8 @@ class CLI:
             f"      use the specified event loop implementation. {DEFAULT}(default: auto){COLOR_RESET}\n"
             f"  {OPTION}--production{COLOR_RESET}\n"
             "      disables service restart on file changes and hides the info banner.\n"
+            f"  {OPTION}--workers <number>{COLOR_RESET}\n"
+            f"      number of worker processes to fork (requires --production). {DEFAULT}(default: 1){COLOR_RESET}\n"
             f"  {OPTION}--log-level [debug|info|warning|error|critical]{COLOR_RESET}\n"
             f"      specify the minimum log level. {DEFAULT}(default: info){COLOR_RESET}\n"
             f"  {OPTION}--logger [console|json|python|disabled]{COLOR_RESET}\n"
@@ -340,6 +342,80 @@ class CLI:
 
                 watcher = Watcher(root=root_directories, configuration=configuration)
 
+            # --workers (env: TOMODACHI_WORKERS)
+            env_workers = str(os.getenv("TOMODACHI_WORKERS", "")).lower() or None
+            workers = 1
+
+            if env_workers or "--workers" in args:
+                if "--workers" in args:
+                    index = args.index("--workers")
+                    args.pop(index)
+                    try:
+                        value = args.pop(index).lower()
+                    except IndexError:
+                        print("Missing value for --workers option")
+                        sys.exit(2)
+
+                    if env_workers and env_workers != value:
+                        print(
+                            "Invalid value for --workers option: '{}' differs from env TOMODACHI_WORKERS".format(value)
+                        )
+                        sys.exit(2)
+                else:
+                    value = env_workers or ""
+
+                try:
+                    workers = int(value)
+                    if workers < 1:
+                        raise ValueError
+                except ValueError:
+                    print("Invalid value for --workers option: '{}' (expected a positive integer)".format(value))
+                    sys.exit(2)
+
+                if workers > 1 and watcher:
+                    print("Invalid combination of --workers and file watcher (the --production option is required)")
+                    sys.exit(2)
+
+            # gc.freeze() before forking workers (env: TOMODACHI_GC_FREEZE)
+            gc_freeze = str(os.getenv("TOMODACHI_GC_FREEZE", "")).lower() not in ("0", "no", "none", "false")
+
+            # queue-backed log output written from a separate thread (env: TOMODACHI_LOG_BUFFER,
+            # TOMODACHI_LOG_BUFFER_SIZE, TOMODACHI_LOG_OVERFLOW_POLICY)
+            log_buffer = str(os.getenv("TOMODACHI_LOG_BUFFER", "")).lower() in ("1", "yes", "true")
+            log_buffer_size: Optional[int] = None
+            if os.getenv("TOMODACHI_LOG_BUFFER_SIZE"):
+                try:
+                    log_buffer_size = int(str(os.getenv("TOMODACHI_LOG_BUFFER_SIZE")))
+                    if log_buffer_size < 1:
+                        raise ValueError
+                except ValueError:
+                    print("Invalid TOMODACHI_LOG_BUFFER_SIZE environment value (expected a positive integer)")
+                    sys.exit(2)
+            log_overflow_policy = str(os.getenv("TOMODACHI_LOG_OVERFLOW_POLICY", "")).lower() or None
+            if log_overflow_policy is not None and log_overflow_policy not in tomodachi.logging.LOG_OVERFLOW_POLICIES:
+                print(
+                    "Invalid TOMODACHI_LOG_OVERFLOW_POLICY environment value (expected 'drop_oldest', 'drop_newest' or 'block')"
+                )
+                sys.exit(2)
+
+            # log rate limiting by (logger, event, level) and sampling of debug / info events (env:
+            # TOMODACHI_LOG_RATE_LIMIT, TOMODACHI_LOG_RATE_LIMIT_BURST, TOMODACHI_LOG_DEBUG_SAMPLE_RATE,
+            # TOMODACHI_LOG_INFO_SAMPLE_RATE)
+            log_rate_limit_values: Dict[str, Optional[float]] = {}
+            for env_name in (
+                "TOMODACHI_LOG_RATE_LIMIT",
+                "TOMODACHI_LOG_RATE_LIMIT_BURST",
+                "TOMODACHI_LOG_DEBUG_SAMPLE_RATE",
+                "TOMODACHI_LOG_INFO_SAMPLE_RATE",
+            ):
+                log_rate_limit_values[env_name] = None
+                if os.getenv(env_name):
+                    try:
+                        log_rate_limit_values[env_name] = float(str(os.getenv(env_name)))
+                    except ValueError:
+                        print("Invalid {} environment value (expected a number)".format(env_name))
+                        sys.exit(2)
+
             # --log-level (env: TOMODACHI_LOG_LEVEL)
             env_log_level: Optional[Union[str, int]] = str(os.getenv("TOMODACHI_LOG_LEVEL", "")).lower() or None
             if not env_log_level:
@@ -503,9 +579,35 @@ class CLI:
 
             tomodachi.logging.set_default_formatter(env_logger)
             tomodachi.logging.set_custom_logger_factory(env_custom_logger)
-            tomodachi.logging.configure(log_level=log_level)
+            tomodachi.logging.configure(
+                log_level=log_level,
+                buffered=log_buffer,
+                buffer_size=log_buffer_size,
+                overflow_policy=cast(Optional[Literal["drop_oldest", "drop_newest", "block"]], log_overflow_policy),
+            )
+
+            log_rate_limit_burst = log_rate_limit_values["TOMODACHI_LOG_RATE_LIMIT_BURST"]
+            log_debug_sample_rate = log_rate_limit_values["TOMODACHI_LOG_DEBUG_SAMPLE_RATE"]
+            log_info_sample_rate = log_rate_limit_values["TOMODACHI_LOG_INFO_SAMPLE_RATE"]
+            try:
+                tomodachi.logging.set_rate_limit(
+                    log_rate_limit_values["TOMODACHI_LOG_RATE_LIMIT"],
+                    burst=int(log_rate_limit_burst) if log_rate_limit_burst is not None else None,
+                    debug_sample_rate=log_debug_sample_rate if log_debug_sample_rate is not None else 1.0,
+                    info_sample_rate=log_info_sample_rate if log_info_sample_rate is not None else 1.0,
+                )
+            except ValueError as e:
+                print("Invalid log rate limit environment value: {}".format(str(e)))
+                sys.exit(2)
 
-            ServiceLauncher.run_until_complete(set(args), configuration, watcher)
+            if workers > 1:
+                from tomodachi.supervisor import WorkerSupervisor  # noqa  #  isort:skip
+
+                tomodachi.SERVICE_EXIT_CODE = WorkerSupervisor(
+                    set(args), configuration, workers=workers, gc_freeze=gc_freeze
+                ).run()
+            else:
+                ServiceLauncher.run_until_complete(set(args), configuration, watcher)
 
         # Cleanup log handlers
         tomodachi.logging.remove_handlers()
@@ -533,6 +635,7 @@ class CLI:
                     "custom-logger",
                     "production",
                     "loop",
+                    "workers",
                 ],
             )
         except getopt.GetoptError as e:
@@ -556,7 +659,16 @@ class CLI:
             if opt in ("--dependency-versions", "--dependencies", "--deps"):
                 self.dependency_versions_command()
 
-            if opt in ("-l", "--log-level", "--log", "--logger", "--custom-logger", "--production", "--loop"):
+            if opt in (
+                "-l",
+                "--log-level",
+                "--log",
+                "--logger",
+                "--custom-logger",
+                "--production",
+                "--loop",
+                "--workers",
+            ):
                 from tomodachi.helpers.colors import COLOR, COLOR_RESET, COLOR_STYLE
 
                 print(f"{COLOR.RED}error:{COLOR_RESET} invalid command or combination of command options.")
@@ -13,6 +13,7 @@ from tomodachi import CLASS_ATTRIBUTE, logging
 from tomodachi._exception import limit_exception_traceback
 from tomodachi.helpers.dict import merge_dicts
 from tomodachi.helpers.execution_context import set_service, unset_service
+from tomodachi.helpers.http_client import setup_http_client
 from tomodachi.invoker import FUNCTION_ATTRIBUTE, INVOKER_TASK_START_KEYWORD, START_ATTRIBUTE
 
 
@@ -256,6 +257,13 @@ class ServiceContainer(object):
                     )
                     services_started.add((service_name, instance, log_level))
 
+                if (
+                    invoker_functions
+                    or getattr(instance, "_start_service", None)
+                    or getattr(instance, "_started_service", None)
+                ):
+                    setup_http_client(instance)
+
                 if getattr(instance, "_start_service", None):
                     setup_coros.add(
                         logging_context_wrapper(
@@ -11,7 +11,7 @@ def __getattr__(name: str) -> Any:
 
     if name == "JsonBase":
         module = importlib.import_module(".json_base", "tomodachi.envelope")
-    elif name == "ProtobufBase":
+    elif name in ("ProtobufBase", "ProtobufBinaryBase"):
         try:
             module = importlib.import_module(".protobuf_base", "tomodachi.envelope")
         except Exception:  # pragma: no cover
@@ -46,4 +46,4 @@ def __getattr__(name: str) -> Any:
     return __cached_defs[name]
 
 
-__all__ = ["JsonBase", "ProtobufBase", "json_base", "protobuf_base"]
+__all__ = ["JsonBase", "ProtobufBase", "ProtobufBinaryBase", "json_base", "protobuf_base"]
@@ -2,3 +2,4 @@ from tomodachi.envelope import json_base as json_base
 from tomodachi.envelope import protobuf_base as protobuf_base
 from tomodachi.envelope.json_base import JsonBase as JsonBase
 from tomodachi.envelope.protobuf_base import ProtobufBase as ProtobufBase
+from tomodachi.envelope.protobuf_base import ProtobufBinaryBase as ProtobufBinaryBase
@@ -9,6 +9,8 @@ PROTOCOL_VERSION = "tomodachi-json-base--1.0.0"
 
 
 class JsonBase(object):
+    content_type = "application/json"
+
     @classmethod
     async def build_message(cls, service: Any, topic: str, data: Any, **kwargs: Any) -> str:
         data_encoding = "raw"
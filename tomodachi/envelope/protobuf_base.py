@@ -11,6 +11,8 @@ PROTOCOL_VERSION = "tomodachi-protobuf-base--1.0.0"
 
 
 class ProtobufBase(object):
+    # Messages are base64 encoded, since message bodies on AWS SNS+SQS are text. Use ProtobufBinaryBase to skip the
+    # base64 encoding on transports with binary message bodies (AMQP).
     @classmethod
     def validate(cls, **kwargs: Any) -> None:
         if "proto_class" not in kwargs:
@@ -22,7 +24,7 @@ class ProtobufBase(object):
                 raise Exception("keyword argument 'proto_class' is not a protobuf message class")
 
     @classmethod
-    async def build_message(cls, service: Any, topic: str, data: Any, **kwargs: Any) -> str:
+    async def build_message(cls, service: Any, topic: str, data: Any, **kwargs: Any) -> Any:
         message_data = data.SerializeToString()
 
         data_encoding = "proto"
@@ -40,14 +42,22 @@ class ProtobufBase(object):
         message.metadata.data_encoding = data_encoding
         message.data = message_data
 
-        return base64.b64encode(message.SerializeToString()).decode("ascii")
+        return cls.encode_payload(message.SerializeToString())
+
+    @classmethod
+    def encode_payload(cls, payload: bytes) -> Any:
+        return base64.b64encode(payload).decode("ascii")
+
+    @classmethod
+    def decode_payload(cls, payload: Union[str, bytes]) -> bytes:
+        return base64.b64decode(payload)
 
     @classmethod
     async def parse_message(
-        cls, payload: str, proto_class: Any = None, validator: Any = None, **kwargs: Any
+        cls, payload: Union[str, bytes], proto_class: Any = None, validator: Any = None, **kwargs: Any
     ) -> Union[Dict, Tuple]:
         message = SNSSQSMessage()
-        message.ParseFromString(base64.b64decode(payload))
+        message.ParseFromString(cls.decode_payload(payload))
 
         message_uuid = message.metadata.message_uuid
         timestamp = message.metadata.timestamp
@@ -99,8 +109,25 @@ class ProtobufBase(object):
         )
 
 
+class ProtobufBinaryBase(ProtobufBase):
+    # Builds messages as bytes, which are published as is by the AMQP transport. Messages built by ProtobufBase
+    # (base64 encoded) can still be parsed.
+    content_type = "application/x-protobuf"
+
+    @classmethod
+    def encode_payload(cls, payload: bytes) -> Any:
+        return payload
+
+    @classmethod
+    def decode_payload(cls, payload: Union[str, bytes]) -> bytes:
+        if isinstance(payload, str):
+            return base64.b64decode(payload)
+        return bytes(payload)
+
+
 __all__ = [
     "PROTOCOL_VERSION",
     "ProtobufBase",
+    "ProtobufBinaryBase",
     "SNSSQSMessage",
 ]
@@ -0,0 +1,299 @@
+import asyncio
+import collections
+import random
+import threading
+import time
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from tomodachi import logging
+
+# Records waiting for the background writer. When the writer can't keep up, the oldest records are dropped rather
+# than growing memory usage without bounds.
+ACCESS_LOG_MAX_QUEUE_SIZE = 10000
+
+
+class AccessLogRecord(object):
+    # Compact access log record built on the event loop – the formatting of the values and the actual logging is
+    # done when the record is emitted, which may be in the background writer thread.
+    __slots__ = (
+        "status_code",
+        "replaced_status_code",
+        "remote_ip",
+        "auth_user",
+        "request_method",
+        "request_path",
+        "request_query_string",
+        "http_version",
+        "response_content_length",
+        "replaced_response_content_length",
+        "request_content_length",
+        "request_content_read_length",
+        "user_agent",
+        "handler_elapsed_time",
+        "request_time",
+        "route",
+    )
+
+    def __init__(
+        self,
+        status_code: int,
+        replaced_status_code: Optional[int],
+        remote_ip: Optional[str],
+        auth_user: Optional[str],
+        request_method: str,
+        request_path: str,
+        request_query_string: Optional[str],
+        http_version: Optional[str],
+        response_content_length: Optional[int],
+        replaced_response_content_length: Optional[int],
+        request_content_length: Optional[int],
+        request_content_read_length: Optional[int],
+        user_agent: str,
+        handler_elapsed_time: Optional[float],
+        request_time: float,
+        route: Optional[str] = None,
+    ) -> None:
+        self.status_code = status_code
+        self.replaced_status_code = replaced_status_code
+        self.remote_ip = remote_ip
+        self.auth_user = auth_user
+        self.request_method = request_method
+        self.request_path = request_path
+        self.request_query_string = request_query_string
+        self.http_version = http_version
+        self.response_content_length = response_content_length
+        self.replaced_response_content_length = replaced_response_content_length
+        self.request_content_length = request_content_length
+        self.request_content_read_length = request_content_read_length
+        self.user_agent = user_agent
+        self.handler_elapsed_time = handler_elapsed_time
+        self.request_time = request_time
+        self.route = route
+
+    def fields(self) -> Dict[str, Any]:
+        # Values set to Ellipsis are left out of the log entry.
+        return {
+            "status_code": self.status_code,
+            "replaced_status_code": self.replaced_status_code or Ellipsis,
+            "remote_ip": self.remote_ip,
+            "auth_user": self.auth_user or Ellipsis,
+            "request_method": self.request_method,
+            "request_path": self.request_path,
+            "request_query_string": self.request_query_string or Ellipsis,
+            "http_version": self.http_version,
+            "response_content_length": (
+                self.response_content_length if self.response_content_length is not None else Ellipsis
+            ),
+            "replaced_response_content_length": self.replaced_response_content_length or Ellipsis,
+            "request_content_length": self.request_content_length or Ellipsis,
+            "request_content_read_length": self.request_content_read_length or Ellipsis,
+            "user_agent": self.user_agent,
+            "handler_elapsed_time": (
+                "{0:.5f}s".format(round(self.handler_elapsed_time, 5))
+                if self.handler_elapsed_time is not None
+                else Ellipsis
+            ),
+            "request_time": "{0:.5f}s".format(round(self.request_time, 5)),
+        }
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    # values must be sorted
+    index = min(len(values) - 1, max(0, int(round(percentile / 100.0 * len(values) + 0.5)) - 1))
+    return values[index]
+
+
+class _RouteSummary(object):
+    __slots__ = ("request_count", "status_counts", "request_times")
+
+    def __init__(self) -> None:
+        self.request_count = 0
+        self.status_counts: Dict[str, int] = {}
+        self.request_times: List[float] = []
+
+    def add(self, record: AccessLogRecord) -> None:
+        status_class = "{}xx".format(record.status_code // 100)
+        self.request_count += 1
+        self.status_counts[status_class] = self.status_counts.get(status_class, 0) + 1
+        self.request_times.append(record.request_time)
+
+    def fields(self) -> Dict[str, Any]:
+        request_times = sorted(self.request_times)
+        return {
+            "request_count": self.request_count,
+            "status_counts": dict(sorted(self.status_counts.items())),
+            "request_time_p50": "{0:.5f}s".format(_percentile(request_times, 50)),
+            "request_time_p90": "{0:.5f}s".format(_percentile(request_times, 90)),
+            "request_time_p99": "{0:.5f}s".format(_percentile(request_times, 99)),
+            "request_time_max": "{0:.5f}s".format(request_times[-1]),
+        }
+
+
+class AccessLog(object):
+    # Sampling and emission of the HTTP access log.
+    #
+    # Responses with a 5xx status code are always logged, 4xx responses are logged with the probability of
+    # `client_error_sample_rate` and other responses with the probability of `sample_rate`. Requests that took at
+    # least `slow_request_threshold` seconds are always logged.
+    #
+    # With a `batch_interval` set, sampled records are handed off to a background writer thread which emits them in
+    # batches, so that the formatting and writing of the log entries isn't done on the event loop. With a
+    # `summary_interval` set, every request (sampled or not) is aggregated per route, and a summary with request
+    # counts and request time percentiles is logged once per interval.
+    __slots__ = (
+        "logger",
+        "sample_rate",
+        "client_error_sample_rate",
+        "slow_request_threshold",
+        "batch_interval",
+        "summary_interval",
+        "max_queue_size",
+        "dropped_count",
+        "_queue",
+        "_summaries",
+        "_summary_started_at",
+        "_thread",
+        "_stop_event",
+    )
+
+    def __init__(
+        self,
+        logger: Any,
+        *,
+        sample_rate: float = 1.0,
+        client_error_sample_rate: float = 1.0,
+        slow_request_threshold: Optional[float] = None,
+        batch_interval: Optional[float] = None,
+        summary_interval: Optional[float] = None,
+        max_queue_size: int = ACCESS_LOG_MAX_QUEUE_SIZE,
+    ) -> None:
+        if sample_rate < 0 or sample_rate > 1:
+            raise ValueError("Bad value for http option access_log_sample_rate: {}".format(sample_rate))
+        if client_error_sample_rate < 0 or client_error_sample_rate > 1:
+            raise ValueError(
+                "Bad value for http option access_log_client_error_sample_rate: {}".format(client_error_sample_rate)
+            )
+        if batch_interval is not None and batch_interval <= 0:
+            raise ValueError("Bad value for http option access_log_batch_interval: {}".format(batch_interval))
+        if summary_interval is not None and summary_interval <= 0:
+            raise ValueError("Bad value for http option access_log_summary_interval: {}".format(summary_interval))
+
+        self.logger = logger
+        self.sample_rate = sample_rate
+        self.client_error_sample_rate = client_error_sample_rate
+        self.slow_request_threshold = slow_request_threshold or None
+        self.batch_interval = batch_interval or None
+        self.summary_interval = summary_interval or None
+        self.max_queue_size = max_queue_size
+        self.dropped_count = 0
+        self._queue: Deque[Tuple[AccessLogRecord, bool]] = collections.deque()
+        self._summaries: Dict[Tuple[str, str], _RouteSummary] = {}
+        self._summary_started_at = time.monotonic()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    @property
+    def summary(self) -> bool:
+        return self.summary_interval is not None
+
+    def sample(self, status_code: int, request_time: float) -> bool:
+        if status_code >= 500:
+            return True
+        if self.slow_request_threshold is not None and request_time >= self.slow_request_threshold:
+            return True
+        rate = self.client_error_sample_rate if status_code >= 400 else self.sample_rate
+        if rate >= 1:
+            return True
+        return rate > 0 and random.random() < rate
+
+    def emit(self, record: AccessLogRecord, log: bool = True) -> None:
+        if log and not self.batch_interval:
+            self.logger.info(**record.fields())
+            if not self.summary_interval:
+                return
+            log = False
+
+        if len(self._queue) >= self.max_queue_size:
+            self._queue.popleft()
+            self.dropped_count += 1
+        self._queue.append((record, log))
+
+    def start(self) -> None:
+        if self._thread is not None or (not self.batch_interval and not self.summary_interval):
+            return
+
+        self._stop_event.clear()
+        self._summary_started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="tomodachi.http.access_log", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        # Flushes records still waiting in the queue and logs the summary for the last (partial) interval.
+        thread = self._thread
+        if thread is None:
+            return
+
+        self._stop_event.set()
+        await asyncio.get_event_loop().run_in_executor(None, thread.join, 10.0)
+        self._thread = None
+
+    def flush(self) -> None:
+        while self._queue:
+            try:
+                record, log = self._queue.popleft()
+            except IndexError:
+                break
+
+            if self.summary_interval:
+                key = (record.request_method, record.route or "")
+                summary = self._summaries.get(key)
+                if summary is None:
+                    summary = self._summaries[key] = _RouteSummary()
+                summary.add(record)
+
+            if log:
+                self.logger.info(**record.fields())
+
+        if self.dropped_count:
+            dropped_count, self.dropped_count = self.dropped_count, 0
+            self.logger.warning("access log records dropped", dropped_count=dropped_count)
+
+    def log_summary(self) -> None:
+        now = time.monotonic()
+        interval = now - self._summary_started_at
+        self._summary_started_at = now
+
+        summaries, self._summaries = self._summaries, {}
+        for (request_method, route), summary in summaries.items():
+            self.logger.info(
+                "access log summary",
+                request_method=request_method,
+                route=route,
+                interval="{0:.3f}s".format(interval),
+                **summary.fields(),
+            )
+
+    def _run(self) -> None:
+        # records are drained at least once per second when aggregating, to keep the queue short.
+        wait_interval = min(
+            i for i in (self.batch_interval, min(self.summary_interval, 1.0) if self.summary_interval else None) if i
+        )
+        while True:
+            stopping = self._stop_event.wait(wait_interval)
+            try:
+                self.flush()
+                if self.summary_interval and (
+                    stopping or time.monotonic() - self._summary_started_at >= self.summary_interval
+                ):
+                    self.log_summary()
+            except Exception as e:
+                logging.getLogger("exception").exception("uncaught exception: {}".format(str(e)))
+            if stopping:
+                return
+
+
+__all__ = [
+    "ACCESS_LOG_MAX_QUEUE_SIZE",
+    "AccessLog",
+    "AccessLogRecord",
+]
@@ -1,6 +1,6 @@
 import datetime
 from calendar import monthrange
-from typing import Any, Dict, List, Optional, Tuple, Union, cast
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
 import pytz
 
@@ -40,7 +40,7 @@ crontab_aliases: Dict[str, str] = {
 }
 
 
-def get_next_datetime(crontab_notation: str, now_date: datetime.datetime) -> Optional[datetime.datetime]:
+def parse_crontab(crontab_notation: str) -> Tuple[List[Set[int]], bool, bool, bool, bool]:
     crontab_notation = crontab_aliases.get(crontab_notation, crontab_notation)
     cron_parts = [c for c in crontab_notation.split() if c.strip()]
     cron_parts += ["*" for _ in range(len(cron_attributes) - len(cron_parts))]
@@ -165,172 +165,205 @@ def get_next_datetime(crontab_notation: str, now_date: datetime.datetime) -> Opt
         if not any([monthrange(y, m)[1] >= min(values[2]) for y in values[5] for m in values[3]]):
             raise Exception("Invalid cron notation: days out of scope")
 
-    def calculate_date(
-        input_date: datetime.datetime, last_day: bool, last_weekday: bool
-    ) -> Optional[datetime.datetime]:
-        tz: Any = input_date.tzinfo
-        naive_date = not bool(input_date.tzinfo)
-        if tz is None:
-            tz = pytz.UTC
+    return values, last_day, last_weekday, use_days, use_weekdays
 
-        next_date: Optional[datetime.datetime] = input_date
-        while True:
-            original_date = next_date
-            next_date_weekday = next_date
-
-            for i, attr in enumerate(cron_attributes):
-                if attr[0] == "isoweekday":
-                    continue
-                value = getattr(next_date, attr[0])
-                possible_values = [v for v in values[i] if v >= value]
-                if not possible_values:
-                    if attr[0] == "year":
-                        return None
-                    next_date = None
-                    break
-                new_value = min(possible_values)
-                try:
-                    next_date = datetime.datetime(
-                        *[
-                            getattr(next_date, dv) if dv != attr[0] else new_value
-                            for dv in ["year", "month", "day", "hour", "minute"]
-                        ]
-                    ).replace(tzinfo=tz)
-                except ValueError:
-                    next_date = None
-                    break
-
-            for i, attr in enumerate(cron_attributes):
-                if attr[0] == "isoweekday" or attr[0] == "day":
-                    continue
-                value = getattr(next_date_weekday, attr[0])
-                possible_values = [v for v in values[i] if v >= value]
-                if not possible_values:
-                    if attr[0] == "year":
-                        return None
-                    next_date_weekday = None
-                    break
-                new_value = min(possible_values)
-                try:
-                    next_date_weekday = datetime.datetime(
-                        *[
-                            getattr(next_date_weekday, dv) if dv != attr[0] else new_value
-                            for dv in ["year", "month", "day", "hour", "minute"]
-                        ]
-                    ).replace(tzinfo=tz)
-                except ValueError:
-                    next_date_weekday = None
-                    break
-
-            if use_weekdays and next_date_weekday:
-                for d in range(
-                    next_date_weekday.day, monthrange(next_date_weekday.year, next_date_weekday.month)[1] + 1
-                ):
-                    next_date_weekday_arguments = (
-                        getattr(next_date_weekday, dv) if dv != "day" else d
-                        for dv in ["year", "month", "day", "hour", "minute"]
-                    )
-                    next_date_weekday = datetime.datetime(
-                        *cast(Tuple[int, int, int, int, int], next_date_weekday_arguments), tzinfo=tz
-                    )
-                    if next_date_weekday and (next_date_weekday.isoweekday() % 7) in values[4]:
-                        break
-
-            if use_days and not use_weekdays:
-                next_date_weekday = None
-            if not use_days and use_weekdays:
-                next_date = None
-
-            if (
-                use_weekdays
-                and next_date_weekday
-                and (next_date_weekday.isoweekday() % 7) not in values[4]
-                and next_date_weekday.isoweekday() not in values[4]
-            ):
-                next_date_weekday = None
-            if next_date and last_day and next_date.day != monthrange(next_date.year, next_date.month)[1]:
-                next_date = None
-            if use_weekdays and next_date_weekday and last_weekday:
-                for i in range(
-                    next_date_weekday.day + 1, monthrange(next_date_weekday.year, next_date_weekday.month)[1] + 1
-                ):
-                    if (
-                        datetime.datetime(next_date_weekday.year, next_date_weekday.month, i).isoweekday()
-                        == next_date_weekday.isoweekday()
-                    ):
-                        next_date_weekday = None
-                        break
-
-            if use_weekdays and next_date_weekday and (not next_date or next_date_weekday < next_date):
-                next_date = next_date_weekday
-
-            if not next_date:
-                next_date = original_date
-                if next_date:
-                    try:
-                        next_date = datetime.datetime(next_date.year, next_date.month, next_date.day + 1, tzinfo=tz)
-                    except ValueError:
-                        try:
-                            if next_date:
-                                next_date = datetime.datetime(next_date.year, next_date.month + 1, 1, tzinfo=tz)
-                        except ValueError:
-                            if next_date:
-                                next_date = datetime.datetime(next_date.year + 1, 1, 1, tzinfo=tz)
-            else:
-                break
 
-            if next_date and next_date.year >= 2100:
-                return None
+def get_next_datetime(crontab_notation: str, now_date: datetime.datetime) -> Optional[datetime.datetime]:
+    # Parses the notation on every call – use a CompiledCrontab to find fire times of the same notation repeatedly.
+    return CompiledCrontab(crontab_notation).next_datetime(now_date)
+
+
+def _next_bit(mask: int, value: int) -> Optional[int]:
+    # Returns the lowest value set in the bitset which is equal to or greater than `value`.
+    remaining = mask >> value
+    if not remaining:
+        return None
+    return value + (remaining & -remaining).bit_length() - 1
+
+
+def localize_datetime(tz: Any, naive_date: datetime.datetime) -> List[datetime.datetime]:
+    # Returns the points in time of a wall-clock time in the timezone – two for wall-clock times that occur twice
+    # when the clock is turned back. Wall-clock times skipped when the clock is turned forward are moved forward by
+    # the size of the gap.
+    if hasattr(tz, "localize"):
+        try:
+            return [tz.localize(naive_date, is_dst=None)]
+        except pytz.AmbiguousTimeError:
+            return [tz.localize(naive_date, is_dst=True), tz.localize(naive_date, is_dst=False)]
+        except pytz.NonExistentTimeError:
+            return [tz.normalize(tz.localize(naive_date, is_dst=False))]
+
+    first = naive_date.replace(tzinfo=tz, fold=0)
+    second = naive_date.replace(tzinfo=tz, fold=1)
+    if first.utcoffset() == second.utcoffset():
+        return [first]
+    if first.astimezone(pytz.UTC).astimezone(tz).replace(tzinfo=None) == naive_date:
+        return [first, second]
+    return [first.astimezone(pytz.UTC).astimezone(tz)]
+
+
+def _find_clock_change(start: datetime.datetime, end: datetime.datetime) -> datetime.datetime:
+    # Returns the first minute after `start` (up until `end`) that has a different utc offset than `start`.
+    tz = start.tzinfo
+    offset = start.utcoffset()
+    low = start.astimezone(pytz.UTC)
+    high = end.astimezone(pytz.UTC)
+    while high - low > datetime.timedelta(minutes=1):
+        middle = low + datetime.timedelta(minutes=((high - low) // datetime.timedelta(minutes=1)) // 2)
+        if middle.astimezone(tz).utcoffset() == offset:
+            low = middle
+        else:
+            high = middle
+    return high.astimezone(tz)
+
+
+class CompiledCrontab(object):
+    # A crontab notation parsed once into bitsets of the allowed values of each field, which is then used to find the
+    # next matching points in time without parsing the notation again.
+    #
+    # The matching is done on wall-clock times of the timezone of the passed datetime. The utc offset of each returned
+    # datetime is the offset in effect at that time, which makes schedules keep their wall-clock times across
+    # daylight saving time changes. Wall-clock times that are skipped when the clock
+    # is turned forward are moved forward by the size of the gap, and wall-clock times that occur twice when the
+    # clock is turned back match both times.
+    __slots__ = (
+        "crontab_notation",
+        "minutes",
+        "hours",
+        "days",
+        "months",
+        "weekdays",
+        "years",
+        "last_day",
+        "last_weekday",
+        "use_days",
+        "use_weekdays",
+    )
+
+    def __init__(self, crontab_notation: str) -> None:
+        values, last_day, last_weekday, use_days, use_weekdays = parse_crontab(crontab_notation)
 
-        if naive_date and next_date:
-            return datetime.datetime(
-                next_date.year,
-                next_date.month,
-                next_date.day,
-                next_date.hour,
-                next_date.minute,
-                next_date.second,
-                next_date.microsecond,
-            )
-        return next_date
-
-    tz: Any = now_date.tzinfo
-    calculated_dates = [
-        calculate_date(d.replace(tzinfo=tz) if tz else d, last_day, last_weekday)
-        for d in [
-            (
-                datetime.datetime(
-                    now_date.year,
-                    now_date.month,
-                    now_date.day,
-                    now_date.hour,
-                    now_date.minute,
-                    now_date.second,
-                    now_date.microsecond,
-                )
-                if now_date.second == 0
-                else None
-            ),
-            (
-                datetime.datetime(now_date.year, now_date.month, now_date.day, now_date.hour, now_date.minute + 1)
-                if now_date.minute < 60 - 1
-                else None
-            ),
-            (
-                datetime.datetime(now_date.year, now_date.month, now_date.day, now_date.hour + 1)
-                if now_date.hour < 24 - 1
-                else None
-            ),
-            (
-                datetime.datetime(now_date.year, now_date.month, now_date.day + 1)
-                if now_date.day < monthrange(now_date.year, now_date.month)[1] - 1
-                else None
-            ),
-            datetime.datetime(now_date.year, now_date.month + 1, 1) if now_date.month < 12 - 1 else None,
-            datetime.datetime(now_date.year + 1, 1, 1),
+        self.crontab_notation = crontab_notation
+        self.minutes, self.hours, self.days, self.months, self.weekdays, self.years = [
+            sum(1 << value for value in field_values) for field_values in values
         ]
-        if d
-    ]
-    if not any(calculated_dates):
+        self.last_day = last_day
+        self.last_weekday = last_weekday
+        self.use_days = use_days
+        self.use_weekdays = use_weekdays
+
+    def __repr__(self) -> str:
+        return "<CompiledCrontab: {}>".format(self.crontab_notation)
+
+    def next_datetime(self, now_date: datetime.datetime) -> Optional[datetime.datetime]:
+        # The current minute is included if `now_date` is at the start of a minute (second 0), otherwise the search
+        # starts at the next minute.
+        start_date = now_date.replace(second=0, microsecond=0)
+        if now_date.second:
+            start_date = self._add_minute(start_date)
+
+        if start_date.tzinfo is None:
+            return self._next_naive_datetime(start_date)
+        return self._next_aware_datetime(start_date)
+
+    def next_datetimes(self, now_date: datetime.datetime, count: int) -> List[datetime.datetime]:
+        result: List[datetime.datetime] = []
+        next_date = self.next_datetime(now_date)
+        while next_date is not None and len(result) < count:
+            result.append(next_date)
+            if next_date.tzinfo is None:
+                next_date = self._next_naive_datetime(self._add_minute(next_date))
+            else:
+                next_date = self._next_aware_datetime(self._add_minute(next_date))
+        return result
+
+    def next_timestamp(self, current_time: float, tz: Any = None) -> Optional[float]:
+        # Returns the unix timestamp of the first matching minute after `current_time` in the timezone `tz`.
+        next_date = self.next_datetime(datetime.datetime.fromtimestamp(current_time + 1, tz or pytz.UTC))
+        return next_date.timestamp() if next_date is not None else None
+
+    @staticmethod
+    def _add_minute(value: datetime.datetime) -> datetime.datetime:
+        if value.tzinfo is None:
+            return value + datetime.timedelta(minutes=1)
+        return (value.astimezone(pytz.UTC) + datetime.timedelta(minutes=1)).astimezone(value.tzinfo)
+
+    def _matches_day(self, year: int, month: int, day: int, first_weekday: int, month_days: int) -> bool:
+        day_matches = bool(self.days >> day & 1) and (not self.last_day or day == month_days)
+        if not self.use_weekdays:
+            return day_matches
+
+        weekday = (first_weekday + day) % 7
+        weekday_matches = bool(self.weekdays >> weekday & 1) and (not self.last_weekday or day + 7 > month_days)
+        if self.use_days:
+            return day_matches or weekday_matches
+        return weekday_matches
+
+    def _next_naive_datetime(self, start_date: datetime.datetime) -> Optional[datetime.datetime]:
+        # Returns the first matching wall-clock time at or after `start_date` (a naive datetime at second 0).
+        year = _next_bit(self.years, start_date.year)
+        while year is not None:
+            same_year = year == start_date.year
+            month = _next_bit(self.months, start_date.month if same_year else 1)
+            while month is not None and month <= 12:
+                same_month = same_year and month == start_date.month
+                first_weekday, month_days = monthrange(year, month)
+                for day in range(start_date.day if same_month else 1, month_days + 1):
+                    if not self._matches_day(year, month, day, first_weekday, month_days):
+                        continue
+                    same_day = same_month and day == start_date.day
+                    hour = _next_bit(self.hours, start_date.hour if same_day else 0)
+                    while hour is not None and hour <= 23:
+                        same_hour = same_day and hour == start_date.hour
+                        minute = _next_bit(self.minutes, start_date.minute if same_hour else 0)
+                        if minute is not None and minute <= 59:
+                            return datetime.datetime(year, month, day, hour, minute)
+                        hour = _next_bit(self.hours, hour + 1)
+                month = _next_bit(self.months, month + 1)
+            year = _next_bit(self.years, year + 1)
+            if year is not None and year >= 2100:
+                return None
         return None
-    return min([d for d in calculated_dates if d])
+
+    def _next_aware_datetime(self, start_date: datetime.datetime) -> Optional[datetime.datetime]:
+        # Aware datetimes are compared by their timestamps, since datetimes sharing the same tzinfo are otherwise
+        # compared by their wall-clock times.
+        tz = start_date.tzinfo
+        lower = start_date
+        wall_date = start_date.replace(tzinfo=None)
+        result: Optional[datetime.datetime] = None
+
+        while True:
+            naive_date = self._next_naive_datetime(wall_date)
+            if naive_date is None:
+                return result
+
+            lower_timestamp = lower.timestamp()
+            lower_offset = lower.utcoffset()
+
+            # most often the wall-clock time has the same utc offset as the start, in which case the time doesn't
+            # need to be localized.
+            if lower_offset is not None:
+                candidate = (naive_date - lower_offset).replace(tzinfo=pytz.UTC).astimezone(tz)
+                if candidate.utcoffset() == lower_offset and candidate.replace(tzinfo=None) == naive_date:
+                    if candidate.timestamp() >= lower_timestamp:
+                        return candidate if result is None or candidate.timestamp() < result.timestamp() else result
+
+            candidates = [d for d in localize_datetime(tz, naive_date) if d.timestamp() >= lower_timestamp]
+            if not candidates:
+                wall_date = naive_date + datetime.timedelta(minutes=1)
+                continue
+
+            if result is None or candidates[0].timestamp() < result.timestamp():
+                result = candidates[0]
+
+            result_offset = result.utcoffset()
+            if lower_offset is None or result_offset is None or result_offset >= lower_offset:
+                return result
+
+            # the clock is turned back before the next match – the wall-clock times after the change occur a second
+            # time and may include an earlier match.
+            lower = _find_clock_change(lower, result)
+            wall_date = lower.replace(tzinfo=None)
+            if wall_date >= naive_date:
+                return result
@@ -0,0 +1,169 @@
+import asyncio
+import contextvars
+import math
+import time
+from types import TracebackType
+from typing import Any, Mapping, Optional, Type
+
+# The deadline of the work currently being handled, as a time.monotonic() value. The deadline is set by the
+# transports from an incoming header or message attribute, or from the deadline of the handler, and is read by
+# outbound calls (the outbound HTTP client, AWS SNS+SQS and AMQP publishing) to limit their timeouts.
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("tomodachi.deadline", default=None)
+
+# HTTP requests carry the remaining budget in milliseconds, so that the deadline isn't affected by clock skew between
+# hosts. Messages carry the deadline as a unix timestamp, since time spent in queue counts towards the deadline.
+DEADLINE_HEADER = "X-Request-Timeout-Ms"
+DEADLINE_MESSAGE_ATTRIBUTE = "tomodachi.deadline"
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    pass
+
+
+def get_deadline() -> Optional[float]:
+    return _deadline.get()
+
+
+def get_remaining_time() -> Optional[float]:
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def get_deadline_timestamp() -> Optional[float]:
+    # Returns the deadline as a unix timestamp, for example to be passed on as a message attribute.
+    remaining = get_remaining_time()
+    if remaining is None:
+        return None
+    return time.time() + remaining
+
+
+def get_timeout(timeout: Optional[float] = None) -> Optional[float]:
+    # Returns the timeout to use for an outbound call – the lowest of the passed timeout and the time remaining until
+    # the deadline. Raises DeadlineExceeded if the deadline has already passed.
+    remaining = get_remaining_time()
+    if remaining is None:
+        return timeout
+    if remaining <= 0:
+        raise DeadlineExceeded("deadline exceeded")
+    if timeout is None:
+        return remaining
+    return min(timeout, remaining)
+
+
+def parse_timeout_header(headers: Mapping[str, str]) -> Optional[float]:
+    value = headers.get(DEADLINE_HEADER)
+    if not value:
+        return None
+    try:
+        timeout = float(value) / 1000
+    except ValueError:
+        return None
+    return timeout if math.isfinite(timeout) else None
+
+
+def parse_deadline_attribute(message_attributes: Optional[Mapping[str, Any]]) -> Optional[float]:
+    value = message_attributes.get(DEADLINE_MESSAGE_ATTRIBUTE) if message_attributes else None
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        timeout = float(value.decode() if isinstance(value, bytes) else value) - time.time()
+    except (ValueError, TypeError):
+        return None
+    return timeout if math.isfinite(timeout) else None
+
+
+def min_timeout(*timeouts: Optional[float]) -> Optional[float]:
+    values = [t for t in timeouts if t is not None]
+    return min(values) if values else None
+
+
+class Deadline(object):
+    # Async context manager that sets the deadline for the work done within it, and cancels the work when the
+    # deadline is reached – in which case DeadlineExceeded is raised. An already set (earlier) deadline is never
+    # extended. Using a timeout of None is a no-op.
+    __slots__ = ("timeout", "_token", "_timeout_cm", "_handle", "_task", "_expired")
+
+    def __init__(self, timeout: Optional[float]) -> None:
+        self.timeout = timeout
+        self._token: Optional[contextvars.Token] = None
+        self._timeout_cm: Any = None
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._task: Optional[asyncio.Task] = None
+        self._expired = False
+
+    async def __aenter__(self) -> "Deadline":
+        if self.timeout is None:
+            return self
+
+        now = time.monotonic()
+        deadline = now + self.timeout
+        current = _deadline.get()
+        if current is not None and current < deadline:
+            deadline = current
+        if deadline <= now:
+            raise DeadlineExceeded("deadline exceeded")
+
+        self._token = _deadline.set(deadline)
+
+        loop = asyncio.get_running_loop()
+        when = loop.time() + (deadline - now)
+        timeout_at = getattr(asyncio, "timeout_at", None)
+        if timeout_at is not None:
+            self._timeout_cm = timeout_at(when)
+            await self._timeout_cm.__aenter__()
+        else:  # pragma: no cover
+            # python 3.10
+            self._task = asyncio.current_task()
+            self._handle = loop.call_at(when, self._on_timeout)
+
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> Optional[bool]:
+        if self._token is None:
+            return None
+
+        _deadline.reset(self._token)
+        self._token = None
+
+        if self._timeout_cm is not None:
+            try:
+                await self._timeout_cm.__aexit__(exc_type, exc_value, traceback)
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded("deadline exceeded") from None
+            finally:
+                self._timeout_cm = None
+            return None
+
+        if self._handle is not None:  # pragma: no cover
+            self._handle.cancel()
+            self._handle = None
+        if self._expired and exc_type is asyncio.CancelledError:  # pragma: no cover
+            raise DeadlineExceeded("deadline exceeded") from None
+        return None
+
+    def _on_timeout(self) -> None:  # pragma: no cover
+        self._expired = True
+        if self._task is not None:
+            self._task.cancel()
+
+
+__all__ = [
+    "DEADLINE_HEADER",
+    "DEADLINE_MESSAGE_ATTRIBUTE",
+    "Deadline",
+    "DeadlineExceeded",
+    "get_deadline",
+    "get_deadline_timestamp",
+    "get_remaining_time",
+    "get_timeout",
+    "min_timeout",
+    "parse_deadline_attribute",
+    "parse_timeout_header",
+]
@@ -0,0 +1,221 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import inspect
+import multiprocessing
+import os
+import pickle
+from typing import Any, Callable, Dict, Optional
+
+from tomodachi import logging
+from tomodachi.helpers.execution_context import set_execution_context
+from tomodachi.invoker import Invoker
+from tomodachi.options import Options
+
+EXECUTOR_TYPES = ("thread", "process")
+
+# Handler functions that are run in a process pool are registered here before the pool is started. The worker
+# processes are forked from the service process and looks up the handler (and the service instance) by key, so
+# that only the arguments of each call has to be serialized.
+_process_handlers: Dict[str, Callable] = {}
+
+
+class ExecutorPool(object):
+    __slots__ = ("executor_type", "max_workers", "_executor", "_pending_tasks", "_total_tasks")
+
+    def __init__(self, executor_type: str, max_workers: Optional[int] = None) -> None:
+        if executor_type not in EXECUTOR_TYPES:
+            raise ValueError("Bad value for executor: {}".format(executor_type))
+        if max_workers is not None and max_workers < 1:
+            raise ValueError("Bad value for executor max workers: {}".format(max_workers))
+        if executor_type == "process" and "fork" not in multiprocessing.get_all_start_methods():
+            raise ValueError("The process executor requires the 'fork' start method, which is not available")
+
+        self.executor_type = executor_type
+        self.max_workers = max_workers or (
+            min(32, (os.cpu_count() or 1) + 4) if executor_type == "thread" else (os.cpu_count() or 1)
+        )
+        self._executor: Optional[concurrent.futures.Executor] = None
+        self._pending_tasks = 0
+        self._total_tasks = 0
+
+    @property
+    def pending_tasks(self) -> int:
+        return self._pending_tasks
+
+    @property
+    def total_tasks(self) -> int:
+        return self._total_tasks
+
+    @property
+    def executor(self) -> concurrent.futures.Executor:
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context("fork")
+                )
+            else:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="tomodachi-executor"
+                )
+        return self._executor
+
+    async def run(self, func: Callable, *args: Any) -> Any:
+        loop = asyncio.get_event_loop()
+        executor = self.executor
+
+        self._pending_tasks += 1
+        self._total_tasks += 1
+        self._set_execution_context()
+        try:
+            return await loop.run_in_executor(executor, func, *args)
+        finally:
+            self._pending_tasks -= 1
+            self._set_execution_context()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _set_execution_context(self) -> None:
+        prefix = "executor_{}_pool".format(self.executor_type)
+        set_execution_context(
+            {
+                "{}_max_workers".format(prefix): self.max_workers,
+                "{}_pending_tasks".format(prefix): self._pending_tasks,
+                "{}_queued_tasks".format(prefix): max(0, self._pending_tasks - self.max_workers),
+                "{}_total_tasks".format(prefix): self._total_tasks,
+            }
+        )
+
+
+def get_executor_pool(obj: Any, context: Dict, executor_type: str) -> ExecutorPool:
+    pools: Dict[str, ExecutorPool] = context.setdefault("_executor_pools", {})
+    pool = pools.get(executor_type)
+    if pool is not None:
+        return pool
+
+    options: Options = Invoker.options(context)
+    max_workers = (
+        options.executor.thread_max_workers if executor_type == "thread" else options.executor.process_max_workers
+    )
+    pool = ExecutorPool(executor_type, max_workers)
+    pools[executor_type] = pool
+
+    if len(pools) == 1:
+        stop_method = getattr(obj, "_stop_service", None)
+
+        async def stop_service(*args: Any, **kwargs: Any) -> None:
+            for pool_ in context.get("_executor_pools", {}).values():
+                pool_.shutdown()
+            context["_executor_pools"] = {}
+
+            if stop_method:
+                await stop_method(*args, **kwargs)
+
+        setattr(obj, "_stop_service", stop_service)
+
+    return pool
+
+
+def _run_process_handler(key: str, payload: bytes) -> Any:
+    args, kwargs, logger_context, trace_carrier = pickle.loads(payload)
+
+    if logger_context:
+        logging.bind_logger(logging.LoggerContext(**logger_context))
+
+    otel_token = None
+    if trace_carrier:
+        try:
+            from opentelemetry import context as otel_context
+            from opentelemetry import propagate
+
+            otel_token = otel_context.attach(propagate.extract(trace_carrier))
+        except ImportError:  # pragma: no cover
+            pass
+
+    try:
+        func = _process_handlers.get(key)
+        if func is None:
+            raise Exception("handler function not registered in executor process: {}".format(key))
+        return func(*args, **kwargs)
+    finally:
+        if otel_token is not None:
+            from opentelemetry import context as otel_context
+
+            otel_context.detach(otel_token)
+
+
+def _get_trace_carrier() -> Dict[str, str]:
+    carrier: Dict[str, str] = {}
+    try:
+        from opentelemetry import propagate
+
+        propagate.inject(carrier)
+    except ImportError:  # pragma: no cover
+        pass
+    return carrier
+
+
+def executor_handler(
+    obj: Any,
+    context: Dict,
+    func: Callable,
+    executor: Optional[str],
+    prepare_arguments: Optional[Callable[..., Any]] = None,
+) -> Callable:
+    # Returns the function that transports should call to invoke the handler. If an executor is used, the returned
+    # function is called with the same arguments as the handler but returns an awaitable, which runs the handler
+    # in a thread or process pool instead of blocking the event loop.
+    if not executor:
+        return func
+
+    if executor not in EXECUTOR_TYPES:
+        raise ValueError("Bad value for executor: {}".format(executor))
+    if inspect.iscoroutinefunction(func):
+        raise ValueError(
+            "The executor option can only be used with non-async handler functions: {}".format(func.__qualname__)
+        )
+
+    pool = get_executor_pool(obj, context, executor)
+
+    if executor == "thread":
+
+        @functools.wraps(func)
+        async def _thread_handler(*args: Any, **kwargs: Any) -> Any:
+            # contextvars (logger context and OpenTelemetry context) are copied to the thread
+            return await pool.run(functools.partial(contextvars.copy_context().run, func, *args, **kwargs))
+
+        return _thread_handler
+
+    key = "{}.{}:{}".format(func.__module__, func.__qualname__, id(func))
+    _process_handlers[key] = functools.partial(func, obj)
+
+    @functools.wraps(func)
+    async def _process_handler(_: Any, *args: Any, **kwargs: Any) -> Any:
+        if prepare_arguments:
+            args, kwargs = prepare_arguments(args, kwargs)
+
+        logger_context = logging.getLogger()._context
+        payload = pickle.dumps(
+            (
+                args,
+                kwargs,
+                {k: logger_context[k] for k in logger_context.keys()} if logger_context else None,
+                _get_trace_carrier(),
+            ),
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+        return await pool.run(_run_process_handler, key, payload)
+
+    return _process_handler
+
+
+__all__ = [
+    "EXECUTOR_TYPES",
+    "ExecutorPool",
+    "executor_handler",
+    "get_executor_pool",
+]
@@ -0,0 +1,176 @@
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict, List, Optional, Set
+
+from tomodachi import logging
+
+# Hot restart with listener handoff. The running (old) process spawns a replacement process and passes the path to a
+# unix socket via the environment. The replacement process connects to the socket at startup and receives the
+# listening sockets of the old process (SCM_RIGHTS), which are then used by the transports instead of binding new
+# sockets. Once the services of the replacement process have started it reports readiness, after which the old
+# process stops accepting new connections and drains in-flight requests and messages.
+HANDOFF_ENV = "TOMODACHI_HANDOFF_SOCKET"
+HANDOFF_READY_TIMEOUT = 60.0
+HANDOFF_MAX_SOCKETS = 64
+
+_listen_sockets: Dict[str, Any] = {}
+_handed_off: Set[str] = set()
+_inherited_sockets: Dict[str, socket.socket] = {}
+_handoff_connection: Optional[socket.socket] = None
+
+
+def register_listen_socket(key: str, sock: Any) -> None:
+    _listen_sockets[key] = sock
+
+
+def unregister_listen_socket(key: str) -> None:
+    _listen_sockets.pop(key, None)
+
+
+def is_handed_off(key: str) -> bool:
+    return key in _handed_off
+
+
+def get_inherited_socket(key: str) -> Optional[socket.socket]:
+    return _inherited_sockets.pop(key, None)
+
+
+def receive_listen_sockets() -> bool:
+    # Called in the replacement process before the services are started. Returns True if the process was started
+    # as part of a hot restart.
+    global _handoff_connection
+
+    path = os.environ.pop(HANDOFF_ENV, None)
+    if not path:
+        return False
+
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.settimeout(10)
+        connection.connect(path)
+        message, fds, _, _ = socket.recv_fds(connection, 65536, HANDOFF_MAX_SOCKETS)
+        keys: List[str] = json.loads(message.decode()) if message else []
+    except Exception as e:
+        connection.close()
+        logging.getLogger("tomodachi.handoff").warning("unable to receive listening sockets", error_message=str(e))
+        return False
+
+    for key, fd in zip(keys, fds):
+        sock = socket.socket(fileno=fd)
+        sock.setblocking(False)
+        _inherited_sockets[key] = sock
+
+    _handoff_connection = connection
+    logging.getLogger("tomodachi.handoff").info("received listening sockets", socket_count=len(_inherited_sockets))
+    return True
+
+
+def notify_ready(ready: bool = True) -> None:
+    global _handoff_connection
+
+    connection = _handoff_connection
+    _handoff_connection = None
+
+    for sock in _inherited_sockets.values():
+        # sockets that weren't picked up by any transport
+        sock.close()
+    _inherited_sockets.clear()
+
+    if connection is not None:
+        try:
+            if ready:
+                connection.sendall(b"ready")
+        except OSError:
+            pass
+        finally:
+            connection.close()
+
+    notify_socket = os.environ.get("NOTIFY_SOCKET")
+    if ready and notify_socket:
+        # the replacement process takes over as the main process of the systemd unit (requires NotifyAccess=all)
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sd_socket:
+                address = "\0" + notify_socket[1:] if notify_socket.startswith("@") else notify_socket
+                sd_socket.sendto("MAINPID={}\nREADY=1".format(os.getpid()).encode(), address)
+        except OSError:
+            pass
+
+
+async def handoff_listen_sockets(timeout: float = HANDOFF_READY_TIMEOUT) -> bool:
+    # Called in the running process. Spawns the replacement process and returns True once the replacement process
+    # has started its services, or False if the replacement process failed to start.
+    logger = logging.getLogger("tomodachi.handoff")
+    loop = asyncio.get_event_loop()
+
+    with tempfile.TemporaryDirectory(prefix="tomodachi-handoff-") as directory:
+        path = os.path.join(directory, "handoff.sock")
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(path)
+        listener.listen(1)
+        listener.setblocking(False)
+
+        # the replacement process is not started as an asyncio subprocess, since those are killed when their
+        # transport is closed, which would happen when the running process exits.
+        process = subprocess.Popen([sys.executable, *sys.orig_argv[1:]], env={**os.environ, HANDOFF_ENV: path})
+        logger.info("started replacement process", replacement_process_id=process.pid)
+
+        async def _handoff() -> bool:
+            connection, _ = await loop.sock_accept(listener)
+            with connection:
+                keys = list(_listen_sockets.keys())
+                fds = [_listen_sockets[key].fileno() for key in keys]
+                connection.setblocking(True)
+                socket.send_fds(connection, [json.dumps(keys).encode()], fds)
+                connection.setblocking(False)
+
+                response = await loop.sock_recv(connection, 16)
+                if response != b"ready":
+                    return False
+
+                _handed_off.update(keys)
+                return True
+
+        async def _wait_exit() -> None:
+            while process.poll() is None:
+                await asyncio.sleep(0.1)
+
+        handoff_task = asyncio.ensure_future(_handoff())
+        exit_task = asyncio.ensure_future(_wait_exit())
+        try:
+            done, _ = await asyncio.wait(
+                [handoff_task, exit_task], timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            result = bool(handoff_task in done and not handoff_task.exception() and handoff_task.result())
+        finally:
+            for task in (handoff_task, exit_task):
+                if not task.done():
+                    task.cancel()
+            listener.close()
+
+    if not result:
+        logger.warning("replacement process failed to start", replacement_process_id=process.pid)
+        if process.poll() is None:
+            process.send_signal(signal.SIGTERM)
+            asyncio.ensure_future(_wait_exit())
+        return False
+
+    logger.info("replacement process is ready", replacement_process_id=process.pid)
+    return True
+
+
+__all__ = [
+    "HANDOFF_ENV",
+    "register_listen_socket",
+    "unregister_listen_socket",
+    "is_handed_off",
+    "get_inherited_socket",
+    "receive_listen_sockets",
+    "notify_ready",
+    "handoff_listen_sockets",
+]
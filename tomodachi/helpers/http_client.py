@@ -0,0 +1,414 @@
+import asyncio
+import time
+from typing import Any, Dict, Mapping, Optional, Set, Union
+
+import aiohttp
+from multidict import CIMultiDict
+from yarl import URL
+
+from tomodachi import logging
+from tomodachi.helpers.deadline import DEADLINE_HEADER, DeadlineExceeded, get_remaining_time, min_timeout
+from tomodachi.helpers.execution_context import set_execution_context
+from tomodachi.invoker import Invoker
+from tomodachi.options import Options
+
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "OPTIONS", "PUT", "DELETE", "TRACE"))
+RETRY_STATUS_CODES = frozenset((502, 503, 504))
+RETRY_EXCEPTIONS = (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError)
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, host: str, retry_after: float) -> None:
+        super().__init__("circuit breaker is open for host: {}".format(host))
+        self.host = host
+        self.retry_after = retry_after
+
+
+class CircuitBreaker(object):
+    # Consecutive failures open the circuit, after which requests to the host fail fast until the reset timeout has
+    # passed. A single trial request is then let through (half-open) – a successful response closes the circuit and
+    # a failed trial request opens it again.
+    __slots__ = ("threshold", "reset_timeout", "failures", "opened_at", "_trial")
+
+    def __init__(self, threshold: int, reset_timeout: float) -> None:
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def retry_after(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if self._trial or self.retry_after() > 0:
+            return False
+        self._trial = True
+        return True
+
+    def release_trial(self) -> None:
+        self._trial = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    def record_failure(self) -> bool:
+        # Returns True if the failure opened the circuit.
+        self.failures += 1
+        was_open = self.opened_at is not None
+        if self._trial or (self.threshold and self.failures >= self.threshold):
+            self.opened_at = time.monotonic()
+            self._trial = False
+            return not was_open
+        return False
+
+
+class HttpClient(object):
+    # Outbound HTTP client shared by all handlers of a service. A single session (and connection pool) is used for
+    # all requests, so that connections to other services are kept alive and reused between requests instead of
+    # paying for DNS lookups and TCP/TLS handshakes on every call.
+
+    def __init__(self, options: Optional[Options.HTTPClient] = None, *, service: Any = None) -> None:
+        self.options = options if options is not None else Options.HTTPClient()
+        if self.options.limit < 0:
+            raise ValueError("Bad value for http_client option limit: {}".format(self.options.limit))
+        if self.options.limit_per_host < 0:
+            raise ValueError("Bad value for http_client option limit_per_host: {}".format(self.options.limit_per_host))
+        if self.options.retries < 0:
+            raise ValueError("Bad value for http_client option retries: {}".format(self.options.retries))
+
+        self.service = service
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._closed = False
+        self._circuit_breakers: Dict[str, CircuitBreaker] = {}
+        self._request_count = 0
+        self._failure_count = 0
+        self._retry_count = 0
+        self._circuit_open_count = 0
+        self._pending_requests = 0
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._closed:
+            raise RuntimeError("The http client has been closed")
+        if self._session is None or self._session.closed:
+            options = self.options
+            connector = aiohttp.TCPConnector(
+                limit=options.limit,
+                limit_per_host=options.limit_per_host,
+                use_dns_cache=True,
+                ttl_dns_cache=options.dns_cache_ttl,
+                keepalive_timeout=options.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self._get_timeout(options.timeout),
+                raise_for_status=False,
+            )
+        return self._session
+
+    def circuit_breaker(self, url: Union[str, URL]) -> Optional[CircuitBreaker]:
+        if not self.options.circuit_breaker_threshold:
+            return None
+        host = self._get_host(URL(url) if isinstance(url, str) else url)
+        circuit_breaker = self._circuit_breakers.get(host)
+        if circuit_breaker is None:
+            circuit_breaker = CircuitBreaker(
+                self.options.circuit_breaker_threshold, self.options.circuit_breaker_reset_timeout
+            )
+            self._circuit_breakers[host] = circuit_breaker
+        return circuit_breaker
+
+    def pool_stats(self) -> Dict[str, int]:
+        connector = self._session.connector if self._session is not None else None
+        acquired: Set = getattr(connector, "_acquired", None) or set()
+        idle: Dict = getattr(connector, "_conns", None) or {}
+
+        return {
+            "limit": self.options.limit,
+            "limit_per_host": self.options.limit_per_host,
+            "acquired_connections": len(acquired),
+            "idle_connections": sum(len(conns) for conns in idle.values()),
+            "hosts": len(idle),
+        }
+
+    async def request(
+        self,
+        method: str,
+        url: Union[str, URL],
+        *,
+        retries: Optional[int] = None,
+        timeout: Optional[Union[float, aiohttp.ClientTimeout]] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        **kwargs: Any,
+    ) -> aiohttp.ClientResponse:
+        # The response body is read before the response is returned, which releases the connection back to the
+        # pool. The response can be used as usual – for example `await response.json()`.
+        method = method.upper()
+        url = URL(url) if isinstance(url, str) else url
+        session = self.session
+
+        if retries is None:
+            retries = self.options.retries if method in IDEMPOTENT_METHODS else 0
+        if timeout is not None and not isinstance(timeout, aiohttp.ClientTimeout):
+            timeout = self._get_timeout(timeout)
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+
+        circuit_breaker = self.circuit_breaker(url)
+        attempt = 0
+
+        while True:
+            if circuit_breaker and not circuit_breaker.allow():
+                self._circuit_open_count += 1
+                self._set_execution_context()
+                raise CircuitOpenError(self._get_host(url), circuit_breaker.retry_after())
+
+            # a request made while the circuit is open is the trial request of the half-open circuit.
+            trial = circuit_breaker is not None and circuit_breaker.is_open
+            try:
+                # the request is limited by the deadline of the current request or message, and the remaining budget is
+                # passed on to the called service.
+                remaining = get_remaining_time()
+                request_kwargs = kwargs
+                request_headers = headers
+                if remaining is not None:
+                    if remaining <= 0:
+                        raise DeadlineExceeded("deadline exceeded")
+                    request_kwargs = {**kwargs, "timeout": self._get_deadline_timeout(kwargs.get("timeout"), remaining)}
+                    request_headers = {**(headers or {}), DEADLINE_HEADER: str(max(1, int(remaining * 1000)))}
+
+                self._request_count += 1
+                self._pending_requests += 1
+                response: Optional[aiohttp.ClientResponse] = None
+                exception: Optional[BaseException] = None
+                try:
+                    response = await self._send(session, method, url, request_headers, request_kwargs)
+                except RETRY_EXCEPTIONS as e:
+                    exception = e
+                finally:
+                    self._pending_requests -= 1
+
+                if isinstance(exception, asyncio.TimeoutError) and remaining is not None:
+                    remaining = get_remaining_time()
+                    if remaining is not None and remaining <= 0:
+                        self._set_execution_context()
+                        raise DeadlineExceeded("deadline exceeded") from exception
+
+                failed = exception is not None or (response is not None and response.status in RETRY_STATUS_CODES)
+                if failed:
+                    self._failure_count += 1
+                    if circuit_breaker and circuit_breaker.record_failure():
+                        logging.getLogger("tomodachi.http_client").warning(
+                            "circuit breaker opened",
+                            host=self._get_host(url),
+                            failures=circuit_breaker.failures,
+                            reset_timeout=circuit_breaker.reset_timeout,
+                        )
+                elif circuit_breaker:
+                    circuit_breaker.record_success()
+            except BaseException:
+                # the outcome of an abandoned trial request (for example cancelled or past the deadline) is unknown,
+                # so the next request is let through as a new trial.
+                if trial and circuit_breaker:
+                    circuit_breaker.release_trial()
+                raise
+
+            if not failed or attempt >= retries or (circuit_breaker and circuit_breaker.is_open):
+                self._set_execution_context()
+                if exception is not None:
+                    raise exception
+                return response  # type: ignore
+
+            delay = self.options.retry_backoff * (2**attempt)
+            remaining = get_remaining_time()
+            if remaining is not None and remaining <= delay:
+                # there's no time left for another attempt before the deadline is reached
+                self._set_execution_context()
+                if exception is not None:
+                    raise exception
+                return response  # type: ignore
+
+            attempt += 1
+            self._retry_count += 1
+            self._set_execution_context()
+            await asyncio.sleep(delay)
+
+    async def get(self, url: Union[str, URL], **kwargs: Any) -> aiohttp.ClientResponse:
+        return await self.request("GET", url, **kwargs)
+
+    async def head(self, url: Union[str, URL], **kwargs: Any) -> aiohttp.ClientResponse:
+        return await self.request("HEAD", url, **kwargs)
+
+    async def post(self, url: Union[str, URL], **kwargs: Any) -> aiohttp.ClientResponse:
+        return await self.request("POST", url, **kwargs)
+
+    async def put(self, url: Union[str, URL], **kwargs: Any) -> aiohttp.ClientResponse:
+        return await self.request("PUT", url, **kwargs)
+
+    async def patch(self, url: Union[str, URL], **kwargs: Any) -> aiohttp.ClientResponse:
+        return await self.request("PATCH", url, **kwargs)
+
+    async def delete(self, url: Union[str, URL], **kwargs: Any) -> aiohttp.ClientResponse:
+        return await self.request("DELETE", url, **kwargs)
+
+    async def close(self) -> None:
+        self._closed = True
+        session = self._session
+        self._session = None
+        if session is not None and not session.closed:
+            await session.close()
+
+    async def _send(
+        self,
+        session: aiohttp.ClientSession,
+        method: str,
+        url: URL,
+        headers: Optional[Mapping[str, str]],
+        kwargs: Dict[str, Any],
+    ) -> aiohttp.ClientResponse:
+        request_headers: CIMultiDict = CIMultiDict(headers or {})
+        tracer = self._get_tracer()
+        if tracer is None:
+            if self.options.propagate_trace_context:
+                self._inject_trace_context(request_headers)
+            async with session.request(method, url, headers=request_headers, **kwargs) as response:
+                await response.read()
+            return response
+
+        from opentelemetry import trace
+
+        attributes: Dict[str, Any] = {
+            "http.request.method": method,
+            "server.address": url.host or "",
+            "server.port": url.port or (443 if url.scheme == "https" else 80),
+            "url.full": str(url.with_user(None)),
+            "url.scheme": url.scheme,
+        }
+        with tracer.start_as_current_span(
+            method,
+            kind=trace.SpanKind.CLIENT,
+            attributes=attributes,
+            record_exception=True,
+            set_status_on_exception=True,
+        ) as span:
+            if self.options.propagate_trace_context:
+                self._inject_trace_context(request_headers)
+            async with session.request(method, url, headers=request_headers, **kwargs) as response:
+                await response.read()
+            span.set_attribute("http.response.status_code", response.status)
+            if response.status >= 400:
+                span.set_status(trace.StatusCode.ERROR)
+            return response
+
+    def _get_tracer(self) -> Any:
+        service = self.service
+        if service is None or not getattr(service, "_is_instrumented_by_opentelemetry", False):
+            return None
+        return getattr(service, "_opentelemetry_tracer", None)
+
+    @staticmethod
+    def _inject_trace_context(headers: CIMultiDict) -> None:
+        try:
+            from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+        except ImportError:  # pragma: no cover
+            return
+        TraceContextTextMapPropagator().inject(carrier=headers)
+
+    def _get_timeout(self, total: Optional[float]) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(total=total, sock_connect=self.options.connect_timeout)
+
+    def _get_deadline_timeout(
+        self, timeout: Optional[aiohttp.ClientTimeout], remaining: float
+    ) -> aiohttp.ClientTimeout:
+        timeout = timeout or (self._session.timeout if self._session is not None else self._get_timeout(None))
+        return aiohttp.ClientTimeout(
+            total=min_timeout(timeout.total, remaining),
+            connect=timeout.connect,
+            sock_read=timeout.sock_read,
+            sock_connect=min_timeout(timeout.sock_connect, remaining),
+        )
+
+    @staticmethod
+    def _get_host(url: URL) -> str:
+        return "{}://{}:{}".format(url.scheme, url.host, url.port)
+
+    def _set_execution_context(self) -> None:
+        pool_stats = self.pool_stats()
+        set_execution_context(
+            {
+                "http_client_requests": self._request_count,
+                "http_client_pending_requests": self._pending_requests,
+                "http_client_failures": self._failure_count,
+                "http_client_retries": self._retry_count,
+                "http_client_circuit_open_rejections": self._circuit_open_count,
+                "http_client_pool_acquired_connections": pool_stats["acquired_connections"],
+                "http_client_pool_idle_connections": pool_stats["idle_connections"],
+            }
+        )
+
+
+def setup_http_client(service: Any) -> None:
+    # Ties the outbound HTTP client to the lifecycle of the service – the client is created before the service's own
+    # _start_service method is called and is closed after the service has stopped, so that requests made while
+    # draining in-flight requests and messages can still be completed.
+    start_method = getattr(service, "_start_service", None)
+    stop_method = getattr(service, "_stop_service", None)
+
+    async def start_service(*args: Any, **kwargs: Any) -> None:
+        context: Dict = service.context
+        if context.get("_http_client") is None:
+            context["_http_client"] = HttpClient(Invoker.options(context).http_client, service=service)
+        if start_method:
+            await start_method(*args, **kwargs)
+
+    async def stop_service(*args: Any, **kwargs: Any) -> None:
+        try:
+            if stop_method:
+                await stop_method(*args, **kwargs)
+        finally:
+            client: Optional[HttpClient] = service.context.get("_http_client")
+            if client is not None:
+                await client.close()
+
+    setattr(service, "_start_service", start_service)
+    setattr(service, "_stop_service", stop_service)
+
+
+def get_http_client(service: Any) -> HttpClient:
+    # Returns the outbound HTTP client of the service, which is available from the service's _start_service method
+    # and onwards. Once the service has stopped, the closed client is returned.
+    context: Optional[Dict] = service if isinstance(service, dict) else getattr(service, "context", None)
+    if context is None:
+        raise ValueError("Unable to get http client: service context missing")
+
+    http_client: Optional[HttpClient] = context.get("_http_client")
+    if http_client is None:
+        raise RuntimeError("Unable to get http client: the service has not been started")
+
+    return http_client
+
+
+__all__ = [
+    "HttpClient",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "get_http_client",
+    "setup_http_client",
+    "IDEMPOTENT_METHODS",
+    "RETRY_STATUS_CODES",
+]
@@ -0,0 +1,141 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+
+# Leases are used to let only one of the instances of a service run each invocation of an exclusive scheduled
+# function. The lease key is made up of the function and the time bucket of the invocation, so that a tick which has
+# already been run by one instance can't be acquired by another instance later on.
+LEASE_TTL = 300.0
+
+# Keys of completed invocations are kept for this long, so that instances whose clocks are behind don't run the same
+# invocation again.
+LEASE_RETENTION = 86400.0
+
+LEASE_DEFAULT_PATH = os.path.join(tempfile.gettempdir(), "tomodachi-leases.sqlite3")
+
+
+class Lease(object):
+    # The fencing token is increased for every acquired lease. Systems written to by the lease holder can reject
+    # writes with a lower token than the highest token seen, which guards against a holder that stalled past the
+    # expiry of its lease.
+    __slots__ = ("key", "owner", "token", "expires_at")
+
+    def __init__(self, key: str, owner: str, token: int, expires_at: float) -> None:
+        self.key = key
+        self.owner = owner
+        self.token = token
+        self.expires_at = expires_at
+
+    def __repr__(self) -> str:
+        return "<Lease: {} (token: {}, owner: {})>".format(self.key, self.token, self.owner)
+
+
+class LeaseBackend(ABC):
+    # Interface for lease stores. Implementations for external stores (for example Redis, DynamoDB or a SQL database)
+    # must acquire leases atomically and only return a lease for a key that has neither been completed nor is held by
+    # another owner with an unexpired lease.
+    @abstractmethod
+    async def acquire(self, key: str, owner: str, ttl: float = LEASE_TTL) -> Optional[Lease]:
+        pass
+
+    @abstractmethod
+    async def release(self, lease: Lease, completed: bool = True) -> None:
+        # A released lease that isn't completed can be acquired again, for example by another instance.
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class SQLiteLeaseBackend(LeaseBackend):
+    # Lease store for the worker processes of a single host, using a SQLite database file (which is locked by SQLite
+    # during each acquisition). The database calls are made in the default executor.
+    __slots__ = ("path", "retention", "_initialized")
+
+    def __init__(self, path: Optional[str] = None, *, retention: float = LEASE_RETENTION) -> None:
+        self.path = path or LEASE_DEFAULT_PATH
+        self.retention = retention
+        self._initialized = False
+
+    async def acquire(self, key: str, owner: str, ttl: float = LEASE_TTL) -> Optional[Lease]:
+        return await asyncio.get_event_loop().run_in_executor(None, self._acquire, key, owner, ttl)
+
+    async def release(self, lease: Lease, completed: bool = True) -> None:
+        await asyncio.get_event_loop().run_in_executor(None, self._release, lease, completed)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+        if not self._initialized:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS tomodachi_leases ("
+                "key TEXT PRIMARY KEY, owner TEXT NOT NULL, token INTEGER NOT NULL, "
+                "expires_at REAL NOT NULL, completed INTEGER NOT NULL DEFAULT 0)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS tomodachi_leases_expires_at ON tomodachi_leases (expires_at)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS tomodachi_lease_tokens (id INTEGER PRIMARY KEY, token INTEGER NOT NULL)"
+            )
+            connection.execute("INSERT OR IGNORE INTO tomodachi_lease_tokens (id, token) VALUES (1, 0)")
+            self._initialized = True
+        return connection
+
+    def _acquire(self, key: str, owner: str, ttl: float) -> Optional[Lease]:
+        connection = self._connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row: Any = connection.execute(
+                    "SELECT expires_at, completed FROM tomodachi_leases WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and (row[1] or row[0] > now):
+                    connection.execute("ROLLBACK")
+                    return None
+
+                connection.execute("UPDATE tomodachi_lease_tokens SET token = token + 1 WHERE id = 1")
+                token = int(connection.execute("SELECT token FROM tomodachi_lease_tokens WHERE id = 1").fetchone()[0])
+                expires_at = now + ttl
+                connection.execute(
+                    "INSERT OR REPLACE INTO tomodachi_leases (key, owner, token, expires_at, completed) "
+                    "VALUES (?, ?, ?, ?, 0)",
+                    (key, owner, token, expires_at),
+                )
+                connection.execute("DELETE FROM tomodachi_leases WHERE expires_at < ?", (now - self.retention,))
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        finally:
+            connection.close()
+
+        return Lease(key, owner, token, expires_at)
+
+    def _release(self, lease: Lease, completed: bool) -> None:
+        connection = self._connect()
+        try:
+            if completed:
+                connection.execute(
+                    "UPDATE tomodachi_leases SET completed = 1 WHERE key = ? AND owner = ? AND token = ?",
+                    (lease.key, lease.owner, lease.token),
+                )
+            else:
+                connection.execute(
+                    "DELETE FROM tomodachi_leases WHERE key = ? AND owner = ? AND token = ?",
+                    (lease.key, lease.owner, lease.token),
+                )
+        finally:
+            connection.close()
+
+
+__all__ = [
+    "LEASE_TTL",
+    "Lease",
+    "LeaseBackend",
+    "SQLiteLeaseBackend",
+]
@@ -0,0 +1,220 @@
+import asyncio
+import collections
+import math
+import time
+from typing import Deque, Optional
+
+
+class ConcurrencyLimitExceeded(Exception):
+    pass
+
+
+class ConcurrencyLimiter(object):
+    __slots__ = (
+        "name",
+        "_limit",
+        "_max_queue_size",
+        "_queue_timeout",
+        "_in_flight",
+        "_waiters",
+        "_rejected_count",
+        "_timeout_count",
+    )
+
+    def __init__(
+        self,
+        limit: int,
+        *,
+        max_queue_size: Optional[int] = None,
+        queue_timeout: Optional[float] = None,
+        name: Optional[str] = None,
+    ) -> None:
+        if limit < 1:
+            raise ValueError("Bad value for concurrency limit: {}".format(limit))
+        if max_queue_size is not None and max_queue_size < 0:
+            raise ValueError("Bad value for max queue size: {}".format(max_queue_size))
+
+        self.name = name
+        self._limit: float = float(limit)
+        self._max_queue_size = max_queue_size
+        self._queue_timeout = queue_timeout if queue_timeout and queue_timeout > 0 else None
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = collections.deque()
+        self._rejected_count = 0
+        self._timeout_count = 0
+
+    @property
+    def limit(self) -> int:
+        return max(1, int(self._limit))
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def rejected_count(self) -> int:
+        return self._rejected_count
+
+    @property
+    def timeout_count(self) -> int:
+        return self._timeout_count
+
+    def try_acquire(self) -> bool:
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+            return True
+        return False
+
+    async def acquire(self) -> float:
+        # Returns the number of seconds spent waiting in queue, or raises ConcurrencyLimitExceeded if the request
+        # was shed, either because the wait queue is full or because the queue timeout was reached.
+        if self.try_acquire():
+            return 0.0
+
+        if self._max_queue_size is not None and len(self._waiters) >= self._max_queue_size:
+            self._rejected_count += 1
+            raise ConcurrencyLimitExceeded("queue is full")
+
+        start_time = time.monotonic()
+        waiter: asyncio.Future = asyncio.get_event_loop().create_future()
+        self._waiters.append(waiter)
+
+        try:
+            if self._queue_timeout:
+                await asyncio.wait_for(asyncio.shield(waiter), timeout=self._queue_timeout)
+            else:
+                await waiter
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # slot was handed over at the same time as the timeout was reached
+                return time.monotonic() - start_time
+            waiter.cancel()
+            self._remove_waiter(waiter)
+            self._timeout_count += 1
+            self._rejected_count += 1
+            raise ConcurrencyLimitExceeded("queue timeout") from None
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                waiter.cancel()
+                self._remove_waiter(waiter)
+            raise
+
+        return time.monotonic() - start_time
+
+    def release(self, latency: Optional[float] = None) -> None:
+        self._in_flight = max(0, self._in_flight - 1)
+        if latency is not None:
+            self.record_latency(latency)
+        self._wake_waiters()
+
+    def record_latency(self, latency: float) -> None:
+        pass
+
+    def _remove_waiter(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _wake_waiters(self) -> None:
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self._in_flight += 1
+            waiter.set_result(None)
+
+
+class AdaptiveConcurrencyLimiter(ConcurrencyLimiter):
+    # Gradient based concurrency limit, which compares a short term latency measurement (sample window average)
+    # to a long term exponentially smoothed latency. When short term latency grows beyond the long term latency
+    # (multiplied by a tolerance factor), the limit is reduced – when latency is stable the limit grows by
+    # a headroom of sqrt(limit), which allows for a small queue to build up.
+
+    __slots__ = (
+        "_min_limit",
+        "_max_limit",
+        "_tolerance",
+        "_smoothing",
+        "_window_size",
+        "_long_latency",
+        "_long_latency_samples",
+        "_window_latency_sum",
+        "_window_count",
+    )
+
+    def __init__(
+        self,
+        limit: int,
+        *,
+        min_limit: int = 1,
+        max_limit: int = 1000,
+        tolerance: float = 2.0,
+        smoothing: float = 0.2,
+        window_size: int = 50,
+        max_queue_size: Optional[int] = None,
+        queue_timeout: Optional[float] = None,
+        name: Optional[str] = None,
+    ) -> None:
+        super().__init__(limit, max_queue_size=max_queue_size, queue_timeout=queue_timeout, name=name)
+        if min_limit < 1 or max_limit < min_limit:
+            raise ValueError("Bad values for adaptive concurrency limits: {}-{}".format(min_limit, max_limit))
+
+        self._min_limit = min_limit
+        self._max_limit = max_limit
+        self._limit = float(min(max(limit, min_limit), max_limit))
+        self._tolerance = tolerance
+        self._smoothing = smoothing
+        self._window_size = max(1, window_size)
+        self._long_latency: Optional[float] = None
+        self._long_latency_samples = 0
+        self._window_latency_sum = 0.0
+        self._window_count = 0
+
+    def record_latency(self, latency: float) -> None:
+        self._window_latency_sum += latency
+        self._window_count += 1
+        if self._window_count < min(self._window_size, max(self.limit, 10)):
+            return
+
+        short_latency = self._window_latency_sum / self._window_count
+        self._window_latency_sum = 0.0
+        self._window_count = 0
+
+        self._long_latency_samples += 1
+        if self._long_latency is None:
+            self._long_latency = short_latency
+        elif self._long_latency_samples <= 10:
+            # warm up with a plain average of the first windows
+            self._long_latency += (short_latency - self._long_latency) / self._long_latency_samples
+        else:
+            # exponential moving average over roughly the 600 most recent windows
+            self._long_latency = self._long_latency * (1 - 2.0 / 601) + short_latency * (2.0 / 601)
+
+        long_latency = self._long_latency
+        if short_latency <= 0 or long_latency <= 0:
+            return
+
+        if long_latency / short_latency > 2:
+            # recover quickly from previous latency spikes that have inflated the long term latency
+            self._long_latency = long_latency * 0.95
+
+        gradient = max(0.5, min(1.0, self._tolerance * long_latency / short_latency))
+        new_limit = self._limit * gradient + math.sqrt(self._limit)
+        new_limit = self._limit * (1 - self._smoothing) + new_limit * self._smoothing
+        self._limit = float(min(max(new_limit, self._min_limit), self._max_limit))
+
+        self._wake_waiters()
+
+
+__all__ = [
+    "ConcurrencyLimitExceeded",
+    "ConcurrencyLimiter",
+    "AdaptiveConcurrencyLimiter",
+]
@@ -1,124 +1,183 @@
-import asyncio
 import functools
 import inspect
-from typing import Any, Callable, Dict, List, Set, Tuple, cast
+from typing import Any, Awaitable, Callable, Dict, List, Set, Tuple, cast
 
 from tomodachi import get_contextvar, logging
 
 TOMODACHI_MIDDLEWARE_ATTRIBUTE = "_tomodachi_middleware_attribute"
+TOMODACHI_MIDDLEWARE_CHAIN_ATTRIBUTE = "_tomodachi_middleware_chain_attribute"
 
+MiddlewareAttributes = Tuple[int, int, Set[str], List[str], bool, bool, bool, bool, int, str]
 
-async def execute_middlewares(
-    func: Callable, routine_func: Callable, middlewares: List, *args: Any, **init_kwargs: Any
-) -> Any:
-    if middlewares:
-        logger = logging.getLogger()
-
-        middleware_context: Dict = {}
-
-        async def middleware_wrapper(idx: int = 0, *ma: Any, **mkw: Any) -> Any:
-            middleware: Callable = middlewares[idx]
-
-            logging.bind_logger(
-                logger.bind(
-                    middleware=(
-                        getattr(middleware, "name", Ellipsis)
-                        if hasattr(middleware, "name")
-                        else (
-                            middleware.__name__
-                            if hasattr(middleware, "__name__")
-                            else (
-                                type(middleware).__name__
-                                if hasattr(type(middleware), "__name__")
-                                else str(type(middleware))
-                            )
-                        )
-                    )
-                )
+
+def get_middleware_name(middleware: Any) -> str:
+    return cast(
+        str,
+        (
+            getattr(middleware, "name", Ellipsis)
+            if hasattr(middleware, "name")
+            else (
+                middleware.__name__
+                if hasattr(middleware, "__name__")
+                else (type(middleware).__name__ if hasattr(type(middleware), "__name__") else str(type(middleware)))
             )
-            get_contextvar("service.logger").set(logger._context["logger"])
-
-            if getattr(middleware, TOMODACHI_MIDDLEWARE_ATTRIBUTE, None) is None:
-                values = inspect.getfullargspec(inspect.unwrap(middleware))
-                middleware_kwargs = set(values.args + values.kwonlyargs)
-                middleware_args = values.args
-                has_defaults = True if values.defaults else False
-                has_varargs = True if values.varargs else False
-                has_varkw = True if values.varkw else False
-
-                is_bound_method = bool(
-                    inspect.ismethod(middleware)
-                    or getattr(middleware, "__self__", None) is middleware
-                    or inspect.ismethod(getattr(middleware, "__call__", None))
-                )
-                arg_start = 0 if is_bound_method else 1
-                arg_len = len(values.args) - len(values.defaults or ()) + arg_start
-                middleware_args_offset = 2 if is_bound_method else 1
-
-                setattr(
-                    middleware,
-                    TOMODACHI_MIDDLEWARE_ATTRIBUTE,
-                    (
-                        arg_len,
-                        arg_start,
-                        middleware_kwargs,
-                        middleware_args,
-                        has_defaults,
-                        has_varargs,
-                        has_varkw,
-                        is_bound_method,
-                        middleware_args_offset,
-                    ),
-                )
-            else:
-                (
-                    arg_len,
-                    arg_start,
-                    middleware_kwargs,
-                    middleware_args,
-                    has_defaults,
-                    has_varargs,
-                    has_varkw,
-                    is_bound_method,
-                    middleware_args_offset,
-                ) = cast(
-                    Tuple[int, int, Set[str], List[str], bool, bool, bool, bool, int],
-                    getattr(middleware, TOMODACHI_MIDDLEWARE_ATTRIBUTE),
-                )
-
-            if has_varargs and not has_defaults:
-                arg_len = 3 + len(args)
-
-            if middlewares and len(middlewares) <= idx + 1:
-
-                @functools.wraps(func)
-                async def _func_wrapper(*a: Any, **kw: Any) -> Any:
-                    return await asyncio.create_task(routine_func(*args, **{**mkw, **kw, **init_kwargs}))
-
-                middleware_arguments = [middleware, _func_wrapper, *args, middleware_context][arg_start:arg_len]
-            else:
-
-                @functools.wraps(func)
-                async def _middleware_wrapper(*a: Any, **kw: Any) -> Any:
-                    return await asyncio.create_task(middleware_wrapper(idx + 1, *a, **{**mkw, **kw, **init_kwargs}))
-
-                middleware_arguments = [middleware, _middleware_wrapper, *args, middleware_context][arg_start:arg_len]
+        ),
+    )
+
+
+def get_middleware_attributes(middleware: Callable) -> MiddlewareAttributes:
+    # The signature of a middleware is only inspected once - the result is stored on the middleware itself.
+    attributes = getattr(middleware, TOMODACHI_MIDDLEWARE_ATTRIBUTE, None)
+    if attributes is not None:
+        return cast(MiddlewareAttributes, attributes)
+
+    values = inspect.getfullargspec(inspect.unwrap(middleware))
+    middleware_kwargs = set(values.args + values.kwonlyargs)
+    middleware_args = values.args
+    has_defaults = True if values.defaults else False
+    has_varargs = True if values.varargs else False
+    has_varkw = True if values.varkw else False
+
+    is_bound_method = bool(
+        inspect.ismethod(middleware)
+        or getattr(middleware, "__self__", None) is middleware
+        or inspect.ismethod(getattr(middleware, "__call__", None))
+    )
+    arg_start = 0 if is_bound_method else 1
+    arg_len = len(values.args) - len(values.defaults or ()) + arg_start
+    middleware_args_offset = 2 if is_bound_method else 1
+
+    attributes = (
+        arg_len,
+        arg_start,
+        middleware_kwargs,
+        middleware_args,
+        has_defaults,
+        has_varargs,
+        has_varkw,
+        is_bound_method,
+        middleware_args_offset,
+        get_middleware_name(middleware),
+    )
+    setattr(middleware, TOMODACHI_MIDDLEWARE_ATTRIBUTE, attributes)
+
+    return attributes
+
+
+def compile_middlewares(func: Callable, middlewares: List) -> Callable[..., Awaitable[Any]]:
+    # Compiles the middleware chain of a handler into nested direct awaits. Each hop is called within the same
+    # task as the previous one (contextvars are shared), so the logger context of the hop is restored when the
+    # next hop returns, in the same way as if it would have been executed in a separate task.
+    hops: List[Tuple[Callable, MiddlewareAttributes]] = [
+        (middleware, get_middleware_attributes(middleware)) for middleware in middlewares
+    ]
+    hop_count = len(hops)
+    service_logger_contextvar = get_contextvar("service.logger")
+
+    def _bind_logger(logger: Any) -> None:
+        logging.bind_logger(logger)
+        service_logger_contextvar.set(logger._context["logger"])
+
+    async def _call(
+        idx: int,
+        routine_func: Callable,
+        args: Tuple,
+        init_kwargs: Dict,
+        middleware_context: Dict,
+        logger: Any,
+        mkw: Dict,
+    ) -> Any:
+        middleware, (
+            arg_len,
+            arg_start,
+            middleware_kwargs,
+            middleware_args,
+            has_defaults,
+            has_varargs,
+            has_varkw,
+            is_bound_method,
+            middleware_args_offset,
+            middleware_name,
+        ) = hops[idx]
+
+        middleware_logger = logger.bind(middleware=middleware_name)
+        _bind_logger(middleware_logger)
+
+        if has_varargs and not has_defaults:
+            arg_len = 3 + len(args)
+
+        if idx + 1 >= hop_count:
+
+            @functools.wraps(func)
+            async def _func_wrapper(*a: Any, **kw: Any) -> Any:
+                try:
+                    return await routine_func(*args, **{**mkw, **kw, **init_kwargs})
+                finally:
+                    _bind_logger(middleware_logger)
+
+            next_func: Callable = _func_wrapper
+        else:
+
+            @functools.wraps(func)
+            async def _middleware_wrapper(*a: Any, **kw: Any) -> Any:
+                try:
+                    return await _call(
+                        idx + 1,
+                        routine_func,
+                        args,
+                        init_kwargs,
+                        middleware_context,
+                        logger,
+                        {**mkw, **kw, **init_kwargs},
+                    )
+                finally:
+                    _bind_logger(middleware_logger)
 
-            mkw_cleaned = {k: v for k, v in mkw.items() if has_varkw or k in middleware_kwargs}
+            next_func = _middleware_wrapper
+
+        middleware_arguments = [middleware, next_func, *args, middleware_context][arg_start:arg_len]
 
+        if mkw:
+            mkw_cleaned = {k: v for k, v in mkw.items() if has_varkw or k in middleware_kwargs}
             for i, key in enumerate(
                 middleware_args[middleware_args_offset : len(middleware_arguments)], middleware_args_offset
             ):
                 if key in mkw_cleaned:
                     middleware_arguments[i] = mkw_cleaned.pop(key)
+        else:
+            mkw_cleaned = mkw
+
+        if is_bound_method:
+            return await middleware(*middleware_arguments[1:], **mkw_cleaned)
 
-            if is_bound_method:
-                return await asyncio.create_task(middleware(*middleware_arguments[1:], **mkw_cleaned))
+        return await middleware(*middleware_arguments, **mkw_cleaned)
 
-            return await asyncio.create_task(middleware(*middleware_arguments, **mkw_cleaned))
+    async def _chain(routine_func: Callable, *args: Any, **init_kwargs: Any) -> Any:
+        return await _call(0, routine_func, args, init_kwargs, {}, logging.getLogger(), init_kwargs)
 
-        return_value = await asyncio.create_task(middleware_wrapper(**init_kwargs))
-    else:
-        return_value = await asyncio.create_task(routine_func(*args, **init_kwargs))
+    return _chain
+
+
+def get_compiled_middlewares(func: Callable, middlewares: List) -> Callable[..., Awaitable[Any]]:
+    # The compiled chain is cached on the handler function and recompiled if the list of middlewares changes.
+    middlewares_key = tuple(middlewares)
+    cached = getattr(func, TOMODACHI_MIDDLEWARE_CHAIN_ATTRIBUTE, None)
+    if cached is not None and cached[0] == middlewares_key:
+        return cast(Callable[..., Awaitable[Any]], cached[1])
+
+    chain = compile_middlewares(func, middlewares)
+    try:
+        setattr(func, TOMODACHI_MIDDLEWARE_CHAIN_ATTRIBUTE, (middlewares_key, chain))
+    except (AttributeError, TypeError):
+        pass
+
+    return chain
+
+
+async def execute_middlewares(
+    func: Callable, routine_func: Callable, middlewares: List, *args: Any, **init_kwargs: Any
+) -> Any:
+    if middlewares:
+        return await get_compiled_middlewares(func, middlewares)(routine_func, *args, **init_kwargs)
 
-    return return_value
+    return await routine_func(*args, **init_kwargs)
@@ -0,0 +1,176 @@
+import asyncio
+import collections
+import functools
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, OrderedDict, Tuple, TypeVar, cast
+
+T = TypeVar("T")
+
+_MISSING = object()
+
+
+class _Call(object):
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Future) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight(object):
+    # Coalesces concurrent calls for the same key into a single call. The first caller for a key starts the work as
+    # a separate task, and callers arriving while the work is in-flight await the same task. The outcome (a result
+    # or an exception) is delivered to every caller for the key – exceptions are never cached, so the next call
+    # after a failure starts new work. Successful results are optionally cached for `ttl` seconds in a LRU cache of
+    # at most `max_size` keys.
+    #
+    # Waiters are cancellation-safe: a cancelled caller doesn't cancel the shared work for the other callers. The
+    # work is only cancelled when every caller waiting for it has been cancelled.
+    __slots__ = ("ttl", "max_size", "_calls", "_cache", "_hit_count", "_miss_count", "_coalesced_count")
+
+    def __init__(self, *, ttl: Optional[float] = None, max_size: int = 1024) -> None:
+        if ttl is not None and ttl < 0:
+            raise ValueError("Bad value for single-flight ttl: {}".format(ttl))
+        if max_size < 1:
+            raise ValueError("Bad value for single-flight max size: {}".format(max_size))
+
+        self.ttl = ttl or None
+        self.max_size = max_size
+        self._calls: Dict[Hashable, _Call] = {}
+        self._cache: OrderedDict[Hashable, Tuple[float, Any]] = collections.OrderedDict()
+        self._hit_count = 0
+        self._miss_count = 0
+        self._coalesced_count = 0
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    @property
+    def hit_count(self) -> int:
+        return self._hit_count
+
+    @property
+    def miss_count(self) -> int:
+        return self._miss_count
+
+    @property
+    def coalesced_count(self) -> int:
+        return self._coalesced_count
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self._hit_count,
+            "misses": self._miss_count,
+            "coalesced": self._coalesced_count,
+            "in_flight": len(self._calls),
+            "cached": len(self._cache),
+        }
+
+    def get_cached(self, key: Hashable, default: Any = None) -> Any:
+        value = self._get_cached(key)
+        return default if value is _MISSING else value
+
+    def forget(self, key: Hashable) -> None:
+        # Removes a cached result. Work that is already in-flight for the key is not affected.
+        self._cache.pop(key, None)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    async def do(self, key: Hashable, func: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+        value = self._get_cached(key)
+        if value is not _MISSING:
+            self._hit_count += 1
+            return cast(T, value)
+
+        call = self._calls.get(key)
+        if call is None or call.task.done():
+            self._miss_count += 1
+            # the task is started with a copy of the context of the first caller (logger context, OpenTelemetry
+            # context, etc.), the same way as tasks started by the middleware execution.
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            call = _Call(task)
+            self._calls[key] = call
+            task.add_done_callback(functools.partial(self._done, key, call))
+        else:
+            self._coalesced_count += 1
+
+        call.waiters += 1
+        try:
+            return cast(T, await asyncio.shield(call.task))
+        finally:
+            call.waiters -= 1
+            if not call.waiters and not call.task.done():
+                # every caller waiting for the result has been cancelled – the call is removed right away, since the
+                # task is only done once the loop has run it again and callers arriving until then must start new work.
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+                call.task.cancel()
+
+    def _get_cached(self, key: Hashable) -> Any:
+        if self.ttl is None:
+            return _MISSING
+
+        item = self._cache.get(key)
+        if item is None:
+            return _MISSING
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._cache[key]
+            return _MISSING
+
+        self._cache.move_to_end(key)
+        return value
+
+    def _done(self, key: Hashable, call: _Call, task: asyncio.Future) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+        if task.cancelled() or task.exception() is not None or self.ttl is None:
+            return
+
+        self._cache[key] = (time.monotonic() + self.ttl, task.result())
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+
+def _default_key(*args: Any, **kwargs: Any) -> Hashable:
+    return (args, tuple(sorted(kwargs.items()))) if kwargs else args
+
+
+def singleflight(
+    func: Optional[Callable[..., Awaitable[Any]]] = None,
+    *,
+    ttl: Optional[float] = None,
+    max_size: int = 1024,
+    key: Optional[Callable[..., Hashable]] = None,
+) -> Any:
+    # Decorator for async functions and service methods. By default the key is made up of all the arguments of the
+    # call (including `self` for methods), which then must be hashable – a custom key function can be passed as
+    # `key`, which is called with the same arguments as the decorated function.
+    def _decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        group = SingleFlight(ttl=ttl, max_size=max_size)
+        key_func = key or _default_key
+
+        @functools.wraps(func)
+        async def _wrapper(*args: Any, **kwargs: Any) -> T:
+            return await group.do(key_func(*args, **kwargs), func, *args, **kwargs)
+
+        setattr(_wrapper, "singleflight", group)
+        return _wrapper
+
+    if func is not None:
+        return _decorator(func)
+    return _decorator
+
+
+__all__ = [
+    "SingleFlight",
+    "singleflight",
+]
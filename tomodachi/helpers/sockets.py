@@ -0,0 +1,107 @@
+import os
+import socket
+import stat
+from typing import List, Optional, Tuple, Union
+
+# File descriptors passed to a process via systemd socket activation start at fd 3 (SD_LISTEN_FDS_START).
+SD_LISTEN_FDS_START = 3
+
+
+def get_systemd_listen_fds() -> List[Tuple[int, str]]:
+    # Returns a list of (fd, name) for the sockets passed via systemd socket activation. The sockets are only valid
+    # for the process identified by LISTEN_PID – or for worker processes forked from that process.
+    listen_pid = os.environ.get("LISTEN_PID", "")
+    if listen_pid not in (str(os.getpid()), str(os.getppid())):
+        return []
+
+    try:
+        listen_fds = int(os.environ.get("LISTEN_FDS", ""))
+    except ValueError:
+        return []
+
+    names = [name for name in os.environ.get("LISTEN_FDNAMES", "").split(":")]
+    return [
+        (SD_LISTEN_FDS_START + i, names[i] if i < len(names) and names[i] else "unknown") for i in range(listen_fds)
+    ]
+
+
+def get_listen_fd(listen_fd: Union[int, str]) -> int:
+    if isinstance(listen_fd, bool):
+        raise ValueError("Bad value for http option listen_fd: {}".format(str(listen_fd)))
+    if isinstance(listen_fd, int) or (isinstance(listen_fd, str) and listen_fd.isdigit()):
+        fd = int(listen_fd)
+        if fd < 0:
+            raise ValueError("Bad value for http option listen_fd: {}".format(str(listen_fd)))
+        return fd
+
+    listen_fds = get_systemd_listen_fds()
+    if not listen_fds:
+        raise ValueError(
+            "Bad value for http option listen_fd: {} - no sockets passed via socket activation (LISTEN_FDS)".format(
+                str(listen_fd)
+            )
+        )
+    if listen_fd in ("systemd", "LISTEN_FDS"):
+        return listen_fds[0][0]
+    for fd, name in listen_fds:
+        if name == listen_fd:
+            return fd
+
+    raise ValueError(
+        "Bad value for http option listen_fd: {} - no socket with that name in LISTEN_FDNAMES".format(str(listen_fd))
+    )
+
+
+def create_inherited_socket(listen_fd: Union[int, str]) -> socket.socket:
+    # The inherited file descriptor is duplicated, so that the original descriptor is kept open when the server
+    # is closed (for example when services are restarted by the file watcher).
+    sock = socket.socket(fileno=os.dup(get_listen_fd(listen_fd)))
+    if sock.type != socket.SOCK_STREAM:
+        sock.close()
+        raise ValueError("Bad value for http option listen_fd: {} - not a stream socket".format(str(listen_fd)))
+
+    sock.setblocking(False)
+    return sock
+
+
+def create_unix_socket(path: str, permissions: Optional[int] = None) -> socket.socket:
+    try:
+        if stat.S_ISSOCK(os.stat(path).st_mode):
+            # stale socket file from a previous process
+            os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.bind(path)
+        if permissions is not None:
+            # permissions are applied before the socket starts listening, so that no connections can be made
+            # with the default permissions of the socket file.
+            os.chmod(path, permissions)
+    except Exception:
+        sock.close()
+        raise
+
+    sock.setblocking(False)
+    return sock
+
+
+def remove_unix_socket(path: str, inode: Optional[int] = None) -> None:
+    # Only removes the socket file if it's still the same file that was created by this process.
+    try:
+        st = os.stat(path)
+        if stat.S_ISSOCK(st.st_mode) and (inode is None or st.st_ino == inode):
+            os.unlink(path)
+    except OSError:
+        pass
+
+
+__all__ = [
+    "SD_LISTEN_FDS_START",
+    "get_systemd_listen_fds",
+    "get_listen_fd",
+    "create_inherited_socket",
+    "create_unix_socket",
+    "remove_unix_socket",
+]
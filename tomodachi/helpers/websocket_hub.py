@@ -0,0 +1,252 @@
+import asyncio
+import collections
+import json
+from typing import Any, Deque, Dict, Hashable, Iterable, List, Optional, Set, Tuple, Union, cast
+
+from tomodachi import logging
+from tomodachi._exception import limit_exception_traceback
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "disconnect")
+
+# A frame is the pre-encoded payload of a broadcast, which is shared between all receiving connections.
+Frame = Tuple[bytes, bool]
+
+
+def encode_frame(data: Union[str, bytes, bytearray, memoryview, Dict, List]) -> Frame:
+    if isinstance(data, str):
+        return data.encode("utf-8"), False
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return bytes(data), True
+    return json.dumps(data).encode("utf-8"), False
+
+
+class WebSocketConnection(object):
+    __slots__ = ("websocket", "rooms", "max_queue_size", "_queue", "_sender", "_closing")
+
+    def __init__(self, websocket: Any, max_queue_size: int) -> None:
+        self.websocket = websocket
+        self.rooms: Set[Hashable] = set()
+        self.max_queue_size = max_queue_size
+        self._queue: Deque[Frame] = collections.deque()
+        self._sender: Optional[asyncio.Future] = None
+        self._closing = False
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    @property
+    def closing(self) -> bool:
+        return self._closing or bool(getattr(self.websocket, "closed", False))
+
+
+class WebSocketHub(object):
+    # Fan-out of messages to open websocket connections. Each connection has its own bounded outbound queue, which
+    # is drained by a sender task that only exists while there are frames to send, so that a slow client never
+    # blocks the broadcast or the delivery to other clients. Connections that fall behind the queue limit either
+    # have frames dropped or are disconnected, depending on the overflow policy.
+
+    def __init__(self, *, max_queue_size: int = 100, overflow_policy: str = "drop_oldest") -> None:
+        if max_queue_size < 1:
+            raise ValueError("Bad value for websocket max queue size: {}".format(max_queue_size))
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError("Bad value for websocket overflow policy: {}".format(overflow_policy))
+
+        self.max_queue_size = max_queue_size
+        self.overflow_policy = overflow_policy
+        self._connections: Dict[Any, WebSocketConnection] = {}
+        self._rooms: Dict[Hashable, Dict[Any, WebSocketConnection]] = {}
+        self._dropped_count = 0
+        self._disconnected_count = 0
+
+    def __len__(self) -> int:
+        return len(self._connections)
+
+    def __contains__(self, websocket: Any) -> bool:
+        return websocket in self._connections
+
+    @property
+    def connections(self) -> List[Any]:
+        return list(self._connections.keys())
+
+    @property
+    def rooms(self) -> List[Hashable]:
+        return list(self._rooms.keys())
+
+    @property
+    def dropped_count(self) -> int:
+        return self._dropped_count
+
+    @property
+    def disconnected_count(self) -> int:
+        return self._disconnected_count
+
+    def room_size(self, room: Hashable) -> int:
+        return len(self._rooms.get(room) or ())
+
+    def rooms_for(self, websocket: Any) -> Set[Hashable]:
+        connection = self._connections.get(websocket)
+        return set(connection.rooms) if connection else set()
+
+    def add(self, websocket: Any, *, max_queue_size: Optional[int] = None) -> WebSocketConnection:
+        connection = self._connections.get(websocket)
+        if connection is None:
+            connection = WebSocketConnection(websocket, max_queue_size or self.max_queue_size)
+            self._connections[websocket] = connection
+        return connection
+
+    def remove(self, websocket: Any) -> None:
+        connection = self._connections.pop(websocket, None)
+        if connection is None:
+            return
+
+        for room in connection.rooms:
+            members = self._rooms.get(room)
+            if members is not None:
+                members.pop(websocket, None)
+                if not members:
+                    self._rooms.pop(room, None)
+        connection.rooms.clear()
+        connection._queue.clear()
+        connection._closing = True
+
+        if connection._sender and not connection._sender.done():
+            connection._sender.cancel()
+
+    def join(self, websocket: Any, *rooms: Hashable) -> None:
+        connection = self.add(websocket)
+        for room in rooms:
+            self._rooms.setdefault(room, {})[websocket] = connection
+            connection.rooms.add(room)
+
+    def leave(self, websocket: Any, *rooms: Hashable) -> None:
+        connection = self._connections.get(websocket)
+        if connection is None:
+            return
+
+        for room in rooms:
+            members = self._rooms.get(room)
+            if members is not None:
+                members.pop(websocket, None)
+                if not members:
+                    self._rooms.pop(room, None)
+            connection.rooms.discard(room)
+
+    def send(self, websocket: Any, data: Union[str, bytes, Dict, List]) -> bool:
+        connection = self._connections.get(websocket)
+        if connection is None:
+            return False
+        return self._enqueue(connection, encode_frame(data))
+
+    def broadcast(
+        self,
+        data: Union[str, bytes, Dict, List],
+        room: Optional[Union[Hashable, Iterable[Hashable]]] = None,
+        *,
+        exclude: Optional[Any] = None,
+    ) -> int:
+        # Queues the message for every connection (or every connection in the given room or list of rooms) and
+        # returns the number of connections that the message was queued for. The payload is encoded once.
+        if room is None:
+            recipients: Iterable[WebSocketConnection] = list(self._connections.values())
+        elif isinstance(room, (list, tuple, set, frozenset)):
+            members: Dict[Any, WebSocketConnection] = {}
+            for room_ in room:
+                members.update(self._rooms.get(room_) or {})
+            recipients = list(members.values())
+        else:
+            recipients = list((self._rooms.get(cast(Hashable, room)) or {}).values())
+
+        frame = encode_frame(data)
+        count = 0
+        for connection in recipients:
+            if exclude is not None and connection.websocket is exclude:
+                continue
+            if self._enqueue(connection, frame):
+                count += 1
+
+        return count
+
+    async def close(self, *, code: int = 1001, message: bytes = b"") -> None:
+        connections = list(self._connections.values())
+        for connection in connections:
+            self.remove(connection.websocket)
+
+        if connections:
+            await asyncio.gather(
+                *[connection.websocket.close(code=code, message=message) for connection in connections],
+                return_exceptions=True,
+            )
+
+    def _enqueue(self, connection: WebSocketConnection, frame: Frame) -> bool:
+        if connection.closing:
+            return False
+
+        queue = connection._queue
+        if len(queue) >= connection.max_queue_size:
+            if self.overflow_policy == "disconnect":
+                self._disconnect(connection)
+                return False
+
+            self._dropped_count += 1
+            if self.overflow_policy == "drop_newest":
+                return False
+            queue.popleft()
+
+        queue.append(frame)
+        if connection._sender is None or connection._sender.done():
+            connection._sender = asyncio.ensure_future(self._send_queued(connection))
+
+        return True
+
+    def _disconnect(self, connection: WebSocketConnection) -> None:
+        websocket = connection.websocket
+        self._disconnected_count += 1
+        self.remove(websocket)
+
+        logging.getLogger("tomodachi.http.websocket").warning(
+            "disconnecting slow websocket client", max_queue_size=connection.max_queue_size
+        )
+
+        async def _close() -> None:
+            try:
+                # 1008 - policy violation, the client was unable to keep up with the messages sent to it
+                await websocket.close(code=1008, message=b"send queue overflow")
+            except Exception:
+                pass
+
+        asyncio.ensure_future(_close())
+
+    async def _send_queued(self, connection: WebSocketConnection) -> None:
+        websocket = connection.websocket
+        queue = connection._queue
+        while queue:
+            payload, binary = queue.popleft()
+            writer = getattr(websocket, "_writer", None)
+            if writer is None or connection.closing:
+                queue.clear()
+                return
+
+            try:
+                # the websocket writer awaits the transport to drain when its buffer is full, which is what
+                # applies backpressure per connection while the queue absorbs bursts.
+                await writer.send(payload, binary=binary)
+            except ConnectionResetError:
+                queue.clear()
+                return
+            except asyncio.CancelledError:
+                queue.clear()
+                raise
+            except Exception as e:
+                limit_exception_traceback(e, ("tomodachi.helpers.websocket_hub",))
+                logging.getLogger("exception").exception("uncaught exception: {}".format(str(e)))
+                queue.clear()
+                return
+
+
+__all__ = [
+    "WebSocketHub",
+    "WebSocketConnection",
+    "OVERFLOW_POLICIES",
+    "encode_frame",
+]
@@ -15,6 +15,7 @@ import tomodachi.invoker
 from tomodachi import logging
 from tomodachi.container import ServiceContainer
 from tomodachi.helpers.execution_context import clear_execution_context, clear_services, set_execution_context
+from tomodachi.helpers.handoff import handoff_listen_sockets, notify_ready, receive_listen_sockets
 from tomodachi.helpers.safe_modules import SAFE_MODULES
 from tomodachi.importer import ServiceImporter
 
@@ -34,6 +35,9 @@ class ServiceLauncher(object):
     stop_services_post_hook: Optional[Callable] = None
     restart_services = False
     services: Set = set()
+    worker_id: Optional[int] = None
+    worker_count: Optional[int] = None
+    _hot_restart_in_progress = False
 
     @classmethod
     def stop_services(cls) -> None:
@@ -57,6 +61,49 @@ class ServiceLauncher(object):
         if cls.stop_services_post_hook:
             await cls.stop_services_post_hook()
 
+    @classmethod
+    def hot_restart(cls) -> None:
+        asyncio.ensure_future(cls._hot_restart())
+
+    @classmethod
+    async def _hot_restart(cls) -> None:
+        logger = logging.getLogger("tomodachi.handoff")
+        if cls._hot_restart_in_progress:
+            logger.warning("hot restart already in progress")
+            return
+        if not cls._close_waiter or cls._close_waiter.done():
+            return
+        if os.getpid() == 1:
+            # the replacement process would be terminated when the process with pid 1 exits
+            logger.warning("hot restart is not available when running as pid 1 - use an init process")
+            return
+
+        cls._hot_restart_in_progress = True
+        try:
+            if await handoff_listen_sockets():
+                await cls._stop_services()
+        except Exception as e:
+            logging.getLogger("exception").exception("uncaught exception: {}".format(str(e)))
+        finally:
+            cls._hot_restart_in_progress = False
+
+    @classmethod
+    async def _notify_handoff_ready(cls) -> None:
+        # reports readiness to the process that started this process as part of a hot restart, once all services
+        # have started.
+        waiters = []
+        for service in cls.services:
+            if not service.started_waiter:
+                service.started_waiter = asyncio.Future()
+            waiters.append(service.started_waiter)
+
+        await asyncio.gather(*waiters, return_exceptions=True)
+        notify_ready(
+            not tomodachi.SERVICE_EXIT_CODE
+            and bool(cls._close_waiter)
+            and not cast(asyncio.Future, cls._close_waiter).done()
+        )
+
     @classmethod
     def run_until_complete(
         cls,
@@ -95,6 +142,14 @@ class ServiceLauncher(object):
         for signame in ("SIGINT", "SIGTERM"):
             loop.add_signal_handler(getattr(signal, signame), cls.stop_services)
 
+        # SIGHUP starts a hot restart, where a replacement process takes over the listening sockets - not available
+        # when using the file watcher or when running as a worker process of the pre-fork supervisor.
+        hot_restart_enabled = not watcher and cls.worker_id is None
+        if hot_restart_enabled:
+            loop.add_signal_handler(signal.SIGHUP, cls.hot_restart)
+
+        handoff = receive_listen_sockets()
+
         signal.siginterrupt(signal.SIGTERM, False)
         signal.siginterrupt(signal.SIGUSR1, False)
         signal.signal(signal.SIGINT, sigintHandler)
@@ -245,6 +300,14 @@ class ServiceLauncher(object):
                 }
             )
 
+            if cls.worker_id is not None:
+                set_execution_context(
+                    {
+                        "worker_id": cls.worker_id,
+                        "worker_count": cls.worker_count,
+                    }
+                )
+
             if event_loop_version:
                 set_execution_context(
                     {
@@ -283,9 +346,10 @@ class ServiceLauncher(object):
                 )
 
                 async def _run_until_complete() -> Any:
-                    return await asyncio.wait(
-                        [asyncio.ensure_future(service.run_until_complete()) for service in cls.services]
-                    )
+                    futures = [asyncio.ensure_future(service.run_until_complete()) for service in cls.services]
+                    if handoff:
+                        asyncio.ensure_future(cls._notify_handoff_ready())
+                    return await asyncio.wait(futures)
 
                 result = loop.run_until_complete(_run_until_complete())
                 exception = [v.exception() for v in [value for value in result if value][0] if v.exception()]
@@ -354,6 +418,9 @@ class ServiceLauncher(object):
                 if not cls.restart_services:
                     tomodachi.SERVICE_EXIT_CODE = 1
 
+            # writes log records that are still buffered before the services are restarted or the process exits
+            logging.flush_handlers()
+
             if cls.restart_services:
                 # log handler cleanup
                 logging.remove_handlers()
@@ -382,3 +449,6 @@ class ServiceLauncher(object):
                         loop.run_until_complete(watcher_future)
                     except (Exception, CancelledError, _CancelledError):
                         pass
+
+        if hot_restart_enabled and not loop.is_closed():
+            loop.remove_signal_handler(signal.SIGHUP)
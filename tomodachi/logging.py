@@ -1,11 +1,16 @@
 from __future__ import annotations
 
+import collections
+import contextvars
 import datetime
 import importlib.metadata
 import json
 import logging
 import os
+import random
 import sys
+import threading
+import time
 import warnings
 from contextvars import ContextVar
 from functools import wraps
@@ -15,9 +20,11 @@ from types import ModuleType
 from typing import (
     TYPE_CHECKING,
     Any,
+    Deque,
     Dict,
     Iterable,
     KeysView,
+    List,
     Literal,
     Optional,
     Protocol,
@@ -48,6 +55,15 @@ EXCEPTION_KEYS: Sequence[str] = ("exception", "exc", "error", "message")
 CONSOLE_QUOTE_KEYS = ("tb_location", "error_location", "tb_filename", "co_filename", "co_location", "error_filename")
 TOMODACHI_LOGGER_TYPE: Literal["json", "console", "no_color_console", "custom", "python", "disabled"] = "console"
 TOMODACHI_CUSTOM_LOGGER: Optional[Union[str, ModuleType, type, object]] = None
+TOMODACHI_LOG_BUFFER: bool = False
+TOMODACHI_LOG_BUFFER_SIZE: int = 10000
+TOMODACHI_LOG_OVERFLOW_POLICY: Literal["drop_oldest", "drop_newest", "block"] = "drop_oldest"
+
+LOG_OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "block")
+LOG_FLUSH_TIMEOUT = 10.0
+LOG_RATE_LIMIT_SUMMARY_INTERVAL = 10.0
+LOG_RATE_LIMIT_MAX_KEYS = 10000
+LOGGER_CACHE_MAX_SIZE = 1000
 
 STD_LOGGER_FIELDS = set(
     [
@@ -79,6 +95,7 @@ STD_LOGGER_FIELDS = set(
 
 _context: ContextVar[Union[LoggerContext, Dict]] = ContextVar("tomodachi.logging._context", default={})
 _loggers: ContextVar[Dict] = ContextVar("tomodachi.logging._loggers", default={})
+_logger_cache: Dict[Tuple[str, Optional[str]], Tuple[Any, Logger]] = {}
 
 
 class LogProcessorTimestamp:
@@ -166,11 +183,15 @@ def serializer_func(event_dict: EventDict, **dumps_kw: Any) -> str:
 
 
 def merge_contextvars(logger: WrappedLogger, method_name: str, event_dict: EventDict) -> EventDict:
-    ctx = structlog.contextvars._CONTEXT_VARS.copy()
+    context_vars = structlog.contextvars._CONTEXT_VARS
+    if not context_vars:
+        return event_dict
 
-    for k, v in ctx.items():
-        if k.startswith(structlog.contextvars.STRUCTLOG_KEY_PREFIX) and v.get() is not Ellipsis:
-            event_dict[k[structlog.contextvars.STRUCTLOG_KEY_PREFIX_LEN :]] = v.get()
+    prefix_len = structlog.contextvars.STRUCTLOG_KEY_PREFIX_LEN
+    for k, v in tuple(context_vars.items()):
+        value = v.get()
+        if value is not Ellipsis:
+            event_dict[k[prefix_len:]] = value
 
     return event_dict
 
@@ -305,6 +326,156 @@ def disabled_logger_processor(logger: WrappedLogger, method_name: str, event_dic
     raise DropEvent
 
 
+class _TokenBucket:
+    __slots__ = ("tokens", "updated_at", "suppressed_count")
+
+    def __init__(self, tokens: float, updated_at: float) -> None:
+        self.tokens = tokens
+        self.updated_at = updated_at
+        self.suppressed_count = 0
+
+
+class LogRateLimiter:
+    # Rate limits log events by (logger, event, level) using token buckets – each key may log `burst` events at once,
+    # after which the bucket is refilled by `rate` events per second. Events exceeding the limit are dropped before
+    # they are formatted, and the number of suppressed events per key is logged as a "suppressed similar log events"
+    # warning at most once per `summary_interval` seconds.
+    #
+    # Events of level debug and info can additionally be sampled, where only the given fraction of events is kept.
+    # Sampled events are not counted as suppressed.
+    __slots__ = ("rate", "burst", "summary_interval", "sample_rates", "max_keys", "_buckets", "_summary_at", "_lock")
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        *,
+        burst: Optional[int] = None,
+        summary_interval: float = LOG_RATE_LIMIT_SUMMARY_INTERVAL,
+        debug_sample_rate: float = 1.0,
+        info_sample_rate: float = 1.0,
+        max_keys: int = LOG_RATE_LIMIT_MAX_KEYS,
+    ) -> None:
+        if rate is not None and rate <= 0:
+            raise ValueError("Bad value for log rate limit: {}".format(rate))
+        if burst is not None and burst < 1:
+            raise ValueError("Bad value for log rate limit burst: {}".format(burst))
+        for sample_rate in (debug_sample_rate, info_sample_rate):
+            if sample_rate < 0 or sample_rate > 1:
+                raise ValueError("Bad value for log sample rate: {}".format(sample_rate))
+
+        self.rate = rate
+        self.burst = float(burst if burst is not None else max(1, int(rate or 1)))
+        self.summary_interval = summary_interval
+        self.sample_rates: Dict[str, float] = {
+            k: v for k, v in (("debug", debug_sample_rate), ("info", info_sample_rate)) if v < 1
+        }
+        self.max_keys = max_keys
+        self._buckets: Dict[Tuple[Any, Any, str], _TokenBucket] = {}
+        self._summary_at = time.monotonic() + summary_interval
+        self._lock = threading.Lock()
+
+    def __call__(self, logger: WrappedLogger, method_name: str, event_dict: EventDict) -> EventDict:
+        sample_rate = self.sample_rates.get(method_name)
+        if sample_rate is not None and random.random() >= sample_rate:
+            raise DropEvent
+
+        rate = self.rate
+        if rate is None:
+            return event_dict
+
+        key = (event_dict.get("logger"), event_dict.get("event"), method_name)
+        now = time.monotonic()
+        allowed = True
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._buckets = {k: b for k, b in self._buckets.items() if b.suppressed_count}
+                if len(self._buckets) < self.max_keys:
+                    self._buckets[key] = _TokenBucket(self.burst - 1, now)
+            else:
+                tokens = min(self.burst, bucket.tokens + (now - bucket.updated_at) * rate)
+                bucket.updated_at = now
+                if tokens >= 1:
+                    bucket.tokens = tokens - 1
+                else:
+                    bucket.tokens = tokens
+                    bucket.suppressed_count += 1
+                    allowed = False
+
+            summary_due = now >= self._summary_at
+
+        if summary_due:
+            self.log_suppressed()
+
+        if not allowed:
+            raise DropEvent
+
+        return event_dict
+
+    def log_suppressed(self) -> None:
+        with self._lock:
+            self._summary_at = time.monotonic() + self.summary_interval
+            suppressed = []
+            for key, bucket in self._buckets.items():
+                if bucket.suppressed_count:
+                    suppressed.append((key, bucket.suppressed_count))
+                    bucket.suppressed_count = 0
+
+        # logged directly to the standard library logger, which bypasses the rate limiting
+        for (logger_name, event, level), suppressed_count in suppressed:
+            name = str(logger_name or "default")
+            logging.getLogger(name).warning(
+                "suppressed similar log events",
+                extra={
+                    "logger.context": {
+                        "logger": name,
+                        "event": "suppressed similar log events",
+                        "suppressed_count": suppressed_count,
+                        "suppressed_event": event,
+                        "suppressed_level": level,
+                    }
+                },
+            )
+
+
+_rate_limiter: Optional[LogRateLimiter] = None
+
+
+def rate_limit_processor(logger: WrappedLogger, method_name: str, event_dict: EventDict) -> EventDict:
+    rate_limiter = _rate_limiter
+    if rate_limiter is None:
+        return event_dict
+    return rate_limiter(logger, method_name, event_dict)
+
+
+def set_rate_limit(
+    rate: Optional[float] = None,
+    *,
+    burst: Optional[int] = None,
+    summary_interval: float = LOG_RATE_LIMIT_SUMMARY_INTERVAL,
+    debug_sample_rate: float = 1.0,
+    info_sample_rate: float = 1.0,
+) -> None:
+    # Rate limiting and sampling is disabled if called without a rate and without sample rates.
+    global _rate_limiter
+
+    if rate is None and debug_sample_rate >= 1 and info_sample_rate >= 1:
+        rate_limiter = _rate_limiter
+        _rate_limiter = None
+        if rate_limiter is not None:
+            rate_limiter.log_suppressed()
+        return
+
+    _rate_limiter = LogRateLimiter(
+        rate,
+        burst=burst,
+        summary_interval=summary_interval,
+        debug_sample_rate=debug_sample_rate,
+        info_sample_rate=info_sample_rate,
+    )
+
+
 class _PythonLoggingLoggerFormatter(logging.Formatter):
     style: Union[logging.PercentStyle, logging.StrFormatStyle, logging.StringTemplateStyle]
     fmt: str
@@ -448,6 +619,183 @@ class StderrHandler(logging.StreamHandler):
         return sys.stderr
 
 
+# Guards the start of the writer threads of buffered handlers, which may log for the first time from several threads
+# at once (the event loop and the threads of the thread pool executor).
+_buffered_handler_start_lock = threading.Lock()
+
+
+def _reset_buffered_handler_start_lock() -> None:
+    # a forked process may have been forked while another thread was holding the lock.
+    global _buffered_handler_start_lock
+    _buffered_handler_start_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_buffered_handler_start_lock)
+
+
+class BufferedHandler(logging.Handler):
+    # Queue-backed log handler. Records are put on a bounded in-memory queue by the logging thread (usually the event
+    # loop) – the formatting, serialization and writing of the records is done in batches by a writer thread, using
+    # the formatter and stream of the wrapped handler.
+    #
+    # When the queue is full, records are either dropped (the oldest or the newest records) or the logging thread is
+    # blocked until the writer thread has caught up, depending on the overflow policy. Dropped records are counted
+    # and reported by the writer thread.
+    def __init__(
+        self,
+        handler: logging.Handler,
+        *,
+        max_queue_size: int = TOMODACHI_LOG_BUFFER_SIZE,
+        overflow_policy: Literal["drop_oldest", "drop_newest", "block"] = TOMODACHI_LOG_OVERFLOW_POLICY,
+        level: int = NOTSET,
+    ) -> None:
+        if max_queue_size < 1:
+            raise ValueError("Bad value for log buffer size: {}".format(max_queue_size))
+        if overflow_policy not in LOG_OVERFLOW_POLICIES:
+            raise ValueError("Bad value for log overflow policy: {}".format(overflow_policy))
+
+        logging.Handler.__init__(self, level)
+        self.handler = handler
+        self.max_queue_size = max_queue_size
+        self.overflow_policy = overflow_policy
+        self.dropped_count = 0
+        self._unreported_dropped_count = 0
+        self._queue: Deque[Tuple[contextvars.Context, logging.LogRecord]] = collections.deque()
+        self._condition = threading.Condition()
+        self._writing = False
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._pid = 0
+
+    @property
+    def queue_size(self) -> int:
+        return len(self._queue)
+
+    def prepare(self, record: logging.LogRecord) -> Tuple[contextvars.Context, logging.LogRecord]:
+        # The record is formatted by the writer thread within a copy of the context of the logging thread, so that
+        # context variables bound to the logger are included. Exception info is resolved here, since it can't be
+        # looked up from the writer thread.
+        event_dict = record.__dict__.get("logger.context")
+        if event_dict is not None and event_dict.get("exc_info") is True and record.exc_info:
+            record.__dict__["logger.context"] = {**event_dict, "exc_info": record.exc_info}
+        return contextvars.copy_context(), record
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self._closed:
+            self.handler.handle(record)
+            return
+
+        item = self.prepare(record)
+        if self._pid != os.getpid():
+            with _buffered_handler_start_lock:
+                if self._pid != os.getpid():
+                    self._start()
+
+        with self._condition:
+            if len(self._queue) >= self.max_queue_size:
+                if self.overflow_policy == "block":
+                    self._condition.wait_for(lambda: len(self._queue) < self.max_queue_size or self._closed)
+                else:
+                    self.dropped_count += 1
+                    self._unreported_dropped_count += 1
+                    if self.overflow_policy == "drop_newest":
+                        return
+                    self._queue.popleft()
+            self._queue.append(item)
+            self._condition.notify_all()
+
+    def flush(self, timeout: Optional[float] = LOG_FLUSH_TIMEOUT) -> None:
+        # Waits until the records that are currently queued have been written.
+        if self._thread is not None and self._thread.is_alive() and self._thread is not threading.current_thread():
+            with self._condition:
+                self._condition.wait_for(lambda: not self._queue and not self._writing, timeout)
+        self.handler.flush()
+
+    def close(self) -> None:
+        self.flush()
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(LOG_FLUSH_TIMEOUT)
+        self._thread = None
+        logging.Handler.close(self)
+
+    def _start(self) -> None:
+        # Also called in forked processes (worker processes), where the writer thread of the parent doesn't exist.
+        # Records queued in the parent process are written by the parent process. The pid is set last, since it's
+        # read without holding the lock.
+        self._queue = collections.deque()
+        self._condition = threading.Condition()
+        self._writing = False
+        self._thread = threading.Thread(target=self._run, name="tomodachi.logging", daemon=True)
+        self._thread.start()
+        self._pid = os.getpid()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._queue or self._closed)
+                if not self._queue and self._closed:
+                    return
+                batch = list(self._queue)
+                self._queue.clear()
+                dropped_count, self._unreported_dropped_count = self._unreported_dropped_count, 0
+                self._writing = True
+                self._condition.notify_all()
+
+            try:
+                self._write(batch)
+                if dropped_count:
+                    self._write([(contextvars.copy_context(), self._dropped_record(dropped_count))])
+            finally:
+                with self._condition:
+                    self._writing = False
+                    self._condition.notify_all()
+
+    def _write(self, batch: List[Tuple[contextvars.Context, logging.LogRecord]]) -> None:
+        handler = self.handler
+        if not isinstance(handler, logging.StreamHandler):
+            for context, record in batch:
+                context.run(handler.handle, record)
+            return
+
+        messages = []
+        for context, record in batch:
+            if record.levelno < handler.level:
+                continue
+            try:
+                message = context.run(handler.format, record)
+            except Exception:
+                handler.handleError(record)
+                continue
+            if message:
+                messages.append(message + handler.terminator)
+
+        if not messages:
+            return
+
+        handler.acquire()
+        try:
+            handler.stream.write("".join(messages))
+            handler.stream.flush()
+        except Exception:
+            handler.handleError(batch[-1][1])
+        finally:
+            handler.release()
+
+    def _dropped_record(self, dropped_count: int) -> logging.LogRecord:
+        record = logging.LogRecord("tomodachi.logging", WARNING, __file__, 0, "log records dropped", None, None)
+        record.__dict__["logger.context"] = {
+            "logger": "tomodachi.logging",
+            "event": "log records dropped",
+            "dropped_count": dropped_count,
+            "overflow_policy": self.overflow_policy,
+        }
+        return record
+
+
 DEFAULT_FORMAT = "%(asctime)s [%(levelname)-9s] %(message)-30s [%(name)s]"
 _default_fmt = DEFAULT_FORMAT
 try:
@@ -600,6 +948,7 @@ def set_custom_logger_factory(
 
     global TOMODACHI_CUSTOM_LOGGER
     TOMODACHI_CUSTOM_LOGGER = logger_factory
+    _logger_cache.clear()
 
 
 set_custom_logger_factory()
@@ -607,17 +956,16 @@ set_custom_logger_factory()
 
 class LoggerContext(dict):
     def __init__(self, *a: Any, **kw: Any) -> None:
-        if a:
-            self.__data = {**a[0], **kw}
-        else:
-            self.__data = {**kw}
+        data = {**a[0], **kw} if a else {**kw}
+        self.__data = data
 
-        name = self._data.get("logger")
+        name = data.get("logger")
         if name and kw:
-            ctx = _loggers.get().get(name)
-            if ctx != self:
-                _loggers.set({**_loggers.get(), **{self._data["logger"]: self}})
-                if name and name == _context.get().get("logger"):
+            loggers = _loggers.get()
+            ctx = loggers.get(name)
+            if ctx is None or (ctx.__data if isinstance(ctx, LoggerContext) else ctx) != data:
+                _loggers.set({**loggers, name: self})
+                if name == _context.get().get("logger"):
                     _context.set(self)
 
     def __str__(self) -> str:
@@ -627,8 +975,7 @@ class LoggerContext(dict):
         return str(self._data)
 
     def __getitem__(self, item: str) -> Any:
-        value = self._data.get(item)
-        return value
+        return self.__data.get(item)
 
     def __setitem__(self, item: str, value: Any) -> None:
         self.__data[item] = value
@@ -646,13 +993,13 @@ class LoggerContext(dict):
             return False
 
     def __len__(self) -> int:
-        return len(self._data)
+        return len(self.__data)
 
     def __iter__(self) -> Any:
-        return self._data.__iter__()
+        return self.__data.__iter__()
 
     def __contains__(self, item: Any) -> Any:
-        return self._data.__contains__(item)
+        return self.__data.__contains__(item)
 
     def __eq__(self, other: Any) -> bool:
         if isinstance(other, LoggerContext):
@@ -666,13 +1013,13 @@ class LoggerContext(dict):
         return not self == other
 
     def keys(self) -> KeysView:  # type: ignore
-        return self._data.keys()
+        return self.__data.keys()
 
     def get(self, key: str, default: Any = None) -> Any:
-        return self._data.get(key, default)
+        return self.__data.get(key, default)
 
     def copy(self) -> dict:
-        return {**self._data}
+        return {**self.__data}
 
     def update(self, *a: Any, **kw: Any) -> None:
         self._data.update(*a, **kw)
@@ -791,6 +1138,19 @@ class Logger(structlog.stdlib.BoundLogger):
 
         super().__init__(logger, processors, context)
 
+    def debug(self, event: Optional[str] = None, *args: Any, **kw: Any) -> Any:
+        # returns early, before any work on the event dict, if the level is disabled
+        logger = self._logger
+        if isinstance(logger, logging.Logger) and not logger.isEnabledFor(DEBUG):
+            return None
+        return self._proxy_to_logger("debug", event, *args, **kw)
+
+    def info(self, event: Optional[str] = None, *args: Any, **kw: Any) -> Any:
+        logger = self._logger
+        if isinstance(logger, logging.Logger) and not logger.isEnabledFor(INFO):
+            return None
+        return self._proxy_to_logger("info", event, *args, **kw)
+
     def _proxy_to_logger(self, method_name: str, event: Optional[str] = None, *event_args: Any, **event_kw: Any) -> Any:
         if method_name == "error" and event_kw and event_kw.get("exc_info") is True:
             method_name = "exception"
@@ -1160,7 +1520,7 @@ custom_logger: Logger = structlog.wrap_logger(
 
 forward_logger: Logger = structlog.wrap_logger(
     logging.getLogger("default"),
-    processors=[remove_ellipsis_values, to_logger_args_kwargs],
+    processors=[rate_limit_processor, remove_ellipsis_values, to_logger_args_kwargs],
     wrapper_class=Logger,
     context_class=LoggerContext,
     cache_logger_on_first_use=False,
@@ -1168,7 +1528,7 @@ forward_logger: Logger = structlog.wrap_logger(
 
 python_logger: Logger = structlog.wrap_logger(
     logging.getLogger("default"),
-    processors=[remove_ellipsis_values, to_logger_args_kwargs],
+    processors=[rate_limit_processor, remove_ellipsis_values, to_logger_args_kwargs],
     wrapper_class=Logger,
     context_class=LoggerContext,
     cache_logger_on_first_use=False,
@@ -1200,7 +1560,16 @@ def get_context(logger: Union[LoggerContext, Dict, structlog.BoundLoggerBase, st
 
 
 def bind_logger(logger: Union[LoggerContext, Dict, structlog.BoundLoggerBase, str]) -> None:
-    _context.set(get_context(logger))
+    # The context is also registered as the context of the logger name, so that loggers looked up by name (for
+    # example the service logger) include the bound values – which allows bound loggers to be created once up front.
+    ctx = get_context(logger)
+    _context.set(ctx)
+
+    name = ctx.get("logger")
+    if name:
+        loggers = _loggers.get()
+        if loggers.get(name) is not ctx:
+            _loggers.set({**loggers, name: ctx})
 
 
 def _get_logger(
@@ -1243,14 +1612,27 @@ def _get_logger(
             )
         )
 
-    if name:
+    # Bound loggers are immutable – a logger created for a context is reused for as long as the same context is
+    # bound (to the name or as the current logger), which is the common case on hot paths where loggers are looked up
+    # by name for every message or request.
+    ctx = _loggers.get().get(name) if name else _context.get()
+    key = (logger_type, name)
+    cached = _logger_cache.get(key)
+    if cached is not None and ctx is not None and cached[0] is ctx:
+        return cached[1]
+
+    if name and not ctx:
+        result = cast(Logger, logger.new(**LoggerContext(logger=name, **{})))
         ctx = _loggers.get().get(name)
-        if ctx:
-            return cast(Logger, logger.new(**ctx))
+    else:
+        result = cast(Logger, logger.new(**(ctx or {})))
 
-        return cast(Logger, logger.new(**LoggerContext(logger=name, **{})))
+    if ctx is not None:
+        if len(_logger_cache) >= LOGGER_CACHE_MAX_SIZE:
+            _logger_cache.clear()
+        _logger_cache[key] = (ctx, result)
 
-    return cast(Logger, logger.new(**_context.get()))
+    return result
 
 
 def get_logger(
@@ -1264,7 +1646,14 @@ def getLogger(name: Optional[str] = None) -> Logger:
     return _get_logger(name=name)
 
 
-def configure(log_level: Union[int, str] = logging.INFO, force: bool = False) -> None:
+def configure(
+    log_level: Union[int, str] = logging.INFO,
+    force: bool = False,
+    *,
+    buffered: Optional[bool] = None,
+    buffer_size: Optional[int] = None,
+    overflow_policy: Optional[Literal["drop_oldest", "drop_newest", "block"]] = None,
+) -> None:
     log_level_ = log_level
     if isinstance(log_level, str) and not log_level.isdigit():
         log_level_ = getattr(logging, log_level.upper(), None) or logging.NOTSET
@@ -1276,6 +1665,20 @@ def configure(log_level: Union[int, str] = logging.INFO, force: bool = False) ->
         )
     log_level = log_level_
 
+    global TOMODACHI_LOG_BUFFER, TOMODACHI_LOG_BUFFER_SIZE, TOMODACHI_LOG_OVERFLOW_POLICY
+    if buffer_size is not None and buffer_size < 1:
+        raise Exception(f"Invalid log buffer size: '{buffer_size}' (expected a positive integer)")
+    if overflow_policy is not None and overflow_policy not in LOG_OVERFLOW_POLICIES:
+        raise Exception(
+            f"Invalid log overflow policy: '{overflow_policy}' (expected 'drop_oldest', 'drop_newest' or 'block')"
+        )
+    if buffered is not None:
+        TOMODACHI_LOG_BUFFER = buffered
+    if buffer_size is not None:
+        TOMODACHI_LOG_BUFFER_SIZE = buffer_size
+    if overflow_policy is not None:
+        TOMODACHI_LOG_OVERFLOW_POLICY = overflow_policy
+
     logging.addLevelName(logging.NOTSET, "notset")
     logging.addLevelName(logging.DEBUG, "debug")
     logging.addLevelName(logging.INFO, "info")
@@ -1303,7 +1706,17 @@ def configure(log_level: Union[int, str] = logging.INFO, force: bool = False) ->
         logging.basicConfig(
             format=_default_fmt,
             level=log_level,
-            handlers=[DefaultRootLoggerHandler],
+            handlers=[
+                (
+                    BufferedHandler(
+                        DefaultRootLoggerHandler,
+                        max_queue_size=TOMODACHI_LOG_BUFFER_SIZE,
+                        overflow_policy=TOMODACHI_LOG_OVERFLOW_POLICY,
+                    )
+                    if TOMODACHI_LOG_BUFFER
+                    else DefaultRootLoggerHandler
+                )
+            ],
             force=force,
         )
     except Exception as e:
@@ -1332,8 +1745,8 @@ def remove_handlers() -> None:
             finally:
                 handler.release()
 
-    for handler in logging.root.handlers:
-        if handler is not DefaultRootLoggerHandler:
+    for handler in list(logging.root.handlers):
+        if handler is not DefaultRootLoggerHandler and not isinstance(handler, BufferedHandler):
             continue
         logging.root.removeHandler(handler)
         try:
@@ -1346,12 +1759,32 @@ def remove_handlers() -> None:
             handler.release()
 
 
+def flush_handlers() -> None:
+    # Writes records that are still buffered, for example by a BufferedHandler, without removing the handlers.
+    if _rate_limiter is not None:
+        _rate_limiter.log_suppressed()
+
+    for handler in list(logging.root.handlers):
+        if isinstance(handler, BufferedHandler):
+            handler.flush()
+
+    for name, logger in list(logging.Logger.manager.loggerDict.items()):
+        if name not in ("tomodachi",) and not name.startswith("tomodachi."):
+            continue
+        if isinstance(logger, logging.PlaceHolder):
+            continue
+        for handler in list(getattr(logger, "handlers", None) or []):
+            if isinstance(handler, BufferedHandler):
+                handler.flush()
+
+
 # Set default logger context
 _context.set(LoggerContext(logger="default", **{}))
 
 
 def reset_context() -> None:
     _loggers.set({})
+    _logger_cache.clear()
     _context.set(LoggerContext(logger="default", **{}))
 
 
@@ -1372,10 +1805,15 @@ __all__ = [
     "DefaultRootLoggerHandler",
     "_defaultHandler",
     "StderrHandler",
+    "BufferedHandler",
     "configure",
     "set_default_formatter",
     "remove_handlers",
+    "flush_handlers",
     "add_exception_info",
+    "LogRateLimiter",
+    "rate_limit_processor",
+    "set_rate_limit",
     "add_stacktrace_info",
     "DEFAULT_FORMAT",
     "CRITICAL",
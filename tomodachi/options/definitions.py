@@ -16,11 +16,19 @@ class _HTTP(OptionsInterface):
     port: int
     host: Optional[str]
     reuse_port: bool
+    unix_socket: Optional[str]
+    unix_socket_permissions: Optional[int]
+    listen_fd: Optional[Union[int, str]]
     content_type: str
     charset: str
     client_max_size: Union[str, int]
     termination_grace_period_seconds: int
     access_log: Union[bool, str]
+    access_log_sample_rate: float
+    access_log_client_error_sample_rate: float
+    access_log_slow_request_threshold: Optional[float]
+    access_log_batch_interval: Optional[float]
+    access_log_summary_interval: Optional[float]
     real_ip_from: Union[str, List[str]]
     real_ip_header: str
     keepalive_timeout: int
@@ -28,6 +36,14 @@ class _HTTP(OptionsInterface):
     max_keepalive_time: Optional[int]
     max_keepalive_requests: Optional[int]
     server_header: str
+    max_concurrent_requests: Optional[int]
+    max_queued_requests: Optional[int]
+    request_queue_timeout: Optional[float]
+    overload_retry_after: int
+    adaptive_concurrency: bool
+    websocket_max_queue_size: int
+    websocket_overflow_policy: str
+    cancel_on_disconnect: bool
 
     _hierarchy: Tuple[str, ...] = ("http",)
     _legacy_fallback: Dict[str, Union[str, Tuple[str, ...]]] = {
@@ -41,11 +57,19 @@ class _HTTP(OptionsInterface):
         port: int = 9700,
         host: Optional[str] = "0.0.0.0",
         reuse_port: bool = (True if platform.system() == "Linux" else False),
+        unix_socket: Optional[str] = None,
+        unix_socket_permissions: Optional[int] = None,
+        listen_fd: Optional[Union[int, str]] = None,
         content_type: str = "text/plain; charset=utf-8",
         charset: str = "utf-8",
         client_max_size: Union[str, int] = (1024**2) * 100,
         termination_grace_period_seconds: int = 30,
         access_log: Union[bool, str] = True,
+        access_log_sample_rate: float = 1.0,
+        access_log_client_error_sample_rate: float = 1.0,
+        access_log_slow_request_threshold: Optional[float] = None,
+        access_log_batch_interval: Optional[float] = None,
+        access_log_summary_interval: Optional[float] = None,
         real_ip_from: Optional[Union[str, List[str]]] = None,
         real_ip_header: str = "X-Forwarded-For",
         keepalive_timeout: int = 0,
@@ -53,16 +77,32 @@ class _HTTP(OptionsInterface):
         max_keepalive_time: Optional[int] = None,
         max_keepalive_requests: Optional[int] = None,
         server_header: str = "tomodachi",
+        max_concurrent_requests: Optional[int] = None,
+        max_queued_requests: Optional[int] = 100,
+        request_queue_timeout: Optional[float] = 5.0,
+        overload_retry_after: int = 1,
+        adaptive_concurrency: bool = False,
+        websocket_max_queue_size: int = 100,
+        websocket_overflow_policy: str = "drop_oldest",
+        cancel_on_disconnect: bool = False,
         **kwargs: Any,
     ):
         self.port = port
         self.host = host
         self.reuse_port = reuse_port
+        self.unix_socket = unix_socket
+        self.unix_socket_permissions = unix_socket_permissions
+        self.listen_fd = listen_fd
         self.content_type = content_type
         self.charset = charset
         self.client_max_size = client_max_size
         self.termination_grace_period_seconds = termination_grace_period_seconds
         self.access_log = access_log
+        self.access_log_sample_rate = access_log_sample_rate
+        self.access_log_client_error_sample_rate = access_log_client_error_sample_rate
+        self.access_log_slow_request_threshold = access_log_slow_request_threshold
+        self.access_log_batch_interval = access_log_batch_interval
+        self.access_log_summary_interval = access_log_summary_interval
         self.real_ip_from = real_ip_from if real_ip_from is not None and real_ip_from != "" else []
         self.real_ip_header = real_ip_header
         self.keepalive_timeout = keepalive_timeout
@@ -70,6 +110,14 @@ class _HTTP(OptionsInterface):
         self.max_keepalive_time = max_keepalive_time
         self.max_keepalive_requests = max_keepalive_requests
         self.server_header = server_header
+        self.max_concurrent_requests = max_concurrent_requests
+        self.max_queued_requests = max_queued_requests
+        self.request_queue_timeout = request_queue_timeout
+        self.overload_retry_after = overload_retry_after
+        self.adaptive_concurrency = adaptive_concurrency
+        self.websocket_max_queue_size = websocket_max_queue_size
+        self.websocket_overflow_policy = websocket_overflow_policy
+        self.cancel_on_disconnect = cancel_on_disconnect
 
         self._load_keyword_options(**kwargs)
 
@@ -196,6 +244,14 @@ class _AMQP(OptionsInterface):
     ssl: bool
     heartbeat: int
     queue_ttl: int
+    publisher_confirms: bool
+    publisher_confirms_window: int
+    publish_channels: int
+    ack_flush_interval: float
+    reconnect: bool
+    reconnect_delay: float
+    reconnect_max_delay: float
+    publish_buffer_size: int
     qos: QOS
 
     _hierarchy: Tuple[str, ...] = ("amqp",)
@@ -214,6 +270,14 @@ class _AMQP(OptionsInterface):
         ssl: bool = False,
         heartbeat: int = 60,
         queue_ttl: int = 86400,
+        publisher_confirms: bool = False,
+        publisher_confirms_window: int = 1000,
+        publish_channels: int = 1,
+        ack_flush_interval: float = 0.0,
+        reconnect: bool = True,
+        reconnect_delay: float = 1.0,
+        reconnect_max_delay: float = 30.0,
+        publish_buffer_size: int = 0,
         qos: Union[Mapping[str, Any], QOS] = DEFAULT(QOS),
         **kwargs: Any,
     ):
@@ -228,6 +292,14 @@ class _AMQP(OptionsInterface):
         self.ssl = ssl
         self.heartbeat = heartbeat
         self.queue_ttl = queue_ttl
+        self.publisher_confirms = publisher_confirms
+        self.publisher_confirms_window = publisher_confirms_window
+        self.publish_channels = publish_channels
+        self.ack_flush_interval = ack_flush_interval
+        self.reconnect = reconnect
+        self.reconnect_delay = reconnect_delay
+        self.reconnect_max_delay = reconnect_max_delay
+        self.publish_buffer_size = publish_buffer_size
 
         input_: Tuple[Tuple[str, Union[Mapping[str, Any], OptionsInterface], type], ...] = (("qos", qos, self.QOS),)
         self._load_initial_input(input_)
@@ -254,6 +326,85 @@ class _Watcher(OptionsInterface):
         self._load_keyword_options(**kwargs)
 
 
+class _Executor(OptionsInterface):
+    thread_max_workers: Optional[int]
+    process_max_workers: Optional[int]
+
+    _hierarchy: Tuple[str, ...] = ("executor",)
+    __slots__: Tuple[str, ...] = ("thread_max_workers", "process_max_workers")
+
+    def __init__(
+        self,
+        *,
+        thread_max_workers: Optional[int] = None,
+        process_max_workers: Optional[int] = None,
+        **kwargs: Any,
+    ):
+        self.thread_max_workers = thread_max_workers
+        self.process_max_workers = process_max_workers
+
+        self._load_keyword_options(**kwargs)
+
+
+class _HTTPClient(OptionsInterface):
+    limit: int
+    limit_per_host: int
+    dns_cache_ttl: Optional[int]
+    keepalive_timeout: float
+    connect_timeout: Optional[float]
+    timeout: Optional[float]
+    retries: int
+    retry_backoff: float
+    circuit_breaker_threshold: int
+    circuit_breaker_reset_timeout: float
+    propagate_trace_context: bool
+
+    _hierarchy: Tuple[str, ...] = ("http_client",)
+    __slots__: Tuple[str, ...] = (
+        "limit",
+        "limit_per_host",
+        "dns_cache_ttl",
+        "keepalive_timeout",
+        "connect_timeout",
+        "timeout",
+        "retries",
+        "retry_backoff",
+        "circuit_breaker_threshold",
+        "circuit_breaker_reset_timeout",
+        "propagate_trace_context",
+    )
+
+    def __init__(
+        self,
+        *,
+        limit: int = 100,
+        limit_per_host: int = 0,
+        dns_cache_ttl: Optional[int] = 30,
+        keepalive_timeout: float = 15,
+        connect_timeout: Optional[float] = 8,
+        timeout: Optional[float] = 30,
+        retries: int = 2,
+        retry_backoff: float = 0.1,
+        circuit_breaker_threshold: int = 5,
+        circuit_breaker_reset_timeout: float = 30,
+        propagate_trace_context: bool = True,
+        **kwargs: Any,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.connect_timeout = connect_timeout
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.circuit_breaker_threshold = circuit_breaker_threshold
+        self.circuit_breaker_reset_timeout = circuit_breaker_reset_timeout
+        self.propagate_trace_context = propagate_trace_context
+
+        self._load_keyword_options(**kwargs)
+
+
 class Options(OptionsInterface):
     class HTTP(_HTTP):
         pass
@@ -271,11 +422,19 @@ class Options(OptionsInterface):
     class Watcher(_Watcher):
         pass
 
+    class Executor(_Executor):
+        pass
+
+    class HTTPClient(_HTTPClient):
+        pass
+
     http: HTTP
     aws_sns_sqs: AWSSNSSQS
     aws_endpoint_urls: AWSEndpointURLs
     amqp: AMQP
     watcher: Watcher
+    executor: Executor
+    http_client: HTTPClient
 
     _hierarchy: Tuple[str, ...] = ()
     _legacy_fallback: Dict[str, Union[str, Tuple[str, ...]]] = {
@@ -319,6 +478,8 @@ class Options(OptionsInterface):
         aws_endpoint_urls: Union[Mapping[str, Any], AWSEndpointURLs] = DEFAULT(AWSEndpointURLs),
         amqp: Union[Mapping[str, Any], AMQP] = DEFAULT(AMQP),
         watcher: Union[Mapping[str, Any], Watcher] = DEFAULT(Watcher),
+        executor: Union[Mapping[str, Any], Executor] = DEFAULT(Executor),
+        http_client: Union[Mapping[str, Any], HTTPClient] = DEFAULT(HTTPClient),
         **kwargs: Any,
     ):
         input_: Tuple[Tuple[str, Union[Mapping[str, Any], OptionsInterface], type], ...] = (
@@ -327,6 +488,8 @@ class Options(OptionsInterface):
             ("aws_endpoint_urls", aws_endpoint_urls, self.AWSEndpointURLs),
             ("amqp", amqp, self.AMQP),
             ("watcher", watcher, self.Watcher),
+            ("executor", executor, self.Executor),
+            ("http_client", http_client, self.HTTPClient),
         )
 
         self._load_initial_input(input_)
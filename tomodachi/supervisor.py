@@ -0,0 +1,231 @@
+import gc
+import os
+import platform
+import signal
+import sys
+import time
+from typing import Any, Dict, List, Optional, Set, Union
+
+import tomodachi
+from tomodachi import logging
+from tomodachi.importer import ServiceImporter
+from tomodachi.launcher import ServiceLauncher
+
+# Workers that exit (due to a crash) within this number of seconds from being started are restarted with an
+# exponential backoff, to avoid tight restart loops when a service is unable to start.
+WORKER_MIN_UPTIME = 10.0
+WORKER_RESTART_DELAY = 0.5
+WORKER_MAX_RESTART_DELAY = 30.0
+
+
+class WorkerProcess(object):
+    __slots__ = ("worker_id", "pid", "started_at", "failures")
+
+    def __init__(self, worker_id: int) -> None:
+        self.worker_id = worker_id
+        self.pid: Optional[int] = None
+        self.started_at = 0.0
+        self.failures = 0
+
+
+class WorkerSupervisor(object):
+    # Pre-fork process supervisor. The service files are imported once in the supervisor process (so that the
+    # imported modules are shared copy-on-write with the workers), after which the workers are forked. Each worker
+    # runs the services in its own event loop – HTTP servers of the workers share the same port via SO_REUSEPORT,
+    # and message consumers (SQS, AMQP) are started in every worker. Crashed workers are restarted and termination
+    # signals are forwarded to the workers so that they drain gracefully.
+
+    def __init__(
+        self,
+        service_files: Union[List, set],
+        configuration: Optional[Dict] = None,
+        *,
+        workers: int,
+        gc_freeze: bool = True,
+    ) -> None:
+        if workers < 1:
+            raise ValueError("Bad value for workers: {}".format(workers))
+
+        self.service_files = service_files
+        self.configuration = configuration
+        self.worker_count = workers
+        self.gc_freeze = gc_freeze
+        self.workers: Dict[int, WorkerProcess] = {i: WorkerProcess(i) for i in range(1, workers + 1)}
+        self.exit_codes: Set[int] = set()
+        self._stopping = False
+        self._kill = False
+        self._restart_at: Dict[int, float] = {}
+
+    @property
+    def pids(self) -> List[int]:
+        return [worker.pid for worker in self.workers.values() if worker.pid]
+
+    def run(self) -> int:
+        logger = logging.getLogger("tomodachi.supervisor")
+
+        if platform.system() != "Linux":
+            logger.warning(
+                "the http option reuse_port (socket.SO_REUSEPORT) is only available on Linux - http servers will be "
+                "unable to share ports between workers",
+                platform=platform.system(),
+            )
+
+        try:
+            # the services are imported in the supervisor, which also validates the service files before forking.
+            for file in self.service_files:
+                ServiceImporter.import_service_file(file)
+        except (SyntaxError, IndentationError, tomodachi.importer.ServicePackageError):
+            return 1
+        except Exception as e:
+            logging.getLogger("exception").exception("uncaught exception: {}".format(str(e)))
+            return 1
+
+        if self.gc_freeze:
+            # moves all objects created during import to the permanent generation, so that the garbage collector
+            # of the workers won't touch (and copy) the memory pages shared with the supervisor.
+            gc.freeze()
+
+        signal.signal(signal.SIGINT, self._handle_stop_signal)
+        signal.signal(signal.SIGTERM, self._handle_stop_signal)
+        signal.signal(signal.SIGHUP, self._handle_hangup_signal)
+
+        logger.info("starting workers", worker_count=self.worker_count, process_id=os.getpid())
+
+        for worker in self.workers.values():
+            self._spawn(worker)
+
+        while self.pids or (self._restart_at and not self._stopping):
+            time.sleep(0.1)
+            self._reap()
+            if not self._stopping:
+                now = time.monotonic()
+                for worker_id, restart_at in list(self._restart_at.items()):
+                    if restart_at <= now:
+                        self._restart_at.pop(worker_id, None)
+                        self._spawn(self.workers[worker_id])
+
+        logger.info("all workers stopped", worker_count=self.worker_count)
+
+        return max(self.exit_codes) if self.exit_codes else 0
+
+    def stop(self) -> None:
+        self._stopping = True
+        self._restart_at.clear()
+        self._signal_workers(signal.SIGTERM)
+
+    def _handle_stop_signal(self, signum: int, *args: Any) -> None:
+        logger = logging.getLogger("tomodachi.signal")
+        if self._stopping:
+            logger.warning(
+                "received signal during shutdown - killing workers",
+                signal=signal.Signals(signum).name,
+                process_id=os.getpid(),
+            )
+            self._kill = True
+            self._signal_workers(signal.SIGKILL)
+            return
+
+        logger.warning(
+            "received termination signal - stopping workers",
+            signal=signal.Signals(signum).name,
+            process_id=os.getpid(),
+        )
+        self.stop()
+
+    def _handle_hangup_signal(self, signum: int, *args: Any) -> None:
+        logging.getLogger("tomodachi.signal").warning(
+            "hot restart is not available when running multiple workers - signal ignored",
+            signal=signal.Signals(signum).name,
+            process_id=os.getpid(),
+        )
+
+    def _signal_workers(self, signum: int) -> None:
+        for pid in self.pids:
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def _spawn(self, worker: WorkerProcess) -> None:
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+        pid = os.fork()
+        if pid:
+            worker.pid = pid
+            worker.started_at = time.monotonic()
+            logging.getLogger("tomodachi.supervisor").info(
+                "started worker", worker_id=worker.worker_id, worker_process_id=pid
+            )
+            return
+
+        # worker process
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+        ServiceLauncher.worker_id = worker.worker_id
+        ServiceLauncher.worker_count = self.worker_count
+        tomodachi.get_contextvar("run.workers").set(self.worker_count)
+
+        exit_code = 1
+        try:
+            ServiceLauncher.run_until_complete(self.service_files, self.configuration, None)
+            exit_code = tomodachi.SERVICE_EXIT_CODE
+        except BaseException as e:
+            if not isinstance(e, SystemExit):
+                logging.getLogger("exception").exception("uncaught exception: {}".format(str(e)))
+            exit_code = e.code if isinstance(e, SystemExit) and isinstance(e.code, int) else 1
+        finally:
+            # the worker never returns to the caller of the supervisor – exit handlers registered in the
+            # supervisor process should not be run by the workers.
+            logging.remove_handlers()
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(exit_code)
+
+    def _reap(self) -> None:
+        logger = logging.getLogger("tomodachi.supervisor")
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if not pid:
+                return
+
+            worker = next((w for w in self.workers.values() if w.pid == pid), None)
+            if worker is None:
+                continue
+            worker.pid = None
+
+            exit_code = os.waitstatus_to_exitcode(status)
+            uptime = time.monotonic() - worker.started_at
+
+            if self._stopping:
+                if exit_code != 0 and not self._kill:
+                    self.exit_codes.add(1 if exit_code < 0 else exit_code)
+                logger.info("worker stopped", worker_id=worker.worker_id, worker_process_id=pid, exit_code=exit_code)
+                continue
+
+            if exit_code == 0:
+                # the worker exited by itself without errors, for example by calling tomodachi.exit().
+                logger.info("worker exited", worker_id=worker.worker_id, worker_process_id=pid, exit_code=exit_code)
+                continue
+
+            worker.failures = worker.failures + 1 if uptime < WORKER_MIN_UPTIME else 1
+            delay = min(WORKER_MAX_RESTART_DELAY, WORKER_RESTART_DELAY * (2 ** (worker.failures - 1)))
+            logger.warning(
+                "worker exited unexpectedly - restarting",
+                worker_id=worker.worker_id,
+                worker_process_id=pid,
+                exit_code=exit_code,
+                restart_delay=delay,
+            )
+            self._restart_at[worker.worker_id] = time.monotonic() + delay
+
+
+__all__ = [
+    "WorkerSupervisor",
+    "WorkerProcess",
+]
@@ -2,23 +2,29 @@ from __future__ import annotations
 
 import asyncio
 import binascii
+import codecs
 import functools
 import hashlib
 import inspect
+import itertools
 import re
 import time
 from typing import Any, Callable, Dict, List, Literal, Match, Optional, Set, Tuple, Union, cast, overload
 
 import aioamqp
 import aioamqp.properties
+import aioamqp.protocol
+import pamqp.commands
 
 from tomodachi import get_contextvar, logging
 from tomodachi._exception import limit_exception_traceback
+from tomodachi.helpers.deadline import Deadline, get_timeout, min_timeout, parse_deadline_attribute
 from tomodachi.helpers.execution_context import (
     decrease_execution_context_value,
     increase_execution_context_value,
     set_execution_context,
 )
+from tomodachi.helpers.executor import executor_handler
 from tomodachi.helpers.middleware import execute_middlewares
 from tomodachi.invoker import Invoker
 from tomodachi.options import Options
@@ -27,6 +33,12 @@ MESSAGE_ENVELOPE_DEFAULT = "2594418c-5771-454a-a7f9-8f83ae82812a"
 MESSAGE_PROTOCOL_DEFAULT = MESSAGE_ENVELOPE_DEFAULT  # deprecated
 MESSAGE_ROUTING_KEY_PREFIX = "38f58822-25f6-458a-985c-52701d40dbbc"
 
+# Content types of message bodies that are passed to handlers (and envelopes) as str when no content encoding is set,
+# in addition to text/* and structured syntax suffixes such as application/cloudevents+json. Bodies with other content
+# types are passed as bytes.
+AMQP_TEXT_CONTENT_TYPES = ("application/json", "application/xml")
+AMQP_TEXT_CONTENT_TYPE_SUFFIXES = ("+json", "+xml")
+
 
 class AmqpException(Exception):
     def __init__(self, *args: Any, **kwargs: Any) -> None:
@@ -61,11 +73,468 @@ class AmqpChannelClosed(AmqpException):
     pass
 
 
+class AmqpPublishFailed(AmqpException):
+    pass
+
+
+class AmqpPublisherConfirms(object):
+    # Publishing on a channel in confirm mode, where the broker acknowledges (or rejects) each published message.
+    # Publishes are pipelined – the future returned from publish() is resolved when the broker acknowledges the
+    # delivery tag of the message (also by acknowledgements of multiple delivery tags), while the number of messages
+    # waiting for confirmation is limited by the window.
+    __slots__ = ("channel", "window", "_delivery_tags", "_pending", "_semaphore")
+
+    def __init__(self, channel: Any, window: int = 1000) -> None:
+        if window < 1:
+            raise ValueError("Bad value for amqp option publisher_confirms_window: {}".format(window))
+
+        self.channel = channel
+        self.window = window
+        self._delivery_tags = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._semaphore = asyncio.Semaphore(window)
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    async def enable(self) -> None:
+        await self.channel.confirm_select()
+        # acks and nacks from the broker are handled here instead of by aioamqp, which resolves a single delivery tag
+        # per frame.
+        setattr(self.channel, "basic_server_ack", self._server_ack)
+        setattr(self.channel, "basic_server_nack", self._server_nack)
+
+    async def publish(self, payload: bytes, exchange_name: str, routing_key: str, properties: Dict) -> asyncio.Future:
+        await self._semaphore.acquire()
+
+        delivery_tag = next(self._delivery_tags)
+        future: asyncio.Future = asyncio.get_event_loop().create_future()
+        future.add_done_callback(lambda _: self._semaphore.release())
+        self._pending[delivery_tag] = future
+        # registered as a waiter of the channel as well, to be failed by aioamqp if the channel is closed.
+        self.channel._futures["basic_server_ack_{}".format(delivery_tag)] = future
+
+        try:
+            await self.channel.basic_publish(payload, exchange_name, routing_key, properties)
+        except BaseException as e:
+            self._resolve(delivery_tag, False, e)
+            raise
+
+        return future
+
+    async def _server_ack(self, frame: Any) -> None:
+        self._resolve(frame.delivery_tag, frame.multiple, None)
+
+    async def _server_nack(self, frame: Any, delivery_tag: Optional[int] = None) -> None:
+        delivery_tag = frame.delivery_tag if delivery_tag is None else delivery_tag
+        self._resolve(
+            delivery_tag,
+            frame.multiple,
+            AmqpPublishFailed("Message with delivery tag {} was rejected by the broker".format(delivery_tag)),
+        )
+
+    def _resolve(self, delivery_tag: int, multiple: bool, exception: Optional[BaseException]) -> None:
+        if multiple:
+            # delivery tags are increasing, which is also the order of the pending futures.
+            delivery_tags = list(itertools.takewhile(lambda tag: tag <= delivery_tag, self._pending))
+        else:
+            delivery_tags = [delivery_tag]
+
+        for tag in delivery_tags:
+            future = self._pending.pop(tag, None)
+            self.channel._futures.pop("basic_server_ack_{}".format(tag), None)
+            if future is None or future.done():
+                continue
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(True)
+
+
+# Completed deliveries above a gap of unacknowledged delivery tags (for example a message still being processed or a
+# message that isn't acknowledged at all) are acknowledged one by one once they have waited this many seconds.
+AMQP_ACK_GAP_TIMEOUT = 5.0
+
+
+class AmqpAckCoalescer(object):
+    # Coalesces the acknowledgements of the deliveries on a consumer channel. Acknowledged delivery tags are collected
+    # and a single basic.ack with multiple=True is sent for the highest delivery tag up to which every delivery has
+    # been acknowledged (or rejected), once per flush interval. Acknowledgements are also flushed right away when every
+    # delivery on the channel has been handled, or when half of the prefetch count is waiting to be acknowledged, so
+    # that the broker keeps delivering messages.
+    #
+    # The basic_client_ack and basic_client_nack methods take the same arguments as the methods of the channel, so
+    # that the coalescer can be used in place of the channel by the handlers.
+    __slots__ = (
+        "channel",
+        "flush_interval",
+        "max_pending",
+        "_acked_tag",
+        "_settled",
+        "_in_flight",
+        "_flush_handle",
+        "_flush_task",
+    )
+
+    def __init__(self, channel: Any, flush_interval: float, prefetch_count: int = 0) -> None:
+        if flush_interval <= 0:
+            raise ValueError("Bad value for amqp option ack_flush_interval: {}".format(flush_interval))
+
+        self.channel = channel
+        self.flush_interval = flush_interval
+        self.max_pending = max(prefetch_count // 2, 1) if prefetch_count else 0
+        self._acked_tag = 0
+        # settled delivery tags above _acked_tag – mapped to the time the delivery was acknowledged, or to None if the
+        # delivery has already been acknowledged or rejected on its own.
+        self._settled: Dict[int, Optional[float]] = {}
+        # delivery tags that have been delivered but not yet settled.
+        self._in_flight: Set[int] = set()
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Future] = None
+
+    @property
+    def pending_count(self) -> int:
+        return len([value for value in self._settled.values() if value is not None])
+
+    def delivered(self, delivery_tag: int) -> None:
+        self._in_flight.add(delivery_tag)
+
+    async def dropped(self, delivery_tag: int) -> None:
+        # Deliveries that are left unacknowledged by the handler (for example duplicate messages) are no longer
+        # counted as in-flight, so that they don't hold back the flush of the acknowledgements of other deliveries.
+        self._in_flight.discard(delivery_tag)
+        if not self._in_flight and self.pending_count:
+            await self.flush(force=True)
+
+    async def basic_client_ack(self, delivery_tag: int, multiple: bool = False) -> None:
+        if multiple:
+            await self.flush()
+            await self.channel.basic_client_ack(delivery_tag, multiple=True)
+            self._settle_up_to(delivery_tag)
+            return
+
+        self._in_flight.discard(delivery_tag)
+        if delivery_tag <= self._acked_tag:
+            return
+        self._settled[delivery_tag] = time.monotonic()
+
+        if not self._in_flight:
+            # a gap below this delivery can only be made up of dropped deliveries, which won't ever be settled.
+            await self.flush(force=True)
+        elif self.max_pending and len(self._settled) >= self.max_pending:
+            await self.flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_event_loop().call_later(self.flush_interval, self._scheduled_flush)
+
+    async def basic_client_nack(self, delivery_tag: int, multiple: bool = False, requeue: bool = True) -> None:
+        if multiple:
+            await self.flush()
+            await self.channel.basic_client_nack(delivery_tag, multiple=True, requeue=requeue)
+            self._settle_up_to(delivery_tag)
+            return
+
+        self._in_flight.discard(delivery_tag)
+        await self.channel.basic_client_nack(delivery_tag, multiple=False, requeue=requeue)
+        if delivery_tag > self._acked_tag:
+            self._settled[delivery_tag] = None
+
+    async def flush(self, force: bool = False) -> None:
+        # Sends the acknowledgements of the contiguous range of settled delivery tags – with force (used on shutdown)
+        # or after AMQP_ACK_GAP_TIMEOUT, the acknowledged deliveries above a gap are sent one by one.
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        ack_tag = None
+        delivery_tag = self._acked_tag + 1
+        while delivery_tag in self._settled:
+            if self._settled.pop(delivery_tag) is not None:
+                ack_tag = delivery_tag
+            delivery_tag += 1
+        self._acked_tag = delivery_tag - 1
+        if ack_tag is not None:
+            await self.channel.basic_client_ack(ack_tag, multiple=True)
+
+        if not self._settled:
+            return
+
+        gap_time = time.monotonic() - AMQP_ACK_GAP_TIMEOUT
+        for delivery_tag, acked_at in sorted(self._settled.items()):
+            if acked_at is not None and (force or acked_at <= gap_time):
+                self._settled[delivery_tag] = None
+                await self.channel.basic_client_ack(delivery_tag, multiple=False)
+
+        if self.pending_count and self._flush_handle is None:
+            self._flush_handle = asyncio.get_event_loop().call_later(self.flush_interval, self._scheduled_flush)
+
+    def _settle_up_to(self, delivery_tag: int) -> None:
+        self._in_flight = {tag for tag in self._in_flight if tag > delivery_tag}
+        self._settled = {tag: value for tag, value in self._settled.items() if tag > delivery_tag}
+        self._acked_tag = max(self._acked_tag, delivery_tag)
+
+    def _scheduled_flush(self) -> None:
+        self._flush_handle = None
+        if self._flush_task is not None and not self._flush_task.done():
+            return
+
+        async def _flush() -> None:
+            try:
+                await self.flush()
+            except Exception as e:
+                logging.getLogger("exception").exception("uncaught exception: {}".format(str(e)))
+
+        self._flush_task = asyncio.ensure_future(_flush())
+
+
+# Seconds to wait for a batch to fill up before the deliveries are handed to the handler.
+AMQP_BATCH_TIMEOUT = 1.0
+# Number of seconds to wait for the handlers of dispatched deliveries to complete on shutdown.
+AMQP_DISPATCHER_CLOSE_TIMEOUT = 10.0
+
+
+class AmqpDeliveryDispatcher(object):
+    # Hands the deliveries of a consumer over to a fixed number of worker tasks, which limits the number of handlers
+    # running concurrently independently of the prefetch count (deliveries above the limit wait in memory until a
+    # worker is free). With a batch size, deliveries are grouped into lists of up to batch_size deliveries, which are
+    # handed over when full or batch_timeout seconds after the first delivery of the batch.
+    #
+    # The dispatch method takes the same arguments as the handlers of the transport and returns right away, so that
+    # it doesn't hold up the reading of frames from the connection.
+    __slots__ = (
+        "handler",
+        "max_concurrency",
+        "batch_size",
+        "batch_timeout",
+        "_queue",
+        "_batch",
+        "_batch_handle",
+        "_workers",
+        "_closing",
+    )
+
+    def __init__(
+        self,
+        handler: Callable,
+        max_concurrency: int = 1,
+        batch_size: int = 0,
+        batch_timeout: float = AMQP_BATCH_TIMEOUT,
+    ) -> None:
+        if max_concurrency < 1:
+            raise ValueError("Bad value for max_concurrency: {}".format(max_concurrency))
+        if batch_size < 0:
+            raise ValueError("Bad value for batch_size: {}".format(batch_size))
+        if batch_timeout <= 0:
+            raise ValueError("Bad value for batch_timeout: {}".format(batch_timeout))
+
+        self.handler = handler
+        self.max_concurrency = max_concurrency
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self._queue: Optional[asyncio.Queue] = None
+        self._batch: List[Tuple[Any, Any, str, Any, Any]] = []
+        self._batch_handle: Optional[asyncio.TimerHandle] = None
+        self._workers: List[asyncio.Future] = []
+        self._closing = False
+
+    @property
+    def pending_count(self) -> int:
+        return (self._queue.qsize() if self._queue else 0) + len(self._batch)
+
+    async def dispatch(
+        self, payload: Any, delivery_tag: Any, routing_key: str, properties: Any, channel: Any = None
+    ) -> None:
+        if self._closing:
+            # deliveries received while closing are left unacknowledged, to be redelivered once the channel is closed.
+            return
+
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._workers = [asyncio.ensure_future(self._work(self._queue)) for _ in range(self.max_concurrency)]
+
+        delivery = (payload, delivery_tag, routing_key, properties, channel)
+        if not self.batch_size:
+            self._queue.put_nowait(delivery)
+            return
+
+        self._batch.append(delivery)
+        if len(self._batch) >= self.batch_size:
+            self._flush_batch()
+        elif self._batch_handle is None:
+            self._batch_handle = asyncio.get_event_loop().call_later(self.batch_timeout, self._flush_batch)
+
+    def _flush_batch(self) -> None:
+        if self._batch_handle is not None:
+            self._batch_handle.cancel()
+            self._batch_handle = None
+        if self._batch and self._queue is not None:
+            batch, self._batch = self._batch, []
+            self._queue.put_nowait(batch)
+
+    async def _work(self, queue: asyncio.Queue) -> None:
+        while True:
+            item = await queue.get()
+            try:
+                if self.batch_size:
+                    await self.handler(item)
+                else:
+                    await self.handler(*item[:4], channel=item[4])
+            except Exception as e:
+                logging.getLogger("exception").exception("uncaught exception: {}".format(str(e)))
+            finally:
+                queue.task_done()
+
+    async def close(self, timeout: float = AMQP_DISPATCHER_CLOSE_TIMEOUT) -> None:
+        # Stops taking in new deliveries, hands over the deliveries of a partial batch and waits (for up to timeout
+        # seconds) for the handlers of the dispatched deliveries to complete. Deliveries that haven't been handled by
+        # then are left unacknowledged.
+        self._closing = True
+        self._flush_batch()
+        if self._queue is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=timeout)
+            except asyncio.TimeoutError:
+                logging.getLogger("tomodachi.amqp").warning(
+                    "deliveries still being handled on shutdown", pending_count=self.pending_count
+                )
+        for worker in self._workers:
+            worker.cancel()
+        if self._workers:
+            await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+
+class AmqpPooledChannel(object):
+    __slots__ = ("channel", "publisher_confirms", "ack_coalescer", "flow", "queue_name")
+
+    def __init__(
+        self,
+        channel: Any,
+        publisher_confirms: Optional[AmqpPublisherConfirms] = None,
+        queue_name: Optional[str] = None,
+        ack_coalescer: Optional[AmqpAckCoalescer] = None,
+    ) -> None:
+        self.channel = channel
+        self.publisher_confirms = publisher_confirms
+        self.ack_coalescer = ack_coalescer
+        # set while the broker allows content to be sent on the channel (see channel.flow).
+        self.flow = asyncio.Event()
+        self.flow.set()
+        self.queue_name = queue_name
+
+
+class AmqpChannelPool(object):
+    # The channels of a connection – one or more channels dedicated to publishing, which are used in round-robin
+    # order, and one channel per subscribed queue with its own prefetch count. This keeps heavy publishing from
+    # competing with the deliveries to the consumers on a single channel.
+    #
+    # Publish channels paused by the broker with channel.flow are skipped until the flow is active again.
+    __slots__ = ("protocol", "publish_channels", "consumer_channels", "_publish_index")
+
+    def __init__(self, protocol: Any) -> None:
+        self.protocol = protocol
+        self.publish_channels: List[AmqpPooledChannel] = []
+        self.consumer_channels: List[AmqpPooledChannel] = []
+        self._publish_index = 0
+
+    async def open_publish_channels(
+        self, count: int = 1, publisher_confirms: bool = False, publisher_confirms_window: int = 1000
+    ) -> None:
+        if count < 1:
+            raise ValueError("Bad value for amqp option publish_channels: {}".format(count))
+
+        for _ in range(count):
+            channel = await self.protocol.channel()
+            confirms = None
+            if publisher_confirms:
+                confirms = AmqpPublisherConfirms(channel, publisher_confirms_window)
+                await confirms.enable()
+            self.publish_channels.append(self._handle_flow(AmqpPooledChannel(channel, confirms)))
+        set_execution_context(self.stats())
+
+    async def open_consumer_channel(
+        self,
+        queue_name: str,
+        prefetch_count: int,
+        global_prefetch_count: Optional[int] = None,
+        ack_flush_interval: Optional[float] = None,
+    ) -> AmqpPooledChannel:
+        channel = await self.protocol.channel()
+        await channel.basic_qos(prefetch_count=prefetch_count, prefetch_size=0, connection_global=False)
+        if global_prefetch_count is not None:
+            await channel.basic_qos(prefetch_count=global_prefetch_count, prefetch_size=0, connection_global=True)
+        ack_coalescer = None
+        if ack_flush_interval:
+            ack_coalescer = AmqpAckCoalescer(channel, ack_flush_interval, prefetch_count)
+        pooled_channel = AmqpPooledChannel(channel, queue_name=queue_name, ack_coalescer=ack_coalescer)
+        self.consumer_channels.append(self._handle_flow(pooled_channel))
+        set_execution_context(self.stats())
+        return pooled_channel
+
+    async def flush_acks(self) -> None:
+        for pooled_channel in self.consumer_channels:
+            if pooled_channel.ack_coalescer:
+                await pooled_channel.ack_coalescer.flush(force=True)
+
+    async def get_publish_channel(self) -> AmqpPooledChannel:
+        channel_count = len(self.publish_channels)
+        for i in range(channel_count):
+            pooled_channel = self.publish_channels[(self._publish_index + i) % channel_count]
+            if pooled_channel.flow.is_set():
+                self._publish_index = (self._publish_index + i + 1) % channel_count
+                return pooled_channel
+
+        # every publish channel is paused by the broker
+        pooled_channel = self.publish_channels[self._publish_index]
+        self._publish_index = (self._publish_index + 1) % channel_count
+        await pooled_channel.flow.wait()
+        return pooled_channel
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "amqp_publish_channels": len(self.publish_channels),
+            "amqp_consumer_channels": len(self.consumer_channels),
+            "amqp_paused_channels": len(
+                [c for c in self.publish_channels + self.consumer_channels if not c.flow.is_set()]
+            ),
+        }
+
+    def _handle_flow(self, pooled_channel: AmqpPooledChannel) -> AmqpPooledChannel:
+        # aioamqp doesn't handle channel.flow sent by the broker, which is answered here with channel.flow-ok.
+        channel = pooled_channel.channel
+        dispatch_frame = channel.dispatch_frame
+
+        async def _dispatch_frame(frame: Any) -> None:
+            if frame.name != pamqp.commands.Channel.Flow.name:
+                await dispatch_frame(frame)
+                return
+
+            if frame.active:
+                pooled_channel.flow.set()
+            else:
+                pooled_channel.flow.clear()
+            logging.getLogger("tomodachi.amqp").info(
+                "channel flow {} by broker".format("resumed" if frame.active else "paused"),
+                channel_id=channel.channel_id,
+                queue_name=pooled_channel.queue_name or Ellipsis,
+            )
+            await channel._write_frame(channel.channel_id, pamqp.commands.Channel.FlowOk(frame.active))
+            set_execution_context(self.stats())
+
+        setattr(channel, "dispatch_frame", _dispatch_frame)
+        return pooled_channel
+
+
 class AmqpTransport(Invoker):
     channel: Any = None
+    channel_pool: Optional[AmqpChannelPool] = None
     protocol: Any = None
     transport: Any = None
     exchange_name: str
+    connected: Optional[asyncio.Event] = None
+    recovery_task: Optional[asyncio.Future] = None
+    buffered_count: int = 0
 
     @overload
     @classmethod
@@ -129,7 +598,7 @@ class AmqpTransport(Invoker):
         routing_key_prefix: Optional[str] = MESSAGE_ROUTING_KEY_PREFIX,
         **kwargs: Any,
     ) -> Optional[asyncio.Task[None]]:
-        if not cls.channel:
+        if not cls.channel or not cls.channel_pool:
             await cls.connect(service, service.context)
         exchange_name = exchange_name or cls.exchange_name or "amq.topic"
 
@@ -150,7 +619,7 @@ class AmqpTransport(Invoker):
                 payload = await asyncio.create_task(build_message_func(service, routing_key, data, **kwargs))
 
         async def _publish_message() -> None:
-            properties: Dict = {}
+            properties: Dict = cls.get_content_properties(payload, message_envelope)
             await cls._publish_message(
                 routing_key, exchange_name, payload, properties, routing_key_prefix, service, service.context
             )
@@ -172,18 +641,105 @@ class AmqpTransport(Invoker):
         service: Any,
         context: Dict,
     ) -> None:
+        body = payload if isinstance(payload, bytes) else str.encode(payload)
+        encoded_routing_key = cls.encode_routing_key(cls.get_routing_key(routing_key, context, routing_key_prefix))
+
+        async def _publish() -> None:
+            await cls.wait_for_connection(context)
+            await cls._publish_on_channel(
+                cast(AmqpChannelPool, cls.channel_pool), body, exchange_name, encoded_routing_key, properties
+            )
+
         success = False
         while not success:
+            # limited by the deadline of the current request or message, if any
+            timeout = get_timeout()
             try:
-                await cls.channel.basic_publish(
-                    str.encode(payload),
-                    exchange_name,
-                    cls.encode_routing_key(cls.get_routing_key(routing_key, context, routing_key_prefix)),
-                    properties,
-                )
+                publish = _publish()
+                await (asyncio.wait_for(publish, timeout=timeout) if timeout is not None else publish)
                 success = True
             except AssertionError:
                 await cls.connect(service, context)
+            except (aioamqp.exceptions.AmqpClosedConnection, aioamqp.exceptions.ChannelClosed):
+                # the connection was lost while publishing – the message is published once the connection has been
+                # recovered (or dropped if the publish buffer is full).
+                if not cls.connected or cls.connected.is_set():
+                    raise
+
+    @classmethod
+    async def wait_for_connection(cls, context: Dict) -> None:
+        connected = cls.connected
+        if connected is None or connected.is_set():
+            return
+
+        if cls.buffered_count >= cls.options(context).amqp.publish_buffer_size:
+            increase_execution_context_value("amqp_dropped_messages")
+            raise AmqpConnectionException(
+                "Connection [amqp] is being recovered - message not published", log_level=context.get("log_level")
+            )
+
+        cls.buffered_count += 1
+        increase_execution_context_value("amqp_buffered_messages")
+        try:
+            await connected.wait()
+        finally:
+            cls.buffered_count -= 1
+
+        if not cls.channel_pool:
+            raise AmqpConnectionException("Connection [amqp] has been closed - message not published")
+
+    @staticmethod
+    def get_content_properties(payload: Any, message_envelope: Any = None) -> Dict:
+        content_type = getattr(message_envelope, "content_type", None)
+        if isinstance(payload, bytes):
+            return {"content_type": content_type or "application/octet-stream"}
+        return {"content_type": content_type or "text/plain", "content_encoding": "utf-8"}
+
+    @staticmethod
+    def parse_content_type(content_type: str) -> Tuple[str, Optional[str]]:
+        # Returns the media type (without parameters, in lower case) and the charset parameter of a content type.
+        media_type, _, parameters = content_type.partition(";")
+        charset = None
+        for parameter in parameters.split(";"):
+            name, _, value = parameter.partition("=")
+            if name.strip().lower() == "charset" and value.strip():
+                charset = value.strip().strip('"')
+        return media_type.strip().lower(), charset
+
+    @classmethod
+    def decode_payload(cls, body: bytes, properties: Any) -> Union[str, bytes]:
+        # Bodies are decoded using the content encoding of the message, or else the charset of the content type. Bodies
+        # without either are decoded as UTF-8 if they have a text content type or no content type at all (messages
+        # published by earlier versions).
+        media_type, charset = cls.parse_content_type(getattr(properties, "content_type", None) or "")
+        content_encoding = getattr(properties, "content_encoding", None) or charset or ""
+        if not content_encoding:
+            if (
+                media_type
+                and not media_type.startswith("text/")
+                and media_type not in AMQP_TEXT_CONTENT_TYPES
+                and not media_type.endswith(AMQP_TEXT_CONTENT_TYPE_SUFFIXES)
+            ):
+                return body
+            content_encoding = "utf-8"
+
+        try:
+            codecs.lookup(content_encoding)
+        except LookupError:
+            # not a character encoding – for example "gzip", which is left to the envelope or handler.
+            return body
+        return body.decode(content_encoding)
+
+    @staticmethod
+    async def _publish_on_channel(
+        channel_pool: AmqpChannelPool, payload: bytes, exchange_name: str, routing_key: str, properties: Dict
+    ) -> None:
+        pooled_channel = await channel_pool.get_publish_channel()
+        if pooled_channel.publisher_confirms:
+            # the message is confirmed by the broker once it has been routed (and persisted if durable).
+            await (await pooled_channel.publisher_confirms.publish(payload, exchange_name, routing_key, properties))
+        else:
+            await pooled_channel.channel.basic_publish(payload, exchange_name, routing_key, properties)
 
     @classmethod
     def get_routing_key(
@@ -262,9 +818,19 @@ class AmqpTransport(Invoker):
         *,
         message_envelope: Any = MESSAGE_ENVELOPE_DEFAULT,
         message_protocol: Any = MESSAGE_ENVELOPE_DEFAULT,  # deprecated
+        executor: Optional[str] = None,
+        deadline: Optional[float] = None,
+        prefetch_count: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        batch_timeout: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
         **kwargs: Any,
     ) -> Any:
         parser_kwargs = kwargs
+        handler_func = executor_handler(obj, context, func, executor)
+
+        if deadline is not None and deadline <= 0:
+            raise ValueError("Bad value for deadline: {}".format(deadline))
 
         if message_envelope == MESSAGE_ENVELOPE_DEFAULT and message_protocol != MESSAGE_ENVELOPE_DEFAULT:
             # Fallback if deprecated message_protocol keyword is used
@@ -302,11 +868,30 @@ class AmqpTransport(Invoker):
         original_kwargs: Dict[str, Any] = {k: v for k, v in _callback_kwargs.items()}
         args_set = (set(values.args[1:]) | set(values.kwonlyargs) | set(callback_kwargs or [])) - set(["self"])
 
-        async def handler(
-            payload: Any, delivery_tag: Any, routing_key: str, properties: aioamqp.properties.Properties
-        ) -> Any:
-            logging.bind_logger(logging.getLogger("tomodachi.amqp").new(logger="tomodachi.amqp"))
+        # the bound loggers are created once per handler and bound for each message
+        transport_logger = logging.getLogger("tomodachi.amqp").new(logger="tomodachi.amqp")
+        handler_logger = logging.getLogger("tomodachi.amqp.handler").bind(handler=func.__name__, type="tomodachi.amqp")
+        middleware_logger = logging.getLogger("tomodachi.amqp.middleware").bind(
+            middleware=Ellipsis, handler=func.__name__, type="tomodachi.amqp"
+        )
 
+        if prefetch_count is not None and prefetch_count < 0:
+            raise ValueError("Bad value for prefetch_count: {}".format(prefetch_count))
+        if batch_size is not None and batch_size < 1:
+            raise ValueError("Bad value for batch_size: {}".format(batch_size))
+        if batch_timeout is not None and batch_timeout <= 0:
+            raise ValueError("Bad value for batch_timeout: {}".format(batch_timeout))
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError("Bad value for max_concurrency: {}".format(max_concurrency))
+
+        async def parse_delivery(
+            payload: Any,
+            delivery_tag: Any,
+            routing_key: str,
+            properties: aioamqp.properties.Properties,
+            channel: Any,
+        ) -> Optional[Tuple[Any, Any, Optional[str], Dict]]:
+            # returns None for deliveries that have already been handled (duplicates and unparsable messages).
             kwargs = dict(original_kwargs)
 
             message = payload
@@ -327,7 +912,9 @@ class AmqpTransport(Invoker):
                             context["_amqp_received_messages"] = {}
                         message_key = "{}:{}".format(message_uuid, func.__name__)
                         if context["_amqp_received_messages"].get(message_key):
-                            return
+                            if isinstance(channel, AmqpAckCoalescer):
+                                await channel.dropped(delivery_tag)
+                            return None
                         context["_amqp_received_messages"][message_key] = time.time()
                         _received_messages = context["_amqp_received_messages"]
                         if (
@@ -363,12 +950,14 @@ class AmqpTransport(Invoker):
                     limit_exception_traceback(e, ("tomodachi.transport.amqp",))
                     logging.getLogger("exception").exception("uncaught exception: {}".format(str(e)))
                     if message is not False and not message_uuid:
-                        await cls.channel.basic_client_ack(delivery_tag)
+                        await channel.basic_client_ack(delivery_tag)
                     elif message is False and message_uuid:
-                        pass  # incompatible envelope, should probably ack if old message
+                        # incompatible envelope, should probably ack if old message
+                        if isinstance(channel, AmqpAckCoalescer):
+                            await channel.dropped(delivery_tag)
                     elif message is False:
-                        await cls.channel.basic_client_ack(delivery_tag)
-                    return
+                        await channel.basic_client_ack(delivery_tag)
+                    return None
             else:
                 if args_set:
                     if "message" in args_set:
@@ -385,11 +974,12 @@ class AmqpTransport(Invoker):
                 if len(values.args[1:]) and values.args[1] in kwargs:
                     del kwargs[values.args[1]]
 
+            return message, message_uuid, message_key, kwargs
+
+        def build_routine(kwargs: Dict, acknowledge: Callable) -> Callable:
             @functools.wraps(func)
             async def routine_func(*a: Any, **kw: Any) -> Any:
-                logging.bind_logger(
-                    logging.getLogger("tomodachi.amqp.handler").bind(handler=func.__name__, type="tomodachi.amqp")
-                )
+                logging.bind_logger(handler_logger)
                 get_contextvar("service.logger").set("tomodachi.amqp.handler")
 
                 kw_values = {k: v for k, v in {**kwargs, **kw}.items() if values.varkw or k in args_set}
@@ -400,36 +990,61 @@ class AmqpTransport(Invoker):
                 if values.varargs and not values.defaults and len(a) > len(args_values) + 1:
                     args_values += a[len(args_values) + 1 :]
 
-                routine = func(*(obj, *args_values), **kw_values)
+                routine = handler_func(*(obj, *args_values), **kw_values)
                 if inspect.isawaitable(routine):
                     return_value = await routine
                 else:
                     return_value = routine
 
-                await cls.channel.basic_client_ack(delivery_tag)
+                await acknowledge()
                 return return_value
 
+            return routine_func
+
+        async def handler(
+            payload: Any,
+            delivery_tag: Any,
+            routing_key: str,
+            properties: aioamqp.properties.Properties,
+            channel: Any = None,
+        ) -> Any:
+            logging.bind_logger(transport_logger)
+            # deliveries are acknowledged on the channel of the consumer
+            channel = channel or cls.channel
+
+            parsed = await parse_delivery(payload, delivery_tag, routing_key, properties, channel)
+            if parsed is None:
+                return None
+            message, message_uuid, message_key, kwargs = parsed
+            routine_func = build_routine(kwargs, functools.partial(channel.basic_client_ack, delivery_tag))
+
+            deadline_timeout = min_timeout(deadline, parse_deadline_attribute(getattr(properties, "headers", None)))
+            if deadline_timeout is not None and deadline_timeout <= 0:
+                # the sender of the message is no longer waiting for the outcome
+                logging.getLogger("tomodachi.amqp").warning(
+                    "message deadline exceeded - ignoring message", handler=func.__name__
+                )
+                await channel.basic_client_ack(delivery_tag)
+                return
+
             increase_execution_context_value("amqp_current_tasks")
             increase_execution_context_value("amqp_total_tasks")
             try:
-                logging.bind_logger(
-                    logging.getLogger("tomodachi.amqp.middleware").bind(
-                        middleware=Ellipsis, handler=func.__name__, type="tomodachi.amqp"
-                    )
-                )
-                return_value = await asyncio.create_task(
-                    execute_middlewares(
-                        func,
-                        routine_func,
-                        context.get("_amqp_message_pre_middleware", []) + context.get("message_middleware", []),
-                        *(obj, message, routing_key),
-                        message=message,
-                        message_uuid=message_uuid,
-                        routing_key=routing_key,
-                        exchange_name=exchange_name,
-                        properties=properties,
+                logging.bind_logger(middleware_logger)
+                async with Deadline(deadline_timeout):
+                    return_value = await asyncio.create_task(
+                        execute_middlewares(
+                            func,
+                            routine_func,
+                            context.get("_amqp_message_pre_middleware", []) + context.get("message_middleware", []),
+                            *(obj, message, routing_key),
+                            message=message,
+                            message_uuid=message_uuid,
+                            routing_key=routing_key,
+                            exchange_name=exchange_name,
+                            properties=properties,
+                        )
                     )
-                )
             except (Exception, asyncio.CancelledError, BaseException) as e:
                 limit_exception_traceback(
                     e,
@@ -443,16 +1058,115 @@ class AmqpTransport(Invoker):
                 ):
                     if message_key:
                         del context["_amqp_received_messages"][message_key]
-                    await cls.channel.basic_client_nack(delivery_tag)
+                    await channel.basic_client_nack(delivery_tag)
                 else:
-                    await cls.channel.basic_client_ack(delivery_tag)
+                    await channel.basic_client_ack(delivery_tag)
+            decrease_execution_context_value("amqp_current_tasks")
+
+            return return_value
+
+        async def batch_handler(deliveries: List[Tuple[Any, Any, str, aioamqp.properties.Properties, Any]]) -> Any:
+            # the arguments of the handler are lists, with one value for each message of the batch.
+            logging.bind_logger(transport_logger)
+
+            batch: List[Tuple[Any, Any, Optional[str], Dict, Any, Any, str, Any]] = []
+            deadline_timeout = deadline
+            for payload, delivery_tag, routing_key, properties, channel in deliveries:
+                channel = channel or cls.channel
+                message_deadline = parse_deadline_attribute(getattr(properties, "headers", None))
+                if message_deadline is not None and message_deadline <= 0:
+                    logging.getLogger("tomodachi.amqp").warning(
+                        "message deadline exceeded - ignoring message", handler=func.__name__
+                    )
+                    await channel.basic_client_ack(delivery_tag)
+                    continue
+
+                parsed = await parse_delivery(payload, delivery_tag, routing_key, properties, channel)
+                if parsed is None:
+                    continue
+                batch.append((*parsed, delivery_tag, channel, routing_key, properties))
+                deadline_timeout = min_timeout(deadline_timeout, message_deadline)
+
+            if not batch:
+                return None
+
+            kwargs: Dict[str, Any] = {
+                key: [item[3].get(key, original_kwargs.get(key)) for item in batch]
+                for key in set(itertools.chain.from_iterable(item[3] for item in batch))
+            }
+            messages = [item[0] for item in batch]
+            message_uuids = [item[1] for item in batch]
+            routing_keys = [item[6] for item in batch]
+            properties_list = [item[7] for item in batch]
+
+            async def acknowledge() -> None:
+                for _, _, _, _, delivery_tag, channel, _, _ in batch:
+                    await channel.basic_client_ack(delivery_tag)
+
+            increase_execution_context_value("amqp_current_tasks")
+            increase_execution_context_value("amqp_total_tasks")
+            try:
+                logging.bind_logger(middleware_logger)
+                async with Deadline(deadline_timeout):
+                    return_value = await asyncio.create_task(
+                        execute_middlewares(
+                            func,
+                            build_routine(kwargs, acknowledge),
+                            context.get("_amqp_message_pre_middleware", []) + context.get("message_middleware", []),
+                            *(obj, messages, routing_keys),
+                            message=messages,
+                            message_uuid=message_uuids,
+                            routing_key=routing_keys,
+                            exchange_name=exchange_name,
+                            properties=properties_list,
+                        )
+                    )
+            except (Exception, asyncio.CancelledError, BaseException) as e:
+                limit_exception_traceback(
+                    e,
+                    ("tomodachi.transport.amqp", "tomodachi.helpers.middleware"),
+                )
+                logging.getLogger("exception").exception("uncaught exception: {}".format(str(e)))
+                return_value = None
+                retry = issubclass(
+                    e.__class__,
+                    (AmqpInternalServiceError, AmqpInternalServiceErrorException, AmqpInternalServiceException),
+                )
+                for _, _, message_key, _, delivery_tag, channel, _, _ in batch:
+                    if retry:
+                        if message_key:
+                            context["_amqp_received_messages"].pop(message_key, None)
+                        await channel.basic_client_nack(delivery_tag)
+                    else:
+                        await channel.basic_client_ack(delivery_tag)
             decrease_execution_context_value("amqp_current_tasks")
 
             return return_value
 
         exchange_name = exchange_name or cls.options(context).amqp.exchange_name
+
+        consumer_handler: Callable = handler
+        if batch_size or max_concurrency:
+            dispatcher = AmqpDeliveryDispatcher(
+                batch_handler if batch_size else handler,
+                max_concurrency=max_concurrency or 1,
+                batch_size=batch_size or 0,
+                batch_timeout=batch_timeout if batch_timeout is not None else AMQP_BATCH_TIMEOUT,
+            )
+            context["_amqp_dispatchers"] = context.get("_amqp_dispatchers", [])
+            context["_amqp_dispatchers"].append(dispatcher)
+            consumer_handler = dispatcher.dispatch
+
+            if prefetch_count is None:
+                # enough deliveries to fill a batch for each of the concurrently running handlers.
+                prefetch_count = max(
+                    cls.options(context).amqp.qos.queue_prefetch_count, (batch_size or 1) * (max_concurrency or 1)
+                )
+
         context["_amqp_subscribers"] = context.get("_amqp_subscribers", [])
-        context["_amqp_subscribers"].append((routing_key, exchange_name, competing, queue_name, func, handler))
+        context["_amqp_subscribers"].append(
+            (routing_key, exchange_name, competing, queue_name, func, consumer_handler, prefetch_count)
+        )
 
         start_func = cls.subscribe(obj, context)
         return (await start_func) if start_func else None
@@ -485,6 +1199,7 @@ class AmqpTransport(Invoker):
                 virtualhost=virtualhost,
                 ssl=ssl,
                 heartbeat=heartbeat,
+                on_error=functools.partial(cls.connection_lost, obj, context),
             )
             cls.protocol = protocol
             cls.transport = transport
@@ -502,26 +1217,111 @@ class AmqpTransport(Invoker):
             raise AmqpConnectionException(str(e), log_level=context.get("log_level")) from e
 
         channel = await protocol.channel()
+        channel_pool = AmqpChannelPool(protocol)
+        await channel_pool.open_publish_channels(
+            amqp_options.publish_channels, amqp_options.publisher_confirms, amqp_options.publisher_confirms_window
+        )
+
         if not cls.channel:
             stop_method = getattr(obj, "_stop_service", None)
 
             async def stop_service(*args: Any, **kwargs: Any) -> None:
+                if cls.recovery_task and not cls.recovery_task.done():
+                    cls.recovery_task.cancel()
+                cls.recovery_task = None
+                for dispatcher in context.get("_amqp_dispatchers", []):
+                    try:
+                        await dispatcher.close()
+                    except Exception as e:
+                        logging.getLogger("exception").exception("uncaught exception: {}".format(str(e)))
+                if cls.channel_pool:
+                    try:
+                        await cls.channel_pool.flush_acks()
+                    except Exception as e:
+                        logging.getLogger("exception").exception("uncaught exception: {}".format(str(e)))
                 logging.getLogger("aioamqp.protocol").setLevel(logging.ERROR)
-                await cls.protocol.close()
-                cls.transport.close()
+                protocol, transport, connected = cls.protocol, cls.transport, cls.connected
+                # unset before closing, so that closing the connection doesn't start a recovery.
                 cls.channel = None
+                cls.channel_pool = None
                 cls.transport = None
                 cls.protocol = None
+                cls.connected = None
+                if connected:
+                    # messages waiting to be published while recovering are failed.
+                    connected.set()
+                if protocol and protocol.state == aioamqp.protocol.OPEN:
+                    await protocol.close()
+                if transport:
+                    transport.close()
                 if stop_method:
                     await stop_method(*args, **kwargs)
 
             setattr(obj, "_stop_service", stop_service)
 
         cls.channel = channel
+        cls.channel_pool = channel_pool
         cls.exchange_name = cls.options(context).amqp.exchange_name
+        if cls.connected is None:
+            cls.connected = asyncio.Event()
+            cls.connected.set()
 
         return channel
 
+    @classmethod
+    def connection_lost(cls, obj: Any, context: Dict, exception: Exception) -> None:
+        # Called by aioamqp when the connection has been closed by the broker or lost, and once more for a connection
+        # that is closed after it has been lost. Connections closed when stopping the service are already unset.
+        if not cls.protocol or cls.protocol.state == aioamqp.protocol.OPEN:
+            return
+        if cls.recovery_task and not cls.recovery_task.done():
+            return
+
+        logger = logging.getLogger("tomodachi.amqp")
+        if not cls.options(context).amqp.reconnect:
+            logger.warning("Connection lost [amqp] ({})".format(str(exception)))
+            return
+
+        logger.warning("Connection lost [amqp] - reconnecting ({})".format(str(exception)))
+        if cls.connected:
+            cls.connected.clear()
+        cls.recovery_task = asyncio.ensure_future(cls.recover(obj, context))
+
+    @classmethod
+    async def recover(cls, obj: Any, context: Dict) -> None:
+        # Reconnects with an exponential backoff and declares the topology recorded from the subscriptions of the
+        # service (exchanges, queues and bindings) again, before the consumers are registered again.
+        logger = logging.getLogger("tomodachi.amqp")
+        logging.bind_logger(logger)
+
+        amqp_options: Options.AMQP = cls.options(context).amqp
+        started_at = time.monotonic()
+        delay = amqp_options.reconnect_delay
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await cls.connect(obj, context)
+                consume = context.get("_amqp_consume")
+                if consume:
+                    await consume()
+                break
+            except Exception as e:
+                delay = min(delay * 2, amqp_options.reconnect_max_delay)
+                logger.warning("Unable to recover connection [amqp] - retrying in {}s ({})".format(delay, str(e)))
+                if cls.protocol and cls.protocol.state == aioamqp.protocol.OPEN:
+                    try:
+                        await cls.protocol.close()
+                    except Exception:
+                        pass
+
+        recovery_time = time.monotonic() - started_at
+        increase_execution_context_value("amqp_reconnects")
+        set_execution_context({"amqp_last_recovery_time": round(recovery_time, 3)})
+        logger.info("Connection recovered [amqp]", recovery_time="{0:.3f}s".format(recovery_time))
+
+        if cls.connected:
+            cls.connected.set()
+
     @classmethod
     async def subscribe(cls, obj: Any, context: Dict) -> Optional[Callable]:
         if context.get("_amqp_subscribed"):
@@ -536,24 +1336,24 @@ class AmqpTransport(Invoker):
                 "amqp_enabled": True,
                 "amqp_current_tasks": 0,
                 "amqp_total_tasks": 0,
+                "amqp_reconnects": 0,
+                "amqp_buffered_messages": 0,
+                "amqp_dropped_messages": 0,
                 "aioamqp_version": aioamqp.__version__,
             }
         )
 
         cls.channel = None
-        channel = await cls.connect(obj, context)
+        await cls.connect(obj, context)
         options: Options = cls.options(context)
-        await channel.basic_qos(
-            prefetch_count=options.amqp.qos.queue_prefetch_count, prefetch_size=0, connection_global=False
-        )
-        await channel.basic_qos(
-            prefetch_count=options.amqp.qos.global_prefetch_count, prefetch_size=0, connection_global=True
-        )
 
         async def _subscribe() -> None:
             logger = logging.getLogger("tomodachi.amqp")
             logging.bind_logger(logger)
 
+            # called again with the channels of the new connection when the connection is recovered.
+            channel = cls.channel
+
             async def declare_queue(
                 routing_key: str,
                 func: Callable,
@@ -652,16 +1452,27 @@ class AmqpTransport(Invoker):
 
                 return queue_name
 
-            def callback(routing_key: str, handler: Callable) -> Callable:
+            def callback(routing_key: str, handler: Callable, ack_coalescer: Optional[AmqpAckCoalescer]) -> Callable:
                 async def _callback(
                     self: Any, body: bytes, envelope: Any, properties: aioamqp.properties.Properties
                 ) -> None:
                     # await channel.basic_reject(delivery_tag, requeue=True)
-                    await asyncio.shield(handler(body.decode(), envelope.delivery_tag, routing_key, properties))
+                    if ack_coalescer:
+                        ack_coalescer.delivered(envelope.delivery_tag)
+                    await asyncio.shield(
+                        handler(
+                            cls.decode_payload(body, properties),
+                            envelope.delivery_tag,
+                            routing_key,
+                            properties,
+                            channel=ack_coalescer or self,
+                        )
+                    )
 
                 return _callback
 
-            for routing_key, exchange_name, competing, queue_name, func, handler in context.get(
+            channel_pool = cast(AmqpChannelPool, cls.channel_pool)
+            for routing_key, exchange_name, competing, queue_name, func, handler, prefetch_count in context.get(
                 "_amqp_subscribers", []
             ):
                 queue_name = await asyncio.create_task(
@@ -673,7 +1484,17 @@ class AmqpTransport(Invoker):
                         queue_name=queue_name,
                     )
                 )
-                await channel.basic_consume(callback(routing_key, handler), queue_name=queue_name)
+                consumer_channel = await channel_pool.open_consumer_channel(
+                    cast(str, queue_name),
+                    prefetch_count if prefetch_count is not None else options.amqp.qos.queue_prefetch_count,
+                    options.amqp.qos.global_prefetch_count,
+                    options.amqp.ack_flush_interval,
+                )
+                await consumer_channel.channel.basic_consume(
+                    callback(routing_key, handler, consumer_channel.ack_coalescer), queue_name=queue_name
+                )
+
+        context["_amqp_consume"] = _subscribe
 
         return _subscribe
 
@@ -693,6 +1514,12 @@ def amqp(
     *,
     message_envelope: Any = MESSAGE_ENVELOPE_DEFAULT,
     message_protocol: Any = MESSAGE_ENVELOPE_DEFAULT,  # deprecated
+    executor: Optional[str] = None,
+    deadline: Optional[float] = None,
+    prefetch_count: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    batch_timeout: Optional[float] = None,
+    max_concurrency: Optional[int] = None,
     **kwargs: Any,
 ) -> Callable:
     return cast(
@@ -705,6 +1532,12 @@ def amqp(
             queue_name=queue_name,
             message_envelope=message_envelope,
             message_protocol=message_protocol,
+            executor=executor,
+            deadline=deadline,
+            prefetch_count=prefetch_count,
+            batch_size=batch_size,
+            batch_timeout=batch_timeout,
+            max_concurrency=max_concurrency,
             **kwargs,
         ),
     )
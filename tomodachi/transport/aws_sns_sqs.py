@@ -52,12 +52,14 @@ from tomodachi import get_contextvar, logging
 from tomodachi._exception import limit_exception_traceback
 from tomodachi.helpers.aiobotocore_connector import ClientConnector
 from tomodachi.helpers.aws_credentials import Credentials
+from tomodachi.helpers.deadline import Deadline, get_timeout, min_timeout, parse_deadline_attribute
 from tomodachi.helpers.execution_context import (
     decrease_execution_context_value,
     get_execution_context,
     increase_execution_context_value,
     set_execution_context,
 )
+from tomodachi.helpers.executor import executor_handler
 from tomodachi.helpers.middleware import execute_middlewares
 from tomodachi.invoker import Invoker
 from tomodachi.options import Options
@@ -843,9 +845,15 @@ class AWSSNSSQSTransport(Invoker):
         max_receive_count: Optional[int] = MAX_RECEIVE_COUNT_DEFAULT,
         fifo: bool = False,
         max_number_of_consumed_messages: Optional[int] = MAX_NUMBER_OF_CONSUMED_MESSAGES,
+        executor: Optional[str] = None,
+        deadline: Optional[float] = None,
         **kwargs: Any,
     ) -> Any:
         parser_kwargs = kwargs
+        handler_func = executor_handler(obj, context, func, executor)
+
+        if deadline is not None and deadline <= 0:
+            raise ValueError("Bad value for deadline: {}".format(deadline))
 
         if message_envelope == MESSAGE_ENVELOPE_DEFAULT and message_protocol != MESSAGE_ENVELOPE_DEFAULT:
             # Fallback if deprecated message_protocol keyword is used
@@ -894,6 +902,15 @@ class AWSSNSSQSTransport(Invoker):
         original_kwargs = {k: v for k, v in _callback_kwargs.items()}
         args_set = (set(values.args[1:]) | set(values.kwonlyargs) | set(callback_kwargs or [])) - set(["self"])
 
+        # the bound loggers are created once per handler and bound for each message
+        transport_logger = logging.getLogger("tomodachi.awssnssqs").new(logger="tomodachi.awssnssqs")
+        handler_logger = logging.getLogger("tomodachi.awssnssqs.handler").bind(
+            handler=func.__name__, type="tomodachi.awssnssqs"
+        )
+        middleware_logger = logging.getLogger("tomodachi.awssnssqs.middleware").bind(
+            middleware=Ellipsis, handler=func.__name__, type="tomodachi.awssnssqs"
+        )
+
         async def handler(
             payload: Optional[str],
             receipt_handle: str,
@@ -909,7 +926,7 @@ class AWSSNSSQSTransport(Invoker):
             message_deduplication_id: Optional[str] = None,
             message_group_id: Optional[str] = None,
         ) -> Any:
-            logging.bind_logger(logging.getLogger("tomodachi.awssnssqs").new(logger="tomodachi.awssnssqs"))
+            logging.bind_logger(transport_logger)
 
             if not payload or payload == DRAIN_MESSAGE_PAYLOAD:
                 try:
@@ -1092,11 +1109,7 @@ class AWSSNSSQSTransport(Invoker):
 
             @functools.wraps(func)
             async def routine_func(*a: Any, **kw: Any) -> Any:
-                logging.bind_logger(
-                    logging.getLogger("tomodachi.awssnssqs.handler").bind(
-                        handler=func.__name__, type="tomodachi.awssnssqs"
-                    )
-                )
+                logging.bind_logger(handler_logger)
                 get_contextvar("service.logger").set("tomodachi.awssnssqs.handler")
 
                 kw_values = {k: v for k, v in {**kwargs, **kw}.items() if values.varkw or k in args_set}
@@ -1107,7 +1120,7 @@ class AWSSNSSQSTransport(Invoker):
                 if values.varargs and not values.defaults and len(a) > len(args_values) + 1:
                     args_values += a[len(args_values) + 1 :]
 
-                routine = func(*(obj, *args_values), **kw_values)
+                routine = handler_func(*(obj, *args_values), **kw_values)
                 if inspect.isawaitable(routine):
                     return_value = await routine
                 else:
@@ -1115,37 +1128,50 @@ class AWSSNSSQSTransport(Invoker):
 
                 return return_value
 
+            deadline_timeout = min_timeout(deadline, parse_deadline_attribute(message_attributes_values))
+            if deadline_timeout is not None and deadline_timeout <= 0:
+                # the sender of the message is no longer waiting for the outcome
+                logging.getLogger("tomodachi.awssnssqs").warning(
+                    "message deadline exceeded - ignoring message", handler=func.__name__
+                )
+                try:
+                    await cls.delete_message(receipt_handle, queue_url, context)
+                except (Exception, asyncio.CancelledError, BaseException) as e:
+                    limit_exception_traceback(e, ("tomodachi.transport.aws_sns_sqs",))
+                    logging.getLogger("exception").exception(
+                        "unexpected error during delete message: {}".format(str(e))
+                    )
+                return
+
             increase_execution_context_value("aws_sns_sqs_current_tasks")
             increase_execution_context_value("aws_sns_sqs_total_tasks")
             keep_message_in_queue = False
             try:
-                logging.bind_logger(
-                    logging.getLogger("tomodachi.awssnssqs.middleware").bind(
-                        middleware=Ellipsis, handler=func.__name__, type="tomodachi.awssnssqs"
-                    )
-                )
-                return_value = await asyncio.create_task(
-                    execute_middlewares(
-                        func,
-                        routine_func,
-                        context.get("_awssnssqs_message_pre_middleware", []) + context.get("message_middleware", []),
-                        *(obj, message, message_topic),
-                        message=message,
-                        message_uuid=message_uuid,
-                        topic=message_topic,
-                        receipt_handle=receipt_handle,
-                        queue_url=queue_url,
-                        message_attributes=message_attributes_values,
-                        approximate_receive_count=approximate_receive_count,
-                        sns_message_id=sns_message_id,
-                        sqs_message_id=sqs_message_id,
-                        message_type=message_type,
-                        raw_message_body=raw_message_body,
-                        message_timestamp=message_timestamp,
-                        message_deduplication_id=message_deduplication_id,
-                        message_group_id=message_group_id,
+                logging.bind_logger(middleware_logger)
+                async with Deadline(deadline_timeout):
+                    return_value = await asyncio.create_task(
+                        execute_middlewares(
+                            func,
+                            routine_func,
+                            context.get("_awssnssqs_message_pre_middleware", [])
+                            + context.get("message_middleware", []),
+                            *(obj, message, message_topic),
+                            message=message,
+                            message_uuid=message_uuid,
+                            topic=message_topic,
+                            receipt_handle=receipt_handle,
+                            queue_url=queue_url,
+                            message_attributes=message_attributes_values,
+                            approximate_receive_count=approximate_receive_count,
+                            sns_message_id=sns_message_id,
+                            sqs_message_id=sqs_message_id,
+                            message_type=message_type,
+                            raw_message_body=raw_message_body,
+                            message_timestamp=message_timestamp,
+                            message_deduplication_id=message_deduplication_id,
+                            message_group_id=message_group_id,
+                        )
                     )
-                )
             except (Exception, asyncio.CancelledError, BaseException) as e:
                 # todo: don't log exception in case the error is of a AWSSNSSQSInternalServiceError (et. al) type
                 limit_exception_traceback(e, ("tomodachi.transport.aws_sns_sqs", "tomodachi.helpers.middleware"))
@@ -1715,6 +1741,8 @@ class AWSSNSSQSTransport(Invoker):
 
         response: Union[PublishResponseTypeDef, PublishResponseTypeDef_, Dict[str, Any]] = {}
         for retry in range(1, 4):
+            # limited by the deadline of the current request or message, if any
+            timeout = get_timeout(40)
             try:
                 async with connector("tomodachi.sns", service_name="sns") as client:
                     response = await asyncio.wait_for(
@@ -1724,7 +1752,7 @@ class AWSSNSSQSTransport(Invoker):
                             MessageAttributes=message_attribute_values,
                             **optional_request_parameters,
                         ),
-                        timeout=40,
+                        timeout=timeout,
                     )
             except (aiohttp.client_exceptions.ServerDisconnectedError, RuntimeError, asyncio.CancelledError) as e:
                 if retry >= 3:
@@ -1819,6 +1847,8 @@ class AWSSNSSQSTransport(Invoker):
 
         response: Union[SendMessageResultTypeDef, SendMessageResultTypeDef_, Dict[str, Any]] = {}
         for retry in range(1, 4):
+            # limited by the deadline of the current request or message, if any
+            timeout = get_timeout(40)
             try:
                 async with connector("tomodachi.sqs", service_name="sqs") as client:
                     response = await asyncio.wait_for(
@@ -1828,7 +1858,7 @@ class AWSSNSSQSTransport(Invoker):
                             MessageAttributes=message_attribute_values,
                             **optional_request_parameters,
                         ),
-                        timeout=40,
+                        timeout=timeout,
                     )
             except (aiohttp.client_exceptions.ServerDisconnectedError, RuntimeError, asyncio.CancelledError) as e:
                 if retry >= 3:
@@ -3269,6 +3299,8 @@ def aws_sns_sqs(
     max_receive_count: Optional[int] = MAX_RECEIVE_COUNT_DEFAULT,
     fifo: bool = False,
     max_number_of_consumed_messages: Optional[int] = MAX_NUMBER_OF_CONSUMED_MESSAGES,
+    executor: Optional[str] = None,
+    deadline: Optional[float] = None,
     **kwargs: Any,
 ) -> Callable:
     return cast(
@@ -3286,6 +3318,8 @@ def aws_sns_sqs(
             max_receive_count=max_receive_count,
             fifo=fifo,
             max_number_of_consumed_messages=max_number_of_consumed_messages,
+            executor=executor,
+            deadline=deadline,
             **kwargs,
         ),
     )
@@ -3305,6 +3339,8 @@ def awssnssqs(
     max_receive_count: Optional[int] = MAX_RECEIVE_COUNT_DEFAULT,
     fifo: bool = False,
     max_number_of_consumed_messages: Optional[int] = MAX_NUMBER_OF_CONSUMED_MESSAGES,
+    executor: Optional[str] = None,
+    deadline: Optional[float] = None,
     **kwargs: Any,
 ) -> Callable:
     return cast(
@@ -3322,6 +3358,8 @@ def awssnssqs(
             max_receive_count=max_receive_count,
             fifo=fifo,
             max_number_of_consumed_messages=max_number_of_consumed_messages,
+            executor=executor,
+            deadline=deadline,
             **kwargs,
         ),
     )
@@ -4,14 +4,29 @@ import asyncio
 import functools
 import inspect
 import ipaddress
+import json
 import os
 import pathlib
 import platform
 import re
+import socket
 import time
 import uuid
 import warnings
-from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, SupportsInt, Tuple, Union, cast
+from typing import (
+    Any,
+    AsyncIterable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    SupportsInt,
+    Tuple,
+    Union,
+    cast,
+)
 
 from aiohttp import WSMsgType
 from aiohttp import __version__ as aiohttp_version
@@ -20,17 +35,29 @@ from aiohttp.helpers import BasicAuth
 from aiohttp.http import HttpVersion
 from aiohttp.streams import EofStream
 from aiohttp.web_fileresponse import FileResponse
-from multidict import CIMultiDict, CIMultiDictProxy
+from multidict import CIMultiDict, CIMultiDictProxy, MultiDict
 from yarl._path import normalize_path
 
 from tomodachi import get_contextvar, logging
 from tomodachi._exception import limit_exception_traceback
+from tomodachi.helpers.access_log import AccessLog, AccessLogRecord
+from tomodachi.helpers.deadline import Deadline, DeadlineExceeded, min_timeout, parse_timeout_header
 from tomodachi.helpers.execution_context import (
     decrease_execution_context_value,
     increase_execution_context_value,
     set_execution_context,
 )
+from tomodachi.helpers.executor import executor_handler
+from tomodachi.helpers.handoff import (
+    get_inherited_socket,
+    is_handed_off,
+    register_listen_socket,
+    unregister_listen_socket,
+)
+from tomodachi.helpers.limiter import AdaptiveConcurrencyLimiter, ConcurrencyLimiter, ConcurrencyLimitExceeded
 from tomodachi.helpers.middleware import execute_middlewares
+from tomodachi.helpers.sockets import create_inherited_socket, create_unix_socket, remove_unix_socket
+from tomodachi.helpers.websocket_hub import WebSocketHub
 from tomodachi.invoker import Invoker
 from tomodachi.options import Options
 
@@ -67,7 +94,15 @@ class RequestHandler(web_protocol.RequestHandler):
     def _cache_remote_ip(self, request: web.BaseRequest) -> None:
         remote_ip: str = request.remote or ""
 
-        if self._manager._real_ip_header and self._manager._real_ip_from:
+        if not remote_ip and request.transport and isinstance(request.transport.get_extra_info("sockname"), str):
+            # connections on unix domain sockets are made from a local proxy - the real ip header is trusted if
+            # forwarded ips are enabled at all (http option real_ip_from).
+            remote_ip = "unix"
+            if self._manager._real_ip_header and self._manager._real_ip_from:
+                header_value = request.headers.get(self._manager._real_ip_header)
+                if header_value:
+                    remote_ip = header_value.split(",")[0].strip().split(" ")[0].strip()
+        elif self._manager._real_ip_header and self._manager._real_ip_from:
             if any(
                 [ipaddress.ip_address(remote_ip) in ipaddress.ip_network(cidr) for cidr in self._manager._real_ip_from]
             ):
@@ -270,13 +305,7 @@ class Response(object):
 
         self.missing_content_type = hdrs.CONTENT_TYPE not in headers and not content_type and not charset
 
-    def get_aiohttp_response(
-        self, context: Dict, default_charset: Optional[str] = None, default_content_type: Optional[str] = None
-    ) -> web.Response:
-        if self.missing_content_type:
-            self.charset = default_charset
-            self.content_type = default_content_type
-
+    def _get_charset(self) -> Optional[str]:
         charset = self.charset
         if hdrs.CONTENT_TYPE in self._headers and ";" in self._headers[hdrs.CONTENT_TYPE]:
             try:
@@ -290,6 +319,17 @@ class Response(object):
         elif hdrs.CONTENT_TYPE in self._headers and ";" not in self._headers[hdrs.CONTENT_TYPE]:
             charset = None
 
+        return charset
+
+    def get_aiohttp_response(
+        self, context: Dict, default_charset: Optional[str] = None, default_content_type: Optional[str] = None
+    ) -> web.StreamResponse:
+        if self.missing_content_type:
+            self.charset = default_charset
+            self.content_type = default_content_type
+
+        charset = self._get_charset()
+
         if self._body and not isinstance(self._body, bytes) and charset:
             body = self._body
             try:
@@ -313,6 +353,190 @@ class Response(object):
         return response
 
 
+class StreamResponse(Response):
+    __slots__ = ("_iterator",)
+
+    def __init__(
+        self,
+        body: Union[AsyncIterable[Any], Iterable[Any]],
+        *,
+        status: int = 200,
+        reason: Optional[str] = None,
+        headers: Optional[Union[Dict, CIMultiDict, CIMultiDictProxy]] = None,
+        content_type: Optional[str] = None,
+        charset: Optional[str] = None,
+    ) -> None:
+        super().__init__(
+            body=None, status=status, reason=reason, headers=headers, content_type=content_type, charset=charset
+        )
+        self._iterator = body
+
+    def encode_chunk(self, chunk: Any, charset: Optional[str]) -> bytes:
+        if isinstance(chunk, (bytes, bytearray, memoryview)):
+            return bytes(chunk)
+        return str(chunk).encode((charset or "utf-8").lower())
+
+    def get_aiohttp_response(
+        self, context: Dict, default_charset: Optional[str] = None, default_content_type: Optional[str] = None
+    ) -> web.StreamResponse:
+        if self.missing_content_type:
+            self.charset = default_charset
+            self.content_type = default_content_type
+
+        charset = self._get_charset()
+        try:
+            if charset:
+                "".encode(charset.lower())
+        except LookupError as e:
+            logging.getLogger("exception").exception("uncaught exception: {}".format(str(e)))
+            raise web.HTTPInternalServerError() from e
+
+        response = IteratorStreamResponse(
+            self._iterator,
+            encode=functools.partial(self.encode_chunk, charset=charset),
+            status=self._status,
+            reason=self._reason,
+            headers=self._headers,
+        )
+        if self.content_type:
+            response.content_type = self.content_type
+        if self.charset:
+            response.charset = self.charset
+        return response
+
+
+class SSEResponse(StreamResponse):
+    __slots__ = ("ping_interval",)
+
+    def __init__(
+        self,
+        body: Union[AsyncIterable[Any], Iterable[Any]],
+        *,
+        status: int = 200,
+        reason: Optional[str] = None,
+        headers: Optional[Union[Dict, CIMultiDict, CIMultiDictProxy]] = None,
+        ping_interval: Optional[float] = 15.0,
+    ) -> None:
+        headers = CIMultiDict(headers or {})
+        if hdrs.CACHE_CONTROL not in headers:
+            headers[hdrs.CACHE_CONTROL] = "no-cache"
+        if "X-Accel-Buffering" not in headers:
+            headers["X-Accel-Buffering"] = "no"
+
+        super().__init__(
+            body, status=status, reason=reason, headers=headers, content_type="text/event-stream", charset="utf-8"
+        )
+        self.ping_interval = ping_interval
+
+    @staticmethod
+    def encode_event(
+        data: Any = None, *, event: Optional[str] = None, id: Optional[str] = None, retry: Optional[int] = None
+    ) -> str:
+        lines = []
+        if id is not None:
+            lines.append("id: {}".format(id))
+        if event:
+            lines.append("event: {}".format(event))
+        if retry is not None:
+            lines.append("retry: {}".format(int(retry)))
+        if data is not None:
+            if not isinstance(data, str):
+                data = json.dumps(data)
+            lines.extend(["data: {}".format(line) for line in (data.splitlines() or [""])])
+        return "\n".join(lines) + "\n\n"
+
+    def encode_chunk(self, chunk: Any, charset: Optional[str]) -> bytes:
+        if isinstance(chunk, (bytes, bytearray, memoryview)):
+            return bytes(chunk)
+        if isinstance(chunk, dict):
+            return self.encode_event(
+                chunk.get("data"), event=chunk.get("event"), id=chunk.get("id"), retry=chunk.get("retry")
+            ).encode("utf-8")
+        return self.encode_event(chunk).encode("utf-8")
+
+    def get_aiohttp_response(
+        self, context: Dict, default_charset: Optional[str] = None, default_content_type: Optional[str] = None
+    ) -> web.StreamResponse:
+        response = super().get_aiohttp_response(context)
+        if isinstance(response, IteratorStreamResponse) and self.ping_interval and self.ping_interval > 0:
+            response.set_ping(self.ping_interval, b": ping\n\n")
+        return response
+
+
+class IteratorStreamResponse(web.StreamResponse):
+    # An aiohttp stream response which writes the chunks of an (async) iterable to the client. Each write awaits
+    # the transport to drain its buffer when it exceeds the high-water mark, so slow clients applies backpressure
+    # on the iterator instead of buffering the whole response in memory.
+
+    def __init__(
+        self,
+        iterator: Union[AsyncIterable[Any], Iterable[Any]],
+        *,
+        encode: Callable[[Any], bytes],
+        status: int = 200,
+        reason: Optional[str] = None,
+        headers: Optional[Union[Dict, CIMultiDict, CIMultiDictProxy]] = None,
+    ) -> None:
+        super().__init__(status=status, reason=reason, headers=headers)
+        self._iterator = iterator
+        self._encode = encode
+        self._ping_interval: Optional[float] = None
+        self._ping_chunk = b""
+        self.streamed_content_length = 0
+
+    def set_ping(self, interval: float, chunk: bytes) -> None:
+        self._ping_interval = interval
+        self._ping_chunk = chunk
+
+    async def _write_chunk(self, chunk: Any) -> None:
+        data = self._encode(chunk)
+        if not data:
+            return
+        await self.write(data)
+        self.streamed_content_length += len(data)
+
+    async def stream(self, request: web.BaseRequest) -> None:
+        await self.prepare(request)
+
+        iterator = self._iterator
+        try:
+            if not hasattr(iterator, "__aiter__"):
+                for chunk in iterator:
+                    await self._write_chunk(chunk)
+            elif not self._ping_interval:
+                async for chunk in cast(AsyncIterable[Any], iterator):
+                    await self._write_chunk(chunk)
+            else:
+                async_iterator = cast(AsyncIterable[Any], iterator).__aiter__()
+                next_task: Optional[asyncio.Future] = None
+                try:
+                    while True:
+                        next_task = asyncio.ensure_future(async_iterator.__anext__())
+                        while not next_task.done():
+                            await asyncio.wait([next_task], timeout=self._ping_interval)
+                            if not next_task.done():
+                                await self.write(self._ping_chunk)
+                        try:
+                            chunk = next_task.result()
+                        except StopAsyncIteration:
+                            break
+                        await self._write_chunk(chunk)
+                finally:
+                    if next_task and not next_task.done():
+                        next_task.cancel()
+        finally:
+            close_func = getattr(iterator, "aclose", None) or getattr(iterator, "close", None)
+            if close_func:
+                try:
+                    result = close_func()
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception:
+                    pass
+
+        await self.write_eof()
+
+
 class HttpTransport(Invoker):
     server_port_mapping: Dict[Any, str] = {}
 
@@ -327,11 +551,38 @@ class HttpTransport(Invoker):
         *,
         ignore_logging: Union[bool, List[int], Tuple[int, ...]] = False,
         pre_handler_func: Optional[Callable] = None,
+        max_concurrent_requests: Optional[int] = None,
+        max_queued_requests: Optional[int] = None,
+        request_queue_timeout: Optional[float] = None,
+        executor: Optional[str] = None,
+        deadline: Optional[float] = None,
     ) -> Any:
         pattern = r"^{}$".format(re.sub(r"\$$", "", re.sub(r"^\^?(.*)$", r"\1", url)))
         compiled_pattern = re.compile(pattern)
 
+        if deadline is not None and deadline <= 0:
+            raise ValueError("Bad value for deadline: {}".format(deadline))
+
+        # The queue of a route is part of its own concurrency limiter, which only exists when the route has a limit.
+        if max_concurrent_requests is None and (max_queued_requests is not None or request_queue_timeout is not None):
+            raise ValueError(
+                "Bad value for max_concurrent_requests: max_queued_requests and request_queue_timeout require a "
+                "per-route max_concurrent_requests"
+            )
+
         http_options: Options.HTTP = cls.options(context).http
+        handler_func = executor_handler(obj, context, func, executor, prepare_arguments=snapshot_request_arguments)
+        concurrency_limiter = (
+            create_concurrency_limiter(
+                http_options,
+                max_concurrent_requests,
+                max_queued_requests=max_queued_requests,
+                request_queue_timeout=request_queue_timeout,
+                name=func.__name__,
+            )
+            if max_concurrent_requests is not None
+            else None
+        )
         default_content_type = http_options.content_type
         default_charset = http_options.charset
         if default_content_type is not None and ";" in default_content_type:
@@ -357,8 +608,14 @@ class HttpTransport(Invoker):
 
         middlewares = context.get("http_middleware", [])
 
-        async def handler(request: web.Request) -> Union[web.Response, web.FileResponse]:
-            logger = logging.getLogger("tomodachi.http.handler").bind(handler=func.__name__, type="tomodachi.http")
+        # the bound loggers are created once per handler and bound for each request
+        handler_logger = logging.getLogger("tomodachi.http.handler").bind(handler=func.__name__, type="tomodachi.http")
+        middleware_logger = logging.getLogger("tomodachi.http.middleware").bind(
+            middleware=Ellipsis, handler=func.__name__, type="tomodachi.http"
+        )
+
+        async def handler(request: web.Request) -> Union[web.Response, web.FileResponse, web.StreamResponse]:
+            logger = handler_logger
 
             kwargs = dict(original_kwargs)
             arg_matches: Dict[str, Any] = {}
@@ -399,34 +656,36 @@ class HttpTransport(Invoker):
                 if values.varargs and not values.defaults and len(a) > len(args_values) + 1:
                     args_values += a[len(args_values) + 1 :]
 
-                routine = func(*(obj, *args_values), **kw_values)
+                routine = handler_func(*(obj, *args_values), **kw_values)
                 return_value: Union[str, bytes, Dict, List, Tuple, web.Response, web.FileResponse, Response] = (
                     (await routine) if inspect.isawaitable(routine) else routine
                 )
                 return return_value
 
             return_value: Union[str, bytes, Dict, List, Tuple, web.Response, web.FileResponse, Response]
-            if middlewares:
-                logging.bind_logger(
-                    logging.getLogger("tomodachi.http.middleware").bind(
-                        middleware=Ellipsis, handler=func.__name__, type="tomodachi.http"
-                    )
-                )
-                return_value = await asyncio.create_task(
-                    execute_middlewares(func, routine_func, middlewares, *(obj, request), request=request)
-                )
-            else:
-                logging.bind_logger(logger)
-                get_contextvar("service.logger").set("tomodachi.http.handler")
+            try:
+                # the deadline is the lowest of the remaining budget passed by the caller and the deadline of the
+                # route – the handler is cancelled if the deadline is reached.
+                async with Deadline(min_timeout(deadline, parse_timeout_header(request.headers))):
+                    if middlewares:
+                        logging.bind_logger(middleware_logger)
+                        return_value = await asyncio.create_task(
+                            execute_middlewares(func, routine_func, middlewares, *(obj, request), request=request)
+                        )
+                    else:
+                        logging.bind_logger(logger)
+                        get_contextvar("service.logger").set("tomodachi.http.handler")
 
-                a = [arg_matches[k] if k in arg_matches else (request,)[i] for i, k in enumerate(args_list)]
-                args_values = [kwargs.pop(key) if key in kwargs else a[i] for i, key in enumerate(args_list)]
+                        a = [arg_matches[k] if k in arg_matches else (request,)[i] for i, k in enumerate(args_list)]
+                        args_values = [kwargs.pop(key) if key in kwargs else a[i] for i, key in enumerate(args_list)]
 
-                if values.varargs and not values.defaults and len(a) > len(args_values) + 1:
-                    args_values += a[len(args_values) + 1 :]
+                        if values.varargs and not values.defaults and len(a) > len(args_values) + 1:
+                            args_values += a[len(args_values) + 1 :]
 
-                routine = func(obj, *args_values, **kwargs)
-                return_value = (await routine) if inspect.isawaitable(routine) else routine
+                        routine = handler_func(obj, *args_values, **kwargs)
+                        return_value = (await routine) if inspect.isawaitable(routine) else routine
+            except DeadlineExceeded:
+                raise web.HTTPGatewayTimeout()
 
             response = resolve_response_sync(
                 return_value,
@@ -438,7 +697,7 @@ class HttpTransport(Invoker):
             return response
 
         context["_http_routes"] = context.get("_http_routes", [])
-        route_context = {"ignore_logging": ignore_logging}
+        route_context = {"ignore_logging": ignore_logging, "concurrency_limiter": concurrency_limiter}
         if isinstance(method, list) or isinstance(method, tuple):
             for m in method:
                 context["_http_routes"].append((m.upper(), pattern, handler, route_context))
@@ -549,11 +808,11 @@ class HttpTransport(Invoker):
 
         middlewares = context.get("http_middleware", [])
 
-        async def handler(request: web.Request) -> Union[web.Response, web.FileResponse]:
-            logger = logging.getLogger("tomodachi.http.handler").bind(
-                handler=func.__name__, type="tomodachi.http_error", status_code=status_code
-            )
+        logger = logging.getLogger("tomodachi.http.handler").bind(
+            handler=func.__name__, type="tomodachi.http_error", status_code=status_code
+        )
 
+        async def handler(request: web.Request) -> Union[web.Response, web.FileResponse, web.StreamResponse]:
             kwargs = dict(original_kwargs)
             arg_matches: Dict[str, Any] = {}
 
@@ -681,8 +940,8 @@ class HttpTransport(Invoker):
 
                 return
 
-            context["_http_open_websockets"] = context.get("_http_open_websockets", [])
-            context["_http_open_websockets"].append(websocket)
+            websocket_hub = get_websocket_hub(context)
+            websocket_hub.add(websocket)
 
             if access_log:
                 response_logger.info(
@@ -737,10 +996,7 @@ class HttpTransport(Invoker):
                 except Exception:
                     pass
 
-                try:
-                    context["_http_open_websockets"].remove(websocket)
-                except Exception:
-                    pass
+                websocket_hub.remove(websocket)
 
                 if access_log:
                     response_logger.info(
@@ -803,10 +1059,7 @@ class HttpTransport(Invoker):
                 except Exception:
                     pass
 
-                try:
-                    context["_http_open_websockets"].remove(websocket)
-                except Exception:
-                    pass
+                websocket_hub.remove(websocket)
 
         return await cls.request_handler(obj, context, _func, "GET", url, pre_handler_func=_pre_handler_func)
 
@@ -848,6 +1101,19 @@ class HttpTransport(Invoker):
             logger.info("logging requests to file", file_path=access_log)
             logging.getLogger("tomodachi.http.response").addHandler(logger_handler)
 
+        access_logger = (
+            AccessLog(
+                logging.getLogger("tomodachi.http.response"),
+                sample_rate=http_options.access_log_sample_rate,
+                client_error_sample_rate=http_options.access_log_client_error_sample_rate,
+                slow_request_threshold=http_options.access_log_slow_request_threshold,
+                batch_interval=http_options.access_log_batch_interval,
+                summary_interval=http_options.access_log_summary_interval,
+            )
+            if access_log
+            else None
+        )
+
         async def _start_server() -> None:
             logger = logging.getLogger("tomodachi.http")
             logging.bind_logger(logger)
@@ -856,11 +1122,59 @@ class HttpTransport(Invoker):
             loop = asyncio.get_event_loop()
 
             logging.getLogger("aiohttp.access").setLevel(logging.WARNING)
+            if access_logger is not None:
+                access_logger.start()
+
+            def set_response_headers(
+                request: web.Request, response: web.StreamResponse, request_version: Tuple[int, int]
+            ) -> None:
+                response.headers[hdrs.SERVER] = server_header
+
+                if request_version in ((1, 0), (1, 1)) and not request._cache.get("is_websocket"):
+                    use_keepalive = False
+                    if context["_http_tcp_keepalive"] and request.keep_alive and request.protocol:
+                        use_keepalive = True
+                        if any(
+                            [
+                                # keep-alive timeout not set or is non-positive
+                                (not context["_http_keepalive_timeout"] or context["_http_keepalive_timeout"] <= 0),
+                                # keep-alive request count has passed configured max for this connection
+                                (
+                                    context["_http_max_keepalive_requests"]
+                                    and request.protocol._request_count >= context["_http_max_keepalive_requests"]
+                                ),
+                                # keep-alive time has passed configured max for this connection
+                                (
+                                    context["_http_max_keepalive_time"]
+                                    and time.time()
+                                    > getattr(request.protocol, "_connection_start_time", 0)
+                                    + context["_http_max_keepalive_time"]
+                                ),
+                            ]
+                        ):
+                            use_keepalive = False
+
+                    if use_keepalive:
+                        response.headers[hdrs.CONNECTION] = "keep-alive"
+                        response.headers[hdrs.KEEP_ALIVE] = "timeout={}{}".format(
+                            request.protocol._keepalive_timeout,
+                            (
+                                ", max={}".format(context["_http_max_keepalive_requests"])
+                                if context["_http_max_keepalive_requests"]
+                                else ""
+                            ),
+                        )
+                    else:
+                        response.headers[hdrs.CONNECTION] = "close"
+                        response.force_close()
+
+                if not context["_http_tcp_keepalive"] and not request._cache.get("is_websocket"):
+                    response.force_close()
 
             async def request_handler_func(
                 request: web.Request, handler: Callable, request_start_time: int = 0
-            ) -> Union[web.Response, web.FileResponse]:
-                response: Optional[Union[web.Response, web.FileResponse]] = None
+            ) -> Union[web.Response, web.FileResponse, web.StreamResponse]:
+                response: Optional[Union[web.Response, web.FileResponse, web.StreamResponse]] = None
                 request_ip = RequestHandler.get_request_ip(request, context)
 
                 # try to read body if it exists and can be read
@@ -1049,6 +1363,27 @@ class HttpTransport(Invoker):
                         else (1, 0)
                     )
 
+                    streamed_content_length: Optional[int] = None
+                    stream_interrupted = False
+                    if isinstance(response, IteratorStreamResponse) and request.transport:
+                        # streamed responses are written to the client here, so that both the access log and
+                        # the middlewares measuring request timing covers the entire stream.
+                        set_response_headers(request, response, request_version)
+                        try:
+                            await response.stream(request)
+                        except ConnectionResetError:
+                            # client disconnected before the stream was completed
+                            stream_interrupted = True
+                        except Exception as e:
+                            limit_exception_traceback(e, ("tomodachi.transport.http",))
+                            logging.getLogger("exception").exception("uncaught exception: {}".format(str(e)))
+                            caught_exceptions.append(e)
+
+                            # the response is incomplete - the connection is closed without a terminating chunk
+                            response._eof_sent = True
+                            response.force_close()
+                        streamed_content_length = response.streamed_content_length
+
                     if access_log:
                         total_request_time = ((time.perf_counter_ns() - request_start_time) / 1000000.0) / 1000.0
                         handler_elapsed_time = ((handler_stop_time - handler_start_time) / 1000000.0) / 1000.0
@@ -1059,52 +1394,57 @@ class HttpTransport(Invoker):
 
                         if not request._cache.get("is_websocket"):
                             status_code = response.status if response is not None else 500
+                            if stream_interrupted:
+                                replaced_status_code = replaced_status_code or status_code
+                                status_code = 499
                             ignore_logging = getattr(handler, "ignore_logging", False)
                             if ignore_logging is True:
                                 pass
                             elif isinstance(ignore_logging, (list, tuple)) and status_code in ignore_logging:
                                 pass
-                            else:
-                                response_logger.info(
-                                    status_code=status_code,
-                                    replaced_status_code=replaced_status_code or Ellipsis,
-                                    remote_ip=request_ip,
-                                    auth_user=getattr(request._cache.get("auth") or {}, "login", None) or Ellipsis,
-                                    request_method=request.method,
-                                    request_path=request.path,
-                                    request_query_string=request.query_string or Ellipsis,
-                                    http_version=version_string,
-                                    response_content_length=(
-                                        response.content_length
-                                        if response is not None and response.content_length is not None
-                                        else Ellipsis
-                                    ),
-                                    replaced_response_content_length=replaced_response_content_length or Ellipsis,
-                                    request_content_length=(
-                                        request.content_length
-                                        if request.content_length
-                                        else (
-                                            len(request._read_bytes)
-                                            if request._read_bytes is not None and len(request._read_bytes)
-                                            else Ellipsis
-                                        )
-                                    ),
-                                    request_content_read_length=(
-                                        len(request._read_bytes)
-                                        if request._read_bytes is not None and len(request._read_bytes)
-                                        else (
-                                            (request.content and getattr(request.content, "total_bytes", None))
-                                            or Ellipsis
-                                        )
-                                    ),
-                                    user_agent=request.headers.get("User-Agent", ""),
-                                    handler_elapsed_time=(
-                                        "{0:.5f}s".format(round(handler_elapsed_time, 5))
-                                        if handler_start_time and handler_stop_time
-                                        else Ellipsis
-                                    ),
-                                    request_time="{0:.5f}s".format(round(total_request_time, 5)),
-                                )
+                            elif access_logger is not None:
+                                log = access_logger.sample(status_code, total_request_time)
+                                if log or access_logger.summary:
+                                    access_logger.emit(
+                                        AccessLogRecord(
+                                            status_code,
+                                            replaced_status_code,
+                                            request_ip,
+                                            getattr(request._cache.get("auth") or {}, "login", None),
+                                            request.method,
+                                            request.path,
+                                            request.query_string,
+                                            version_string,
+                                            (
+                                                streamed_content_length
+                                                if streamed_content_length is not None
+                                                else response.content_length if response is not None else None
+                                            ),
+                                            replaced_response_content_length,
+                                            (
+                                                request.content_length
+                                                or (
+                                                    len(request._read_bytes)
+                                                    if request._read_bytes is not None
+                                                    else None
+                                                )
+                                            ),
+                                            (
+                                                len(request._read_bytes)
+                                                if request._read_bytes is not None and len(request._read_bytes)
+                                                else (
+                                                    getattr(request.content, "total_bytes", None)
+                                                    if request.content
+                                                    else None
+                                                )
+                                            ),
+                                            request.headers.get("User-Agent", ""),
+                                            handler_elapsed_time if handler_start_time and handler_stop_time else None,
+                                            total_request_time,
+                                            getattr(request.match_info.route.resource, "_simplified_pattern", None),
+                                        ),
+                                        log,
+                                    )
                         else:
                             response_logger.info(
                                 websocket_state="closed",
@@ -1118,52 +1458,7 @@ class HttpTransport(Invoker):
                             )
 
                     if response is not None:
-                        response.headers[hdrs.SERVER] = server_header
-
-                        if request_version in ((1, 0), (1, 1)) and not request._cache.get("is_websocket"):
-                            use_keepalive = False
-                            if context["_http_tcp_keepalive"] and request.keep_alive and request.protocol:
-                                use_keepalive = True
-                                if any(
-                                    [
-                                        # keep-alive timeout not set or is non-positive
-                                        (
-                                            not context["_http_keepalive_timeout"]
-                                            or context["_http_keepalive_timeout"] <= 0
-                                        ),
-                                        # keep-alive request count has passed configured max for this connection
-                                        (
-                                            context["_http_max_keepalive_requests"]
-                                            and request.protocol._request_count
-                                            >= context["_http_max_keepalive_requests"]
-                                        ),
-                                        # keep-alive time has passed configured max for this connection
-                                        (
-                                            context["_http_max_keepalive_time"]
-                                            and time.time()
-                                            > getattr(request.protocol, "_connection_start_time", 0)
-                                            + context["_http_max_keepalive_time"]
-                                        ),
-                                    ]
-                                ):
-                                    use_keepalive = False
-
-                            if use_keepalive:
-                                response.headers[hdrs.CONNECTION] = "keep-alive"
-                                response.headers[hdrs.KEEP_ALIVE] = "timeout={}{}".format(
-                                    request.protocol._keepalive_timeout,
-                                    (
-                                        ", max={}".format(context["_http_max_keepalive_requests"])
-                                        if context["_http_max_keepalive_requests"]
-                                        else ""
-                                    ),
-                                )
-                            else:
-                                response.headers[hdrs.CONNECTION] = "close"
-                                response.force_close()
-
-                        if not context["_http_tcp_keepalive"] and not request._cache.get("is_websocket"):
-                            response.force_close()
+                        set_response_headers(request, response, request_version)
 
                     if response is None:
                         try:
@@ -1185,21 +1480,113 @@ class HttpTransport(Invoker):
 
                     return response
 
+            def overload_response(request: web.Request, handler: Callable, request_start_time: int = 0) -> web.Response:
+                increase_execution_context_value("http_rejected_tasks")
+
+                response = web.Response(
+                    status=503,
+                    headers={hdrs.SERVER: server_header, hdrs.RETRY_AFTER: str(overload_retry_after)},
+                )
+                if not context["_http_tcp_keepalive"]:
+                    response.headers[hdrs.CONNECTION] = "close"
+                    response.force_close()
+
+                if access_log:
+                    ignore_logging = getattr(handler, "ignore_logging", False)
+                    if ignore_logging is True:
+                        pass
+                    elif isinstance(ignore_logging, (list, tuple)) and 503 in ignore_logging:
+                        pass
+                    else:
+                        total_request_time = ((time.perf_counter_ns() - request_start_time) / 1000000.0) / 1000.0
+                        response_logger.info(
+                            "request rejected - concurrency limit exceeded",
+                            status_code=503,
+                            remote_ip=get_forwarded_remote_ip(request),
+                            auth_user=getattr(request._cache.get("auth") or {}, "login", None) or Ellipsis,
+                            request_method=request.method,
+                            request_path=request.path,
+                            request_query_string=request.query_string or Ellipsis,
+                            user_agent=request.headers.get("User-Agent", ""),
+                            request_time="{0:.5f}s".format(round(total_request_time, 5)),
+                        )
+
+                return response
+
+            async def acquire_concurrency_limiters(
+                request: web.Request, handler: Callable
+            ) -> Optional[List[ConcurrencyLimiter]]:
+                # the route limiter is acquired before the global limiter, so that requests waiting for a slot on a
+                # busy route won't hold on to slots of the global limit.
+                acquired_limiters: List[ConcurrencyLimiter] = []
+                for limiter in (getattr(handler, "concurrency_limiter", None), global_concurrency_limiter):
+                    if not limiter:
+                        continue
+                    if limiter.try_acquire():
+                        acquired_limiters.append(limiter)
+                        continue
+                    increase_execution_context_value("http_queued_tasks")
+                    try:
+                        await limiter.acquire()
+                        acquired_limiters.append(limiter)
+                    except ConcurrencyLimitExceeded:
+                        for acquired_limiter in acquired_limiters:
+                            acquired_limiter.release()
+                        return None
+                    except BaseException:
+                        for acquired_limiter in acquired_limiters:
+                            acquired_limiter.release()
+                        raise
+                    finally:
+                        decrease_execution_context_value("http_queued_tasks")
+
+                return acquired_limiters
+
+            def release_concurrency_limiters(
+                limiters: List[ConcurrencyLimiter], start_time: float, task: asyncio.Future
+            ) -> None:
+                latency = time.perf_counter() - start_time if not task.cancelled() else None
+                for limiter in limiters:
+                    limiter.release(latency)
+                if global_concurrency_limiter:
+                    set_execution_context({"http_concurrency_limit": global_concurrency_limiter.limit})
+
             @web.middleware
-            async def middleware(request: web.Request, handler: Callable) -> Union[web.Response, web.FileResponse]:
+            async def middleware(
+                request: web.Request, handler: Callable
+            ) -> Union[web.Response, web.FileResponse, web.StreamResponse]:
                 request_start_time = time.perf_counter_ns() if access_log else 0
 
+                acquired_limiters: Optional[List[ConcurrencyLimiter]] = None
+                if (global_concurrency_limiter or getattr(handler, "concurrency_limiter", None)) and (
+                    request.headers.get(hdrs.UPGRADE, "").lower() != "websocket"
+                ):
+                    acquired_limiters = await acquire_concurrency_limiters(request, handler)
+                    if acquired_limiters is None:
+                        return overload_response(request, handler, request_start_time=request_start_time)
+
                 increase_execution_context_value("http_current_tasks")
                 increase_execution_context_value("http_total_tasks")
 
                 task = asyncio.ensure_future(
                     request_handler_func(request, handler, request_start_time=request_start_time)
                 )
+                if acquired_limiters:
+                    task.add_done_callback(
+                        functools.partial(release_concurrency_limiters, acquired_limiters, time.perf_counter())
+                    )
                 context["_http_active_requests"] = context.get("_http_active_requests", set())
                 context["_http_active_requests"].add(task)
                 try:
                     await asyncio.shield(task)
                 except asyncio.CancelledError:
+                    if (
+                        http_options.cancel_on_disconnect
+                        and not task.done()
+                        and (request.transport is None or request.transport.is_closing())
+                    ):
+                        # the client has disconnected – handlers are otherwise run to completion.
+                        task.cancel()
                     try:
                         await task
                         decrease_execution_context_value("http_current_tasks")
@@ -1208,7 +1595,7 @@ class HttpTransport(Invoker):
                         except KeyError:
                             pass
                         return task.result()
-                    except Exception:
+                    except (Exception, asyncio.CancelledError):
                         decrease_execution_context_value("http_current_tasks")
                         try:
                             context["_http_active_requests"].remove(task)
@@ -1305,6 +1692,7 @@ class HttpTransport(Invoker):
                     raise ValueError("Bad http route pattern '{}': {}".format(pattern, exc)) from None
                 ignore_logging = route_context.get("ignore_logging", False)
                 setattr(handler, "ignore_logging", ignore_logging)
+                setattr(handler, "concurrency_limiter", route_context.get("concurrency_limiter"))
                 resource = DynamicResource(compiled_pattern)
                 app.router.register_resource(resource)
                 if method.upper() == "GET":
@@ -1318,6 +1706,17 @@ class HttpTransport(Invoker):
             if port is True:
                 raise ValueError("Bad value for http option port: {}".format(str(port)))
 
+            unix_socket = http_options.unix_socket or None
+            unix_socket_permissions = http_options.unix_socket_permissions
+            listen_fd = http_options.listen_fd if http_options.listen_fd not in (None, "") else None
+            if unix_socket and listen_fd is not None:
+                raise ValueError("The http options unix_socket and listen_fd cannot be used at the same time")
+            if unix_socket and (get_contextvar("run.workers").get() or 1) > 1:
+                raise ValueError(
+                    "The http option unix_socket cannot be used with multiple worker processes - use an inherited "
+                    "socket (http option listen_fd) instead"
+                )
+
             # Configuration settings for keep-alive could use some refactoring
 
             keepalive_timeout_option = http_options.keepalive_timeout or http_options.keepalive_expiry
@@ -1386,6 +1785,21 @@ class HttpTransport(Invoker):
                     "HTTP keep-alive must be enabled to use http option max_keepalive_time - a http.keepalive_timeout option value is required"
                 ) from None
 
+            global_concurrency_limiter = create_concurrency_limiter(
+                http_options,
+                http_options.max_concurrent_requests,
+                name="http",
+            )
+            context["_http_concurrency_limiter"] = global_concurrency_limiter
+
+            overload_retry_after = http_options.overload_retry_after
+            try:
+                overload_retry_after = max(0, int(overload_retry_after or 0))
+            except Exception:
+                raise ValueError(
+                    "Bad value for http option overload_retry_after: {}".format(str(overload_retry_after))
+                ) from None
+
             reuse_port = True if http_options.reuse_port else False
             if reuse_port and platform.system() != "Linux":
                 logger.warning(
@@ -1394,6 +1808,17 @@ class HttpTransport(Invoker):
                 )
                 reuse_port = False
 
+            if (
+                not reuse_port
+                and not unix_socket
+                and listen_fd is None
+                and (get_contextvar("run.workers").get() or 1) > 1
+            ):
+                logger.warning(
+                    "The http option reuse_port (socket.SO_REUSEPORT) is disabled - the http servers of the worker "
+                    "processes will be unable to bind to the same port"
+                )
+
             context["_http_tcp_keepalive"] = tcp_keepalive
             context["_http_keepalive_timeout"] = keepalive_timeout
             context["_http_max_keepalive_requests"] = max_keepalive_requests
@@ -1404,10 +1829,25 @@ class HttpTransport(Invoker):
                     "http_enabled": True,
                     "http_current_tasks": 0,
                     "http_total_tasks": 0,
+                    "http_queued_tasks": 0,
+                    "http_rejected_tasks": 0,
+                    "http_concurrency_limit": (
+                        global_concurrency_limiter.limit if global_concurrency_limiter else None
+                    ),
                     "aiohttp_version": aiohttp_version,
                 }
             )
 
+            unix_socket_inode: Optional[int] = None
+            listen_socket_key: Optional[str] = (
+                "unix:{}".format(unix_socket)
+                if unix_socket
+                else (
+                    "fd:{}".format(listen_fd)
+                    if listen_fd is not None
+                    else ("tcp:{}:{}".format(host, port) if port else None)
+                )
+            )
             try:
                 app.freeze()
                 web_server = Server(
@@ -1419,9 +1859,12 @@ class HttpTransport(Invoker):
                     real_ip_from=real_ip_from,
                     keepalive_timeout=keepalive_timeout,
                     tcp_keepalive=tcp_keepalive,
+                    handler_cancellation=http_options.cancel_on_disconnect,
                 )
 
-                if reuse_port:
+                if unix_socket or listen_fd is not None:
+                    pass
+                elif reuse_port:
                     if not port:
                         logger.warning(
                             "The http option reuse_port (socket option SO_REUSEPORT) is enabled by default on Linux - "
@@ -1433,22 +1876,48 @@ class HttpTransport(Invoker):
                             "different service classes should not use the same port ({})".format(port)
                         )
 
-                if port:
-                    HttpTransport.server_port_mapping[web_server] = str(port)
+                inherited_socket = get_inherited_socket(listen_socket_key) if listen_socket_key else None
+                if inherited_socket is not None:
+                    # listening socket handed off from the previous process during a hot restart
+                    if inherited_socket.family == socket.AF_UNIX:
+                        if unix_socket:
+                            unix_socket_inode = os.stat(unix_socket).st_ino
+                        server = await loop.create_unix_server(web_server, sock=inherited_socket)
+                    else:
+                        server = await loop.create_server(web_server, sock=inherited_socket)
+                elif unix_socket:
+                    sock = create_unix_socket(unix_socket, unix_socket_permissions)
+                    unix_socket_inode = os.stat(unix_socket).st_ino
+                    server = await loop.create_unix_server(web_server, sock=sock)
+                elif listen_fd is not None:
+                    server = await loop.create_server(web_server, sock=create_inherited_socket(listen_fd))
+                else:
+                    if port:
+                        HttpTransport.server_port_mapping[web_server] = str(port)
 
-                server_task = loop.create_server(web_server, host, port, reuse_port=reuse_port)
-                server = await server_task
+                    server_task = loop.create_server(web_server, host, port, reuse_port=reuse_port)
+                    server = await server_task
             except OSError as e:
                 context["_http_accept_new_requests"] = False
                 error_message = re.sub(".*: ", "", e.strerror) if e.strerror else str(e)
-                logger.warning(
-                    "unable to bind service [http] to http://{}:{}/".format(
-                        "localhost" if host in ("0.0.0.0", "127.0.0.1") else host, port
-                    ),
-                    host=host,
-                    port=port,
-                    error_message=error_message,
-                )
+                if unix_socket or listen_fd is not None:
+                    logger.warning(
+                        "unable to bind service [http] to {}".format(
+                            "unix:{}".format(unix_socket) if unix_socket else "fd:{}".format(listen_fd)
+                        ),
+                        unix_socket=unix_socket or Ellipsis,
+                        listen_fd=listen_fd if listen_fd is not None else Ellipsis,
+                        error_message=error_message,
+                    )
+                else:
+                    logger.warning(
+                        "unable to bind service [http] to http://{}:{}/".format(
+                            "localhost" if host in ("0.0.0.0", "127.0.0.1") else host, port
+                        ),
+                        host=host,
+                        port=port,
+                        error_message=error_message,
+                    )
 
                 try:
                     raise HttpException(str(e)).with_traceback(e.__traceback__) from None
@@ -1456,12 +1925,20 @@ class HttpTransport(Invoker):
                     exc.__traceback__ = e.__traceback__
                     raise
 
+            listen_unix_socket: Optional[str] = None
             if server.sockets:
                 socket_address = server.sockets[0].getsockname()
-                if socket_address:
+                if server.sockets[0].family == socket.AF_UNIX:
+                    listen_unix_socket = str(socket_address)
+                elif socket_address:
+                    host = socket_address[0] if listen_fd is not None else host
                     port = int(socket_address[1])
                     HttpTransport.server_port_mapping[web_server] = str(port)
-            context["_http_port"] = port
+            context["_http_port"] = port if listen_unix_socket is None else None
+            context["_http_unix_socket"] = listen_unix_socket
+
+            if listen_socket_key and server.sockets:
+                register_listen_socket(listen_socket_key, server.sockets[0])
 
             stop_method = getattr(obj, "_stop_service", None)
 
@@ -1472,6 +1949,10 @@ class HttpTransport(Invoker):
                 await server.wait_closed()
 
                 HttpTransport.server_port_mapping.pop(web_server, None)
+                if listen_socket_key:
+                    unregister_listen_socket(listen_socket_key)
+                if unix_socket and not (listen_socket_key and is_handed_off(listen_socket_key)):
+                    remove_unix_socket(unix_socket, unix_socket_inode)
 
                 shutdown_sleep = 0
                 if len(web_server.connections):
@@ -1481,7 +1962,7 @@ class HttpTransport(Invoker):
                 if not tcp_keepalive:
                     context["_http_accept_new_requests"] = False
 
-                open_websockets = context.get("_http_open_websockets", [])[:]
+                open_websockets = get_websocket_hub(context).connections
                 if open_websockets:
                     logger.info("closing websocket connections", connection_count=len(open_websockets))
                     tasks = []
@@ -1497,7 +1978,8 @@ class HttpTransport(Invoker):
                         await asyncio.sleep(1)
                     except (Exception, asyncio.TimeoutError, asyncio.CancelledError):
                         pass
-                    context["_http_open_websockets"] = []
+                    for websocket in open_websockets:
+                        get_websocket_hub(context).remove(websocket)
 
                 termination_grace_period_seconds = 30
                 try:
@@ -1573,6 +2055,8 @@ class HttpTransport(Invoker):
                 else:
                     await app.shutdown()
 
+                if access_logger is not None:
+                    await access_logger.stop()
                 if logger_handler:
                     response_logger = logging.getLogger("tomodachi.http.response")
                     response_logger.removeHandler(logger_handler)
@@ -1587,20 +2071,144 @@ class HttpTransport(Invoker):
                     if getattr(registry, "add_http_endpoint", None):
                         await registry.add_http_endpoint(obj, host, port, method, pattern)
 
-            listen_url = "http://{}:{}/".format("localhost" if host in ("0.0.0.0", "127.0.0.1") else host, port)
-            logger.info("accepting http requests", listen_url=listen_url, listen_host=host, listen_port=port)
+            if listen_unix_socket is not None:
+                listen_url = "unix:{}".format(listen_unix_socket)
+                listen_kwargs: Dict[str, Any] = {"listen_url": listen_url, "listen_unix_socket": listen_unix_socket}
+            else:
+                listen_url = "http://{}:{}/".format("localhost" if host in ("0.0.0.0", "127.0.0.1") else host, port)
+                listen_kwargs = {"listen_url": listen_url, "listen_host": host, "listen_port": port}
+            logger.info("accepting http requests", **listen_kwargs)
 
             if logger_handler:
                 response_logger = logging.getLogger("tomodachi.http.response")
                 response_logger._logger.propagate = False
-                response_logger.info(
-                    "accepting http requests", listen_url=listen_url, listen_host=host, listen_port=port
-                )
+                response_logger.info("accepting http requests", **listen_kwargs)
                 response_logger._logger.propagate = True
 
         return _start_server
 
 
+def create_concurrency_limiter(
+    http_options: Options.HTTP,
+    max_concurrent_requests: Optional[int],
+    *,
+    max_queued_requests: Optional[int] = None,
+    request_queue_timeout: Optional[float] = None,
+    adaptive: Optional[bool] = None,
+    name: Optional[str] = None,
+) -> Optional[ConcurrencyLimiter]:
+    adaptive = http_options.adaptive_concurrency if adaptive is None else adaptive
+    if not max_concurrent_requests and not adaptive:
+        return None
+
+    if max_queued_requests is None:
+        max_queued_requests = http_options.max_queued_requests
+    if request_queue_timeout is None:
+        request_queue_timeout = http_options.request_queue_timeout
+
+    try:
+        limit = int(max_concurrent_requests) if max_concurrent_requests else 0
+        if limit < 0 or max_concurrent_requests is True:
+            raise ValueError
+    except Exception:
+        raise ValueError(
+            "Bad value for http option max_concurrent_requests: {}".format(str(max_concurrent_requests))
+        ) from None
+    try:
+        queue_size = int(max_queued_requests) if max_queued_requests is not None else None
+        if (queue_size is not None and queue_size < 0) or max_queued_requests is True:
+            raise ValueError
+    except Exception:
+        raise ValueError("Bad value for http option max_queued_requests: {}".format(str(max_queued_requests))) from None
+    try:
+        queue_timeout = float(request_queue_timeout) if request_queue_timeout else None
+        if request_queue_timeout is True:
+            raise ValueError
+    except Exception:
+        raise ValueError(
+            "Bad value for http option request_queue_timeout: {}".format(str(request_queue_timeout))
+        ) from None
+
+    if adaptive:
+        return AdaptiveConcurrencyLimiter(
+            limit or 100,
+            max_limit=limit or 1000,
+            max_queue_size=queue_size,
+            queue_timeout=queue_timeout,
+            name=name,
+        )
+
+    return ConcurrencyLimiter(limit, max_queue_size=queue_size, queue_timeout=queue_timeout, name=name)
+
+
+class RequestSnapshot(object):
+    # A picklable copy of the request attributes that are available without reading the request body, which is
+    # passed instead of the request object to handlers that are run in a process pool.
+
+    __slots__ = (
+        "method",
+        "path",
+        "path_qs",
+        "query_string",
+        "query",
+        "headers",
+        "cookies",
+        "match_info",
+        "remote",
+        "host",
+        "scheme",
+        "content_type",
+        "charset",
+        "content_length",
+    )
+
+    def __init__(self, request: web.BaseRequest) -> None:
+        self.method = request.method
+        self.path = request.path
+        self.path_qs = request.path_qs
+        self.query_string = request.query_string
+        self.query = MultiDict(request.query)
+        self.headers = CIMultiDict(request.headers)
+        self.cookies = dict(request.cookies)
+        self.match_info = dict(getattr(request, "match_info", None) or {})
+        self.remote = request.remote
+        self.host = request.host
+        self.scheme = request.scheme
+        self.content_type = request.content_type
+        self.charset = request.charset
+        self.content_length = request.content_length
+
+
+def snapshot_request_arguments(args: Tuple, kwargs: Dict) -> Tuple[Tuple, Dict]:
+    return (
+        tuple(RequestSnapshot(v) if isinstance(v, web.BaseRequest) else v for v in args),
+        {k: (RequestSnapshot(v) if isinstance(v, web.BaseRequest) else v) for k, v in kwargs.items()},
+    )
+
+
+def get_websocket_hub(service: Any) -> WebSocketHub:
+    # Returns the websocket hub of the service, which keeps track of the open websocket connections of the
+    # service and is used to broadcast messages to all connections or to the connections in a room.
+    context: Optional[Dict] = service if isinstance(service, dict) else getattr(service, "context", None)
+    if context is None:
+        raise ValueError("Unable to get websocket hub: service context missing")
+
+    websocket_hub: Optional[WebSocketHub] = context.get("_http_websocket_hub")
+    if websocket_hub is None:
+        http_options: Options.HTTP = HttpTransport.options(context).http
+        websocket_hub = WebSocketHub(
+            max_queue_size=int(http_options.websocket_max_queue_size or 100),
+            overflow_policy=http_options.websocket_overflow_policy or "drop_oldest",
+        )
+        context["_http_websocket_hub"] = websocket_hub
+
+    return websocket_hub
+
+
+def is_stream_body(value: Any) -> bool:
+    return bool(hasattr(value, "__aiter__") or inspect.isgenerator(value))
+
+
 async def resolve_response(
     value: Union[str, bytes, Dict, List, Tuple, web.Response, web.FileResponse, Response],
     request: Optional[web.Request] = None,
@@ -1608,7 +2216,7 @@ async def resolve_response(
     status_code: Optional[Union[str, int]] = None,
     default_content_type: Optional[str] = None,
     default_charset: Optional[str] = None,
-) -> Union[web.Response, web.FileResponse]:
+) -> Union[web.Response, web.FileResponse, web.StreamResponse]:
     return resolve_response_sync(
         value=value,
         request=request,
@@ -1626,7 +2234,7 @@ def resolve_response_sync(
     status_code: Optional[Union[str, int]] = None,
     default_content_type: Optional[str] = None,
     default_charset: Optional[str] = None,
-) -> Union[web.Response, web.FileResponse]:
+) -> Union[web.Response, web.FileResponse, web.StreamResponse]:
     if not context:
         context = {}
     if isinstance(value, Response):
@@ -1659,13 +2267,22 @@ def resolve_response_sync(
         if len(value) > 2:
             returned_headers = value[2]
             headers = CIMultiDict(returned_headers)
-    elif isinstance(value, web.Response):
+    elif isinstance(value, web.StreamResponse):
         return value
     else:
         if value is None:
             value = ""  # type: ignore
         body = value
 
+    if is_stream_body(body):
+        return StreamResponse(
+            body=cast(AsyncIterable[Any], body),
+            status=status,
+            headers=headers,
+            content_type=default_content_type,
+            charset=default_charset,
+        ).get_aiohttp_response(context)
+
     return Response(
         body=body, status=status, headers=headers, content_type=default_content_type, charset=default_charset
     ).get_aiohttp_response(context)
@@ -1732,8 +2349,26 @@ def http(
     *,
     ignore_logging: Union[bool, List[int], Tuple[int, ...]] = False,
     pre_handler_func: Optional[Callable] = None,
+    max_concurrent_requests: Optional[int] = None,
+    max_queued_requests: Optional[int] = None,
+    request_queue_timeout: Optional[float] = None,
+    executor: Optional[str] = None,
+    deadline: Optional[float] = None,
 ) -> Callable:
-    return cast(Callable, __http(method, url, ignore_logging=ignore_logging, pre_handler_func=pre_handler_func))
+    return cast(
+        Callable,
+        __http(
+            method,
+            url,
+            ignore_logging=ignore_logging,
+            pre_handler_func=pre_handler_func,
+            max_concurrent_requests=max_concurrent_requests,
+            max_queued_requests=max_queued_requests,
+            request_queue_timeout=request_queue_timeout,
+            executor=executor,
+            deadline=deadline,
+        ),
+    )
 
 
 def http_error(status_code: int) -> Callable:
@@ -1,28 +1,602 @@
 import asyncio
+import collections
+import contextvars
 import datetime
 import functools
+import hashlib
+import heapq
 import inspect
-import random
+import itertools
+import os
+import socket
 import time
-from typing import Any, Callable, Dict, List, Optional, Tuple, Union, cast
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple, Union, cast
 
 import pytz
 import tzlocal
 
 from tomodachi import get_contextvar, logging
 from tomodachi._exception import limit_exception_traceback
-from tomodachi.helpers.crontab import get_next_datetime
+from tomodachi.helpers.crontab import CompiledCrontab, localize_datetime
 from tomodachi.helpers.execution_context import (
     decrease_execution_context_value,
     increase_execution_context_value,
     set_execution_context,
 )
+from tomodachi.helpers.executor import executor_handler
+from tomodachi.helpers.lease import Lease, LeaseBackend, SQLiteLeaseBackend
 from tomodachi.helpers.middleware import execute_middlewares
 from tomodachi.invoker import Invoker
 
+# Scheduled functions without any upcoming invocation are scheduled a hundred years ahead.
+SCHEDULE_NEVER = 60 * 60 * 24 * 365 * 100
+
+INTERVAL_ALIASES: Dict[Tuple[str, ...], Union[str, int]] = {
+    ("every second", "1s", "1 s", "1second", "1 second", "second", "secondly", "once per second"): 1,
+    (
+        "every minute",
+        "1m",
+        "1 m",
+        "1minute",
+        "1 minute",
+        "minute",
+        "minutely",
+        "once per minute",
+    ): "@minutely",
+    ("every hour", "1h", "1 h", "1hour", "1 hour", "hour", "hourly", "once per hour"): "@hourly",
+    ("every day", "1d", "1 d", "1day", "1 day", "day", "daily", "once per day", "nightly"): "@daily",
+    ("every month", "1month", "1 month", "month", "monthly", "once per month"): "@monthly",
+    (
+        "every year",
+        "1y",
+        "1 y",
+        "1year",
+        "1 year",
+        "year",
+        "yearly",
+        "once per year",
+        "annually",
+    ): "@yearly",
+    (
+        "monday",
+        "mondays",
+        "mon",
+        "every monday",
+        "once per monday",
+        "weekly",
+        "once per week",
+        "week",
+        "every week",
+    ): "0 0 * * 1",
+    ("tuesday", "tuesdays", "tue", "every tuesday", "once per tuesday"): "0 0 * * 2",
+    ("wednesday", "wednesdays", "wed", "every wednesday", "once per wednesday"): "0 0 * * 3",
+    ("thursday", "thursdays", "thu", "every thursday", "once per thursday"): "0 0 * * 4",
+    ("friday", "fridays", "fri", "every friday", "once per friday"): "0 0 * * 5",
+    ("saturday", "saturdays", "sat", "every saturday", "once per saturday"): "0 0 * * 6",
+    ("sunday", "sundays", "sun", "every sunday", "once per sunday"): "0 0 * * 0",
+    ("weekday", "weekdays", "every weekday"): "0 0 * * 1-5",
+    ("weekend", "weekends", "every weekend"): "0 0 * * 0,6",
+}
+
+
+class CompiledSchedule(object):
+    # The interval, timestamp and timezone of a scheduled function parsed once into either an interval of seconds,
+    # a compiled crontab notation (with a number of seconds added for timestamps with seconds), or a single point in
+    # time for timestamps with a date.
+    __slots__ = ("interval_seconds", "crontab", "tz", "seconds", "fixed_time")
+
+    def __init__(
+        self,
+        interval: Optional[Union[str, int]] = None,
+        timestamp: Optional[str] = None,
+        timezone: Optional[str] = None,
+    ) -> None:
+        if not timezone:
+            tz = tzlocal.get_localzone()
+        else:
+            try:
+                tz = pytz.timezone(timezone or "")
+            except Exception as e:
+                raise Exception("Unknown timezone: {}".format(timezone)) from e
+
+        self.interval_seconds: Optional[int] = None
+        self.crontab: Optional[CompiledCrontab] = None
+        self.tz: Any = tz
+        self.seconds = 0
+        self.fixed_time: Optional[float] = None
+
+        if interval is None and timestamp is not None:
+            self._parse_timestamp(timestamp)
+        elif interval is not None:
+            self._parse_interval(interval)
+
+    def next_call_at(self, current_time: float) -> int:
+        if self.interval_seconds is not None:
+            return int(current_time + self.interval_seconds)
+
+        if self.crontab is not None:
+            next_at = self.crontab.next_timestamp(current_time - self.seconds, self.tz)
+            if next_at is None:
+                return int(current_time + SCHEDULE_NEVER)
+            return int(next_at + self.seconds)
+
+        if self.fixed_time is not None and self.fixed_time > current_time:
+            return int(self.fixed_time)
+
+        return int(current_time + SCHEDULE_NEVER)
+
+    def _parse_interval(self, interval: Union[str, int]) -> None:
+        if isinstance(interval, int):
+            self.interval_seconds = interval
+            return
+
+        value: Union[str, int] = interval.lower()
+        if isinstance(value, str) and (value.endswith("s") or value.endswith("seconds")):
+            try:
+                value = int(value.replace("seconds", "").replace("s", "").replace(" ", ""))
+            except ValueError:
+                pass
+
+        try:
+            value = [v for k, v in INTERVAL_ALIASES.items() if value in k][0]
+        except IndexError:
+            pass
+        if isinstance(value, int):
+            self.interval_seconds = value
+            return
+
+        try:
+            self.crontab = CompiledCrontab(value)
+        except Exception:
+            raise Exception("Invalid interval")
+
+    def _parse_timestamp(self, timestamp: str) -> None:
+        for timestamp_format in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"):
+            try:
+                datetime_object = datetime.datetime.strptime(timestamp, timestamp_format)
+            except ValueError:
+                continue
+            self.fixed_time = localize_datetime(self.tz, datetime_object)[0].timestamp()
+            return
+
+        for timestamp_format in ("%H:%M:%S", "%H:%M"):
+            try:
+                datetime_object = datetime.datetime.strptime(timestamp, timestamp_format)
+            except ValueError:
+                continue
+            self.crontab = CompiledCrontab("{} {} * * *".format(datetime_object.minute, datetime_object.hour))
+            self.seconds = datetime_object.second
+            return
+
+        raise Exception("Invalid timestamp")
+
+
+# The scheduled functions of the process are invoked from a single timer loop, which sleeps until the earliest next
+# invocation. The sleep is capped so that changes of the system clock are detected within the max sleep time.
+SCHEDULE_MAX_SLEEP_TIME = 60.0
+SCHEDULE_CLOCK_JUMP_THRESHOLD = 1.0
+
+# With the "allow" overlap policy, a scheduled function with this many unfinished tasks (unless another limit is set
+# with max_concurrency) is paused until the task count is down to three quarters of the limit again.
+SCHEDULE_TASK_LIMIT = 20
+
+SCHEDULE_OVERLAP_POLICIES = ("allow", "skip", "queue")
+SCHEDULE_CATCH_UP_POLICIES = ("none", "coalesce", "all")
+
+# Invocations missed while the event loop was blocked or the system clock jumped ahead are run with the "all" catch-up
+# policy up to this number of invocations – older missed invocations are skipped. The same limit is used for the
+# number of invocations waiting to run with the "queue" overlap policy.
+SCHEDULE_CATCH_UP_LIMIT = 100
+
+# Invocations started this many seconds (or more) after their scheduled time are counted as late runs.
+SCHEDULE_LATE_THRESHOLD = 1.0
+
+
+class ScheduledFunction(object):
+    __slots__ = (
+        "obj",
+        "func",
+        "handler",
+        "interval",
+        "timestamp",
+        "timezone",
+        "immediately",
+        "overlap",
+        "max_concurrency",
+        "catch_up",
+        "jitter",
+        "schedule",
+        "context",
+        "logger",
+        "next_call_at",
+        "prev_call_at",
+        "fire_at",
+        "resync",
+        "catching_up",
+        "tasks",
+        "queued",
+        "too_many_tasks",
+        "threshold",
+        "skipped_runs",
+        "late_runs",
+    )
+
+    def __init__(
+        self,
+        obj: Any,
+        func: Callable,
+        handler: Callable,
+        interval: Optional[Union[str, int]] = None,
+        timestamp: Optional[str] = None,
+        timezone: Optional[str] = None,
+        immediately: bool = False,
+        overlap: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        catch_up: Optional[str] = None,
+        jitter: Optional[Union[int, float]] = None,
+    ) -> None:
+        overlap = overlap or "allow"
+        catch_up = catch_up or "none"
+        if overlap not in SCHEDULE_OVERLAP_POLICIES:
+            raise ValueError("Bad value for schedule argument overlap: {}".format(overlap))
+        if catch_up not in SCHEDULE_CATCH_UP_POLICIES:
+            raise ValueError("Bad value for schedule argument catch_up: {}".format(catch_up))
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError("Bad value for schedule argument max_concurrency: {}".format(max_concurrency))
+        if jitter is not None and jitter < 0:
+            raise ValueError("Bad value for schedule argument jitter: {}".format(jitter))
+
+        self.obj = obj
+        self.func = func
+        self.handler = handler
+        self.interval = interval
+        self.timestamp = timestamp
+        self.timezone = timezone
+        self.immediately = immediately
+        self.overlap = overlap
+        self.max_concurrency = max_concurrency or (SCHEDULE_TASK_LIMIT if overlap == "allow" else 1)
+        self.catch_up = catch_up
+        self.jitter = Scheduler.get_jitter_offset(obj, func, jitter) if jitter else 0.0
+        self.schedule = Scheduler.compile_schedule(interval, timestamp, timezone)
+        # tasks are started within the context of the service that registered the function.
+        self.context = contextvars.copy_context()
+        self.logger = logging.getLogger("tomodachi.scheduler").bind(handler=func.__name__)
+        self.next_call_at: Optional[float] = None
+        self.prev_call_at: Optional[float] = None
+        self.fire_at: Optional[float] = None
+        self.resync = False
+        self.catching_up = False
+        self.tasks: List[asyncio.Future] = []
+        self.queued: Deque[float] = collections.deque()
+        self.too_many_tasks = False
+        self.threshold = self.max_concurrency
+        self.skipped_runs = 0
+        self.late_runs = 0
+
+    def get_next_call_at(self, current_time: float) -> int:
+        return self.schedule.next_call_at(current_time)
+
+
+class ScheduleEngine(object):
+    # Invokes the scheduled functions from a min-heap of (next_call_at, sequence, function) items. Items are never
+    # removed from the heap when a function is rescheduled – items not matching the current next_call_at of the
+    # function are skipped when popped.
+    #
+    # Functions scheduled on an interval of seconds are scheduled relative to their previous invocation and are moved
+    # along with changes of the system clock, while calendar based schedules (crontab notation and timestamps) stay
+    # on their wall-clock times.
+    #
+    # Functions with jitter are fired a fixed number of seconds (unique per instance and function) after their
+    # scheduled time, while the invocation time passed to the handler is the scheduled time.
+    __slots__ = ("close_waiter", "_functions", "_heap", "_counter", "_clock_offset", "_wakeup", "_task")
+
+    def __init__(self, close_waiter: asyncio.Future) -> None:
+        self.close_waiter = close_waiter
+        self._functions: List[ScheduledFunction] = []
+        self._heap: List[Tuple[float, int, ScheduledFunction]] = []
+        self._counter = itertools.count()
+        self._clock_offset = time.time() - time.monotonic()
+        self._wakeup: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Future] = None
+
+    def add(self, functions: List[ScheduledFunction]) -> None:
+        current_time = time.time()
+        for function in functions:
+            self._functions.append(function)
+            self._push(function, current_time if function.immediately else function.get_next_call_at(current_time))
+
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+        elif self._wakeup and not self._wakeup.done():
+            self._wakeup.set_result(None)
+
+    def next_runs(self, obj: Any = None) -> List[Dict[str, Any]]:
+        return [
+            {
+                "handler": function.func.__qualname__,
+                "next_call_at": function.next_call_at,
+                "prev_call_at": function.prev_call_at,
+                "task_count": len([task for task in function.tasks if not task.done()]),
+                "queued_runs": len(function.queued),
+                "skipped_runs": function.skipped_runs,
+                "late_runs": function.late_runs,
+            }
+            for function in sorted(
+                self._functions, key=lambda f: f.next_call_at if f.next_call_at is not None else float("inf")
+            )
+            if obj is None or function.obj is obj
+        ]
+
+    async def stop(self) -> None:
+        if not self.close_waiter.done():
+            self.close_waiter.set_result(None)
+        if self._task is not None:
+            await asyncio.wait([self._task])
+
+    async def wait_for_tasks(self, functions: List[ScheduledFunction]) -> None:
+        tasks = [(function, task) for function in functions for task in function.tasks if not task.done()]
+        if not tasks:
+            return
+
+        task_waiter = asyncio.ensure_future(asyncio.wait([task for _, task in tasks]))
+        sleep_task = asyncio.ensure_future(asyncio.sleep(2))
+        await asyncio.wait([sleep_task, task_waiter], return_when=asyncio.FIRST_COMPLETED)
+        if not sleep_task.done():
+            sleep_task.cancel()
+        for function, task in tasks:
+            if task.done():
+                continue
+            task_name = getattr(task, "get_name")() if hasattr(task, "get_name") else function.func.__name__
+            function.logger.warning(
+                "awaiting task to complete",
+                task_name=task_name,
+            )
+
+        while not task_waiter.done():
+            sleep_task = asyncio.ensure_future(asyncio.sleep(10))
+            await asyncio.wait([sleep_task, task_waiter], return_when=asyncio.FIRST_COMPLETED)
+            if not sleep_task.done():
+                sleep_task.cancel()
+            for function, task in tasks:
+                if task.done():
+                    continue
+                task_name = getattr(task, "get_name")() if hasattr(task, "get_name") else function.func.__name__
+                function.logger.warning(
+                    "still awaiting task to finish",
+                    task_name=task_name,
+                )
+
+    def _push(self, function: ScheduledFunction, call_at: float) -> None:
+        function.next_call_at = call_at
+        function.fire_at = call_at + function.jitter
+        heapq.heappush(self._heap, (function.fire_at, next(self._counter), function))
+
+    def _check_clock(self) -> None:
+        clock_offset = time.time() - time.monotonic()
+        clock_jump = clock_offset - self._clock_offset
+        if abs(clock_jump) < SCHEDULE_CLOCK_JUMP_THRESHOLD:
+            return
+
+        self._clock_offset = clock_offset
+        logging.getLogger("tomodachi.scheduler").warning(
+            "system clock changed - rescheduling scheduled functions", clock_jump="{0:.3f}s".format(clock_jump)
+        )
+
+        self._heap = []
+        for function in self._functions:
+            if function.next_call_at is None:
+                continue
+            if function.schedule.interval_seconds is not None and not function.resync:
+                self._push(function, function.next_call_at + round(clock_jump))
+            else:
+                self._push(function, function.next_call_at)
+
+    def _fire(self, function: ScheduledFunction, current_time: float) -> None:
+        call_at = cast(float, function.next_call_at)
+        function.tasks = [task for task in function.tasks if not task.done()]
+
+        next_call_at: float
+        if function.resync:
+            next_call_at = function.get_next_call_at(current_time)
+            if function.prev_call_at is not None and int(function.prev_call_at) == next_call_at:
+                if int(function.prev_call_at + 60) < int(current_time):
+                    function.logger.warning(
+                        "scheduled function loop has lost time sync and may not run",
+                    )
+                    try:
+                        raise Exception("scheduled function loop has lost time sync and may not run")
+                    except Exception as e:
+                        logging.getLogger("exception").exception(str(e))
+                self._push(function, current_time + 1)
+                return
+
+            function.resync = False
+            self._push(function, next_call_at)
+            return
+
+        task_count = len(function.tasks)
+        if function.overlap == "allow":
+            if task_count >= function.max_concurrency:
+                if not function.too_many_tasks and task_count >= function.threshold:
+                    function.too_many_tasks = True
+                    function.logger.warning(
+                        "too many scheduled tasks for function in scheduled function loop",
+                        task_count=task_count,
+                        task_limit=function.threshold,
+                    )
+                    function.threshold = function.threshold * 2
+                self._skip(function, call_at, "too many tasks")
+                self._push(function, function.get_next_call_at(current_time + 10))
+                return
+            if function.too_many_tasks and task_count >= function.max_concurrency * 3 // 4:
+                self._skip(function, call_at, "too many tasks")
+                self._push(function, function.get_next_call_at(current_time + 10))
+                return
+            if function.too_many_tasks:
+                function.threshold = function.max_concurrency
+                function.logger.info(
+                    "scheduled function loop resumed as task count is within threshold",
+                    task_count=task_count,
+                    task_limit=function.threshold,
+                )
+
+            function.too_many_tasks = False
+            self._start(function, call_at, current_time)
+        elif task_count < function.max_concurrency:
+            self._start(function, call_at, current_time)
+        elif function.overlap == "queue" and len(function.queued) < SCHEDULE_CATCH_UP_LIMIT:
+            function.queued.append(call_at)
+        else:
+            self._skip(function, call_at, "previous invocation still running")
+
+        function.prev_call_at = call_at
+
+        # the next invocation is calculated from the time of this invocation to avoid drift – invocations that were
+        # missed (for example due to a blocked event loop) are handled according to the catch-up policy.
+        scheduled_time = current_time - function.jitter
+        next_call_at = function.get_next_call_at(call_at)
+        if next_call_at <= scheduled_time:
+            if not function.catching_up:
+                missed_count, missed = self._missed_calls(function, call_at, scheduled_time)
+                if function.catch_up == "all":
+                    self._skip(function, None, "too many missed invocations", missed_count - len(missed))
+                    function.catching_up = True
+                    next_call_at = missed[0]
+                elif function.catch_up == "coalesce":
+                    self._skip(function, None, "missed invocations coalesced", missed_count - 1)
+                    next_call_at = missed[-1]
+                else:
+                    self._skip(function, None, "missed invocations", missed_count)
+                    next_call_at = function.get_next_call_at(scheduled_time)
+        else:
+            function.catching_up = False
+
+        if next_call_at <= int(call_at):
+            function.resync = True
+            self._push(function, current_time + 1)
+            return
+
+        self._push(function, next_call_at)
+
+    def _start(self, function: ScheduledFunction, call_at: float, current_time: float) -> None:
+        if current_time - call_at - function.jitter >= SCHEDULE_LATE_THRESHOLD:
+            function.late_runs += 1
+            increase_execution_context_value("scheduled_functions_late_runs")
+
+        invocation_time = (
+            datetime.datetime.fromtimestamp(int(call_at), tz=datetime.timezone.utc).isoformat().replace("+00:00", "Z")
+        )
+        task = function.context.run(asyncio.ensure_future, function.handler(invocation_time=invocation_time))
+        if hasattr(task, "set_name"):
+            getattr(task, "set_name")(
+                "{}/{}".format(
+                    function.func.__qualname__,
+                    datetime.datetime.fromtimestamp(current_time, tz=datetime.timezone.utc)
+                    .isoformat(timespec="microseconds")
+                    .replace("+00:00", "Z"),
+                )
+            )
+        function.tasks.append(task)
+        if function.overlap == "queue":
+            task.add_done_callback(lambda _: self._start_queued(function))
+
+    def _start_queued(self, function: ScheduledFunction) -> None:
+        function.tasks = [task for task in function.tasks if not task.done()]
+        if self.close_waiter.done():
+            function.queued.clear()
+            return
+        while function.queued and len(function.tasks) < function.max_concurrency:
+            self._start(function, function.queued.popleft(), time.time())
+
+    def _skip(self, function: ScheduledFunction, call_at: Optional[float], reason: str, count: int = 1) -> None:
+        if count <= 0:
+            return
+        function.skipped_runs += count
+        increase_execution_context_value("scheduled_functions_skipped_runs", count)
+        if call_at is not None:
+            function.logger.debug(
+                "scheduled function invocation skipped",
+                reason=reason,
+                invocation_time=datetime.datetime.fromtimestamp(int(call_at), tz=datetime.timezone.utc)
+                .isoformat()
+                .replace("+00:00", "Z"),
+            )
+        else:
+            function.logger.info("scheduled function invocations skipped", reason=reason, skipped_count=count)
+
+    def _missed_calls(
+        self, function: ScheduledFunction, call_at: float, current_time: float
+    ) -> Tuple[int, List[float]]:
+        # Returns the number of invocations scheduled after call_at up until the current time, together with the times
+        # of the most recent of them (at most SCHEDULE_CATCH_UP_LIMIT).
+        interval_seconds = function.schedule.interval_seconds
+        if interval_seconds is not None and interval_seconds > 0:
+            missed_count = int((current_time - int(call_at)) // interval_seconds)
+            return missed_count, [
+                int(call_at) + i * interval_seconds
+                for i in range(max(missed_count - SCHEDULE_CATCH_UP_LIMIT, 0) + 1, missed_count + 1)
+            ]
+
+        # calendar based schedules are iterated from the previous invocation – after long pauses the iteration skips
+        # ahead to the most recent hour, day, month or year with a missed invocation, in which case the returned number
+        # of missed invocations is a lower bound.
+        missed_count = 0
+        missed: Deque[float] = collections.deque(maxlen=SCHEDULE_CATCH_UP_LIMIT)
+        next_call_at = function.get_next_call_at(call_at)
+        while call_at < next_call_at <= current_time:
+            missed_count += 1
+            missed.append(next_call_at)
+            next_call_at = function.get_next_call_at(next_call_at)
+            if missed_count % SCHEDULE_CATCH_UP_LIMIT == 0:
+                for window in (3600, 86400, 2678400, 31622400):
+                    window_call_at = function.get_next_call_at(current_time - window)
+                    if window_call_at <= next_call_at:
+                        break
+                    if window_call_at <= current_time:
+                        next_call_at = window_call_at
+                        break
+        return missed_count, list(missed)
+
+    async def _run(self) -> None:
+        logging.bind_logger(logging.getLogger("tomodachi.scheduler"))
+        loop = asyncio.get_event_loop()
+
+        while not self.close_waiter.done():
+            try:
+                self._check_clock()
+
+                current_time = time.time()
+                while self._heap and self._heap[0][0] <= current_time and not self.close_waiter.done():
+                    fire_at, _, function = heapq.heappop(self._heap)
+                    if function.fire_at != fire_at:
+                        continue
+                    self._fire(function, current_time)
+
+                if self.close_waiter.done():
+                    break
+
+                sleep_time = SCHEDULE_MAX_SLEEP_TIME
+                if self._heap:
+                    sleep_time = max(min(self._heap[0][0] - time.time(), sleep_time), 0)
+
+                self._wakeup = loop.create_future()
+                await asyncio.wait(
+                    [self._wakeup, self.close_waiter], timeout=sleep_time, return_when=asyncio.FIRST_COMPLETED
+                )
+                self._wakeup = None
+            except (Exception, asyncio.CancelledError) as e:
+                logging.getLogger("exception").exception("uncaught exception: {}".format(str(e)))
+                await asyncio.sleep(1)
+            except BaseException as e:
+                logging.getLogger("exception").exception("uncaught exception: {}".format(str(e)))
+                await asyncio.sleep(1)
+
 
 class Scheduler(Invoker):
     close_waiter: Optional[asyncio.Future] = None
+    engine: Optional[ScheduleEngine] = None
+    lease_backend: Optional[LeaseBackend] = None
+    lease_release_tasks: Set[asyncio.Future] = set()
 
     @classmethod
     async def schedule_handler(
@@ -34,7 +608,14 @@ class Scheduler(Invoker):
         timestamp: Optional[str] = None,
         timezone: Optional[str] = None,
         immediately: Optional[bool] = False,
+        executor: Optional[str] = None,
+        exclusive: Optional[bool] = False,
+        overlap: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        catch_up: Optional[str] = None,
+        jitter: Optional[Union[int, float]] = None,
     ) -> Any:
+        handler_func = executor_handler(obj, context, func, executor)
         values = inspect.getfullargspec(func)
         original_kwargs = (
             {k: values.defaults[i] for i, k in enumerate(values.args[len(values.args) - len(values.defaults) :])}
@@ -51,7 +632,15 @@ class Scheduler(Invoker):
             get_contextvar("service.logger").set("tomodachi.schedule.handler")
 
             increase_execution_context_value("scheduled_functions_current_tasks")
+            lease: Optional[Lease] = None
             try:
+                if exclusive:
+                    lease_key = cls.get_lease_key(obj, func, invocation_time, interval, timestamp, timezone)
+                    lease = await cls.acquire_lease(context, lease_key, cls.get_lease_owner(obj))
+                    if lease is None:
+                        logger.debug("scheduled function invocation run by another instance", lease_key=lease_key)
+                        return
+
                 kwargs = dict(original_kwargs)
                 arg_matches: Dict[str, Any] = {}
 
@@ -59,6 +648,8 @@ class Scheduler(Invoker):
                     kwargs["invocation_time"] = invocation_time
                 if "interval" in args_set:
                     kwargs["interval"] = interval
+                if "fencing_token" in args_set:
+                    kwargs["fencing_token"] = lease.token if lease else None
 
                 increase_execution_context_value("scheduled_functions_total_tasks")
 
@@ -79,7 +670,7 @@ class Scheduler(Invoker):
                         if values.varargs and not values.defaults and len(a) > len(args_values) + 1:
                             args_values += a[len(args_values) + 1 :]
 
-                        routine = func(*(obj, *args_values), **kw_values)
+                        routine = handler_func(*(obj, *args_values), **kw_values)
                         if inspect.isawaitable(routine):
                             await routine
 
@@ -103,7 +694,7 @@ class Scheduler(Invoker):
                     if values.varargs and not values.defaults and len(a) > len(args_values) + 1:
                         args_values += a[len(args_values) + 1 :]
 
-                    routine = func(obj, *args_values, **kwargs)
+                    routine = handler_func(obj, *args_values, **kwargs)
                     if inspect.isawaitable(routine):
                         await routine
 
@@ -114,10 +705,25 @@ class Scheduler(Invoker):
                 limit_exception_traceback(e, ("tomodachi.transport.schedule",))
                 logging.getLogger("exception").exception("uncaught exception: {}".format(str(e)))
             finally:
+                if lease is not None:
+                    try:
+                        await cls.get_lease_backend(context).release(lease)
+                    except Exception as e:
+                        logging.getLogger("exception").exception("uncaught exception: {}".format(str(e)))
                 decrease_execution_context_value("scheduled_functions_current_tasks")
 
         context["_schedule_scheduled_functions"] = context.get("_schedule_scheduled_functions", [])
-        context["_schedule_scheduled_functions"].append((interval, timestamp, timezone, immediately, func, handler))
+        context["_schedule_scheduled_functions"].append(
+            (
+                interval,
+                timestamp,
+                timezone,
+                immediately,
+                func,
+                handler,
+                {"overlap": overlap, "max_concurrency": max_concurrency, "catch_up": catch_up, "jitter": jitter},
+            )
+        )
 
         start_func = cls.start_scheduler(obj, context)
         return (await start_func) if start_func else None
@@ -129,6 +735,74 @@ class Scheduler(Invoker):
 
         return _func
 
+    @classmethod
+    def get_lease_backend(cls, context: Dict) -> LeaseBackend:
+        # The lease backend can be set as the `schedule_lease_backend` attribute of the service class – by default the
+        # instances on the same host share leases in a SQLite database file.
+        lease_backend = context.get("schedule_lease_backend")
+        if lease_backend is not None:
+            return cast(LeaseBackend, lease_backend)
+        if cls.lease_backend is None:
+            cls.lease_backend = SQLiteLeaseBackend()
+        return cls.lease_backend
+
+    @classmethod
+    async def acquire_lease(cls, context: Dict, key: str, owner: str) -> Optional[Lease]:
+        # The acquisition is shielded from cancellation of the handler, since the backend may still store the lease
+        # after the handler has been cancelled. Such a lease is released again (without being completed), so that the
+        # invocation isn't blocked for other instances until the lease expires.
+        lease_backend = cls.get_lease_backend(context)
+        task = asyncio.ensure_future(lease_backend.acquire(key, owner))
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+
+            def _release(t: asyncio.Future) -> None:
+                if t.cancelled() or t.exception() is not None or t.result() is None:
+                    return
+                release_task = asyncio.ensure_future(lease_backend.release(t.result(), completed=False))
+                cls.lease_release_tasks.add(release_task)
+                release_task.add_done_callback(cls.lease_release_tasks.discard)
+
+            task.add_done_callback(_release)
+            raise
+
+    @staticmethod
+    def get_lease_owner(obj: Any) -> str:
+        return "{}:{}:{}".format(socket.gethostname(), os.getpid(), getattr(obj, "uuid", None) or id(obj))
+
+    @classmethod
+    def get_lease_key(
+        cls,
+        obj: Any,
+        func: Callable,
+        invocation_time: str,
+        interval: Optional[Union[str, int]] = None,
+        timestamp: Optional[str] = None,
+        timezone: Optional[str] = None,
+    ) -> str:
+        # Invocations on an interval of seconds are scheduled relative to when each instance was started, which is why
+        # their invocation times are bucketed by the interval to get the same key on every instance.
+        invocation_timestamp = int(datetime.datetime.fromisoformat(invocation_time.replace("Z", "+00:00")).timestamp())
+        interval_seconds = cls.compile_schedule(interval, timestamp, cls.get_timezone(timezone)).interval_seconds
+        if interval_seconds and interval_seconds > 0:
+            invocation_timestamp -= invocation_timestamp % interval_seconds
+
+        return "{}/{}/{}".format(
+            getattr(obj, "name", None) or type(obj).__name__,
+            func.__qualname__,
+            datetime.datetime.fromtimestamp(invocation_timestamp, tz=datetime.timezone.utc)
+            .isoformat()
+            .replace("+00:00", "Z"),
+        )
+
+    @classmethod
+    def get_jitter_offset(cls, obj: Any, func: Callable, jitter: Union[int, float]) -> float:
+        # A number of seconds in the range [0, jitter) derived from the instance and the function, so that the
+        # instances of a service are spread out over the jitter window while each instance keeps a fixed offset.
+        digest = hashlib.sha256("{}/{}".format(cls.get_lease_owner(obj), func.__qualname__).encode()).digest()
+        return jitter * int.from_bytes(digest[:8], "big") / 2**64
+
     @staticmethod
     def next_call_at(
         current_time: float,
@@ -136,183 +810,16 @@ class Scheduler(Invoker):
         timestamp: Optional[str] = None,
         timezone: Optional[str] = None,
     ) -> int:
-        if not timezone:
-            tz = tzlocal.get_localzone()
-        else:
-            try:
-                tz = pytz.timezone(timezone or "")
-            except Exception as e:
-                raise Exception("Unknown timezone: {}".format(timezone)) from e
-        local_tz = tzlocal.get_localzone()
-
-        if interval is None and timestamp is not None:
-            if isinstance(timestamp, str):
-                try:
-                    datetime_object = datetime.datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
-                    interval = "{} {} {} {} * {}".format(
-                        datetime_object.minute,
-                        datetime_object.hour,
-                        datetime_object.day,
-                        datetime_object.month,
-                        datetime_object.year,
-                    )
-                    second_modifier = 1
-                    if datetime_object.replace(tzinfo=tz) > datetime.datetime.fromtimestamp(current_time).replace(
-                        tzinfo=local_tz
-                    ):
-                        second_modifier = -60
-                    next_at = get_next_datetime(
-                        interval,
-                        datetime.datetime.fromtimestamp(current_time + second_modifier)
-                        .replace(tzinfo=local_tz)
-                        .astimezone(tz),
-                    )
-                    if not next_at:
-                        return int(current_time + 60 * 60 * 24 * 365 * 100)
-                    return int(next_at.timestamp() + datetime_object.second)
-                except ValueError:
-                    pass
+        return Scheduler.compile_schedule(interval, timestamp, timezone).next_call_at(current_time)
 
-                try:
-                    datetime_object = datetime.datetime.strptime(timestamp, "%Y-%m-%d %H:%M")
-                    interval = "{} {} {} {} * {}".format(
-                        datetime_object.minute,
-                        datetime_object.hour,
-                        datetime_object.day,
-                        datetime_object.month,
-                        datetime_object.year,
-                    )
-                    next_at = get_next_datetime(
-                        interval,
-                        datetime.datetime.fromtimestamp(current_time + 1).replace(tzinfo=local_tz).astimezone(tz),
-                    )
-                    if not next_at:
-                        return int(current_time + 60 * 60 * 24 * 365 * 100)
-                    return int(next_at.timestamp())
-                except ValueError:
-                    pass
-
-                try:
-                    datetime_object = datetime.datetime.strptime(timestamp, "%H:%M:%S")
-                    datetime_object = datetime.datetime(
-                        datetime.datetime.fromtimestamp(current_time).year,
-                        datetime.datetime.fromtimestamp(current_time).month,
-                        datetime.datetime.fromtimestamp(current_time).day,
-                        datetime_object.hour,
-                        datetime_object.minute,
-                        datetime_object.second,
-                    )
-                    interval = "{} {} * * *".format(datetime_object.minute, datetime_object.hour)
-                    second_modifier = 1
-
-                    if datetime_object.replace(tzinfo=tz) > datetime.datetime.fromtimestamp(current_time).replace(
-                        tzinfo=local_tz
-                    ):
-                        second_modifier = -60
-                    next_at = get_next_datetime(
-                        interval,
-                        datetime.datetime.fromtimestamp(current_time + second_modifier)
-                        .replace(tzinfo=local_tz)
-                        .astimezone(tz),
-                    )
-                    if not next_at:
-                        return int(current_time + 60 * 60 * 24 * 365 * 100)
-                    return int(next_at.timestamp() + datetime_object.second)
-                except ValueError:
-                    pass
-
-                try:
-                    datetime_object = datetime.datetime.strptime(timestamp, "%H:%M")
-                    interval = "{} {} * * *".format(datetime_object.minute, datetime_object.hour)
-                    next_at = get_next_datetime(
-                        interval,
-                        datetime.datetime.fromtimestamp(current_time + 1).replace(tzinfo=local_tz).astimezone(tz),
-                    )
-                    if not next_at:
-                        return int(current_time + 60 * 60 * 24 * 365 * 100)
-                    return int(next_at.timestamp())
-                except ValueError:
-                    pass
-
-                raise Exception("Invalid timestamp")
-
-        if interval is not None:
-            if isinstance(interval, int):
-                return int(current_time + interval)
-
-            interval_aliases: Dict[Tuple[str, ...], Union[str, int]] = {
-                ("every second", "1s", "1 s", "1second", "1 second", "second", "secondly", "once per second"): 1,
-                (
-                    "every minute",
-                    "1m",
-                    "1 m",
-                    "1minute",
-                    "1 minute",
-                    "minute",
-                    "minutely",
-                    "once per minute",
-                ): "@minutely",
-                ("every hour", "1h", "1 h", "1hour", "1 hour", "hour", "hourly", "once per hour"): "@hourly",
-                ("every day", "1d", "1 d", "1day", "1 day", "day", "daily", "once per day", "nightly"): "@daily",
-                ("every month", "1month", "1 month", "month", "monthly", "once per month"): "@monthly",
-                (
-                    "every year",
-                    "1y",
-                    "1 y",
-                    "1year",
-                    "1 year",
-                    "year",
-                    "yearly",
-                    "once per year",
-                    "annually",
-                ): "@yearly",
-                (
-                    "monday",
-                    "mondays",
-                    "mon",
-                    "every monday",
-                    "once per monday",
-                    "weekly",
-                    "once per week",
-                    "week",
-                    "every week",
-                ): "0 0 * * 1",
-                ("tuesday", "tuesdays", "tue", "every tuesday", "once per tuesday"): "0 0 * * 2",
-                ("wednesday", "wednesdays", "wed", "every wednesday", "once per wednesday"): "0 0 * * 3",
-                ("thursday", "thursdays", "thu", "every thursday", "once per thursday"): "0 0 * * 4",
-                ("friday", "fridays", "fri", "every friday", "once per friday"): "0 0 * * 5",
-                ("saturday", "saturdays", "sat", "every saturday", "once per saturday"): "0 0 * * 6",
-                ("sunday", "sundays", "sun", "every sunday", "once per sunday"): "0 0 * * 0",
-                ("weekday", "weekdays", "every weekday"): "0 0 * * 1-5",
-                ("weekend", "weekends", "every weekend"): "0 0 * * 0,6",
-            }
-            interval = interval.lower()
-
-            if interval.endswith("s") or interval.endswith("seconds"):
-                try:
-                    interval = int(interval.replace("seconds", "").replace("s", "").replace(" ", ""))
-                except ValueError:
-                    pass
-
-            try:
-                interval_value: Union[str, int] = [v for k, v in interval_aliases.items() if interval in k][0]
-            except IndexError:
-                interval_value = interval
-            if isinstance(interval_value, int):
-                return int(current_time + interval_value)
-
-            try:
-                next_at = get_next_datetime(
-                    interval_value,
-                    datetime.datetime.fromtimestamp(current_time + 1).replace(tzinfo=local_tz).astimezone(tz),
-                )
-                if not next_at:
-                    return int(current_time + 60 * 60 * 24 * 365 * 100)
-                return int(next_at.timestamp())
-            except Exception:
-                raise Exception("Invalid interval")
-
-        return int(current_time + 60 * 60 * 24 * 365 * 100)
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def compile_schedule(
+        interval: Optional[Union[str, int]] = None,
+        timestamp: Optional[str] = None,
+        timezone: Optional[str] = None,
+    ) -> CompiledSchedule:
+        return CompiledSchedule(interval, timestamp, timezone)
 
     @staticmethod
     def get_timezone(timezone: Optional[str] = None) -> Optional[str]:
@@ -371,281 +878,115 @@ class Scheduler(Invoker):
         return timezone
 
     @classmethod
-    async def start_schedule_loop(
-        cls,
-        obj: Any,
-        context: Dict,
-        handler: Callable,
-        func: Callable,
-        interval: Optional[Union[str, int]] = None,
-        timestamp: Optional[str] = None,
-        timezone: Optional[str] = None,
-        immediately: Optional[bool] = False,
-    ) -> None:
-        logger = logging.getLogger("tomodachi.scheduler").bind(handler=func.__name__)
-        logging.bind_logger(logger)
+    def next_runs(cls, obj: Any = None) -> List[Dict[str, Any]]:
+        # Returns the upcoming invocations of the scheduled functions (of the service `obj` if passed), in order of
+        # their next invocation.
+        if not cls.engine:
+            return []
+        return cls.engine.next_runs(obj)
+
+    @classmethod
+    async def start_scheduler(cls, obj: Any, context: Dict) -> Optional[Callable]:
+        if context.get("_schedule_loop_started"):
+            return None
+        context["_schedule_loop_started"] = True
 
-        timezone = cls.get_timezone(timezone)
+        set_execution_context(
+            {
+                "scheduled_functions_enabled": True,
+                "scheduled_functions_current_tasks": 0,
+                "scheduled_functions_total_tasks": 0,
+                "scheduled_functions_skipped_runs": 0,
+                "scheduled_functions_late_runs": 0,
+            }
+        )
+
+        async def _schedule() -> None:
+            if not cls.close_waiter or cls.close_waiter.done():
+                cls.close_waiter = asyncio.Future()
+            close_waiter = cls.close_waiter
 
-        if not cls.close_waiter:
-            cls.close_waiter = asyncio.Future()
-        stop_waiter: asyncio.Future = asyncio.Future()
-        start_waiter: asyncio.Future = asyncio.Future()
+            functions: List[ScheduledFunction] = []
+            for interval, timestamp, timezone, immediately, func, handler, policies in context.get(
+                "_schedule_scheduled_functions", []
+            ):
+                timezone = cls.get_timezone(timezone)
+                cls.next_call_at(time.time(), interval, timestamp, timezone)  # test provided interval/timestamp on init
+                functions.append(
+                    ScheduledFunction(obj, func, handler, interval, timestamp, timezone, bool(immediately), **policies)
+                )
 
-        async def schedule_loop() -> None:
-            sleep_task: asyncio.Future
-            current_time = time.time()
-            max_sleep_time = 300
+            if not cls.engine or cls.engine.close_waiter is not close_waiter:
+                cls.engine = ScheduleEngine(close_waiter)
+            engine = cls.engine
 
-            try:
-                sleep_task = asyncio.ensure_future(asyncio.sleep(10))
-                await asyncio.wait([sleep_task, start_waiter], return_when=asyncio.FIRST_COMPLETED)
-                if not sleep_task.done():
-                    sleep_task.cancel()
-                else:
-                    logger.warning(
-                        "scheduled function loop cannot start yet - start waiter not done for 10 seconds",
-                    )
-                    sleep_task = asyncio.ensure_future(asyncio.sleep(110))
+            logger = logging.getLogger("tomodachi.scheduler")
+            start_waiter: asyncio.Future = asyncio.Future()
+
+            async def start() -> None:
+                sleep_task: asyncio.Future
+                try:
+                    sleep_task = asyncio.ensure_future(asyncio.sleep(10))
                     await asyncio.wait([sleep_task, start_waiter], return_when=asyncio.FIRST_COMPLETED)
                     if not sleep_task.done():
                         sleep_task.cancel()
                     else:
                         logger.warning(
-                            "scheduled function loop cannot start yet - start waiter not done for 120 seconds",
+                            "scheduled function loop cannot start yet - start waiter not done for 10 seconds",
                         )
-                        try:
-                            raise Exception("scheduled function loop not started for 120 seconds")
-                        except Exception as e:
-                            logging.getLogger("exception").exception(str(e))
-
-                await asyncio.sleep(0.001)
-                await start_waiter
-
-                if not cls.close_waiter or cls.close_waiter.done():
-                    logger.warning(
-                        "scheduled function loop never started before service termination",
-                    )
-                else:
-                    ts0 = cls.next_call_at(current_time, interval, timestamp, timezone)
-                    for _ in range(10):
-                        ts1 = cls.next_call_at(ts0, interval, timestamp, timezone)
-                        ts2 = cls.next_call_at(ts1, interval, timestamp, timezone)
-                        if int(ts2 - ts1) // 2 < max_sleep_time:
-                            max_sleep_time = int(ts2 - ts1) // 2
-                    max_sleep_time = min(max(max_sleep_time, 10), 300)
-            except (Exception, asyncio.CancelledError) as e:
-                logging.getLogger("exception").exception("uncaught exception: {}".format(str(e)))
-
-                await asyncio.sleep(0.001)
-                await start_waiter
-
-                if not cls.close_waiter or cls.close_waiter.done():
-                    logger.warning(
-                        "scheduled function loop never started before service termination",
-                    )
-
-            next_call_at: Optional[int] = None
-            prev_call_at: Optional[int] = None
-            tasks: List = []
-            too_many_tasks = False
-            threshold = 20
-            run_immediately = immediately
-
-            while cls.close_waiter and not cls.close_waiter.done():
-                try:
-                    if not run_immediately:
-                        last_time = current_time
-                        actual_time = time.time()
-                        current_time = last_time + 1 if int(last_time + 1) < int(actual_time) else actual_time
-
-                        if next_call_at is None:
-                            next_call_at = cls.next_call_at(current_time, interval, timestamp, timezone)
-                            if prev_call_at and prev_call_at == next_call_at:
-                                if int(last_time + 60) < int(actual_time):
-                                    logger.warning(
-                                        "scheduled function loop has lost time sync and may not run",
-                                    )
-                                    try:
-                                        raise Exception("scheduled function loop has lost time sync and may not run")
-                                    except Exception as e:
-                                        logging.getLogger("exception").exception(str(e))
-
-                                next_call_at = None
-                                await asyncio.sleep(1)
-                                continue
-                        sleep_diff = int(current_time + 1) - actual_time + 0.001
-                        if next_call_at > time.time() + 8:
-                            sleep_diff = int((next_call_at - time.time()) / 3)
-                        if sleep_diff >= max_sleep_time:
-                            sleep_diff = int(max_sleep_time - random.random() * 5)
-                        if sleep_diff >= 2:
-                            sleep_task = asyncio.ensure_future(asyncio.sleep(sleep_diff))
-                            await asyncio.wait([sleep_task, cls.close_waiter], return_when=asyncio.FIRST_COMPLETED)
-                            if not sleep_task.done():
-                                sleep_task.cancel()
-                            current_time = time.time()
+                        sleep_task = asyncio.ensure_future(asyncio.sleep(110))
+                        await asyncio.wait([sleep_task, start_waiter], return_when=asyncio.FIRST_COMPLETED)
+                        if not sleep_task.done():
+                            sleep_task.cancel()
                         else:
-                            await asyncio.sleep(sleep_diff)
-                        if next_call_at > time.time():
-                            continue
-                    run_immediately = False
-                    if cls.close_waiter.done():
-                        continue
-                    prev_call_at = next_call_at
-                    next_call_at = None
-
-                    tasks = [task for task in tasks if not task.done()]
-
-                    if len(tasks) >= 20:
-                        if not too_many_tasks and len(tasks) >= threshold:
-                            too_many_tasks = True
                             logger.warning(
-                                "too many scheduled tasks for function in scheduled function loop",
-                                task_count=len(tasks),
-                                task_limit=threshold,
+                                "scheduled function loop cannot start yet - start waiter not done for 120 seconds",
                             )
-                            threshold = threshold * 2
-                        await asyncio.sleep(1)
-                        current_time = time.time()
-                        next_call_at = cls.next_call_at(current_time + 10, interval, timestamp, timezone)
-                        continue
-                    if too_many_tasks and len(tasks) >= 15:
-                        await asyncio.sleep(1)
-                        current_time = time.time()
-                        next_call_at = cls.next_call_at(current_time + 10, interval, timestamp, timezone)
-                        continue
-                    if too_many_tasks and len(tasks) < 15:
-                        threshold = 20
-                        logger.info(
-                            "scheduled function loop resumed as task count is within threshold",
-                            task_count=len(tasks),
-                            task_limit=threshold,
-                        )
-
-                    too_many_tasks = False
-
-                    current_time = time.time()
-                    invocation_time = (
-                        datetime.datetime.fromtimestamp(int(prev_call_at or current_time), tz=datetime.timezone.utc)
-                        .isoformat()
-                        .replace("+00:00", "Z")
-                    )
-
-                    task = asyncio.ensure_future(handler(invocation_time=invocation_time))
-                    if hasattr(task, "set_name"):
-                        getattr(task, "set_name")(
-                            "{}/{}".format(
-                                func.__qualname__,
-                                datetime.datetime.fromtimestamp(current_time, tz=datetime.timezone.utc)
-                                .isoformat(timespec="microseconds")
-                                .replace("+00:00", "Z"),
-                            )
-                        )
-                    tasks.append(task)
+                            try:
+                                raise Exception("scheduled function loop not started for 120 seconds")
+                            except Exception as e:
+                                logging.getLogger("exception").exception(str(e))
                 except (Exception, asyncio.CancelledError) as e:
                     logging.getLogger("exception").exception("uncaught exception: {}".format(str(e)))
-                    await asyncio.sleep(1)
-                except BaseException as e:
-                    logging.getLogger("exception").exception("uncaught exception: {}".format(str(e)))
-                    await asyncio.sleep(1)
-
-            if tasks:
-                task_waiter = asyncio.ensure_future(asyncio.wait(tasks))
-                sleep_task = asyncio.ensure_future(asyncio.sleep(2))
-                await asyncio.wait([sleep_task, task_waiter], return_when=asyncio.FIRST_COMPLETED)
-                if not sleep_task.done():
-                    sleep_task.cancel()
-                for task in tasks:
-                    if task.done():
-                        continue
-                    task_name = getattr(task, "get_name")() if hasattr(task, "get_name") else func.__name__
+
+                await start_waiter
+
+                if close_waiter.done():
                     logger.warning(
-                        "awaiting task to complete",
-                        task_name=task_name,
+                        "scheduled function loop never started before service termination",
                     )
+                    return
 
-                while not task_waiter.done():
-                    sleep_task = asyncio.ensure_future(asyncio.sleep(10))
-                    await asyncio.wait([sleep_task, task_waiter], return_when=asyncio.FIRST_COMPLETED)
-                    if not sleep_task.done():
-                        sleep_task.cancel()
-                    for task in tasks:
-                        if task.done():
-                            continue
-                        task_name = getattr(task, "get_name")() if hasattr(task, "get_name") else func.__name__
-                        logger.warning(
-                            "still awaiting task to finish",
-                            task_name=task_name,
-                        )
-
-            if not stop_waiter.done():
-                stop_waiter.set_result(None)
+                engine.add(functions)
 
-        stop_method = getattr(obj, "_stop_service", None)
+            start_task = asyncio.ensure_future(start())
 
-        async def stop_service(*args: Any, **kwargs: Any) -> None:
-            if cls.close_waiter and not cls.close_waiter.done():
-                cls.close_waiter.set_result(None)
+            stop_method = getattr(obj, "_stop_service", None)
 
+            async def stop_service(*args: Any, **kwargs: Any) -> None:
+                if not close_waiter.done():
+                    close_waiter.set_result(None)
                 if not start_waiter.done():
                     start_waiter.set_result(None)
 
-                await stop_waiter
-                if stop_method:
-                    await stop_method(*args, **kwargs)
-            else:
-                if not start_waiter.done():
-                    start_waiter.set_result(None)
+                await start_task
+                await engine.stop()
+                await engine.wait_for_tasks(functions)
 
-                await stop_waiter
                 if stop_method:
                     await stop_method(*args, **kwargs)
 
-        setattr(obj, "_stop_service", stop_service)
-
-        started_method = getattr(obj, "_started_service", None)
-
-        async def started_service(*args: Any, **kwargs: Any) -> None:
-            if started_method:
-                await started_method(*args, **kwargs)
-            if not start_waiter.done():
-                start_waiter.set_result(None)
-
-        setattr(obj, "_started_service", started_service)
-
-        asyncio.create_task(schedule_loop())
-
-    @classmethod
-    async def start_scheduler(cls, obj: Any, context: Dict) -> Optional[Callable]:
-        if context.get("_schedule_loop_started"):
-            return None
-        context["_schedule_loop_started"] = True
-
-        set_execution_context(
-            {
-                "scheduled_functions_enabled": True,
-                "scheduled_functions_current_tasks": 0,
-                "scheduled_functions_total_tasks": 0,
-            }
-        )
+            setattr(obj, "_stop_service", stop_service)
 
-        async def _schedule() -> None:
-            cls.close_waiter = asyncio.Future()
+            started_method = getattr(obj, "_started_service", None)
 
-            for interval, timestamp, timezone, immediately, func, handler in context.get(
-                "_schedule_scheduled_functions", []
-            ):
-                cls.next_call_at(
-                    time.time(), interval, timestamp, cls.get_timezone(timezone)
-                )  # test provided interval/timestamp on init
+            async def started_service(*args: Any, **kwargs: Any) -> None:
+                if started_method:
+                    await started_method(*args, **kwargs)
+                if not start_waiter.done():
+                    start_waiter.set_result(None)
 
-            for interval, timestamp, timezone, immediately, func, handler in context.get(
-                "_schedule_scheduled_functions", []
-            ):
-                await asyncio.create_task(
-                    cls.start_schedule_loop(obj, context, handler, func, interval, timestamp, timezone, immediately)
-                )
+            setattr(obj, "_started_service", started_service)
 
         return _schedule
 
@@ -667,9 +1008,27 @@ def schedule(
     timestamp: Optional[str] = None,
     timezone: Optional[str] = None,
     immediately: Optional[bool] = False,
+    executor: Optional[str] = None,
+    exclusive: Optional[bool] = False,
+    overlap: Optional[str] = None,
+    max_concurrency: Optional[int] = None,
+    catch_up: Optional[str] = None,
+    jitter: Optional[Union[int, float]] = None,
 ) -> Callable:
     return cast(
-        Callable, __schedule(interval=interval, timestamp=timestamp, timezone=timezone, immediately=immediately)
+        Callable,
+        __schedule(
+            interval=interval,
+            timestamp=timestamp,
+            timezone=timezone,
+            immediately=immediately,
+            executor=executor,
+            exclusive=exclusive,
+            overlap=overlap,
+            max_concurrency=max_concurrency,
+            catch_up=catch_up,
+            jitter=jitter,
+        ),
     )
 
 
@@ -678,9 +1037,27 @@ def scheduler(
     timestamp: Optional[str] = None,
     timezone: Optional[str] = None,
     immediately: Optional[bool] = False,
+    executor: Optional[str] = None,
+    exclusive: Optional[bool] = False,
+    overlap: Optional[str] = None,
+    max_concurrency: Optional[int] = None,
+    catch_up: Optional[str] = None,
+    jitter: Optional[Union[int, float]] = None,
 ) -> Callable:
     return cast(
-        Callable, __scheduler(interval=interval, timestamp=timestamp, timezone=timezone, immediately=immediately)
+        Callable,
+        __scheduler(
+            interval=interval,
+            timestamp=timestamp,
+            timezone=timezone,
+            immediately=immediately,
+            executor=executor,
+            exclusive=exclusive,
+            overlap=overlap,
+            max_concurrency=max_concurrency,
+            catch_up=catch_up,
+            jitter=jitter,
+        ),
     )
 
 